@@ -15,9 +15,15 @@ from sense.osc import ControlledOSCConnection
 from sense.state import MetaWearState
 from sense.pipeline import (
     Latch, LatchUpdate, LowPass, Magnitude, Tilt, OscEmit,
-    apply_pipeline_overrides,
+    apply_emission_policy, apply_pipeline_overrides,
 )
-from sense.recorder import Recorder, RecorderSink
+from sense.recorder import (
+    DEFAULT_FLUSH_INTERVAL_S, DEFAULT_QUEUE_CAPACITY, FORMAT_COLUMNAR, FORMATS,
+    Recorder, RecorderSink,
+)
+from sense.segments import COMPRESSION_NONE, COMPRESSIONS
+from sense.shmring import DEFAULT_SLOTS, ShmPublish, ShmRing
+from sense.tcpstream import DEFAULT_MAX_BUFFER, TcpPublish, TcpStreamServer
 from sense.gesture import GestureLibrary, GestureRecognizer
 from sense.position import PositionTracker
 
@@ -53,6 +59,8 @@ Examples:
   Record a session for offline analysis:
     python3 -u run_fs.py --record
     python3 -u run_fs.py --record-to /tmp/diag.jsonl
+    python3 -u run_fs.py --record --record-format columnar   # → .fsc
+    python3 -u run_fs.py --record --record-segment-mb 64 --record-compress gzip
 
   Capture training data for a new gesture (long-press a button to enter
   capture mode; single-press marks a window. --capture-label implies --record):
@@ -101,6 +109,96 @@ parser.add_argument(
     metavar="PATH",
     help="Record to a specific JSONL path (implies --record).",
 )
+parser.add_argument(
+    "--record-queue",
+    type=int,
+    default=DEFAULT_QUEUE_CAPACITY,
+    metavar="N",
+    help=(
+        "Frames the recording writer thread may fall behind by before "
+        f"frames are dropped (default {DEFAULT_QUEUE_CAPACITY})."
+    ),
+)
+parser.add_argument(
+    "--record-flush-s",
+    type=float,
+    default=DEFAULT_FLUSH_INTERVAL_S,
+    metavar="S",
+    help=f"Flush the recording to the OS every S seconds (default {DEFAULT_FLUSH_INTERVAL_S:g}).",
+)
+parser.add_argument(
+    "--record-fsync-s",
+    type=float,
+    default=None,
+    metavar="S",
+    help=(
+        "Also fsync the recording every S seconds (rounded up to a flush), "
+        "bounding what a power cut loses. Off by default — each fsync is an "
+        "SD-card write."
+    ),
+)
+parser.add_argument(
+    "--record-format",
+    choices=FORMATS,
+    default=None,
+    help=(
+        "Recording format: 'jsonl' (text, one object per frame) or 'columnar' "
+        "(binary .fsc blocks per device+sensor, memory-mapped by the readers — "
+        "see sense/columnar.py). Default: from the --record-to suffix "
+        "(.fsc is columnar), else jsonl."
+    ),
+)
+parser.add_argument(
+    "--record-float32",
+    action="store_true",
+    help="Store columnar recording values as float32 (half the size; IMU data "
+         "carries far less precision than that).",
+)
+parser.add_argument(
+    "--record-decimals",
+    type=int,
+    default=None,
+    metavar="N",
+    help=(
+        "Write JSONL recording values with N digits after the point "
+        "(timestamps to 1 µs) instead of full float precision: smaller "
+        "files, cheaper to write. IMU values carry ~4-5 significant digits."
+    ),
+)
+parser.add_argument(
+    "--record-no-index",
+    action="store_true",
+    help=(
+        "Don't write the <recording>.idx.json sidecar that lets readers seek "
+        "to a time or gesture window (see sense/recindex.py)."
+    ),
+)
+parser.add_argument(
+    "--record-segment-mb",
+    type=float,
+    default=None,
+    metavar="MB",
+    help=(
+        "Split the recording into segments of about MB megabytes, tied "
+        "together by <name>.manifest.json (see sense/segments.py)."
+    ),
+)
+parser.add_argument(
+    "--record-segment-min",
+    type=float,
+    default=None,
+    metavar="MIN",
+    help="Start a new recording segment every MIN minutes.",
+)
+parser.add_argument(
+    "--record-compress",
+    choices=COMPRESSIONS,
+    default=COMPRESSION_NONE,
+    help=(
+        "Compress closed recording segments on a low-priority background "
+        "thread (implies segmenting; default none)."
+    ),
+)
 parser.add_argument(
     "--capture-label",
     type=str,
@@ -138,8 +236,9 @@ parser.add_argument(
         "features (e.g. 'acc_mag,gyro_mag,tilt'). When omitted, the library "
         "auto-detects from the JSONL — taking the intersection of scalar "
         "streams present in every captured gesture window. Per-tick "
-        "recognizer cost scales with len(features) × n_templates; check "
-        "Pipeline.stats[GestureRecognizer] after a run to compare."
+        "recognizer cost scales with len(features) × n_templates; run with "
+        "--profile sampled and check the GestureRecognizer line of the "
+        "shutdown profile report to compare."
     ),
 )
 parser.add_argument(
@@ -307,6 +406,144 @@ parser.add_argument(
     action="store_true",
     help="Verbose per-tick logging from the position tracker.",
 )
+parser.add_argument(
+    "--profile",
+    choices=["off", "sampled", "full"],
+    default="off",
+    help=(
+        "Per-stage latency profiling on every pipeline (default off — the "
+        "BLE callback thread pays no timer calls). 'sampled' times one "
+        "frame in --profile-every; 'full' times every frame. p50/p95/p99/"
+        "p99.9 per stage and per (device, sensor) are logged at shutdown."
+    ),
+)
+parser.add_argument(
+    "--profile-every",
+    type=int,
+    default=32,
+    metavar="N",
+    help="Sampling interval for --profile sampled (default 32 = 1-in-32 frames).",
+)
+parser.add_argument(
+    "--frame-queue",
+    choices=["off", "drop-oldest", "coalesce", "block"],
+    default="off",
+    help=(
+        "Run pipelines on a per-device worker thread instead of inside the "
+        "BLE callback (default off = synchronous). The value is the overflow "
+        "policy when the worker falls behind: 'drop-oldest' evicts the oldest "
+        "pending frame, 'coalesce' evicts the oldest pending frame of the same "
+        "sensor, 'block' stalls the callback up to --frame-queue-block-ms then "
+        "drops. See sense/framequeue.py."
+    ),
+)
+parser.add_argument(
+    "--frame-queue-capacity",
+    type=int,
+    default=256,
+    metavar="N",
+    help="Per-device queue capacity in frames (default 256 ≈ 1 s of acc+gyro at 100 Hz).",
+)
+parser.add_argument(
+    "--frame-queue-block-ms",
+    type=float,
+    default=50.0,
+    metavar="MS",
+    help="Max callback stall per frame under --frame-queue block (default 50).",
+)
+parser.add_argument(
+    "--osc-egress",
+    choices=["sync", "thread"],
+    default="sync",
+    help=(
+        "Where OSC data sends happen. 'sync' (default): inline on the "
+        "thread running the pipeline. 'thread': OscEmit only queues "
+        "pre-encoded datagrams; one sender thread does the socket work, so "
+        "a slow or unreachable receiver costs the BLE path nothing. "
+        "Overflow drops the oldest datagram. See sense/egress.py."
+    ),
+)
+parser.add_argument(
+    "--osc-egress-capacity",
+    type=int,
+    default=1024,
+    metavar="N",
+    help="Egress queue capacity in datagrams for --osc-egress thread (default 1024).",
+)
+parser.add_argument(
+    "--osc-bundle",
+    choices=["off", "tick", "window"],
+    default="off",
+    help=(
+        "Group the acc/gyro pipelines' OSC output into one datagram instead "
+        "of one per frame (default off). 'tick' sends everything derived "
+        "from one sample (acc, acc_lp, acc_mag, acc_lp_mag, tilt) as one "
+        "OSC bundle; 'window' groups across samples for "
+        "--osc-bundle-window-us. Receivers must understand #bundle — see "
+        "--osc-pd-compat."
+    ),
+)
+parser.add_argument(
+    "--osc-bundle-window-us",
+    type=int,
+    default=2000,
+    metavar="US",
+    help="Grouping window for --osc-bundle window, in microseconds (default 2000).",
+)
+parser.add_argument(
+    "--osc-pd-compat",
+    action="store_true",
+    help=(
+        "With --osc-bundle, send each group as one plain /<MAC>/packed "
+        "message (<sensor> <values...> repeated) instead of a #bundle, for "
+        "vanilla Pd's [oscparse]. See docs/stages.md#oscemit."
+    ),
+)
+parser.add_argument(
+    "--shm-ring",
+    type=str,
+    default=None,
+    metavar="NAME",
+    help=(
+        "Also publish every frame into a shared-memory ring named NAME "
+        "(/dev/shm/NAME) for local consumers — a visualiser or analysis "
+        "process maps it with sense.shmring.ShmRingReader and reads "
+        "frames without sockets or OSC decoding. See sense/shmring.py."
+    ),
+)
+parser.add_argument(
+    "--shm-ring-slots",
+    type=int,
+    default=DEFAULT_SLOTS,
+    metavar="N",
+    help=(
+        "Ring capacity in frames for --shm-ring (default %d ≈ 4 s of all "
+        "streams of two devices). A reader further behind than this "
+        "loses the oldest frames and sees them counted in `lost`." % DEFAULT_SLOTS
+    ),
+)
+parser.add_argument(
+    "--osc-tcp",
+    type=int,
+    default=None,
+    metavar="PORT",
+    help=(
+        "Also serve the OSC stream over TCP on PORT (SLIP-framed, OSC 1.1) "
+        "for remote recorders that need every frame — see "
+        "tools/osc_tcp_record.py. Carries every post-pipeline frame, "
+        "timestamped, regardless of emission policy, subscriptions or "
+        "capture mute; a client that falls --osc-tcp-buffer-kb behind "
+        "is disconnected."
+    ),
+)
+parser.add_argument(
+    "--osc-tcp-buffer-kb",
+    type=int,
+    default=DEFAULT_MAX_BUFFER >> 10,
+    metavar="KB",
+    help="Per-connection send buffer for --osc-tcp, in KiB (default %d)." % (
+        DEFAULT_MAX_BUFFER >> 10),
+)
 args = parser.parse_args()
 
 config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fs_config.json")
@@ -319,6 +556,18 @@ devices = config["metawear"]["devices"]
 
 log.info("setting up OSC")
 osc = ControlledOSCConnection(ip=network["ip"], port=network["port"])
+if args.osc_egress == "thread":
+    # Before building states: each captures osc.client at construction.
+    osc.enable_egress(capacity=args.osc_egress_capacity)
+# Extra receivers (visualiser, logger, ...) next to the network target.
+osc.fanout.apply_config(config.get("targets"))
+# Lossless TCP stream for remote recorders; fed by TcpPublish stages
+# (below, with the shm ring), not by OscEmit.
+tcp_stream = None
+if args.osc_tcp is not None:
+    tcp_stream = TcpStreamServer(port=args.osc_tcp,
+                                 max_buffer=args.osc_tcp_buffer_kb << 10)
+    tcp_stream.start()
 
 log.info("building device states")
 states = [MetaWearState(device_config=d, network_config=network, OSC=osc) for d in devices]
@@ -331,18 +580,37 @@ states = [MetaWearState(device_config=d, network_config=network, OSC=osc) for d
 # needed as the second feature for multivariate gesture recognition
 # (acc_mag is translation, gyro_mag is rotation; together they
 # discriminate gestures with similar amplitude profiles).
+emit_opts = dict(
+    bundle=args.osc_bundle,
+    bundle_window_us=args.osc_bundle_window_us,
+    pd_compat=args.osc_pd_compat,
+)
 for s in states:
     s.pipelines["acc"].stages = [
         LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
         Magnitude(),
         Tilt(),
-        OscEmit(s._osc_client)
+        OscEmit(s._osc_client, **emit_opts)
     ]
     s.pipelines["gyro"].stages = [
         Magnitude(),
-        OscEmit(s._osc_client)
+        OscEmit(s._osc_client, **emit_opts)
     ]
 
+if args.frame_queue != "off":
+    for s in states:
+        s.enable_frame_queue(
+            capacity=args.frame_queue_capacity,
+            policy=args.frame_queue,
+            block_timeout_s=args.frame_queue_block_ms / 1000.0,
+        )
+
+# Profiling mode applies to the Pipeline objects, not their stages, so
+# it survives the composition overrides and stage inserts below.
+for s in states:
+    for pipe in s.pipelines.values():
+        pipe.set_profile(args.profile, sample_every=args.profile_every)
+
 # --- Gesture recognition (opt-in) ---------------------------------------------
 # --gesture-library loads templates from one or more capture-mode JSONL
 # recordings, auto-derives per-label thresholds, and inserts a single
@@ -484,26 +752,28 @@ if args.position_track:
 # one RecorderSink so a session is one file demuxable by device+sensor.
 # A `_meta` first line anchors the session in wall-clock time and
 # records the configured sensor settings; `_session` start/end markers
-# bracket the file for boundary recovery on read.
+# bracket the file for boundary recovery on read. The sink's writer
+# thread does the JSON and file I/O; producers only enqueue.
 recorder_sink = None
 recorder_path = None
 ts = time.strftime("%Y%m%dT%H%M%S")
 # --capture-label implies --record. Default file naming distinguishes
 # gesture-capture sessions from plain recordings.
 record_implied_by_capture = args.capture_label is not None
+record_suffix = ".fsc" if args.record_format == FORMAT_COLUMNAR else ".jsonl"
 if args.record_to:
     recorder_path = args.record_to
 elif args.record:
     recorder_path = os.path.join(
         os.path.dirname(os.path.abspath(__file__)),
         "recordings",
-        f"session-{ts}.jsonl",
+        f"session-{ts}{record_suffix}",
     )
 elif record_implied_by_capture:
     recorder_path = os.path.join(
         os.path.dirname(os.path.abspath(__file__)),
         "recordings",
-        f"gesture-{args.capture_label}-{ts}.jsonl",
+        f"gesture-{args.capture_label}-{ts}{record_suffix}",
     )
 
 if recorder_path:
@@ -519,7 +789,19 @@ if recorder_path:
             for d in devices
         ],
     }
-    recorder_sink = RecorderSink(recorder_path)
+    recorder_sink = RecorderSink(
+        recorder_path,
+        capacity=args.record_queue,
+        flush_interval_s=args.record_flush_s,
+        fsync_interval_s=args.record_fsync_s,
+        fmt=args.record_format,
+        values_dtype="float32" if args.record_float32 else "float64",
+        segment_bytes=int(args.record_segment_mb * 1e6) if args.record_segment_mb else None,
+        segment_s=args.record_segment_min * 60.0 if args.record_segment_min else None,
+        compression=args.record_compress,
+        float_decimals=args.record_decimals,
+        index=not args.record_no_index,
+    )
     recorder_sink.open(metadata=metadata)
     if args.capture_label:
         recorder_sink.current_label = args.capture_label
@@ -536,6 +818,44 @@ if recorder_path:
                     break
             pipe.stages.insert(insert_at, Recorder(recorder_sink))
 
+# --- Shared-memory ring (opt-in) ----------------------------------------------
+# --shm-ring NAME: one ShmRing for all devices, fed by a ShmPublish
+# just ahead of each terminal — after any Recorder, before the emission
+# policy below, so local readers get every frame at full rate.
+shm_ring = None
+if args.shm_ring:
+    shm_ring = ShmRing(args.shm_ring, slots=args.shm_ring_slots)
+    log.info("[shmring] publishing frames to /dev/shm/%s (%d slots)",
+             shm_ring.name, shm_ring.slots)
+    for s in states:
+        for pipe in s.pipelines.values():
+            insert_at = len(pipe.stages)
+            for i, stage in enumerate(pipe.stages):
+                if stage.is_terminal:
+                    insert_at = i
+                    break
+            pipe.stages.insert(insert_at, ShmPublish(shm_ring))
+
+# --osc-tcp PORT: a TcpPublish just ahead of each terminal, next to the
+# ShmPublish — before the emission policy and OscEmit's capture mute,
+# and a consumer for subscription pruning, so remote recorders get
+# every frame at full rate.
+if tcp_stream is not None:
+    for s in states:
+        for pipe in s.pipelines.values():
+            insert_at = len(pipe.stages)
+            for i, stage in enumerate(pipe.stages):
+                if stage.is_terminal:
+                    insert_at = i
+                    break
+            pipe.stages.insert(insert_at, TcpPublish(tcp_stream))
+
+# Rate limits / deadbands from fs_config.json's emission section: one
+# EmitPolicy per matching rule, just ahead of each OscEmit (after the
+# Recorder, so recordings keep every frame). Before the overrides below
+# so persisted EmitPolicy tunings apply to these stages.
+apply_emission_policy(states, config)
+
 # Apply persisted operator edits from fs_config.local.json's pipelines section
 # (C2 /cmd/pipeline/* writes there). Composition overrides replace the
 # constructible chain; tunings setattr params on runtime-dep stages. See
@@ -558,7 +878,8 @@ controller = Controller(
     osc=osc,
     states=states,
     config_path=config_path,
-    recorder_path_provider=lambda: recorder_path,
+    recorder_path_provider=lambda: (
+        str(recorder_sink.recording_path) if recorder_sink is not None else None),
     position_track_enabled=args.position_track,
     position_trackers=position_trackers,
 )
@@ -566,7 +887,28 @@ controller.install()
 controller.announce_initial_state()
 
 
+_profile_reported = False
+
+
+def _log_profile_reports() -> None:
+    global _profile_reported
+    if args.profile == "off" or _profile_reported:
+        return
+    _profile_reported = True
+    for s in states:
+        for pipe_name, pipe in s.pipelines.items():
+            report = pipe.profile_report()
+            if not report["stages"]:
+                continue
+            for stage_name, summary in report["stages"].items():
+                log.info("[%s] profile %s/%s: %s",
+                         s.address, pipe_name, stage_name, summary)
+            for key, summary in report["push"].items():
+                log.info("[%s] profile push %s: %s", s.address, key, summary)
+
+
 def _shutdown_all() -> None:
+    _log_profile_reports()
     # Flush any pending C2 persistence so a /cmd/pipeline/set right
     # before SIGTERM doesn't get lost in the debounce window.
     try:
@@ -579,14 +921,27 @@ def _shutdown_all() -> None:
         except BaseException:
             log.exception("error during shutdown of %s", s.address)
     try:
-        osc.stop_server()
+        osc.close()
     except BaseException:
         log.exception("error stopping OSC server")
+    if osc.egress is not None:
+        log.info("egress stats at shutdown: %s", osc.egress.stats())
+    if tcp_stream is not None:
+        log.info("tcp stream stats at shutdown: %s", tcp_stream.stats())
+        try:
+            tcp_stream.close()
+        except BaseException:
+            log.exception("error closing tcp stream")
     if recorder_sink is not None:
         try:
             recorder_sink.close()
         except BaseException:
             log.exception("error closing recorder sink")
+    if shm_ring is not None:
+        try:
+            shm_ring.close()
+        except BaseException:
+            log.exception("error closing shm ring")
 
 
 atexit.register(_shutdown_all)
@@ -0,0 +1,153 @@
+"""
+Per-target circuit breaker for OSC sends.
+
+While PD (or whatever listens on the data port) is down, every frame
+still costs a `sendto` that fails with a receiver-unreachable errno
+(`TRANSIENT_ERRNOS`). The callers already treat those as soft, but the
+syscall plus the raised `OSError` is paid per frame per sensor — that
+path is where the 199 Hz → 60 Hz drop came from when it also logged.
+
+A `CircuitBreaker` counts consecutive transient errors for one
+`ip:port` target. After `threshold` of them it opens: sends are skipped
+(counted in `skipped`, no syscall) until `backoff_s` has passed, then a
+single datagram goes out as a probe (half-open). A probe that succeeds
+closes the breaker; one that fails re-opens it with the backoff doubled,
+up to `max_backoff_s`. Any non-transient error leaves the breaker alone
+— those are bugs, not an absent receiver.
+
+Breakers are shared per target through `breaker_for(ip, port)`, so the
+OscEmit data path, the per-device state senders and C2 all see the same
+state, and one probe serves them all. `WireClient` and `EgressClient`
+check the breaker before sending; their `send_*` return False for a
+skipped send. C2 reports transitions as `/state/egress/breaker`.
+
+The closed fast path is one attribute read (`open`); the lock is only
+taken on state changes and while open.
+"""
+import errno
+import logging
+import threading
+import time
+from typing import Callable, Dict
+
+log = logging.getLogger("fs.breaker")
+
+# UDP send errnos that mean "receiver not reachable right now" — common
+# at boot before PD/the listener is up. Never worth a traceback.
+TRANSIENT_ERRNOS = (errno.ENETUNREACH, errno.EHOSTUNREACH, errno.ECONNREFUSED)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+DEFAULT_THRESHOLD = 5
+DEFAULT_BACKOFF_S = 1.0
+MAX_BACKOFF_S = 30.0
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one send target. Thread-safe;
+    callers do `if b.open and not b.allow(): skip`, then report the
+    outcome with `record_failure()` (transient errnos only) or
+    `record_success()`.
+    """
+    def __init__(self, target: str, threshold: int = DEFAULT_THRESHOLD,
+                 backoff_s: float = DEFAULT_BACKOFF_S,
+                 max_backoff_s: float = MAX_BACKOFF_S,
+                 clock: Callable[[], float] = time.monotonic):
+        if threshold < 1:
+            raise ValueError(f"threshold must be >= 1, got {threshold}")
+        self.target = target
+        self.threshold = int(threshold)
+        self.backoff_s = float(backoff_s)
+        self.max_backoff_s = max(float(max_backoff_s), self.backoff_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.state = CLOSED
+        # Fast-path flag: True whenever state != CLOSED.
+        self.open = False
+        self.consecutive = 0
+        self.skipped = 0
+        self.trips = 0
+        self.probes = 0
+        self._backoff = self.backoff_s
+        self._retry_at = 0.0
+
+    def allow(self) -> bool:
+        """True if a send may go out now. While open, lets one probe
+        through per backoff interval and counts the rest as skipped."""
+        if not self.open:
+            return True
+        with self._lock:
+            if not self.open:
+                return True
+            now = self._clock()
+            if now >= self._retry_at:
+                # Half-open: this send is the probe. If its outcome is
+                # never reported (dropped before the socket), another
+                # probe goes out after the same interval.
+                self.state = HALF_OPEN
+                self._retry_at = now + self._backoff
+                self.probes += 1
+                return True
+            self.skipped += 1
+            return False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive += 1
+            if self.state == HALF_OPEN:
+                self._backoff = min(self._backoff * 2.0, self.max_backoff_s)
+                self._trip()
+            elif self.state == CLOSED and self.consecutive >= self.threshold:
+                self.trips += 1
+                self._trip()
+                log.warning("[breaker] %s unreachable after %d sends; "
+                            "skipping, probing every %.1fs",
+                            self.target, self.consecutive, self._backoff)
+
+    def _trip(self) -> None:
+        self.state = OPEN
+        self.open = True
+        self._retry_at = self._clock() + self._backoff
+
+    def record_success(self) -> None:
+        if not self.open and not self.consecutive:
+            return
+        with self._lock:
+            if self.open:
+                log.info("[breaker] %s reachable again (%d sends skipped)",
+                         self.target, self.skipped)
+            self.state = CLOSED
+            self.open = False
+            self.consecutive = 0
+            self._backoff = self.backoff_s
+
+    def as_list(self) -> list:
+        """`/state/egress/breaker` payload."""
+        return [self.target, self.state, self.consecutive, self.skipped]
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def breaker_for(ip: str, port: int) -> CircuitBreaker:
+    """Process-wide breaker for `ip:port`, created on first use."""
+    key = f"{ip}:{port}"
+    breaker = _BREAKERS.get(key)
+    if breaker is None:
+        with _BREAKERS_LOCK:
+            breaker = _BREAKERS.get(key)
+            if breaker is None:
+                breaker = _BREAKERS[key] = CircuitBreaker(key)
+    return breaker
+
+
+def breakers() -> Dict[str, CircuitBreaker]:
+    """Snapshot of every breaker created so far, keyed by `ip:port`."""
+    with _BREAKERS_LOCK:
+        return dict(_BREAKERS)
+
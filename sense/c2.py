@@ -14,26 +14,32 @@ Per-device state-change events (/state/<mac>/connected etc.) are emitted
 from MetaWearState directly, where the transitions happen — see
 MetaWearState._emit_state_event.
 """
-import errno
 import logging
 import os
 import threading
 import time
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+from . import breaker, telemetry
+from .breaker import TRANSIENT_ERRNOS
+from .fanout import DEFAULT_TARGET
 from .fs_setup import _deep_merge, is_valid_ip, is_valid_port, write_local_overrides
-from .pipeline import _STAGE_REGISTRY
+from .pipeline import _STAGE_REGISTRY, _resolve_stage, intern_key
+from .subscriptions import SubscriptionTable
 
 log = logging.getLogger("fs.c2")
 
 HEARTBEAT_PERIOD_S = 2.0
+# /state/egress/* telemetry cadence (sense/telemetry.py); /cmd/egress/stats
+# answers on demand in between.
+TELEMETRY_PERIOD_S = 10.0
 # Debounce window for persistence writes. /cmd/pipeline/set in particular
 # can fire at slider-drag rates (~50 Hz); collapsing the disk writes saves
 # SD wear and keeps the dispatcher thread responsive. Live setattr happens
 # synchronously regardless — only the disk write is debounced.
 PERSIST_DEBOUNCE_S = 0.5
 
-_TRANSIENT_OSC_ERRNOS = (errno.ENETUNREACH, errno.EHOSTUNREACH, errno.ECONNREFUSED)
+_TRANSIENT_OSC_ERRNOS = TRANSIENT_ERRNOS
 
 # Knob whitelist for /cmd/configure/sensor. Keys here mirror the
 # fs_config schema; values outside this map are rejected with
@@ -54,10 +60,10 @@ _ALLOWED_SENSOR_KEYS = {
 def send_best_effort(client, addr: str, value, op: str) -> bool:
     """Mirror of MetaWearState._osc_send_best_effort for module-level
     sends. Receiver-unreachable errnos are treated as soft failures
-    (one WARNING line, no traceback)."""
+    (one WARNING line, no traceback); a send skipped by an open
+    circuit breaker returns False silently."""
     try:
-        client.send_message(addr, value)
-        return True
+        return client.send_message(addr, value) is not False
     except OSError as e:
         if e.errno in _TRANSIENT_OSC_ERRNOS:
             log.warning("[c2] %s: receiver unreachable (%s); skipping", op, e)
@@ -131,6 +137,18 @@ class Controller:
         # state is idempotent).
         self._dirty_pipelines: Set[Tuple[str, str]] = set()
 
+        # Receiver subscriptions (/cmd/subscribe). Empty = no filtering;
+        # expired receivers are pruned from tick().
+        self.subscriptions = SubscriptionTable()
+
+        # Last breaker state reported per target ("ip:port" → state);
+        # tick() emits /state/egress/breaker when one changes.
+        self._breaker_reported: Dict[str, str] = {}
+
+        # Egress telemetry: rates are per interval between reports.
+        self._telemetry_rates = telemetry.RateTracker()
+        self._last_telemetry_at = time.monotonic()
+
     @property
     def should_stop(self) -> bool:
         """Polled by run_fs.py main loop — set True by /cmd/shutdown."""
@@ -166,6 +184,11 @@ class Controller:
         d.map("/cmd/pipeline/set", self._on_pipeline_set)
         d.map("/cmd/pipeline/add", self._on_pipeline_add)
         d.map("/cmd/pipeline/remove", self._on_pipeline_remove)
+        d.map("/cmd/subscribe", self._on_subscribe)
+        d.map("/cmd/unsubscribe", self._on_unsubscribe)
+        d.map("/cmd/target/add", self._on_target_add)
+        d.map("/cmd/target/remove", self._on_target_remove)
+        d.map("/cmd/egress/stats", self._on_egress_stats)
         log.info("c2 handlers installed (token=%s)", self.shutdown_token)
 
     def announce_initial_state(self) -> None:
@@ -178,9 +201,17 @@ class Controller:
     # --- Heartbeat / tick -----------------------------------------------------
 
     def tick(self) -> None:
-        """Called from the watchdog loop (~1Hz). Emits heartbeat at
+        """Called from the watchdog loop (~1Hz). Expires silent
+        subscribers, reports circuit-breaker transitions, egress
+        telemetry every TELEMETRY_PERIOD_S, then emits heartbeat at
         HEARTBEAT_PERIOD_S cadence; cheap when not yet due."""
+        if self.subscriptions.prune():
+            self._apply_subscriptions()
+        self._report_breakers()
         now = time.monotonic()
+        if (now - self._last_telemetry_at) >= TELEMETRY_PERIOD_S:
+            self._last_telemetry_at = now
+            self._report_telemetry()
         if (now - self._last_heartbeat_at) < HEARTBEAT_PERIOD_S:
             return
         self._last_heartbeat_at = now
@@ -189,6 +220,50 @@ class Controller:
             [round(self.uptime_s(), 2), self.shutdown_token],
         )
 
+    def _report_breakers(self, force: bool = False) -> None:
+        """/state/egress/breaker for every target whose breaker changed
+        state since the last report (all of them with `force`). Closed
+        breakers that were never reported stay quiet."""
+        reported = self._breaker_reported
+        for target, b in breaker.breakers().items():
+            state = b.state
+            if not force and reported.get(target, breaker.CLOSED) == state:
+                continue
+            reported[target] = state
+            self._send("/state/egress/breaker", b.as_list())
+
+    def _report_telemetry(self) -> None:
+        """/state/egress/{target,errors,latency,address,queue} rows —
+        see docs/c2.md#egress-telemetry. Rates cover the interval since
+        the previous report."""
+        rate = self._telemetry_rates.rate
+        for key, t in sorted(telemetry.targets().items()):
+            msg_rate, byte_rate = rate("target " + key, t.messages, t.bytes)
+            self._send("/state/egress/target", [
+                key, t.messages, t.bytes, t.error_count,
+                round(msg_rate, 1), round(byte_rate, 1),
+                t.percentile_us(0.5), t.percentile_us(0.99),
+            ])
+            for name, n in sorted(t.errors.items()):
+                self._send("/state/egress/errors", [key, name, n])
+            self._send("/state/egress/latency", [key] + list(t.latency))
+        fanout = getattr(self.osc, "fanout", None)
+        if fanout is not None:
+            for address, r in sorted(fanout.routes().items()):
+                if not r.messages:
+                    continue
+                msg_rate, byte_rate = rate(address, r.messages, r.bytes)
+                self._send("/state/egress/address", [
+                    address, r.messages, r.bytes,
+                    round(msg_rate, 1), round(byte_rate, 1),
+                ])
+        egress = getattr(self.osc, "egress", None)
+        if egress is not None:
+            self._send("/state/egress/queue", [
+                egress.depth, egress.max_depth, egress.capacity,
+                egress.dropped_overflow, egress.enqueued,
+            ])
+
     # --- Internals ------------------------------------------------------------
 
     def _send(self, addr: str, value) -> bool:
@@ -227,6 +302,9 @@ class Controller:
         for s in self.states:
             self._send(f"/state/{s.address}/snapshot", self._device_snapshot(s))
         self._send("/state/global/snapshot", self._global_snapshot())
+        for target in self.osc.fanout.targets:
+            self._send("/state/targets", target.as_list())
+        self._report_breakers(force=True)
 
     def _on_start(self, address, *args):
         mac = args[0] if args else ""
@@ -473,21 +551,20 @@ class Controller:
         self._flush_persist()
 
     def _replace_osc_target(self, ip: str, port: int) -> None:
-        """Swap the outbound OSC target on every reference we know
-        about: osc.client (read by Controller._send), every state's
+        """Repoint the fan-out's `default` target and hand the fan-out
+        to every reference we know about: osc.client (read by
+        Controller._send), every state's
         _osc_client (read by state event hooks + indicator sends), and
         every pipeline stage carrying an `osc_client` attribute (the
         terminal OscEmit). Duck-typed on `osc_client` so future stages
         with their own sender pick up the swap automatically."""
-        from pythonosc.udp_client import SimpleUDPClient
-        new_client = SimpleUDPClient(ip, port)
-        self.osc.client = new_client
+        new_client = self.osc.set_default_target(ip, port)
         for s in self.states:
             s._osc_client = new_client
             s.ip = ip
             s.port = port
             for pipe in s.pipelines.values():
-                for stage in pipe.stages:
+                for stage in pipe.composition.stages:
                     if hasattr(stage, "osc_client"):
                         stage.osc_client = new_client
 
@@ -502,10 +579,11 @@ class Controller:
         log.info("c2 /cmd/pipeline/list mac=%r → %d device(s)", mac, len(targets))
         for s in targets:
             for pipe_name, pipe in s.pipelines.items():
+                n_stages = len(pipe.composition.stages)
                 advertised = sorted(pipe.advertised_outputs(pipe_name))
                 self._send(
                     f"/state/{s.address}/pipelines",
-                    [pipe_name, len(pipe.stages), ",".join(advertised)],
+                    [pipe_name, n_stages, ",".join(advertised)],
                 )
 
     def _on_pipeline_inspect(self, address, *args):
@@ -522,9 +600,12 @@ class Controller:
         if pipe is None:
             self._send("/error/unknown-pipeline", [mac, pipe_name])
             return
+        # One snapshot for the whole reply, so a concurrent edit can't
+        # interleave stage indices from two compositions.
+        stages = pipe.composition.stages
         log.info("c2 /cmd/pipeline/inspect %s %s (%d stage(s))",
-                 mac, pipe_name, len(pipe.stages))
-        for idx, stage in enumerate(pipe.stages):
+                 mac, pipe_name, len(stages))
+        for idx, stage in enumerate(stages):
             cls_name = stage.__class__.__name__
             # Render tunable params as "key=value,key=value". Inspectable
             # whether or not the stage has any (empty string for stages
@@ -557,7 +638,7 @@ class Controller:
         if pipe is None:
             self._send("/error/unknown-pipeline", [mac, pipe_name])
             return
-        resolved = _resolve_stage(pipe.stages, stage_ref)
+        resolved = _resolve_stage(pipe.composition.stages, stage_ref)
         if resolved is None:
             self._send("/error/unknown-stage", [mac, pipe_name, stage_ref])
             return
@@ -571,12 +652,18 @@ class Controller:
             self._send("/error/bad-value", [param, repr(raw_value)])
             return
 
+        suffix = stage._output_suffix()
         try:
             setattr(stage, param, coerced)
         except BaseException as e:
             log.exception("c2 /cmd/pipeline/set: setattr raised")
             self._send("/error/bad-value", [param, str(e)])
             return
+        if stage._output_suffix() != suffix:
+            # The tune renamed the stage's output (Window.stat:
+            # acc_mag_mean → acc_mag_std); the plan's demand-narrowed
+            # routes still name the old sensor.
+            pipe.recompile()
 
         self._mark_pipeline_dirty(mac, pipe_name)
         log.info("c2 /cmd/pipeline/set: %s/%s/%s/%s = %r",
@@ -619,9 +706,16 @@ class Controller:
             self._send("/error/bad-args", ["add params must be key/value pairs"])
             return
         kwargs: dict = {}
+        inputs = _NO_INPUTS
         for i in range(0, len(raw_kv), 2):
             key = str(raw_kv[i])
             raw = raw_kv[i + 1]
+            if key == "inputs":
+                inputs = _parse_inputs(raw)
+                if inputs is _COERCE_FAIL:
+                    self._send("/error/bad-params", [key, repr(raw)])
+                    return
+                continue
             if key not in klass.CONSTRUCTION_PARAMS:
                 self._send("/error/bad-params", [key, "unknown-key"])
                 return
@@ -638,24 +732,44 @@ class Controller:
             self._send("/error/bad-params", ["construction", str(e)])
             return
 
-        # Clamp position to [0, first_terminal_index]. Anything past the
-        # first terminal would execute but not be advertised — confusing,
-        # so we silently clamp and report the actual insertion point.
-        insert_at = max(0, position)
-        for i, existing in enumerate(pipe.stages):
-            if existing.is_terminal:
-                insert_at = min(insert_at, i)
-                break
-
-        # Atomic replace — BLE callback thread iterating pipe.stages will
-        # finish on the old list; subsequent pushes see the new one.
-        new_stages = list(pipe.stages)
-        new_stages.insert(insert_at, stage)
-        pipe.stages = new_stages
+        if inputs is not _NO_INPUTS:
+            stage.inputs = inputs
+        unreachable = False
+
+        def insert(stages):
+            nonlocal insert_at, unreachable
+            # Clamp position to [0, first_terminal_index]. Anything past
+            # the first terminal would execute but not be advertised —
+            # confusing, so we silently clamp and report the actual
+            # insertion point.
+            insert_at = max(0, position)
+            for i, existing in enumerate(stages):
+                if existing.is_terminal:
+                    insert_at = min(insert_at, i)
+                    break
+            if inputs not in (_NO_INPUTS, None):
+                # A selector matching nothing that reaches this position
+                # would make the stage dead weight — refuse it.
+                if not inputs & pipe.sensors_at(pipe_name, insert_at):
+                    unreachable = True
+                    return None
+            stages.insert(insert_at, stage)
+            return stages
+
+        # Built off the live chain and published in one swap — the BLE
+        # callback thread finishes on the old composition; subsequent
+        # pushes see the new one.
+        insert_at = 0
+        if pipe.edit(insert) is None:
+            if unreachable:
+                self._send("/error/bad-params",
+                           ["inputs", "unreachable:" + ",".join(sorted(inputs))])
+            return
 
         self._mark_pipeline_dirty(mac, pipe_name)
-        log.info("c2 /cmd/pipeline/add: %s/%s inserted %s at %d (params=%s)",
-                 mac, pipe_name, cls_name, insert_at, kwargs)
+        log.info("c2 /cmd/pipeline/add: %s/%s inserted %s at %d (params=%s inputs=%s)",
+                 mac, pipe_name, cls_name, insert_at, kwargs,
+                 sorted(stage.inputs) if stage.inputs is not None else "*")
         # Composition change alters /<MAC>/__advertise__; re-advertise.
         try:
             state.advertise()
@@ -683,7 +797,7 @@ class Controller:
         if pipe is None:
             self._send("/error/unknown-pipeline", [mac, pipe_name])
             return
-        resolved = _resolve_stage(pipe.stages, stage_ref)
+        resolved = _resolve_stage(pipe.composition.stages, stage_ref)
         if resolved is None:
             self._send("/error/unknown-stage", [mac, pipe_name, stage_ref])
             return
@@ -692,9 +806,20 @@ class Controller:
             self._send("/error/terminal-remove", [stage.__class__.__name__])
             return
 
-        new_stages = list(pipe.stages)
-        del new_stages[idx]
-        pipe.stages = new_stages
+        def remove(stages):
+            nonlocal idx
+            # Re-find by identity: an edit may have shifted it since
+            # the ref was resolved.
+            for i, existing in enumerate(stages):
+                if existing is stage:
+                    idx = i
+                    del stages[i]
+                    return stages
+            return None
+
+        if pipe.edit(remove) is None:
+            self._send("/error/unknown-stage", [mac, pipe_name, stage_ref])
+            return
 
         self._mark_pipeline_dirty(mac, pipe_name)
         log.info("c2 /cmd/pipeline/remove: %s/%s removed %s at %d",
@@ -708,6 +833,106 @@ class Controller:
             ["pipeline", f"{mac}/{pipe_name}/remove@{idx}"],
         )
 
+    # --- Subscription handlers ---------------------------------------------------
+
+    def _on_subscribe(self, address, *args):
+        if not args or not str(args[0]):
+            self._send("/error/bad-args", ["subscribe needs <receiver> [pattern]*"])
+            return
+        receiver = str(args[0])
+        patterns = [str(a) for a in args[1:]]
+        bad = next((p for p in patterns if not p.startswith("/")), None)
+        if bad is not None:
+            self._send("/error/bad-pattern", [receiver, bad])
+            return
+        if self.subscriptions.subscribe(receiver, patterns):
+            log.info("c2 /cmd/subscribe %s %s", receiver, patterns)
+            self._apply_subscriptions()
+        self._send_subscription_state(receiver)
+
+    def _on_unsubscribe(self, address, *args):
+        if not args or not str(args[0]):
+            self._send("/error/bad-args", ["unsubscribe needs <receiver> [pattern]*"])
+            return
+        receiver = str(args[0])
+        patterns = [str(a) for a in args[1:]]
+        if self.subscriptions.unsubscribe(receiver, patterns):
+            log.info("c2 /cmd/unsubscribe %s %s", receiver, patterns or "(all)")
+            self._apply_subscriptions()
+        self._send_subscription_state(receiver)
+
+    def _send_subscription_state(self, receiver: str) -> None:
+        patterns = self.subscriptions.receivers().get(receiver, [])
+        self._send("/state/subscriptions",
+                   [receiver, len(patterns), self.subscriptions.ttl_s])
+
+    def _apply_subscriptions(self) -> None:
+        """Re-plan every device's pipelines against the current table."""
+        for s in self.states:
+            try:
+                s.apply_subscriptions(self.subscriptions)
+            except BaseException:
+                log.exception("c2 subscriptions: apply raised on %s", s.address)
+
+    # --- Fan-out targets ------------------------------------------------------
+
+    def _on_target_add(self, address, *args):
+        if len(args) < 3:
+            self._send("/error/bad-args",
+                       ["target/add needs <name> <ip> <port> [pattern]*"])
+            return
+        name = str(args[0])
+        ip = str(args[1])
+        try:
+            port = int(args[2])
+        except (TypeError, ValueError):
+            self._send("/error/bad-target", [name, "bad-port"])
+            return
+        if not name or name == DEFAULT_TARGET:
+            # The default target is /cmd/configure/network's.
+            self._send("/error/bad-target", [name, "reserved"])
+            return
+        if not is_valid_ip(ip) or not is_valid_port(port):
+            self._send("/error/bad-target", [name, "bad-value"])
+            return
+        patterns = [str(a) for a in args[3:]]
+        bad = next((p for p in patterns if not p.startswith("/")), None)
+        if bad is not None:
+            self._send("/error/bad-pattern", [name, bad])
+            return
+        try:
+            target = self.osc.fanout.set_target(name, ip, port, patterns or None)
+        except BaseException as e:
+            log.exception("c2 /cmd/target/add: set_target raised")
+            self._send("/error/bad-target", [name, str(e)])
+            return
+        log.info("c2 /cmd/target/add %s %s:%d %s", name, ip, port, patterns)
+        if self.config_path is not None:
+            self._persist({"targets": {name: {
+                "ip": ip, "port": port, "patterns": list(target.patterns)}}})
+        self._send("/state/targets", target.as_list())
+
+    def _on_target_remove(self, address, *args):
+        if not args:
+            self._send("/error/bad-args", ["target/remove needs <name>"])
+            return
+        name = str(args[0])
+        if name == DEFAULT_TARGET:
+            self._send("/error/bad-target", [name, "reserved"])
+            return
+        if not self.osc.fanout.remove_target(name):
+            self._send("/error/bad-target", [name, "unknown-target"])
+            return
+        log.info("c2 /cmd/target/remove %s", name)
+        if self.config_path is not None:
+            # null, not a deletion: local.json is deep-merged over base.
+            self._persist({"targets": {name: None}})
+        self._send("/state/targets", [name, "", ""])
+
+    def _on_egress_stats(self, address, *args):
+        log.info("c2 /cmd/egress/stats")
+        self._report_telemetry()
+
     # --- Pipeline persistence builders -----------------------------------------
 
     def _mark_pipeline_dirty(self, mac: str, pipe_name: str) -> None:
@@ -735,7 +960,8 @@ class Controller:
         pipeline. composition holds C2-constructible stages (LowPass,
         Magnitude, Tilt) in order; tunings holds the current
         TUNABLE_PARAMS values for stages NOT in the registry but
-        that have tunable knobs (PositionTracker, GestureRecognizer).
+        that have tunable knobs (PositionTracker, GestureRecognizer,
+        EmitPolicy), keyed by stage ref (`Class`, then `Class:N`).
         Non-tunable runtime-dep stages (OscEmit, LatchUpdate, Recorder)
         are skipped entirely — they're spliced in by run_fs.py at
         startup based on CLI flags, not from persistence."""
@@ -744,17 +970,26 @@ class Controller:
             return None
         composition: list = []
         tunings: dict = {}
-        for stage in pipe.stages:
+        seen: Dict[str, int] = {}
+        for stage in pipe.composition.stages:
             cls_name = stage.__class__.__name__
+            seen[cls_name] = n = seen.get(cls_name, 0) + 1
             if cls_name in _STAGE_REGISTRY:
                 params = {
                     k: getattr(stage, k)
                     for k in stage.CONSTRUCTION_PARAMS
                     if getattr(stage, k, None) is not None
                 }
-                composition.append({"class": cls_name, "params": params})
+                item = {"class": cls_name, "params": params}
+                if "inputs" in stage.__dict__:
+                    # Per-instance selector from /cmd/pipeline/add.
+                    item["inputs"] = (sorted(stage.inputs)
+                                      if stage.inputs is not None else None)
+                composition.append(item)
             elif stage.TUNABLE_PARAMS:
-                tunings[cls_name] = {
+                # Stage-ref keys, so duplicates (several EmitPolicy
+                # rules) each keep their own values.
+                tunings[cls_name if n == 1 else f"{cls_name}:{n}"] = {
                     k: getattr(stage, k) for k in stage.TUNABLE_PARAMS
                 }
         entry: dict = {}
@@ -785,37 +1020,17 @@ def _coerce(raw, expected_type):
         return _COERCE_FAIL
 
 
-def _resolve_stage(stages: list, stage_ref: str):
-    """Resolve a stage_ref string to (index, stage). Returns None if
-    unresolved. Accepts three forms:
-      - Integer string: 0-indexed position in the pipeline
-      - 'ClassName': first stage of that class
-      - 'ClassName:N': 1-indexed Nth stage of that class (for duplicates)
-    """
-    # Pure integer → position
-    try:
-        idx = int(stage_ref)
-        if 0 <= idx < len(stages):
-            return (idx, stages[idx])
-        return None
-    except (TypeError, ValueError):
-        pass
-    # ClassName:N
-    if ":" in stage_ref:
-        cls_name, n_str = stage_ref.rsplit(":", 1)
-        try:
-            n = int(n_str)
-        except (TypeError, ValueError):
-            return None
-        matches = [
-            (i, s) for i, s in enumerate(stages)
-            if s.__class__.__name__ == cls_name
-        ]
-        if 1 <= n <= len(matches):
-            return matches[n - 1]
+# `inputs` not given at all (keep the class default) — distinct from
+# "*" (None: route every sensor).
+_NO_INPUTS = object()
+
+
+def _parse_inputs(raw):
+    """`/cmd/pipeline/add ... inputs <spec>`: comma-separated sensor
+    names → frozenset, or "*" → None (every sensor). _COERCE_FAIL on
+    an empty spec."""
+    spec = str(raw).strip()
+    if spec == "*":
         return None
-    # Bare ClassName → first match
-    for i, s in enumerate(stages):
-        if s.__class__.__name__ == stage_ref:
-            return (i, s)
-    return None
+    names = frozenset(intern_key(n.strip()) for n in spec.split(",") if n.strip())
+    return names or _COERCE_FAIL
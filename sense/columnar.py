@@ -0,0 +1,496 @@
+"""
+Binary columnar recording format (`.fsc`) with a memory-mapped reader.
+
+JSONL recordings cost every consumer a `json.loads` per frame; a
+30-minute four-device fusion session is hundreds of MB of text. A
+`.fsc` file holds the same session as chunked columns: per (device,
+sensor) blocks of `seq` (uint64, the frame's position in the session),
+`t_recv` (float64) and the values (float64, or float32 to halve the
+size), so a reader maps the file and gets numpy views instead of
+parsing. `RecorderSink` writes it when the path ends in `.fsc` or it is
+asked to (`run_fs.py --record-format columnar`).
+
+Layout (little-endian, every block 8-byte aligned):
+
+    file head    "FSCOL001" u32 version u32 reserved
+    block*       "FSCB" u8 kind  c dtype  u16 width  u32 n  u32 size
+                 kind 1 (frames): u16+device, u16+sensor, pad,
+                                  seq[n] u64, t_recv[n] f64,
+                                  values[n, width] dtype, pad
+                 kind 2 (markers): seq[n] u64, JSON array of n records, pad
+    footer       JSON index: streams → block offsets, marker blocks
+    trailer      u64 footer offset  u32 footer length  4x  "FSCOLEND"
+
+`_meta`, `_session` and `_gesture` records are kept as a side table of
+marker blocks, each tagged with the number of frames written before it,
+so `iter_records()` reproduces the JSONL record order exactly. Every
+block is self-describing, so a file whose writer died before the footer
+(power cut) is still read by scanning the blocks; only the frames since
+the last flush are lost.
+
+`iter_records(path)` is the format-agnostic entry point: it yields the
+same dicts whether `path` is JSONL or `.fsc`, and `replay()`,
+`GestureLibrary.from_files` and the `tools/` scripts read recordings
+through it. Only numpy and the stdlib are needed, so the tools can use
+this module without the rest of the stack — and numpy only once a
+`.fsc` file is actually written or read: `is_columnar` and
+`iter_records` on JSONL stay stdlib-only, like the recorder.
+"""
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import segments
+
+MAGIC = b"FSCOL001"
+TRAILER_MAGIC = b"FSCOLEND"
+SUFFIX = ".fsc"
+VERSION = 1
+
+BLOCK_MAGIC = b"FSCB"
+KIND_FRAMES = 1
+KIND_MARKERS = 2
+
+# Rows per frame block before it's written; a flush writes partial ones.
+DEFAULT_BLOCK_ROWS = 1024
+
+_FILE_HEAD = struct.Struct("<8sII")
+_BLOCK_HEAD = struct.Struct("<4sBcHII")
+_NAME_LEN = struct.Struct("<H")
+_TRAILER = struct.Struct("<QI4x8s")
+
+_DTYPES = {b"d": "float64", b"f": "float32"}
+_DTYPE_CODES = {"float64": b"d", "float32": b"f"}
+
+_np = None
+
+
+def _numpy():
+    """Import NumPy on first use (`.fsc` files only)."""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError(
+                f"{SUFFIX} recordings need NumPy (pip install numpy); "
+                "JSONL recordings don't"
+            ) from e
+        _np = numpy
+    return _np
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+class ColumnarError(ValueError):
+    """Not a `.fsc` file, or one damaged beyond its last whole block."""
+
+
+class _StreamBuffer:
+    __slots__ = ("device", "sensor", "width", "seq", "t", "values", "blocks")
+
+    def __init__(self, device: str, sensor: str, width: int):
+        self.device = device
+        self.sensor = sensor
+        self.width = width
+        self.seq: List[int] = []
+        self.t: List[float] = []
+        self.values: List[float] = []
+        # Footer entries: [offset, n, seq_first, t_first, t_last].
+        self.blocks: List[list] = []
+
+
+class ColumnarWriter:
+    """
+    Appends frames and markers to a binary file object. Not
+    thread-safe — `RecorderSink` calls it from its writer thread only.
+    `flush()` writes every partial block (call it on the sink's flush
+    interval); `close()` flushes and writes the footer index.
+    """
+    def __init__(self, fh, dtype: str = "float64", block_rows: int = DEFAULT_BLOCK_ROWS):
+        if dtype not in _DTYPE_CODES:
+            raise ValueError(f"dtype must be one of {tuple(_DTYPE_CODES)}, got {dtype!r}")
+        self._fh = fh
+        self.dtype = dtype
+        self._code = _DTYPE_CODES[dtype]
+        self._values_dtype = _numpy().dtype(_DTYPES[self._code]).newbyteorder("<")
+        self.block_rows = int(block_rows)
+        self._streams: Dict[tuple, _StreamBuffer] = {}
+        self._markers: List[Tuple[int, dict]] = []
+        self._marker_blocks: List[int] = []
+        self._offset = 0
+        self.frames = 0
+        self._write(_FILE_HEAD.pack(MAGIC, VERSION, 0))
+
+    def _write(self, data: bytes) -> None:
+        self._fh.write(data)
+        self._offset += len(data)
+
+    @property
+    def size(self) -> int:
+        """Bytes written to the file so far (buffered rows excluded)."""
+        return self._offset
+
+    def frame(self, device: str, sensor: str, t_recv: float, values: Sequence) -> None:
+        """Append one frame. Raises TypeError / ValueError (and records
+        nothing) for a non-numeric value."""
+        row = [float(v) for v in values]
+        key = (device, sensor, len(row))
+        buf = self._streams.get(key)
+        if buf is None:
+            buf = self._streams[key] = _StreamBuffer(device, sensor, len(row))
+        buf.seq.append(self.frames)
+        buf.t.append(float(t_recv))
+        buf.values.extend(row)
+        self.frames += 1
+        if len(buf.t) >= self.block_rows:
+            self._write_frames(buf)
+
+    def marker(self, record: dict) -> None:
+        """Append a non-frame record (`_meta`, `_session`, `_gesture`),
+        ordered before the next frame."""
+        self._markers.append((self.frames, record))
+
+    def _write_frames(self, buf: _StreamBuffer) -> None:
+        np = _numpy()
+        n = len(buf.t)
+        names = b"".join(_NAME_LEN.pack(len(raw)) + raw
+                         for raw in (buf.device.encode("utf-8"), buf.sensor.encode("utf-8")))
+        names += b"\0" * _pad(_BLOCK_HEAD.size + len(names))
+        body = (np.asarray(buf.seq, dtype="<u8").tobytes()
+                + np.asarray(buf.t, dtype="<f8").tobytes()
+                + np.asarray(buf.values, dtype=self._values_dtype).tobytes())
+        body += b"\0" * _pad(len(body))
+        size = _BLOCK_HEAD.size + len(names) + len(body)
+        buf.blocks.append([self._offset, n, buf.seq[0], buf.t[0], buf.t[-1]])
+        self._write(_BLOCK_HEAD.pack(BLOCK_MAGIC, KIND_FRAMES, self._code,
+                                     buf.width, n, size) + names + body)
+        buf.seq.clear()
+        buf.t.clear()
+        buf.values.clear()
+
+    def _write_markers(self) -> None:
+        np = _numpy()
+        markers = self._markers
+        n = len(markers)
+        payload = (np.asarray([m[0] for m in markers], dtype="<u8").tobytes()
+                   + json.dumps([m[1] for m in markers], separators=(",", ":")).encode("utf-8"))
+        payload += b"\0" * _pad(len(payload))
+        size = _BLOCK_HEAD.size + len(payload)
+        self._marker_blocks.append(self._offset)
+        self._write(_BLOCK_HEAD.pack(BLOCK_MAGIC, KIND_MARKERS, b"\0", 0, n, size) + payload)
+        markers.clear()
+
+    def flush(self) -> None:
+        """Write every partial block, then flush the file object."""
+        if self._markers:
+            self._write_markers()
+        for buf in self._streams.values():
+            if buf.t:
+                self._write_frames(buf)
+        self._fh.flush()
+
+    def close(self) -> None:
+        """Flush and write the footer index and trailer. The file object
+        stays open (the caller owns it)."""
+        self.flush()
+        footer = json.dumps({
+            "version": VERSION,
+            "dtype": self.dtype,
+            "frames": self.frames,
+            "streams": [
+                {"device": b.device, "sensor": b.sensor, "width": b.width,
+                 "blocks": b.blocks}
+                for b in self._streams.values()
+            ],
+            "markers": self._marker_blocks,
+        }, separators=(",", ":")).encode("utf-8")
+        offset = self._offset
+        self._write(footer)
+        self._write(_TRAILER.pack(offset, len(footer), TRAILER_MAGIC))
+        self._fh.flush()
+
+
+class Stream:
+    """One (device, sensor, width) column set of a `.fsc` file."""
+    __slots__ = ("device", "sensor", "width", "dtype", "blocks", "_reader")
+
+    def __init__(self, reader: "ColumnarReader", device: str, sensor: str,
+                 width: int, dtype):
+        self._reader = reader
+        self.device = device
+        self.sensor = sensor
+        self.width = width
+        self.dtype = dtype
+        # [offset, n, seq_first, t_first, t_last] per block, file order.
+        self.blocks: List[list] = []
+
+    def __len__(self) -> int:
+        return sum(b[1] for b in self.blocks)
+
+    @property
+    def t_first(self) -> Optional[float]:
+        return self.blocks[0][3] if self.blocks else None
+
+    @property
+    def t_last(self) -> Optional[float]:
+        return self.blocks[-1][4] if self.blocks else None
+
+    def block(self, i: int) -> tuple:
+        """(seq, t_recv, values[n, width]) of block `i` — read-only views
+        into the mapped file, no copy."""
+        return self._reader._frame_block(self.blocks[i][0])
+
+    def arrays(self) -> tuple:
+        """(seq, t_recv, values) over the whole stream. Views for a
+        single-block stream; otherwise one concatenated copy."""
+        np = _numpy()
+        parts = [self.block(i) for i in range(len(self.blocks))]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return (np.empty(0, np.uint64), np.empty(0, np.float64),
+                    np.empty((0, self.width), self.dtype))
+        return tuple(np.concatenate([p[k] for p in parts]) for k in range(3))
+
+
+class ColumnarReader:
+    """
+    Memory-mapped `.fsc` reader. Uses the footer index when present and
+    falls back to scanning the blocks (`recovered` is then True). Use
+    as a context manager, or `close()`; arrays handed out stay valid
+    until then.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        if segments.is_compressed(self.path):
+            # A compressed segment can't be mapped; read it into memory.
+            with segments.open_file(self.path, "rb") as fh:
+                self._mm = fh.read()
+        else:
+            with self.path.open("rb") as fh:
+                try:
+                    self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    raise ColumnarError(f"{self.path}: empty file") from None
+        np = _numpy()
+        self._buf = np.frombuffer(self._mm, dtype=np.uint8)
+        try:
+            magic, version, _ = _FILE_HEAD.unpack_from(self._mm, 0)
+        except struct.error:
+            magic, version = b"", 0
+        if magic != MAGIC:
+            self.close()
+            raise ColumnarError(f"{self.path}: not a {SUFFIX} recording")
+        if version > VERSION:
+            self.close()
+            raise ColumnarError(f"{self.path}: format version {version} is newer than {VERSION}")
+        self.streams: List[Stream] = []
+        self._by_key: Dict[tuple, Stream] = {}
+        self.markers: List[Tuple[int, dict]] = []
+        self.recovered = not self._load_footer()
+        if self.recovered:
+            self._scan()
+        self.frame_count = sum(len(s) for s in self.streams)
+
+    # --- Index ----------------------------------------------------------------
+
+    def _stream(self, device: str, sensor: str, width: int, dtype) -> Stream:
+        key = (device, sensor, width)
+        stream = self._by_key.get(key)
+        if stream is None:
+            stream = self._by_key[key] = Stream(self, device, sensor, width, dtype)
+            self.streams.append(stream)
+        return stream
+
+    def _load_footer(self) -> bool:
+        mm = self._mm
+        if len(mm) < _FILE_HEAD.size + _TRAILER.size:
+            return False
+        offset, length, magic = _TRAILER.unpack_from(mm, len(mm) - _TRAILER.size)
+        if magic != TRAILER_MAGIC or offset + length + _TRAILER.size != len(mm):
+            return False
+        try:
+            footer = json.loads(bytes(mm[offset:offset + length]))
+        except ValueError:
+            return False
+        dtype = _DTYPES[_DTYPE_CODES[footer["dtype"]]]
+        for s in footer["streams"]:
+            self._stream(s["device"], s["sensor"], s["width"], dtype).blocks = s["blocks"]
+        for block_offset in footer["markers"]:
+            self.markers.extend(self._marker_block(block_offset))
+        return True
+
+    def _scan(self) -> None:
+        mm = self._mm
+        end = len(mm)
+        offset = _FILE_HEAD.size
+        while offset + _BLOCK_HEAD.size <= end:
+            magic, kind, code, width, n, size = _BLOCK_HEAD.unpack_from(mm, offset)
+            if magic != BLOCK_MAGIC or size < _BLOCK_HEAD.size or offset + size > end:
+                break
+            if kind == KIND_FRAMES:
+                seq, t, _ = self._frame_block(offset)
+                device, sensor = self._names(offset)
+                self._stream(device, sensor, width, _DTYPES[code]).blocks.append(
+                    [offset, n, int(seq[0]), float(t[0]), float(t[-1])])
+            elif kind == KIND_MARKERS:
+                try:
+                    self.markers.extend(self._marker_block(offset))
+                except ValueError:
+                    break
+            offset += size
+        self.markers.sort(key=lambda m: m[0])
+
+    def _names(self, offset: int) -> Tuple[str, str]:
+        mm = self._mm
+        pos = offset + _BLOCK_HEAD.size
+        names = []
+        for _ in range(2):
+            (n,) = _NAME_LEN.unpack_from(mm, pos)
+            names.append(bytes(mm[pos + 2:pos + 2 + n]).decode("utf-8"))
+            pos += 2 + n
+        return names[0], names[1]
+
+    def _frame_block(self, offset: int):
+        mm = self._mm
+        _, _, code, width, n, _ = _BLOCK_HEAD.unpack_from(mm, offset)
+        pos = offset + _BLOCK_HEAD.size
+        for _ in range(2):
+            (length,) = _NAME_LEN.unpack_from(mm, pos)
+            pos += 2 + length
+        pos += _pad(pos - offset)
+        buf = self._buf
+        seq = buf[pos:pos + 8 * n].view("<u8")
+        pos += 8 * n
+        t = buf[pos:pos + 8 * n].view("<f8")
+        pos += 8 * n
+        dtype = _numpy().dtype(_DTYPES[code]).newbyteorder("<")
+        values = buf[pos:pos + dtype.itemsize * n * width].view(dtype).reshape(n, width)
+        return seq, t, values
+
+    def _marker_block(self, offset: int) -> List[Tuple[int, dict]]:
+        mm = self._mm
+        _, _, _, _, n, size = _BLOCK_HEAD.unpack_from(mm, offset)
+        pos = offset + _BLOCK_HEAD.size
+        seq = self._buf[pos:pos + 8 * n].view("<u8").tolist()
+        raw = bytes(mm[pos + 8 * n:offset + size]).rstrip(b"\0")
+        return list(zip(seq, json.loads(raw)))
+
+    # --- Access ---------------------------------------------------------------
+
+    @property
+    def meta(self) -> Optional[dict]:
+        for _, record in self.markers:
+            if "_meta" in record:
+                return record["_meta"]
+        return None
+
+    def stream(self, device: str, sensor: str) -> Optional[Stream]:
+        """The stream for (device, sensor); the longest one if the
+        value width changed mid-session."""
+        found = [s for s in self.streams if s.device == device and s.sensor == sensor]
+        return max(found, key=len) if found else None
+
+    def sensor_arrays(self, sensor: str, device: Optional[str] = None) -> tuple:
+        """(t_recv, values) of every `sensor` stream (of `device`, or of
+        all devices) in recording order. Widths must agree."""
+        np = _numpy()
+        streams = [s for s in self.streams if s.sensor == sensor
+                   and (device is None or s.device == device)]
+        if not streams:
+            return np.empty(0, np.float64), np.empty((0, 0), np.float64)
+        parts = [s.arrays() for s in streams]
+        if len(parts) == 1:
+            return parts[0][1], parts[0][2]
+        seq = np.concatenate([p[0] for p in parts])
+        order = np.argsort(seq, kind="stable")
+        return (np.concatenate([p[1] for p in parts])[order],
+                np.concatenate([p[2] for p in parts])[order])
+
+    def iter_frames(self) -> Iterator[Tuple[str, str, float, list]]:
+        """(device, sensor, t_recv, values) in recording order."""
+        for record in self.iter_records(markers=False):
+            yield record["device"], record["sensor"], record["t_recv"], record["values"]
+
+    def iter_records(self, markers: bool = True) -> Iterator[dict]:
+        """Every record as the JSONL reader would yield it — frames as
+        `{"device", "sensor", "t_recv", "values"}` dicts, markers as
+        written — in the order they were recorded."""
+        cols = []
+        for stream in self.streams:
+            seq, t, values = stream.arrays()
+            cols.append((stream.device, stream.sensor, seq, t.tolist(), values.tolist()))
+        pending = list(self.markers) if markers else []
+        m = 0
+        if cols:
+            np = _numpy()
+            seq = np.concatenate([c[2] for c in cols])
+            which = np.concatenate([np.full(len(c[2]), i, dtype=np.intp)
+                                    for i, c in enumerate(cols)])
+            row = np.concatenate([np.arange(len(c[2]), dtype=np.intp) for c in cols])
+            order = np.argsort(seq, kind="stable")
+            for s, i, r in zip(seq[order].tolist(), which[order].tolist(), row[order].tolist()):
+                while m < len(pending) and pending[m][0] <= s:
+                    yield pending[m][1]
+                    m += 1
+                device, sensor, _, ts, vals = cols[i]
+                yield {"device": device, "sensor": sensor, "t_recv": ts[r], "values": vals[r]}
+        for _, record in pending[m:]:
+            yield record
+
+    def close(self) -> None:
+        self._buf = None
+        mm, self._mm = getattr(self, "_mm", None), None
+        if isinstance(mm, mmap.mmap):
+            try:
+                mm.close()
+            except BufferError:
+                # Arrays handed out still reference the mapping; it is
+                # released when the last of them goes.
+                pass
+
+    def __enter__(self) -> "ColumnarReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def is_columnar(path) -> bool:
+    """True if `path` starts with the `.fsc` magic (any extension,
+    compressed segments included)."""
+    try:
+        with segments.open_file(path, "rb") as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except segments.READ_ERRORS:
+        return False
+
+
+def iter_records(path) -> Iterator[dict]:
+    """Records of a recording in file order, JSONL or `.fsc` alike:
+    frames as `{"device", "sensor", "t_recv", "values"}`, plus the
+    `_meta` / `_session` / `_gesture` records. A segmented session's
+    manifest (sense/segments.py) yields its segments in turn."""
+    for segment in segments.segment_paths(path):
+        if is_columnar(segment):
+            with ColumnarReader(segment) as reader:
+                yield from reader.iter_records()
+            continue
+        with segments.open_file(segment, "r") as fh:
+            for line in fh:
+                if not line.endswith("\n"):
+                    # Last line of a file whose writer died mid-write.
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    yield record
+                    break
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
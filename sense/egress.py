@@ -0,0 +1,272 @@
+"""
+UDP egress thread: take socket sends off the producer threads.
+
+Without it, `OscEmit` calls `sendto` on the BLE callback (or frame-
+queue worker) thread, so a slow or erroring send — a full socket
+buffer, an ICMP-unreachable receiver turning every send into an
+exception — is paid for by the device's sample path. With egress
+enabled (`run_fs.py --osc-egress thread`), producers hand pre-encoded
+datagrams to a bounded `Egress` queue and return; one sender thread
+drains the queue in batches and does all the socket work.
+
+The producer side is one short critical section per datagram (deque
+append, a counter, a condition notify) and never raises. When the
+sender falls behind and the queue is full, the oldest pending datagram
+is dropped — for live control data the freshest value matters, and
+latency stays bounded by `capacity`.
+
+Receiver-unreachable errnos (`TRANSIENT_ERRNOS`) are counted per
+target and fed to the target's `breaker.CircuitBreaker`; while it is
+open, `EgressClient` skips the enqueue entirely and only the breaker's
+probe datagrams reach the sender; anything else is counted and logged
+at most once per target per `ERROR_LOG_INTERVAL_S`. Python has no
+`sendmmsg`, so a "batch" is every datagram pending at wake-up sent in
+one tight loop without re-taking the lock.
+
+`EgressClient` is the producer handle: a drop-in for `WireClient`
+(`send_message` / `send` / `send_dgram`) bound to one (ip, port)
+target, so `OscEmit` and the best-effort state senders use it
+unchanged. Counters (`stats()`): enqueued, sent, dropped (overflow /
+closed), depth and high-water depth, plus per-target sent / bytes /
+transient and other errors. The sender also records every send in the
+target's `telemetry.TargetTelemetry` (errno breakdown, send time).
+"""
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from time import perf_counter_ns
+from typing import Dict, Optional, Tuple
+
+from .breaker import TRANSIENT_ERRNOS, CircuitBreaker, breaker_for
+from .oscwire import ENCODER, OscEncoder
+from .telemetry import TargetTelemetry, telemetry_for
+
+log = logging.getLogger("fs.egress")
+
+DEFAULT_CAPACITY = 1024
+ERROR_LOG_INTERVAL_S = 10.0
+
+
+class TargetStats:
+    """Per-target counters, written by the sender thread only."""
+    __slots__ = ("sent", "bytes", "transient_errors", "errors", "last_error",
+                 "breaker", "telemetry", "_last_logged")
+
+    def __init__(self, breaker: CircuitBreaker, telemetry: TargetTelemetry):
+        self.breaker = breaker
+        self.telemetry = telemetry
+        self.sent = 0
+        self.bytes = 0
+        self.transient_errors = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._last_logged = 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "sent": self.sent,
+            "bytes": self.bytes,
+            "transient_errors": self.transient_errors,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "breaker": self.breaker.state,
+            "skipped": self.breaker.skipped,
+        }
+
+
+class Egress:
+    """
+    Bounded datagram queue drained by one daemon sender thread.
+    `send(target, dgram)` is safe from any thread; `target` is a
+    resolved `(family, sockaddr)` pair (see `EgressClient`).
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, name: str = "fs-egress"):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.capacity = int(capacity)
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._closed = False
+        self._sockets: Dict[int, socket.socket] = {}
+        self._targets: Dict[tuple, TargetStats] = {}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped_overflow = 0
+        self.dropped_closed = 0
+        self.batches = 0
+        self.max_depth = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def send(self, target: tuple, dgram: bytes) -> bool:
+        """Queue one datagram. Returns False iff it was dropped because
+        the egress is closed; an overflow evicts the oldest instead."""
+        with self._lock:
+            if self._closed:
+                self.dropped_closed += 1
+                return False
+            pending = self._pending
+            if len(pending) >= self.capacity:
+                pending.popleft()
+                self.dropped_overflow += 1
+            pending.append((target, dgram))
+            self.enqueued += 1
+            depth = len(pending)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._not_empty.notify()
+        return True
+
+    def _take_batch(self) -> list:
+        with self._lock:
+            if not self._pending and not self._closed:
+                self._not_empty.wait()
+            if not self._pending:
+                return []
+            batch = list(self._pending)
+            self._pending.clear()
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self._closed:
+                    return
+                continue
+            self.batches += 1
+            self._send_batch(batch)
+
+    def _send_batch(self, batch: list) -> None:
+        sockets = self._sockets
+        targets = self._targets
+        sent = 0
+        for (family, sockaddr), dgram in batch:
+            sock = sockets.get(family)
+            if sock is None:
+                sock = sockets[family] = socket.socket(family, socket.SOCK_DGRAM)
+            stats = targets.get(sockaddr)
+            if stats is None:
+                stats = targets[sockaddr] = TargetStats(
+                    breaker_for(sockaddr[0], sockaddr[1]),
+                    telemetry_for(sockaddr[0], sockaddr[1]))
+            t0 = perf_counter_ns()
+            try:
+                sock.sendto(dgram, sockaddr)
+            except OSError as e:
+                stats.telemetry.record_error(e)
+                if e.errno in TRANSIENT_ERRNOS:
+                    stats.transient_errors += 1
+                    stats.breaker.record_failure()
+                    continue
+                self._send_error(sockaddr, stats, e)
+                continue
+            except BaseException as e:
+                stats.telemetry.record_error(e)
+                self._send_error(sockaddr, stats, e)
+                continue
+            stats.telemetry.record(len(dgram), perf_counter_ns() - t0)
+            if stats.breaker.consecutive:
+                stats.breaker.record_success()
+            stats.sent += 1
+            stats.bytes += len(dgram)
+            sent += 1
+        self.sent += sent
+
+    @staticmethod
+    def _send_error(sockaddr, stats: TargetStats, e: BaseException) -> None:
+        stats.errors += 1
+        stats.last_error = repr(e)
+        now = time.monotonic()
+        if now - stats._last_logged >= ERROR_LOG_INTERVAL_S:
+            stats._last_logged = now
+            log.warning("[egress] send to %s failed (%d so far): %s",
+                        sockaddr, stats.errors, e)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop accepting datagrams, send what's pending, join, close sockets."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                log.warning("[egress] sender did not drain within %.1fs (depth=%d)",
+                            timeout, self.depth)
+                return
+        for sock in self._sockets.values():
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_overflow + self.dropped_closed
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "capacity": self.capacity,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "batches": self.batches,
+            "dropped_overflow": self.dropped_overflow,
+            "dropped_closed": self.dropped_closed,
+            "targets": {
+                f"{addr[0]}:{addr[1]}": stats.as_dict()
+                for addr, stats in list(self._targets.items())
+            },
+        }
+
+
+def resolve_target(ip: str, port: int) -> Tuple[int, tuple]:
+    """`(family, sockaddr)` for a UDP target — resolved once, not per send."""
+    family, _, _, _, sockaddr = socket.getaddrinfo(
+        ip, port, type=socket.SOCK_DGRAM)[0]
+    return family, sockaddr
+
+
+class EgressClient:
+    """
+    Producer handle for one target: a drop-in for `oscwire.WireClient`
+    that queues instead of sending. Never raises on send; returns False
+    when the datagram was not queued (breaker open, egress closed).
+    """
+    def __init__(self, egress: Egress, ip: str, port: int,
+                 encoder: Optional[OscEncoder] = None):
+        self.egress = egress
+        self.ip = ip
+        self.port = port
+        self.target = resolve_target(ip, port)
+        sockaddr = self.target[1]
+        self.breaker = breaker_for(sockaddr[0], sockaddr[1])
+        self.encoder = encoder or ENCODER
+
+    def send_dgram(self, dgram: bytes) -> bool:
+        breaker = self.breaker
+        if breaker.open and not breaker.allow():
+            return False
+        return self.egress.send(self.target, dgram)
+
+    def send_message(self, address: str, value) -> bool:
+        return self.send_dgram(self.encoder.encode(address, value))
+
+    def send(self, content) -> bool:
+        """python-osc `OscMessage` / `OscBundle` (anything with `.dgram`)."""
+        return self.send_dgram(content.dgram)
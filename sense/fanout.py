@@ -0,0 +1,251 @@
+"""
+Multi-target OSC fan-out.
+
+`ControlledOSCConnection.client` used to be one `WireClient` for one
+(ip, port). A rig with PD, a visualiser and a logging host each wanting
+a different slice of `/<MAC>/...` had to pick one. `FanOut` is a
+drop-in client (`send_message` / `send` / `send_dgram`) over any number
+of named targets, each with its own address patterns (shell wildcards
+as in /cmd/subscribe; `*` also matches `/`). The `default` target is
+the one from `fs_config.json`'s `network` section with pattern `*`, so
+a single-target setup behaves as before.
+
+Messages are encoded once. Which targets get an address is worked out
+the first time the address is seen and cached in a `Route`; OscEmit
+holds on to the `Route` per (device, sensor), so the per-frame cost is
+one call through `route.send` — two counter adds, then for one
+matching target the target client's own `send_dgram`. Adding or
+removing a target re-resolves every cached route in place (one
+attribute store each), so holders never re-lookup and the send path
+never locks.
+
+Each target's client comes from `ControlledOSCConnection.make_client`,
+so it goes through the egress thread when that's on and has its own
+circuit breaker. A send error on one target doesn't stop the others;
+the first one is re-raised after all targets were tried.
+"""
+import fnmatch
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .oscwire import ENCODER, OscEncoder
+
+log = logging.getLogger("fs.fanout")
+
+DEFAULT_TARGET = "default"
+MATCH_ALL = ("*",)
+
+# Route cache bound. Routes handed out are kept (holders rely on them
+# being re-resolved), so past the cap new addresses are matched
+# per send instead of cached.
+MAX_ROUTES = 4096
+
+
+class Target:
+    """One named receiver: its client and compiled address patterns."""
+    __slots__ = ("name", "ip", "port", "patterns", "client", "_match")
+
+    def __init__(self, name: str, ip: str, port: int, patterns: Sequence[str], client):
+        self.name = name
+        self.ip = ip
+        self.port = int(port)
+        self.patterns = tuple(patterns)
+        self.client = client
+        self._match = re.compile(
+            "|".join(fnmatch.translate(p) for p in self.patterns)).match
+
+    def wants(self, address: str) -> bool:
+        return self._match(address) is not None
+
+    def as_list(self) -> list:
+        """`/state/targets` payload."""
+        return [self.name, f"{self.ip}:{self.port}", ",".join(self.patterns)]
+
+
+def _drop(dgram: bytes) -> None:
+    return None
+
+
+class Route:
+    """
+    Resolved recipients of one address. `send(dgram)` is rebound
+    whenever the target set changes: a no-op for none, otherwise a
+    counting wrapper around `_deliver` — the client's own `send_dgram`
+    for one target, a loop for several. `messages` / `bytes` count
+    what was emitted on this address (once, whatever the target count;
+    see sense/telemetry.py).
+    """
+    __slots__ = ("address", "targets", "send", "_deliver", "messages", "bytes")
+
+    def __init__(self, address: str):
+        self.address = address
+        self.targets: Tuple[Target, ...] = ()
+        self.send: Callable[[bytes], object] = _drop
+        self._deliver: Callable[[bytes], object] = _drop
+        self.messages = 0
+        self.bytes = 0
+
+    def resolve(self, targets: Sequence[Target]) -> None:
+        matched = tuple(t for t in targets if t.wants(self.address))
+        self.targets = matched
+        if not matched:
+            self._deliver = _drop
+            self.send = _drop
+            return
+        if len(matched) == 1:
+            self._deliver = matched[0].client.send_dgram
+        else:
+            sends = tuple(t.client.send_dgram for t in matched)
+            self._deliver = lambda dgram: _send_all(sends, dgram)
+        self.send = self._send_counted
+
+    def _send_counted(self, dgram: bytes):
+        self.messages += 1
+        self.bytes += len(dgram)
+        return self._deliver(dgram)
+
+    def count(self, nbytes: int) -> None:
+        """Account a message sent as part of a group (bundle / packed)."""
+        if self.targets:
+            self.messages += 1
+            self.bytes += nbytes
+
+
+def _send_all(sends, dgram: bytes) -> None:
+    error: Optional[BaseException] = None
+    for send in sends:
+        try:
+            send(dgram)
+        except BaseException as e:
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+
+
+class FanOut:
+    """
+    Drop-in outbound client over named targets. `make_client(ip,
+    port)` builds each target's client. Target changes are serialized
+    by a lock; sends never take it.
+    """
+    def __init__(self, make_client: Callable[[str, int], object],
+                 encoder: Optional[OscEncoder] = None):
+        self._make_client = make_client
+        self.encoder = encoder or ENCODER
+        self._lock = threading.Lock()
+        self._targets: Tuple[Target, ...] = ()
+        self._routes: Dict[str, Route] = {}
+
+    # --- Targets --------------------------------------------------------------
+
+    @property
+    def targets(self) -> Tuple[Target, ...]:
+        return self._targets
+
+    def target(self, name: str) -> Optional[Target]:
+        return next((t for t in self._targets if t.name == name), None)
+
+    def set_target(self, name: str, ip: str, port: int,
+                   patterns: Optional[Sequence[str]] = None,
+                   client=None) -> Target:
+        """Add or replace target `name`. `patterns=None` keeps an
+        existing target's patterns (`*` for a new one). `client`
+        overrides `make_client(ip, port)` for targets that aren't UDP
+        receivers (the TCP stream server)."""
+        with self._lock:
+            old = self.target(name)
+            if patterns is None:
+                patterns = old.patterns if old is not None else MATCH_ALL
+            if client is None:
+                client = self._make_client(ip, int(port))
+            new = Target(name, ip, port, patterns, client)
+            targets = [t for t in self._targets if t.name != name]
+            if old is not None:
+                targets.insert(self._targets.index(old), new)
+            else:
+                targets.append(new)
+            self._publish(tuple(targets))
+        log.info("[fanout] target %s → %s:%d %s", name, ip, new.port, list(new.patterns))
+        return new
+
+    def remove_target(self, name: str) -> bool:
+        with self._lock:
+            if self.target(name) is None:
+                return False
+            self._publish(tuple(t for t in self._targets if t.name != name))
+        log.info("[fanout] target %s removed", name)
+        return True
+
+    def _publish(self, targets: Tuple[Target, ...]) -> None:
+        # Caller holds _lock.
+        self._targets = targets
+        for route in list(self._routes.values()):
+            route.resolve(targets)
+
+    def apply_config(self, section: Optional[dict]) -> None:
+        """Add the targets from fs_config's `targets` section. A null
+        entry is a target C2 removed (`/cmd/target/remove`) — skipped."""
+        for name, entry in (section or {}).items():
+            if entry is None or name == DEFAULT_TARGET:
+                continue
+            self.set_target(name, entry["ip"], entry["port"],
+                            entry.get("patterns") or MATCH_ALL)
+
+    # --- Routing --------------------------------------------------------------
+
+    def route(self, address: str) -> Route:
+        """Cached `Route` for `address`; kept up to date across target
+        changes, so callers may hold it."""
+        route = self._routes.get(address)
+        if route is None:
+            route = Route(address)
+            route.resolve(self._targets)
+            if len(self._routes) < MAX_ROUTES:
+                with self._lock:
+                    # Resolve again under the lock: a target change may
+                    # have published between the first resolve and here.
+                    route = self._routes.setdefault(address, route)
+                    route.resolve(self._targets)
+        return route
+
+    def routes(self) -> Dict[str, Route]:
+        """Snapshot of the cached routes (per-address telemetry)."""
+        return dict(self._routes)
+
+    def partition(self, addresses: Sequence[str]) -> List[Tuple[List[int], Tuple[Callable, ...]]]:
+        """Group a multi-message send (a bundle, a packed message) by
+        recipient: `(indices into addresses, target sends)` per distinct
+        subset, so each subset is encoded once."""
+        per_target: Dict[str, List[int]] = {}
+        sends: Dict[str, Callable] = {}
+        for i, address in enumerate(addresses):
+            for t in self.route(address).targets:
+                per_target.setdefault(t.name, []).append(i)
+                sends[t.name] = t.client.send_dgram
+        groups: Dict[Tuple[int, ...], List[Callable]] = {}
+        for name, indices in per_target.items():
+            groups.setdefault(tuple(indices), []).append(sends[name])
+        return [(list(idx), tuple(s)) for idx, s in groups.items()]
+
+    # --- Client interface -----------------------------------------------------
+
+    # Like WireClient, sends return the single target's result (False
+    # when its breaker skipped the send), else None.
+
+    def send_message(self, address: str, value):
+        return self.route(address).send(self.encoder.encode(address, value))
+
+    def send_dgram(self, dgram: bytes):
+        """Route pre-encoded bytes by the address they carry; a
+        `#bundle` goes to every target."""
+        if dgram[:1] == b"/":
+            address = dgram[:dgram.index(b"\x00")].decode("utf-8")
+            return self.route(address).send(dgram)
+        return _send_all(tuple(t.client.send_dgram for t in self._targets), dgram)
+
+    def send(self, content):
+        """python-osc `OscMessage` / `OscBundle` (anything with `.dgram`)."""
+        return self.send_dgram(content.dgram)
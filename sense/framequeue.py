@@ -0,0 +1,213 @@
+"""
+Per-device frame queues: decouple pipeline execution from the BLE
+callback thread.
+
+By default `MetaWearState._emit` runs the whole pipeline synchronously
+inside the libmetawear callback — DTW matching, JSONL recording and the
+UDP send all happen before the callback returns, and anything slow
+there throttles the BLE link (see the ~9 Hz linear_acc cap noted in
+`sense.position`). With a queue enabled, the callback only builds the
+`IMUFrame` and `put()`s it; a per-device `PipelineWorker` thread drains
+the queue in batches and pushes each frame through its pipeline.
+
+The producer side is one short critical section per frame (deque append
+plus a condition notify) — the BLE thread never waits on downstream
+work. What happens when the worker falls behind and the queue is full
+is the overflow policy:
+
+- `drop-oldest` (default): evict the oldest pending frame. Downstream
+  sees a gap; latency stays bounded by `capacity`.
+- `coalesce`: evict the oldest pending frame *of the same sensor* and
+  append the new one, so each stream keeps its freshest sample and a
+  burst on one sensor can't starve the others. Falls back to
+  drop-oldest when no same-sensor frame is pending.
+- `block`: the callback waits up to `block_timeout_s` for space, then
+  drops the new frame. Lossless under short hiccups, but it's the one
+  policy that can stall BLE — use for recording runs, not live.
+
+Counters (`stats()`): enqueued, processed, dropped (by reason), current
+depth and high-water depth.
+
+Ordering: frames of one device are processed in arrival order (minus
+whatever overflow evicted). Side channels that bypass the queue — e.g.
+`RecorderSink.mark_gesture_start` from the button thread — can land up
+to one queue depth earlier in the JSONL than they would synchronously.
+"""
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from .pipeline import IMUFrame
+
+log = logging.getLogger("fs.framequeue")
+
+OVERFLOW_DROP_OLDEST = "drop-oldest"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_BLOCK)
+
+DEFAULT_CAPACITY = 256
+DEFAULT_BLOCK_TIMEOUT_S = 0.05
+
+
+class FrameQueue:
+    """Bounded single-device frame queue with a selectable overflow policy."""
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        policy: str = OVERFLOW_DROP_OLDEST,
+        block_timeout_s: float = DEFAULT_BLOCK_TIMEOUT_S,
+    ):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"policy must be one of {OVERFLOW_POLICIES}, got {policy!r}")
+        self.capacity = int(capacity)
+        self.policy = policy
+        self.block_timeout_s = float(block_timeout_s)
+        self._frames: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped_oldest = 0
+        self.coalesced = 0
+        self.dropped_timeout = 0
+        self.max_depth = 0
+
+    def put(self, frame: IMUFrame) -> bool:
+        """
+        Enqueue `frame`. Returns False iff the frame itself was dropped
+        (queue closed, or `block` policy timed out) — evicting an older
+        frame still counts as a successful put.
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            frames = self._frames
+            if len(frames) >= self.capacity:
+                if self.policy == OVERFLOW_BLOCK:
+                    if not self._not_full.wait_for(
+                        lambda: len(self._frames) < self.capacity or self._closed,
+                        timeout=self.block_timeout_s,
+                    ) or self._closed:
+                        self.dropped_timeout += 1
+                        return False
+                elif self.policy == OVERFLOW_COALESCE:
+                    self._evict_same_sensor(frame.sensor)
+                else:
+                    frames.popleft()
+                    self.dropped_oldest += 1
+            frames.append(frame)
+            self.enqueued += 1
+            depth = len(frames)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._not_empty.notify()
+        return True
+
+    def _evict_same_sensor(self, sensor: str) -> None:
+        frames = self._frames
+        for i, pending in enumerate(frames):
+            if pending.sensor == sensor:
+                del frames[i]
+                self.coalesced += 1
+                return
+        frames.popleft()
+        self.dropped_oldest += 1
+
+    def get_batch(self, timeout: Optional[float] = None) -> list:
+        """
+        Block until at least one frame is pending (or `timeout` / close),
+        then take *every* pending frame in one go. Returns [] on timeout
+        or when closed and empty.
+        """
+        with self._lock:
+            if not self._frames and not self._closed:
+                self._not_empty.wait(timeout)
+            if not self._frames:
+                return []
+            batch = list(self._frames)
+            self._frames.clear()
+            self._not_full.notify_all()
+        return batch
+
+    def close(self) -> None:
+        """Stop accepting frames and wake any waiters. Pending frames stay
+        drainable via get_batch()."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_oldest + self.coalesced + self.dropped_timeout
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "policy": self.policy,
+            "capacity": self.capacity,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped_oldest": self.dropped_oldest,
+            "coalesced": self.coalesced,
+            "dropped_timeout": self.dropped_timeout,
+        }
+
+
+class PipelineWorker:
+    """
+    Daemon thread draining one `FrameQueue` into `dispatch(frame)`.
+    `dispatch` is called on the worker thread; exceptions from it are
+    logged and contained per frame (stage errors are already contained
+    inside `Pipeline.push`).
+    """
+    def __init__(self, queue: FrameQueue, dispatch: Callable[[IMUFrame], None],
+                 name: str = "fs-pipeline"):
+        self.queue = queue
+        self._dispatch = dispatch
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        queue = self.queue
+        dispatch = self._dispatch
+        while True:
+            batch = queue.get_batch()
+            if not batch:
+                if queue.closed:
+                    return
+                continue
+            for frame in batch:
+                try:
+                    dispatch(frame)
+                except BaseException:
+                    log.exception("[%s] dispatch raised on %s/%s",
+                                  self._thread.name, frame.device, frame.sensor)
+            queue.processed += len(batch)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Close the queue, let the worker drain what's pending, and join."""
+        self.queue.close()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                log.warning("[%s] worker did not drain within %.1fs (depth=%d)",
+                            self._thread.name, timeout, self.queue.depth)
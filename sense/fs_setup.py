@@ -34,6 +34,8 @@ ALLOWED_FUSION_OUTPUTS = (
     "quaternion", "euler_angle", "linear_acc", "gravity",
     "corrected_acc", "corrected_gyro", "corrected_mag",
 )
+# Keys of an `emission` rule — pipeline.EmitPolicy's TUNABLE_PARAMS.
+EMISSION_PARAMS = ("max_hz", "deadband", "deadband_rel", "refresh_s")
 
 
 def _local_override_path(path: str) -> str:
@@ -129,6 +131,19 @@ def read_fugue_states_config(path) -> dict:
             }
         }
 
+    An optional top-level `"emission"` object maps OSC address
+    patterns to send-rate / deadband limits, e.g.
+    `{"tilt": {"max_hz": 30}, "temp": {"deadband": 0.05}}`. Params are
+    `max_hz`, `deadband`, `deadband_rel` and `refresh_s` (see
+    `pipeline.EmitPolicy`); run_fs.py applies it with
+    `apply_emission_policy`.
+
+    An optional top-level `"targets"` object adds OSC receivers next
+    to `network` (the `default` target), each getting only the
+    addresses matching its patterns (all of them when omitted), e.g.
+    `{"viz": {"ip": "192.168.4.60", "port": 9000,
+    "patterns": ["/*/tilt", "/*/acc_mag"]}}`. See `sense/fanout.py`.
+
     Sensor Fusion (when present) is exclusive with Accelerometer /
     Gyroscope / Magnetometer; the validator drops the raw sensors and
     keeps Sensor Fusion. The fusion `outputs` list selects any subset
@@ -181,6 +196,12 @@ def validate_config(config) -> dict:
         if not _validate_device(device):
             valid = False
 
+    if "emission" in config and not _validate_emission(config["emission"]):
+        valid = False
+
+    if "targets" in config and not _validate_targets(config["targets"]):
+        valid = False
+
     config["valid"] = valid
     return config
 
@@ -206,6 +227,58 @@ def _validate_network(network) -> bool:
     return valid
 
 
+def _validate_emission(emission) -> bool:
+    if not isinstance(emission, dict):
+        log.error("'emission' must map address patterns to params, got %r", emission)
+        return False
+    valid = True
+    for pattern, params in emission.items():
+        if not isinstance(params, dict):
+            log.error("emission %r: params must be an object, got %r", pattern, params)
+            valid = False
+            continue
+        for key, value in params.items():
+            if key not in EMISSION_PARAMS:
+                log.error("emission %r: unknown param %r — allowed: %s",
+                          pattern, key, EMISSION_PARAMS)
+                valid = False
+            elif isinstance(value, bool) or not isinstance(value, (int, float)) \
+                    or value < 0:
+                log.error("emission %r: %s must be a number >= 0, got %r",
+                          pattern, key, value)
+                valid = False
+    return valid
+
+
+def _validate_targets(targets) -> bool:
+    if not isinstance(targets, dict):
+        log.error("'targets' must map names to {ip, port, patterns}, got %r", targets)
+        return False
+    valid = True
+    for name, entry in targets.items():
+        if entry is None:
+            continue  # removed via /cmd/target/remove
+        if name == "default":
+            log.error("targets: 'default' is reserved for the network section")
+            valid = False
+            continue
+        if not isinstance(entry, dict):
+            log.error("targets %r: expected an object, got %r", name, entry)
+            valid = False
+            continue
+        if not is_valid_ip(entry.get("ip", "")) or not is_valid_port(entry.get("port", -1)):
+            log.error("targets %r: invalid ip/port %r:%r",
+                      name, entry.get("ip"), entry.get("port"))
+            valid = False
+        patterns = entry.get("patterns", [])
+        if not isinstance(patterns, list) or not all(
+                isinstance(p, str) and p.startswith("/") for p in patterns):
+            log.error("targets %r: patterns must be a list of OSC address "
+                      "patterns, got %r", name, patterns)
+            valid = False
+    return valid
+
+
 def _validate_device(device) -> bool:
     valid = True
     sensors = device.setdefault("sensors", {})
@@ -25,7 +25,9 @@ Components:
   `np.ndarray` of shape `(n_samples, n_features)`. Z-normed at build
   iff library.zscore is True; otherwise stored raw.
 - `GestureLibrary.from_files(paths, ...)` — loads templates from
-  `--capture-label` JSONL recordings, optionally filters outliers
+  `--capture-label` recordings (JSONL or `.fsc`), reading only the
+  gesture windows (`recindex.iter_gesture_windows`, which seeks via
+  the index sidecar when there is one), optionally filters outliers
   per label via Median Absolute Deviation, computes per-label
   thresholds from intra-label pairwise DTW.
 - `GestureRecognizer(library, ...)` — Pipeline Stage. Inserted into
@@ -45,7 +47,6 @@ the cost is observable via `Pipeline.stats[GestureRecognizer]` after
 a run. To compare configurations, re-run with different
 `--gesture-features` sets and read the mean/max timings.
 """
-import json
 import logging
 import time
 from collections import defaultdict, deque
@@ -56,6 +57,7 @@ from typing import Iterable, List, Optional, Set, Tuple
 import numpy as np
 from dtaidistance import dtw_ndim
 
+from .recindex import iter_gesture_windows
 from .pipeline import IMUFrame, Stage
 
 log = logging.getLogger("fs.gesture")
@@ -75,26 +77,11 @@ def _discover_feature_sensors(paths) -> Tuple[str, ...]:
     """
     per_window_scalars: List[Set[str]] = []
     for p in paths:
-        active: Optional[Set[str]] = None
-        with Path(p).open("r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                rec = json.loads(line)
-                kind = rec.get("_gesture")
-                if kind == "start":
-                    active = set()
-                elif kind == "end":
-                    if active is not None:
-                        per_window_scalars.append(active)
-                    active = None
-                elif active is not None and "device" in rec:
-                    sensor = rec.get("sensor")
-                    values = rec.get("values")
-                    if (sensor and isinstance(values, list)
-                            and len(values) == 1):
-                        active.add(sensor)
+        for _, _, frames in iter_gesture_windows(p):
+            per_window_scalars.append({
+                rec["sensor"] for rec in frames
+                if isinstance(rec.get("values"), list) and len(rec["values"]) == 1
+            })
     if not per_window_scalars:
         return ()
     return tuple(sorted(set.intersection(*per_window_scalars)))
@@ -205,52 +192,34 @@ class GestureLibrary:
                            feature_sensors: Tuple[str, ...],
                            zscore: bool = False) -> List[Template]:
         templates: List[Template] = []
-        active: Optional[dict] = None
-        # Per-sensor frame lists during the currently-open window.
-        per_sensor: dict = {s: [] for s in feature_sensors}
-        with path.open("r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                rec = json.loads(line)
-                kind = rec.get("_gesture")
-                if kind == "start":
-                    active = {
-                        "label": rec["label"],
-                        "device": rec["device"],
-                        "instance": rec["instance"],
-                    }
-                    per_sensor = {s: [] for s in feature_sensors}
-                elif kind == "end":
-                    if active is not None and all(
-                        len(per_sensor[s]) > 0 for s in feature_sensors
-                    ):
-                        # Truncate to the shortest stream — sensors at
-                        # the same ODR should be aligned to ±1 sample.
-                        n = min(len(per_sensor[s]) for s in feature_sensors)
-                        matrix = np.array(
-                            [
-                                [per_sensor[s][i] for s in feature_sensors]
-                                for i in range(n)
-                            ],
-                            dtype=np.double,
-                        )
-                        series = _zscore_columns(matrix) if zscore else matrix
-                        templates.append(Template(
-                            label=active["label"],
-                            device=active["device"],
-                            instance=active["instance"],
-                            feature_series=series,
-                        ))
-                    active = None
-                    per_sensor = {s: [] for s in feature_sensors}
-                elif active is not None and "device" in rec:
-                    sensor = rec.get("sensor")
-                    if (sensor in feature_sensors
-                            and rec.get("device") == active["device"]
-                            and rec.get("values")):
-                        per_sensor[sensor].append(float(rec["values"][0]))
+        for start, _, frames in iter_gesture_windows(path):
+            device = start["device"]
+            # Per-sensor values of the window's device.
+            per_sensor: dict = {s: [] for s in feature_sensors}
+            for rec in frames:
+                sensor = rec["sensor"]
+                if (sensor in per_sensor and rec["device"] == device
+                        and rec.get("values")):
+                    per_sensor[sensor].append(float(rec["values"][0]))
+            if not all(per_sensor[s] for s in feature_sensors):
+                continue
+            # Truncate to the shortest stream — sensors at
+            # the same ODR should be aligned to ±1 sample.
+            n = min(len(per_sensor[s]) for s in feature_sensors)
+            matrix = np.array(
+                [
+                    [per_sensor[s][i] for s in feature_sensors]
+                    for i in range(n)
+                ],
+                dtype=np.double,
+            )
+            series = _zscore_columns(matrix) if zscore else matrix
+            templates.append(Template(
+                label=start["label"],
+                device=device,
+                instance=start["instance"],
+                feature_series=series,
+            ))
         log.info("[gesture] loaded %d template(s) from %s (zscore=%s)",
                  len(templates), path.name, zscore)
         return templates
@@ -426,6 +395,8 @@ class GestureRecognizer(Stage):
                  debug: bool = False):
         self.library = library
         self.feature_sensors = library.feature_sensors
+        # Only feature frames reach process(); the rest bypass it.
+        self.inputs = frozenset(self.feature_sensors)
         self.zscore = library.zscore
         self.window_samples = window_samples
         self.tick_frames = tick_frames
@@ -0,0 +1,254 @@
+"""
+Vectorised (NumPy) kernels for the batch path of the filter stages.
+
+Selected per stage with `backend="numpy"` (LowPass, HighPass, Scale,
+Magnitude). Only `Stage.process_batch` — i.e. `Pipeline.push_batch`,
+offline replay — uses them; single-frame `process()` always stays on
+the scalar Python path, which is faster for one frame at a time than
+any array round-trip on the BLE callback thread.
+
+NumPy is imported lazily on first use so `sense.pipeline` keeps
+working on a box without it; `require_numpy()` fails fast at stage
+construction instead of at the first batch.
+
+The IIR kernels keep the scalar stages' per-(device, sensor) state
+semantics exactly — same state dict, same tuple representation, same
+first-frame seeding and arity-change reset — so a stage can switch
+backends mid-stream. Frames of one batch are grouped per key, keys of
+the same arity are stacked as columns of one contiguous float64 array
+(shorter series zero-padded at the end, which a causal filter never
+sees), and the whole block is filtered in one pass.
+
+A first-order recursion `y[n] = c·y[n-1] + g·u[n]` is sequential, so
+it's evaluated in chunks of `SCAN_CHUNK` samples as a matrix product:
+`Y = T @ U + p ⊗ y0` with `T[i, j] = g·c^(i-j)` (j ≤ i) and
+`p[i] = c^(i+1)`, carrying `y0` across chunks. All coefficients are
+≤ 1 in magnitude, so this is as well-conditioned as the scalar loop;
+results match it to ~1e-12 relative (not bit-for-bit — summation
+order differs). Scale and Magnitude are element-wise and reproduce the
+scalar results exactly.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BACKEND_PYTHON = "python"
+BACKEND_NUMPY = "numpy"
+BACKENDS = (BACKEND_PYTHON, BACKEND_NUMPY)
+
+# Scan chunk length. T is SCAN_CHUNK² float64s (32 KiB at 64); longer
+# chunks trade O(L²) flops for fewer Python-level iterations.
+SCAN_CHUNK = 64
+
+_np = None
+
+
+def require_numpy():
+    """Import NumPy on first use; ImportError names the stage backend."""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError(
+                "backend='numpy' needs NumPy (pip install numpy); "
+                "use the default backend='python' without it"
+            ) from e
+        _np = numpy
+    return _np
+
+
+def check_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+    if backend == BACKEND_NUMPY:
+        require_numpy()
+    return backend
+
+
+@lru_cache(maxsize=32)
+def _scan_operator(c: float, g: float, chunk: int):
+    np = require_numpy()
+    idx = np.arange(chunk)
+    lag = idx[:, None] - idx[None, :]
+    T = np.where(lag >= 0, g * np.power(c, np.maximum(lag, 0)), 0.0)
+    p = np.power(c, idx + 1.0)
+    return T, p
+
+
+def first_order_scan(u, c: float, g: float, y0, chunk: int = SCAN_CHUNK):
+    """
+    Evaluate `y[n] = c·y[n-1] + g·u[n]` along axis 0 of `u` (shape
+    `(N, ...)`), starting from `y[-1] = y0` (shape `u.shape[1:]`).
+    Returns an array shaped like `u`.
+    """
+    np = require_numpy()
+    n = u.shape[0]
+    flat = np.ascontiguousarray(u, dtype=np.float64).reshape(n, -1)
+    out = np.empty_like(flat)
+    T, p = _scan_operator(float(c), float(g), chunk)
+    y = np.asarray(y0, dtype=np.float64).reshape(-1)
+    for start in range(0, n, chunk):
+        length = min(chunk, n - start)
+        seg = T[:length, :length] @ flat[start:start + length]
+        seg += np.outer(p[:length], y)
+        out[start:start + length] = seg
+        y = seg[-1]
+    return out.reshape(u.shape)
+
+
+def _group_by_key(frames: Sequence) -> Optional[Dict[int, List[Tuple[tuple, List[int]]]]]:
+    """
+    `{arity: [((device, sensor), [frame positions]), ...]}` preserving
+    first-seen key order. None if any key changes arity mid-batch —
+    callers fall back to the scalar loop, which handles the reset.
+    """
+    positions: Dict[tuple, List[int]] = {}
+    setdefault = positions.setdefault
+    for i, frame in enumerate(frames):
+        setdefault((frame.device, frame.sensor), []).append(i)
+    arities = [len(frame.values) for frame in frames]
+    by_arity: Dict[int, List[Tuple[tuple, List[int]]]] = {}
+    uniform = len(set(arities)) == 1
+    for key, idxs in positions.items():
+        arity = arities[idxs[0]]
+        if not uniform and any(arities[i] != arity for i in idxs):
+            return None
+        by_arity.setdefault(arity, []).append((key, idxs))
+    return by_arity
+
+
+def _stack(frames: Sequence, members, arity: int):
+    """Zero-padded `(n_max, n_keys, arity)` block of the members' values."""
+    np = require_numpy()
+    n_max = max(len(idxs) for _, idxs in members)
+    block = np.zeros((n_max, len(members), arity), dtype=np.float64)
+    for col, (_, idxs) in enumerate(members):
+        block[:len(idxs), col, :] = [frames[i].values for i in idxs]
+    return block
+
+
+def _scatter(out: list, members, result) -> None:
+    """Write the `(n_max, n_keys, arity)` result back as value tuples at
+    each member's frame positions."""
+    by_col = result.transpose(1, 0, 2).tolist()
+    for col, (_, idxs) in enumerate(members):
+        rows = by_col[col]
+        for r, i in enumerate(idxs):
+            out[i] = tuple(rows[r])
+
+
+def lowpass_values(frames: Sequence, state: dict, alpha: float) -> Optional[list]:
+    """
+    Filtered value tuples for `frames` (aligned by position), advancing
+    `state` exactly as `LowPass.process` would. None → use the scalar
+    path.
+    """
+    np = require_numpy()
+    groups = _group_by_key(frames)
+    if groups is None:
+        return None
+    out: list = [None] * len(frames)
+    for arity, members in groups.items():
+        block = _stack(frames, members, arity)
+        y0 = np.empty((len(members), arity), dtype=np.float64)
+        seeded = []
+        for col, (key, idxs) in enumerate(members):
+            prev = state.get(key)
+            if prev is None or len(prev) != arity:
+                y0[col] = block[0, col]
+                seeded.append(idxs[0])
+            else:
+                y0[col] = prev
+        _scatter(out, members, first_order_scan(block, 1.0 - alpha, alpha, y0))
+        for i in seeded:
+            # Scalar path passes a key's first frame through unchanged.
+            out[i] = frames[i].values
+        for key, idxs in members:
+            state[key] = out[idxs[-1]]
+    return out
+
+
+def highpass_values(frames: Sequence, state: dict, alpha: float) -> Optional[list]:
+    """
+    HighPass counterpart of `lowpass_values`: `y[n] = α(y[n-1] + x[n] -
+    x[n-1])`, state `(prev_input, prev_output)` per key; a key's first
+    frame outputs zeros.
+    """
+    np = require_numpy()
+    groups = _group_by_key(frames)
+    if groups is None:
+        return None
+    out: list = [None] * len(frames)
+    for arity, members in groups.items():
+        block = _stack(frames, members, arity)
+        prev_in = np.empty((len(members), arity), dtype=np.float64)
+        y0 = np.zeros((len(members), arity), dtype=np.float64)
+        for col, (key, idxs) in enumerate(members):
+            prev = state.get(key)
+            if prev is None or len(prev[0]) != arity:
+                # Seeding with x[-1] = x[0], y[-1] = 0 makes the first
+                # output exactly zero, matching the scalar path.
+                prev_in[col] = block[0, col]
+            else:
+                prev_in[col] = prev[0]
+                y0[col] = prev[1]
+        shifted = np.empty_like(block)
+        shifted[0] = prev_in
+        shifted[1:] = block[:-1]
+        _scatter(out, members, first_order_scan(block - shifted, alpha, alpha, y0))
+        for key, idxs in members:
+            last = idxs[-1]
+            state[key] = (frames[last].values, out[last])
+    return out
+
+
+def _by_arity(frames: Sequence) -> Dict[int, List[int]]:
+    positions: Dict[int, List[int]] = {}
+    for i, frame in enumerate(frames):
+        positions.setdefault(len(frame.values), []).append(i)
+    return positions
+
+
+def _elementwise(frames: Sequence, fn, as_tuples: bool) -> list:
+    """
+    Apply `fn` to `(n, arity)` blocks of frame values, one block per
+    arity present. Single-arity batches — the normal case — skip the
+    regrouping and scatter.
+    """
+    np = require_numpy()
+    values = [frame.values for frame in frames]
+    try:
+        block = np.array(values, dtype=np.float64)
+    except ValueError:
+        block = None  # ragged: mixed arities in one batch
+    if block is not None and block.ndim == 2:
+        rows = fn(block).tolist()
+        return list(map(tuple, rows)) if as_tuples else rows
+    out: list = [None] * len(frames)
+    for arity, idxs in _by_arity(frames).items():
+        sub = np.array([values[i] for i in idxs], dtype=np.float64)
+        rows = fn(sub.reshape(len(idxs), arity)).tolist()
+        for r, i in enumerate(idxs):
+            out[i] = tuple(rows[r]) if as_tuples else rows[r]
+    return out
+
+
+def scale_values(frames: Sequence, offset: float, scale: float) -> list:
+    """`(v - offset) * scale` per axis, as value tuples aligned with `frames`."""
+    return _elementwise(frames, lambda block: (block - offset) * scale, True)
+
+
+def _l2(block):
+    # Accumulate axis by axis, left to right, so rounding matches the
+    # scalar `sqrt(sum(v * v for v in values))` exactly.
+    np = require_numpy()
+    acc = np.zeros(block.shape[0], dtype=np.float64)
+    for axis in range(block.shape[1]):
+        col = block[:, axis]
+        acc += col * col
+    return np.sqrt(acc)
+
+
+def magnitudes(frames: Sequence) -> list:
+    """L2 norm of each frame's values, as floats aligned with `frames`."""
+    return _elementwise(frames, _l2, False)
@@ -1,14 +1,14 @@
-from pythonosc import osc_server
-from pythonosc import dispatcher
-from pythonosc import udp_client
-import threading
-import time
+from .egress import Egress, EgressClient
+from .fanout import DEFAULT_TARGET, FanOut
+from .oscserver import ControlServer, Dispatcher
+from .oscwire import WireClient
 
 class ControlledOSCConnection:
     """
-    This class is an extension of the ThreadingOSCUDPServer class from pythonosc.
-    The purpose of the class is to allow a listening server to be gracefully 
-    shut down by a key message. 
+    Pairs the control-plane listener (a `ControlServer`, see
+    sense/oscserver.py) with the outbound data/reply client. The listener
+    can be stopped cleanly from anywhere, including its own handlers
+    (/stop_server).
 
     The server (listener) IP and port are hard coded: '0.0.0.0' and 8001. This is
     because the server needs to listen to messages from remote and local IPs. 
@@ -19,27 +19,60 @@ class ControlledOSCConnection:
     def __init__(self, ip, port):
 
         # Server
-        self.dispatcher = dispatcher.Dispatcher()
-        self.server = osc_server.ThreadingOSCUDPServer(("0.0.0.0", 8001), self.dispatcher)
-        self.is_running = False
+        self.dispatcher = Dispatcher()
+        self.server = ControlServer(("0.0.0.0", 8001), self.dispatcher)
 
-        # Internal Client
-        self._client = udp_client.SimpleUDPClient("127.0.0.1", 8001)
+        # Optional sender thread (sense.egress); None = send inline.
+        self.egress = None
 
-        # Remote Client
-        self.client = udp_client.SimpleUDPClient(ip, port)
+        # Remote Client: a FanOut whose `default` target is (ip, port);
+        # more targets come from config / C2 /cmd/target/add.
+        self._ip, self._port = ip, port
+        self.fanout = FanOut(self.make_client)
+        self.fanout.set_target(DEFAULT_TARGET, ip, port)
+        self.client = self.fanout
 
-    def start_server(self):
-        if self.is_running:
-            return
-        self.is_running = True
-        server_thread = threading.Thread(target=self.run_server, daemon=True)
-        server_thread.start()
+    def enable_egress(self, capacity: int) -> Egress:
+        """Route outbound data through an `Egress` sender thread. Call
+        before anything captures `self.client` (MetaWearState does at
+        construction)."""
+        if self.egress is None:
+            self.egress = Egress(capacity=capacity)
+            self.egress.start()
+            for t in self.fanout.targets:
+                if isinstance(t.client, WireClient):
+                    self.fanout.set_target(t.name, t.ip, t.port)
+        return self.egress
+
+    def set_default_target(self, ip, port):
+        """Point the `default` fan-out target at (ip, port), keeping its
+        patterns. Returns the client to hand to senders."""
+        self._ip, self._port = ip, port
+        self.fanout.set_target(DEFAULT_TARGET, ip, port)
+        self.client = self.fanout
+        return self.client
+
+    def make_client(self, ip, port):
+        """Outbound client for (ip, port): queued through the egress
+        thread when enabled, a direct WireClient otherwise."""
+        if self.egress is not None:
+            return EgressClient(self.egress, ip, port)
+        return WireClient(ip, port)
 
-    def run_server(self):
-        while self.is_running:
-            self.server.handle_request()
+    @property
+    def is_running(self):
+        return self.server.is_running
+
+    def start_server(self):
+        self.server.start()
 
     def stop_server(self):
-        self.is_running = False
-        self._client.send_message("/stopped", "(dummy message)")
+        """Stop the control listener only; data keeps flowing (PD's
+        /stop_server and `set_OSC` restart the listener mid-session)."""
+        self.server.stop()
+
+    def close(self):
+        """Final shutdown: stop the listener and the egress thread."""
+        self.stop_server()
+        if self.egress is not None:
+            self.egress.stop()
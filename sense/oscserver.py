@@ -0,0 +1,289 @@
+"""
+Control-plane OSC receiver: one selector thread, a small worker pool.
+
+`ControlledOSCConnection` used to run python-osc's
+`ThreadingOSCUDPServer` one `handle_request()` at a time — a new thread
+per datagram, each walking every mapped address with a regex. A PD
+slider bound to `/cmd/pipeline/set` sends tens of messages a second,
+so a drag meant hundreds of short-lived threads racing each other
+through the controller, applied in whatever order they got scheduled.
+Stopping it meant sending a dummy `/stopped` to our own port 8001 to
+unblock the pending `handle_request()`.
+
+`ControlServer` has one receiver thread blocked in a selector on the
+UDP socket and a wake-up socketpair. Datagrams are parsed on that
+thread and looked up in `Dispatcher` by exact address (one dict get;
+a message whose address is itself an OSC pattern, or a pattern
+mapping, falls back to python-osc's match walk). The matched handlers
+run on a fixed pool of worker threads, sharded by address, so messages
+to one address run in arrival order and a slow handler (`/cmd/calibrate`)
+only holds up its own shard. Each shard's queue is bounded; on
+overflow the oldest pending message to the same address is dropped
+(counted) — for a slider flood the latest value is the one that
+matters — and a message to an address with nothing queued is
+rejected, so a flood never evicts another address's command.
+
+`stop()` wakes the selector, joins the receiver and the workers (not
+the calling thread, so a handler may stop its own server), discards
+messages still queued and closes the socket: port 8001 is free once it
+returns. Bundle timetags are not honoured; bundled messages dispatch
+on arrival, in bundle order.
+"""
+import logging
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from pythonosc import dispatcher as _dispatcher
+from pythonosc.osc_packet import OscPacket
+
+log = logging.getLogger("fs.oscserver")
+
+DEFAULT_ADDRESS = ("0.0.0.0", 8001)
+DEFAULT_WORKERS = 4
+DEFAULT_SHARD_CAPACITY = 64
+MAX_DGRAM = 65535
+JOIN_TIMEOUT_S = 2.0
+
+_PATTERN_CHARS = frozenset("*?[]{}")
+
+
+class Dispatcher(_dispatcher.Dispatcher):
+    """
+    python-osc `Dispatcher` (same `map` / `unmap` / `set_default_handler`
+    and handler signatures) with an exact-address fast path.
+    """
+    def __init__(self):
+        super().__init__()
+        self._wildcard_maps = False
+
+    def map(self, address: str, handler, *args, needs_reply_address: bool = False):
+        if not _PATTERN_CHARS.isdisjoint(address):
+            self._wildcard_maps = True
+        return super().map(address, handler, *args,
+                           needs_reply_address=needs_reply_address)
+
+    def handlers_for(self, address: str) -> List[_dispatcher.Handler]:
+        if self._wildcard_maps or not _PATTERN_CHARS.isdisjoint(address):
+            return list(self.handlers_for_address(address))
+        handlers = self._map.get(address)
+        if handlers:
+            return list(handlers)
+        return [self._default_handler] if self._default_handler else []
+
+
+class _Shard:
+    """One worker thread and its bounded, per-address coalescing queue."""
+    def __init__(self, name: str, capacity: int, server: "ControlServer"):
+        self.name = name
+        self.capacity = capacity
+        self._server = server
+        self._pending: deque = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._stopping = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def put(self, item) -> None:
+        """Queue `(handlers, client_address, message)`. When full, the
+        oldest queued message to the same address is replaced (a slider
+        flood coalesces to its latest value); a message whose address
+        has nothing queued is rejected instead — another address's
+        command (`/cmd/shutdown`, `/cmd/pipeline/add`) is never evicted.
+        Either way one message is dropped and counted."""
+        with self._cond:
+            if self._stopping:
+                return
+            pending = self._pending
+            if len(pending) >= self.capacity:
+                self._server.dropped += 1
+                address = item[2].address
+                for i, queued in enumerate(pending):
+                    if queued[2].address == address:
+                        del pending[i]
+                        break
+                else:
+                    return
+            pending.append(item)
+            self._cond.notify()
+
+    def stop(self) -> int:
+        """Ask the worker to exit after its current handler. Returns the
+        number of queued messages discarded."""
+        with self._cond:
+            self._stopping = True
+            discarded = len(self._pending)
+            self._pending.clear()
+            self._cond.notify()
+        return discarded
+
+    def _run(self) -> None:
+        pending = self._pending
+        cond = self._cond
+        while True:
+            with cond:
+                while not pending and not self._stopping:
+                    cond.wait()
+                if self._stopping:
+                    return
+                handlers, client_address, message = pending.popleft()
+            for handler in handlers:
+                try:
+                    handler.invoke(client_address, message)
+                except BaseException:
+                    self._server.handler_errors += 1
+                    log.exception("[oscserver] handler for %s failed", message.address)
+
+
+class ControlServer:
+    """
+    UDP OSC receiver. Binds at construction (so `server_address` is
+    known, port 0 picks one); `start()` / `stop()` may be called more
+    than once — a stopped server rebinds on start.
+    """
+    def __init__(self, server_address: Tuple[str, int] = DEFAULT_ADDRESS,
+                 dispatcher: Optional[Dispatcher] = None,
+                 workers: int = DEFAULT_WORKERS,
+                 shard_capacity: int = DEFAULT_SHARD_CAPACITY):
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.dispatcher = dispatcher if dispatcher is not None else Dispatcher()
+        self.workers = int(workers)
+        self.shard_capacity = int(shard_capacity)
+        self._requested_address = server_address
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._wake: Optional[Tuple[socket.socket, socket.socket]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._shards: List[_Shard] = []
+        self.received = 0
+        self.dispatched = 0
+        self.unhandled = 0
+        self.parse_errors = 0
+        self.handler_errors = 0
+        self.dropped = 0
+        self._bind()
+
+    def _bind(self) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(self._requested_address)
+        except BaseException:
+            sock.close()
+            raise
+        sock.setblocking(False)
+        self._sock = sock
+        self.server_address = sock.getsockname()
+
+    @property
+    def is_running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            if self._sock is None:
+                self._bind()
+            self._wake = socket.socketpair()
+            self._wake[0].setblocking(False)
+            self._shards = [_Shard(f"osc-ctl-{i}", self.shard_capacity, self)
+                            for i in range(self.workers)]
+            for shard in self._shards:
+                shard.thread.start()
+            self._thread = threading.Thread(
+                target=self._serve, args=(self._sock, self._wake[0], self._shards),
+                name="osc-ctl-recv", daemon=True)
+            self._thread.start()
+        log.info("[oscserver] listening on %s:%d (%d workers)",
+                 self.server_address[0], self.server_address[1], self.workers)
+
+    def stop(self) -> None:
+        """Stop receiving, stop the workers, close the socket. Safe from
+        a handler (the calling worker isn't joined) and idempotent."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            shards, self._shards = self._shards, []
+            wake, self._wake = self._wake, None
+            if thread is not None:
+                try:
+                    wake[1].send(b"\0")
+                except OSError:
+                    pass
+        current = threading.current_thread()
+        if thread is not None and thread is not current:
+            thread.join(JOIN_TIMEOUT_S)
+        for shard in shards:
+            self.dropped += shard.stop()
+        for shard in shards:
+            if shard.thread is not current:
+                shard.thread.join(JOIN_TIMEOUT_S)
+        for s in (wake or ()):
+            s.close()
+        with self._lock:
+            if self._thread is None and self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    # socketserver-style name; tests and older callers close with it.
+    server_close = stop
+
+    def _serve(self, sock: socket.socket, wake: socket.socket,
+               shards: List[_Shard]) -> None:
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ)
+        sel.register(wake, selectors.EVENT_READ)
+        try:
+            while True:
+                for key, _ in sel.select():
+                    if key.fileobj is wake:
+                        return
+                    self._drain(sock, shards)
+        except BaseException:
+            log.exception("[oscserver] receiver stopped")
+        finally:
+            sel.close()
+
+    def _drain(self, sock: socket.socket, shards: List[_Shard]) -> None:
+        n = len(shards)
+        handlers_for = self.dispatcher.handlers_for
+        while True:
+            try:
+                data, client_address = sock.recvfrom(MAX_DGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # ICMP port-unreachable from one of our own earlier
+                # replies surfaces here on some platforms; not fatal.
+                log.debug("[oscserver] recvfrom: %s", e)
+                return
+            self.received += 1
+            try:
+                messages = OscPacket(data).messages
+            except Exception as e:
+                # ParseError, but also UnicodeDecodeError (non-UTF-8
+                # address / string) and friends: one bad datagram must
+                # never end the receiver.
+                self.parse_errors += 1
+                log.debug("[oscserver] unparseable datagram from %s: %r", client_address, e)
+                continue
+            for timed in messages:
+                message = timed.message
+                handlers = handlers_for(message.address)
+                if not handlers:
+                    self.unhandled += 1
+                    continue
+                self.dispatched += 1
+                shards[hash(message.address) % n].put((handlers, client_address, message))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "dispatched": self.dispatched,
+            "unhandled": self.unhandled,
+            "parse_errors": self.parse_errors,
+            "handler_errors": self.handler_errors,
+            "dropped": self.dropped,
+        }
@@ -20,6 +20,10 @@ Stages can:
 Per-stage timing is recorded in `Pipeline.stats` so we can answer
 "how much wall-clock does my LowPass actually cost?" while iterating.
 
+`push()` runs a compiled execution plan (bound stage methods and
+stats slots resolved once per `stages` change) so the per-frame
+overhead on the BLE callback thread is just the stage calls.
+
 The default pipeline is `[OscEmit(...)]`, which preserves the
 pre-pipeline OSC vocabulary 1:1. Compose richer pipelines per sensor:
 
@@ -34,51 +38,123 @@ Cross-sensor / cross-device fusion stages are intentionally not in
 this first cut — they need a separate "latest-value latch" or buffered
 device-frame abstraction. To be added when the basic shape is proven.
 """
-import errno
+import fnmatch
 import logging
 import math
+import struct
+import sys
 import threading
 import time
 from collections import deque
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from . import kernels, oscwire
+from .breaker import TRANSIENT_ERRNOS
+from .kernels import BACKEND_NUMPY, BACKEND_PYTHON
+from .profiling import (
+    PROFILE_FULL, PROFILE_MODES, PROFILE_OFF, PROFILE_SAMPLED,
+    LatencyHistogram, summarize,
+)
 
 log = logging.getLogger("fs.pipeline")
 
 # UDP send errnos that mean "receiver not reachable right now." Suppressed
 # silently in OscEmit (no traceback, no warning per send) — at our frame
-# rates anything above silent costs throughput. Matches the
-# _osc_send_best_effort policy in state.py.
-_TRANSIENT_OSC_ERRNOS = (errno.ENETUNREACH, errno.EHOSTUNREACH, errno.ECONNREFUSED)
+# rates anything above silent costs throughput. With the egress thread
+# on, OscEmit only enqueues and sense.egress counts these instead.
+_TRANSIENT_OSC_ERRNOS = TRANSIENT_ERRNOS
+
+# Bound once at import — saves an attribute lookup per stage call in
+# the compiled push loop.
+_perf_ns = time.perf_counter_ns
 
 
 @dataclass
 class IMUFrame:
+    # Slotted: no per-instance __dict__. Every derived frame is a fresh
+    # allocation (4 devices × 12 pipelines × several derived streams),
+    # so instance size and GC churn add up on the Pi. Explicit
+    # __slots__ rather than dataclass(slots=True) for pre-3.10 Pythons.
+    __slots__ = ("device", "sensor", "t_recv", "values")
+
     device: str                 # MAC address (matches MetaWearState.address)
     sensor: str                 # "acc", "gyro", "mag", or derived ("acc_mag", "tilt", ...)
     t_recv: float               # time.monotonic() at receipt — Pi-side timeline
     values: Tuple[float, ...]   # variable length (1 = scalar, 3 = vec3, 4 = quat/euler)
 
 
-class StageStats:
-    """Rolling window of per-call elapsed times for a stage."""
-    def __init__(self, capacity: int = 1024):
-        self._samples: deque = deque(maxlen=capacity)
+# --- Key registry ------------------------------------------------------------
+#
+# Device MACs and sensor names are a small, closed vocabulary (a handful
+# of devices × a few dozen raw/derived sensors) but they're used as dict
+# keys on every frame — per-(device, sensor) stage state, OSC address
+# caches, recorder columns. Interning them means every frame for a given
+# stream carries the *same* str object, so dict lookups hit the identity
+# fast path and hashes are computed once. Each interned name also gets a
+# small integer id, stable for the life of the process, for compact
+# binary encodings.
+
+class KeyRegistry:
+    """Process-wide name ↔ small-int-id table. Thread-safe for writers;
+    lookups of already-registered names are lock-free."""
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, name: str) -> str:
+        """Canonical (interned) instance of `name`, registering it if new."""
+        if name in self._ids:
+            return self._names[self._ids[name]]
+        return self._names[self._register(name)]
+
+    def id_of(self, name: str) -> int:
+        key_id = self._ids.get(name)
+        if key_id is None:
+            key_id = self._register(name)
+        return key_id
 
-    def add(self, elapsed_s: float) -> None:
-        self._samples.append(elapsed_s)
+    def name_of(self, key_id: int) -> str:
+        return self._names[key_id]
+
+    def _register(self, name: str) -> int:
+        with self._lock:
+            key_id = self._ids.get(name)
+            if key_id is None:
+                key_id = len(self._names)
+                self._names.append(sys.intern(name))
+                self._ids[self._names[key_id]] = key_id
+            return key_id
+
+    def __len__(self) -> int:
+        return len(self._names)
 
-    @property
-    def count(self) -> int:
-        return len(self._samples)
+
+KEYS = KeyRegistry()
+intern_key = KEYS.intern
+
+
+class StageStats(LatencyHistogram):
+    """
+    Per-stage timing histogram (see `sense.profiling`). Keeps the
+    seconds-based `count` / `mean_s` / `max_s` / `add()` surface the
+    pipeline has always exposed, plus `percentile_s()` for tails.
+    Counts are cumulative since construction (or `reset()`).
+    """
+    def add(self, elapsed_s: float) -> None:
+        self.add_ns(int(elapsed_s * 1e9))
 
     @property
     def mean_s(self) -> float:
-        return sum(self._samples) / len(self._samples) if self._samples else 0.0
+        return self.mean_ns / 1e9
 
     @property
     def max_s(self) -> float:
-        return max(self._samples) if self._samples else 0.0
+        return self.max_ns / 1e9
+
+    def percentile_s(self, q: float) -> float:
+        return self.percentile_ns(q) / 1e9
 
 
 class Stage:
@@ -94,6 +170,28 @@ class Stage:
     forwarding them (e.g. `OscEmit`); pipeline introspection stops at
     the first terminal stage.
 
+    Set `inputs` to the sensor names the stage acts on (e.g. Tilt →
+    `{"acc"}`); frames with any other sensor bypass it — forwarded
+    unchanged to the next stage without calling `process`, and
+    `advertised_outputs()` treats them as passthrough. `None` (the
+    default) routes every frame to the stage. The pipeline reads
+    `inputs` when it compiles its plan, so set it before the stage
+    goes into a Pipeline (or call `pipe.recompile()`).
+
+    Set `prunable = True` on stages whose `process` forwards every
+    input frame unchanged and whose only effect is the derived frames
+    it adds (Magnitude, Tilt, HighPass, ...). When a pipeline has a
+    subscription demand (`Pipeline.set_demand`), a prunable stage is
+    skipped for inputs whose derived outputs nobody downstream
+    consumes. Stages with side effects (Recorder, LatchUpdate, the
+    gesture recognizer) keep the default False and count as consumers
+    of everything they select.
+
+    Set `is_filter = True` on stages that only forward or drop their
+    input frames, never adding or changing any (EmitPolicy). Under a
+    demand such a stage is routed just the sensors someone downstream
+    wants, and doesn't itself keep anything alive.
+
     Class-level metadata for C2 remote configuration:
     - `CONSTRUCTION_PARAMS`: params the stage accepts at __init__ time;
       `/cmd/pipeline/add` validates against this map. Only set on
@@ -106,6 +204,19 @@ class Stage:
     is_terminal: bool = False
     CONSTRUCTION_PARAMS: Dict[str, type] = {}
     TUNABLE_PARAMS: Dict[str, type] = {}
+    inputs: Optional[FrozenSet[str]] = None
+    prunable: bool = False
+    is_filter: bool = False
+
+    # Stages that emit a derived `<input><OUTPUT_SUFFIX>` frame (e.g.
+    # Magnitude → `acc_mag`) set this and name outputs through the
+    # per-instance `_derived_names` memo instead of formatting an
+    # f-string per frame:
+    #     out = self._derived_names.get(s) or self.derived_sensor(s)
+    OUTPUT_SUFFIX: str = ""
+    # Class-level placeholder, never written to — derived_sensor()
+    # installs the real per-instance dict on first use.
+    _derived_names: Dict[str, str] = {}
 
     def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
         raise NotImplementedError
@@ -115,20 +226,489 @@ class Stage:
         given a single input sensor name. Default: passthrough."""
         return [input_sensor]
 
+    def accepts(self, sensor: str) -> bool:
+        """True if frames of `sensor` are routed to this stage."""
+        return self.inputs is None or sensor in self.inputs
 
-class Pipeline:
-    def __init__(self, stages: List[Stage]):
+    def routed_outputs(self, input_sensor: str) -> List[str]:
+        """`outputs()` with routing applied: a sensor outside `inputs`
+        bypasses the stage and comes out unchanged."""
+        if not self.accepts(input_sensor):
+            return [input_sensor]
+        return self.outputs(input_sensor)
+
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        """
+        Batch hook for `Pipeline.push_batch`. Must return exactly what
+        calling `process` on each frame would have, concatenated in
+        input order — that keeps batch and per-frame runs equivalent.
+        Override only when the stage can do better than the loop (no
+        generator per frame, hoisted attribute lookups); the pipeline
+        runs non-overriding stages frame by frame itself so a raising
+        frame is dropped alone.
+        """
+        out: List[IMUFrame] = []
+        for frame in frames:
+            out.extend(self.process(frame))
+        return out
+
+    def flush(self) -> None:
+        """
+        End-of-push hook: called once after every `Pipeline.push` /
+        `push_batch`, when everything derived from the input frame has
+        gone through the chain. Override to emit what the stage has
+        been holding back (OscEmit's bundles). Only overriding stages
+        are called.
+        """
+
+    def drain(self) -> None:
+        """
+        End-of-stream hook: emit everything still held, whatever the
+        stage's own timing says. Called by `Pipeline.drain()` on
+        shutdown and on a stage an edit removes. Default: `flush()`.
+        """
+        self.flush()
+
+    def derived_sensor(self, input_sensor: str) -> str:
+        """
+        Output name for the derived frame built from `input_sensor`:
+        the explicit `output_sensor` if the stage has one set, else
+        `<input_sensor><suffix>`. Memoised per input name (so
+        `output_sensor` is construction-time only) and interned in
+        `KEYS`; `_invalidate_derived_names()` drops the memo when the
+        suffix changes at runtime (Window's tunable `stat`).
+        """
+        names = self.__dict__.get("_derived_names")
+        if names is None:
+            names = self._derived_names = {}
+        name = names.get(input_sensor)
+        if name is None:
+            explicit = getattr(self, "output_sensor", None)
+            name = intern_key(explicit or input_sensor + self._output_suffix())
+            names[input_sensor] = name
+        return name
+
+    def _output_suffix(self) -> str:
+        return self.OUTPUT_SUFFIX
+
+    def _invalidate_derived_names(self) -> None:
+        self.__dict__.pop("_derived_names", None)
+
+
+class _StageList(list):
+    """
+    Copy of a pipeline's chain handed out by `Pipeline.stages`. Every
+    in-place mutation publishes the edited copy, so
+    `pipe.stages.insert(...)` / `pipe.stages[i] = ...` behave exactly
+    like `pipe.stages = [...]` — the published chain itself is never
+    mutated.
+    """
+    def __init__(self, stages: Iterable["Stage"], on_change):
+        super().__init__(stages)
+        self._on_change = on_change
+
+
+def _notifying(name: str):
+    base = getattr(list, name)
+
+    def method(self, *args, **kwargs):
+        result = base(self, *args, **kwargs)
+        self._on_change(self)
+        return result
+    method.__name__ = name
+    return method
+
+
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__",
+              "append", "extend", "insert", "pop", "remove", "clear",
+              "sort", "reverse"):
+    setattr(_StageList, _name, _notifying(_name))
+del _name
+
+
+class Composition:
+    """
+    Immutable snapshot of a pipeline's chain: the stages (a tuple) and
+    the push / push_batch plans compiled from them. A `Pipeline` never
+    edits a published Composition; every change builds a new one and
+    publishes it with a single attribute store (`pipe.composition`),
+    RCU-style. Readers load it once and work from that — a push in
+    flight during an edit finishes on the chain it started with.
+    `flushers` are the bound `flush` hooks of the stages that override
+    it. `version` counts publishes.
+    """
+    __slots__ = ("stages", "plan", "batch_plan", "flushers", "version")
+
+    def __init__(self, stages: Tuple["Stage", ...], plan: tuple,
+                 batch_plan: tuple, flushers: tuple, version: int):
         self.stages = stages
+        self.plan = plan
+        self.batch_plan = batch_plan
+        self.flushers = flushers
+        self.version = version
+
+
+def _flush(flushers: tuple) -> None:
+    for stage_name, flush in flushers:
+        try:
+            flush()
+        except BaseException:
+            log.exception("[%s] %s.flush raised", stage_name, stage_name)
+
+
+def _drain(stages: Iterable["Stage"]) -> None:
+    for stage in stages:
+        try:
+            stage.drain()
+        except BaseException:
+            stage_name = stage.__class__.__name__
+            log.exception("[%s] %s.drain raised", stage_name, stage_name)
+
+
+class Pipeline:
+    """
+    Ordered chain of stages for one (device, sensor) stream.
+
+    By default `push()` runs a compiled execution plan: a tuple of
+    `(stage_name, bound process, bound stats.add)` resolved once when
+    `stages` changes, plus a pair of scratch lists reused across frames.
+    Per-frame cost is then just the stage calls themselves — no class
+    name lookups, no `stats.setdefault`, no per-hop list allocation.
+
+    Stages and plan live in one immutable `Composition`, rebuilt on
+    the writer side and published by a single attribute store — the
+    BLE callback thread never takes a lock and always sees either the
+    old or the new chain, never a half-edited one. `pipe.stages` is a
+    copy: assigning it, mutating it in place (`insert`, `append`,
+    `__setitem__`, ...), `swap()` and `edit()` all publish a new
+    Composition. Writers are serialised, so concurrent edits (C2 on
+    the OSC thread, subscription demand, startup overrides) can't lose
+    each other's changes. Stages kept across an edit are the same
+    objects, so their filter state carries over untouched; stages an
+    edit removes are drained (`Stage.drain`), so an OscEmit swapped
+    out doesn't take a held bundle with it. `drain()` does the same
+    for the whole chain at shutdown.
+
+    Plain attribute changes on a stage (C2 `/cmd/pipeline/set`,
+    `OscEmit.muted`) need no new Composition — tunables are read per
+    frame with a single attribute load, so a burst of them costs the
+    hot path nothing. Rebinding a stage's `process` method after the
+    fact does, via `recompile()`.
+
+    Each plan entry also carries the stage's `inputs` selector, so a
+    frame whose sensor a stage doesn't select is forwarded past it
+    without a call (and without a timing sample).
+
+    `set_demand(source, wants)` narrows those selectors further to
+    what receivers consume (see `sense.subscriptions`): the terminal
+    only gets sensors `wants()` accepts, and prunable stages only get
+    inputs whose derived outputs are consumed further down.
+
+    `compiled=False` keeps the original interpreted loop — useful for
+    A/B timing and as a reference when debugging a new stage.
+
+    Profiling (`set_profile`, modes from `sense.profiling`) controls
+    how much timing the hot path pays for: `"off"` runs the plan with
+    no timer calls, `"sampled"` times one frame in `sample_every`, and
+    `"full"` (the default) times every frame. Timed frames record each
+    stage call into `stats[<StageName>]` and the whole push into
+    `push_stats[(device, sensor)]`; `profile_report()` summarises both
+    as p50/p95/p99/p99.9 in µs.
+    """
+    def __init__(
+        self,
+        stages: List[Stage],
+        compiled: bool = True,
+        profile: str = PROFILE_FULL,
+        sample_every: int = 32,
+    ):
         self.stats: dict = {}
+        self.push_stats: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.compiled = compiled
+        # Pool of (current, next) scratch-list pairs. list.pop/append
+        # are atomic under the GIL, so a re-entrant or concurrent push
+        # simply allocates a fresh pair instead of sharing one.
+        self._scratch: list = []
+        self._sample_tick = 0
+        # (source, wants) from set_demand(); None = no pruning.
+        self._demand: Optional[Tuple[str, Callable[[str], bool]]] = None
+        # Serialises writers (edits, recompiles); readers never take it.
+        self._write_lock = threading.RLock()
+        self._composition = Composition((), (), (), (), 0)
+        self.set_profile(profile, sample_every)
+        self.stages = stages
+
+    @property
+    def composition(self) -> Composition:
+        """The published snapshot. Load once, then read from it."""
+        return self._composition
+
+    @property
+    def stages(self) -> List[Stage]:
+        """Copy of the current chain; in-place edits publish it."""
+        return _StageList(self._composition.stages, self.swap)
+
+    @stages.setter
+    def stages(self, stages: List[Stage]) -> None:
+        self.swap(stages)
+
+    def swap(self, stages: Iterable[Stage]) -> Composition:
+        """Compile `stages` and publish them as the new chain."""
+        with self._write_lock:
+            return self._publish(tuple(stages))
+
+    def edit(self, fn: Callable[[List[Stage]], Optional[List[Stage]]]
+             ) -> Optional[Composition]:
+        """
+        Read-modify-write the chain: `fn` gets a list copy of the
+        current stages and returns the new list (or None to leave the
+        pipeline alone). Runs under the writer lock, so `fn` sees the
+        latest chain and no other edit lands in between. Returns the
+        published Composition, or None.
+        """
+        with self._write_lock:
+            stages = fn(list(self._composition.stages))
+            if stages is None:
+                return None
+            return self._publish(tuple(stages))
+
+    @property
+    def profile(self) -> str:
+        return self._profile
+
+    def set_profile(self, mode: str, sample_every: Optional[int] = None) -> None:
+        """
+        Switch profiling mode at runtime. `sample_every` only matters
+        for `"sampled"`; leaving it None keeps the current value.
+        Existing histograms are kept — call `reset_stats()` for a clean
+        window.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"profile must be one of {PROFILE_MODES}, got {mode!r}")
+        if sample_every is not None:
+            if int(sample_every) < 1:
+                raise ValueError(f"sample_every must be >= 1, got {sample_every}")
+            self.sample_every = int(sample_every)
+        self._profile = mode
+        # 0 = never time, 1 = time every frame, N = time 1-in-N.
+        if mode == PROFILE_OFF:
+            self._time_every = 0
+        elif mode == PROFILE_SAMPLED:
+            self._time_every = self.sample_every
+        else:
+            self._time_every = 1
+
+    def reset_stats(self) -> None:
+        for stats in self.stats.values():
+            stats.reset()
+        for hist in self.push_stats.values():
+            hist.reset()
+
+    def set_demand(self, source: str,
+                   wants: Optional[Callable[[str], bool]]) -> None:
+        """
+        Prune the plan to what receivers consume. `wants(sensor)` says
+        whether a sensor arriving at the terminal is consumed; `source`
+        is the sensor this pipeline is fed with (for the static walk).
+        `wants=None` lifts the demand. Re-evaluated on every
+        recompile, so composition changes keep honouring it; call
+        again (or `recompile()`) when the answers of `wants` change.
+        """
+        with self._write_lock:
+            self._demand = (source, wants) if wants is not None else None
+            self._publish(self._composition.stages)
+
+    def _routes(self, stages: Tuple[Stage, ...]) -> list:
+        """Effective `inputs` selector per stage: the stage's own,
+        narrowed by the demand (if any)."""
+        routes = [frozenset(st.inputs) if st.inputs is not None else None
+                  for st in stages]
+        if self._demand is None:
+            return routes
+        source, wants = self._demand
+        # Forward: sensors arriving at each stage up to the terminal.
+        reach = []
+        sensors = {source}
+        term = len(stages)
+        for i, stage in enumerate(stages):
+            reach.append(sensors)
+            if stage.is_terminal:
+                term = i
+                break
+            nxt: set = set()
+            for s in sensors:
+                nxt.update(stage.routed_outputs(s))
+            sensors = nxt
+        if term < len(stages):
+            needed = {s for s in reach[term] if wants(s)}
+            own = routes[term]
+            routes[term] = frozenset(needed if own is None else needed & own)
+        else:
+            needed = {s for s in sensors if wants(s)}
+        # Backward: keep what feeds a needed sensor.
+        for i in range(term - 1, -1, -1):
+            stage = stages[i]
+            arriving = reach[i]
+            accepted = {s for s in arriving if stage.accepts(s)}
+            if stage.is_filter:
+                keep = accepted & needed
+                if keep != accepted:
+                    routes[i] = frozenset(keep)
+                continue
+            if not stage.prunable:
+                needed = (needed & arriving) | accepted
+                continue
+            keep = set()
+            for s in accepted:
+                derived = list(stage.outputs(s))
+                if s in derived:
+                    derived.remove(s)  # the unchanged passthrough
+                if needed.intersection(derived):
+                    keep.add(s)
+            if keep != accepted:
+                routes[i] = frozenset(keep)
+            needed = (needed & arriving) | keep
+        return routes
+
+    def recompile(self) -> None:
+        """Rebuild the execution plan from the current `stages`."""
+        with self._write_lock:
+            self._publish(self._composition.stages)
+
+    def drain(self) -> None:
+        """Drain every stage (`Stage.drain`): call once pushes have
+        stopped, before the OSC client goes away."""
+        _drain(self._composition.stages)
+
+    def _publish(self, stages: Tuple[Stage, ...]) -> Composition:
+        # Caller holds _write_lock.
+        kept = {id(stage) for stage in stages}
+        retired = [stage for stage in self._composition.stages if id(stage) not in kept]
+        plan = []
+        batch_plan = []
+        flushers = []
+        for stage, inputs in zip(stages, self._routes(stages)):
+            stage_name = stage.__class__.__name__
+            stats = self.stats.setdefault(stage_name, StageStats())
+            plan.append((stage_name, stage.process, stats.add_ns, inputs))
+            # Only stages that override process_batch get it called;
+            # the rest run per frame inside push_batch.
+            batched = type(stage).process_batch is not Stage.process_batch
+            batch_plan.append((stage_name, stage.process,
+                               stage.process_batch if batched else None,
+                               stats, inputs))
+            if type(stage).flush is not Stage.flush:
+                flushers.append((stage_name, stage.flush))
+        composition = Composition(stages, tuple(plan), tuple(batch_plan),
+                                  tuple(flushers), self._composition.version + 1)
+        self._composition = composition
+        # After publishing, so new pushes already go to the new chain.
+        _drain(retired)
+        return composition
 
     def push(self, frame: IMUFrame) -> None:
+        if not self.compiled:
+            self._push_interpreted(frame)
+            return
+        every = self._time_every
+        if every:
+            self._sample_tick += 1
+            if self._sample_tick >= every:
+                self._sample_tick = 0
+                self._push_timed(frame)
+                return
+        self._push_untimed(frame)
+
+    def _push_untimed(self, frame: IMUFrame) -> None:
+        composition = self._composition
+        plan = composition.plan
+        try:
+            frames, next_frames = self._scratch.pop()
+        except IndexError:
+            frames, next_frames = [], []
+        frames.append(frame)
+        try:
+            for stage_name, process, _, inputs in plan:
+                for f in frames:
+                    if inputs is not None and f.sensor not in inputs:
+                        next_frames.append(f)
+                        continue
+                    mark = len(next_frames)
+                    try:
+                        next_frames.extend(process(f))
+                    except BaseException:
+                        # A stage error is contained — log and drop the
+                        # offending frame (including anything it yielded
+                        # before raising), don't take down the rest.
+                        del next_frames[mark:]
+                        log.exception("[%s] %s raised on %s/%s",
+                                      stage_name, stage_name, f.device, f.sensor)
+                frames.clear()
+                frames, next_frames = next_frames, frames
+                if not frames:
+                    break
+            if composition.flushers:
+                _flush(composition.flushers)
+        finally:
+            frames.clear()
+            next_frames.clear()
+            self._scratch.append((frames, next_frames))
+
+    def _push_timed(self, frame: IMUFrame) -> None:
+        t_push = _perf_ns()
+        composition = self._composition
+        plan = composition.plan
+        try:
+            frames, next_frames = self._scratch.pop()
+        except IndexError:
+            frames, next_frames = [], []
+        frames.append(frame)
+        try:
+            for stage_name, process, add_stat, inputs in plan:
+                for f in frames:
+                    if inputs is not None and f.sensor not in inputs:
+                        next_frames.append(f)
+                        continue
+                    mark = len(next_frames)
+                    t0 = _perf_ns()
+                    try:
+                        next_frames.extend(process(f))
+                    except BaseException:
+                        del next_frames[mark:]
+                        log.exception("[%s] %s raised on %s/%s",
+                                      stage_name, stage_name, f.device, f.sensor)
+                    add_stat(_perf_ns() - t0)
+                frames.clear()
+                frames, next_frames = next_frames, frames
+                if not frames:
+                    break
+            if composition.flushers:
+                _flush(composition.flushers)
+        finally:
+            frames.clear()
+            next_frames.clear()
+            self._scratch.append((frames, next_frames))
+            self._record_push(frame, _perf_ns() - t_push)
+
+    def _record_push(self, frame: IMUFrame, elapsed_ns: int) -> None:
+        key = (frame.device, frame.sensor)
+        hist = self.push_stats.get(key)
+        if hist is None:
+            hist = self.push_stats.setdefault(key, LatencyHistogram())
+        hist.add_ns(elapsed_ns)
+
+    def _push_interpreted(self, frame: IMUFrame) -> None:
+        t_push = _perf_ns()
         frames = [frame]
-        for stage in self.stages:
+        for stage in self._composition.stages:
             stage_name = stage.__class__.__name__
             stats = self.stats.setdefault(stage_name, StageStats())
             next_frames: List[IMUFrame] = []
             for f in frames:
-                t0 = time.monotonic()
+                if not stage.accepts(f.sensor):
+                    next_frames.append(f)
+                    continue
+                t0 = _perf_ns()
                 try:
                     outs = list(stage.process(f))
                 except BaseException:
@@ -137,25 +717,157 @@ class Pipeline:
                     log.exception("[%s] %s raised on %s/%s",
                                   stage_name, stage_name, f.device, f.sensor)
                     outs = []
-                stats.add(time.monotonic() - t0)
+                stats.add_ns(_perf_ns() - t0)
                 next_frames.extend(outs)
             frames = next_frames
             if not frames:
                 break
+        _flush(tuple((stage.__class__.__name__, stage.flush)
+                     for stage in self._composition.stages
+                     if type(stage).flush is not Stage.flush))
+        self._record_push(frame, _perf_ns() - t_push)
+
+    def push_batch(self, frames: Iterable[IMUFrame]) -> None:
+        """
+        Push many frames at once, stage-major: each stage sees the whole
+        batch before the next stage runs. Output order (and so what the
+        terminal stage sees) is identical to pushing the frames one by
+        one, as long as every `process_batch` override honours its
+        contract. Side-effect *timing* is not: a `LatchUpdate` at the
+        head of the chain updates the latch for the whole batch before
+        any downstream stage runs. Meant for offline replay and
+        tuning, not for the live BLE path.
+
+        Error containment: a per-frame stage still drops just the
+        raising frame; a raising `process_batch` drops that stage's
+        whole batch (its state may have partially advanced, so a
+        per-frame retry would double-apply).
+
+        Timing (profile "sampled" or "full"): each stage call's elapsed
+        time is averaged over the frames it received, so `stats` counts
+        stay in per-frame units and are comparable with `push()`.
+        """
+        frames = list(frames)
+        if not frames:
+            return
+        if not self.compiled:
+            for frame in frames:
+                self._push_interpreted(frame)
+            return
+        timed = self._time_every != 0
+        t_push = _perf_ns() if timed else 0
+        pushed = frames
+        run = self._run_batch_stage
+        composition = self._composition
+        for stage_name, process, process_batch, stats, inputs in composition.batch_plan:
+            t0 = _perf_ns() if timed else 0
+            if inputs is None:
+                n = len(frames)
+                out = run(stage_name, process, process_batch, frames)
+            else:
+                # Routed stage: selected frames go through in runs, the
+                # rest are forwarded in place, so order is unchanged.
+                n = 0
+                out = []
+                start = None
+                for i, f in enumerate(frames):
+                    if f.sensor in inputs:
+                        if start is None:
+                            start = i
+                        continue
+                    if start is not None:
+                        n += i - start
+                        out.extend(run(stage_name, process, process_batch,
+                                       frames[start:i]))
+                        start = None
+                    out.append(f)
+                if start is not None:
+                    n += len(frames) - start
+                    out.extend(run(stage_name, process, process_batch,
+                                   frames[start:]))
+            if timed and n:
+                stats.add_ns_many((_perf_ns() - t0) // n, n)
+            frames = out
+            if not frames:
+                break
+        if composition.flushers:
+            _flush(composition.flushers)
+        if timed:
+            per_frame_ns = (_perf_ns() - t_push) // len(pushed)
+            counts: Dict[Tuple[str, str], int] = {}
+            for f in pushed:
+                key = (f.device, f.sensor)
+                counts[key] = counts.get(key, 0) + 1
+            for key, count in counts.items():
+                hist = self.push_stats.get(key)
+                if hist is None:
+                    hist = self.push_stats.setdefault(key, LatencyHistogram())
+                hist.add_ns_many(per_frame_ns, count)
+
+    @staticmethod
+    def _run_batch_stage(stage_name, process, process_batch, frames) -> List[IMUFrame]:
+        if process_batch is not None:
+            try:
+                out = process_batch(frames)
+                return out if type(out) is list else list(out)
+            except BaseException:
+                log.exception("[%s] %s.process_batch raised on %d frames "
+                              "— batch dropped", stage_name, stage_name, len(frames))
+                return []
+        out = []
+        for f in frames:
+            mark = len(out)
+            try:
+                out.extend(process(f))
+            except BaseException:
+                del out[mark:]
+                log.exception("[%s] %s raised on %s/%s",
+                              stage_name, stage_name, f.device, f.sensor)
+        return out
+
+    def profile_report(self) -> dict:
+        """
+        `{"mode", "sample_every", "stages": {name: summary},
+        "push": {"<device>/<sensor>": summary}}` — summaries from
+        `sense.profiling.summarize` (count, mean, p50/p95/p99/p999,
+        max; µs). Stages never timed are omitted.
+        """
+        return {
+            "mode": self._profile,
+            "sample_every": self.sample_every,
+            "stages": {
+                name: summarize(stats)
+                for name, stats in list(self.stats.items()) if stats.count
+            },
+            "push": {
+                f"{dev}/{sensor}": summarize(hist)
+                for (dev, sensor), hist in list(self.push_stats.items())
+            },
+        }
 
     def advertised_outputs(self, source: str) -> set:
         """
         Walk stages forward and return the set of sensor names that
         arrive at the first terminal stage (e.g. OscEmit). If no
         terminal stage exists, returns the set at the end of the chain.
+        Routing is honoured: a stage only transforms the sensors its
+        `inputs` select.
+        """
+        return self.sensors_at(source, len(self._composition.stages))
+
+    def sensors_at(self, source: str, index: int) -> set:
+        """
+        Sensor names that statically reach stage `index` (i.e. leave
+        stage `index - 1`), walking from `source`. The walk stops at
+        the first terminal stage — nothing gets past it.
         """
         sensors = {source}
-        for stage in self.stages:
+        for stage in self._composition.stages[:index]:
             if stage.is_terminal:
                 return sensors
             new_sensors: set = set()
             for s in sensors:
-                new_sensors.update(stage.outputs(s))
+                new_sensors.update(stage.routed_outputs(s))
             sensors = new_sensors
         return sensors
 
@@ -252,20 +964,41 @@ class Magnitude(Stage):
     `<sensor>_mag` frame containing the L2 norm of the input values.
     Useful for collapsing a vec3 into a single 'how much motion' scalar.
     """
-    def __init__(self, output_sensor: Optional[str] = None):
+    OUTPUT_SUFFIX = "_mag"
+    prunable = True
+
+    def __init__(self, output_sensor: Optional[str] = None,
+                 backend: str = BACKEND_PYTHON):
         self.output_sensor = output_sensor
+        self.backend = kernels.check_backend(backend)
 
     def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
         yield frame
         mag = math.sqrt(sum(v * v for v in frame.values))
-        out = self.output_sensor or f"{frame.sensor}_mag"
+        sensor = frame.sensor
+        out = self._derived_names.get(sensor) or self.derived_sensor(sensor)
         yield IMUFrame(
             device=frame.device, sensor=out,
             t_recv=frame.t_recv, values=(mag,),
         )
 
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        out: List[IMUFrame] = []
+        append = out.append
+        if self.backend == BACKEND_NUMPY:
+            mags = kernels.magnitudes(frames)
+        else:
+            sqrt = math.sqrt
+            mags = [sqrt(sum([v * v for v in frame.values])) for frame in frames]
+        for frame, mag in zip(frames, mags):
+            append(frame)
+            sensor = frame.sensor
+            name = self._derived_names.get(sensor) or self.derived_sensor(sensor)
+            append(IMUFrame(frame.device, name, frame.t_recv, (mag,)))
+        return out
+
     def outputs(self, input_sensor: str) -> List[str]:
-        out = self.output_sensor or f"{input_sensor}_mag"
+        out = self.derived_sensor(input_sensor)
         return [input_sensor, out]
 
 
@@ -298,14 +1031,22 @@ class LowPass(Stage):
         cutoff_hz: float,
         fs: float,
         output_sensor: Optional[str] = None,
+        backend: str = BACKEND_PYTHON,
     ):
         # Set _fs first so the cutoff_hz setter has fs available when
         # it recomputes alpha.
         self._fs = float(fs)
         self.cutoff_hz = cutoff_hz  # triggers setter → _recompute_alpha
         self.output_sensor = output_sensor
+        self.backend = kernels.check_backend(backend)
         self._state: dict = {}
 
+    @property
+    def prunable(self) -> bool:
+        # Derived mode forwards the raw frame untouched; in-place mode
+        # rewrites it, so skipping the stage would change what's sent.
+        return self.output_sensor is not None
+
     @property
     def cutoff_hz(self) -> float:
         return self._cutoff_hz
@@ -357,6 +1098,44 @@ class LowPass(Stage):
                 t_recv=frame.t_recv, values=new,
             )
 
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        if self.backend == BACKEND_NUMPY:
+            filtered = kernels.lowpass_values(frames, self._state, self.alpha)
+            if filtered is not None:
+                return self._emit_batch(frames, filtered)
+        out: List[IMUFrame] = []
+        append = out.append
+        state = self._state
+        alpha = self.alpha
+        derived = self.output_sensor
+        for frame in frames:
+            values = frame.values
+            key = (frame.device, frame.sensor)
+            prev = state.get(key)
+            if prev is None or len(prev) != len(values):
+                new = values
+            else:
+                new = tuple([p + alpha * (v - p) for p, v in zip(prev, values)])
+            state[key] = new
+            if derived is None:
+                append(IMUFrame(frame.device, frame.sensor, frame.t_recv, new))
+            else:
+                append(frame)
+                append(IMUFrame(frame.device, derived, frame.t_recv, new))
+        return out
+
+    def _emit_batch(self, frames: List[IMUFrame], filtered: list) -> List[IMUFrame]:
+        out: List[IMUFrame] = []
+        append = out.append
+        derived = self.output_sensor
+        for frame, new in zip(frames, filtered):
+            if derived is None:
+                append(IMUFrame(frame.device, frame.sensor, frame.t_recv, new))
+            else:
+                append(frame)
+                append(IMUFrame(frame.device, derived, frame.t_recv, new))
+        return out
+
     def outputs(self, input_sensor: str) -> List[str]:
         if self.output_sensor is None:
             return [input_sensor]
@@ -376,7 +1155,13 @@ class Tilt(Stage):
     Computed from the accelerometer alone, so it's only meaningful
     when the device isn't being shaken — under heavy linear
     acceleration the signal is dominated by motion, not gravity.
+
+    Routed to `acc` only, so derived streams upstream (`acc_mag`,
+    `acc_hp`, ...) skip it entirely.
     """
+    inputs = frozenset({"acc"})
+    prunable = True
+
     def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
         yield frame
         if frame.sensor != "acc" or len(frame.values) != 3:
@@ -414,6 +1199,8 @@ class HighPass(Stage):
     `cutoff_hz`/`fs` are exposed as Tier-1 tunables; `output_sensor`
     can be passed explicitly to override the default name.
     """
+    OUTPUT_SUFFIX = "_hp"
+    prunable = True
     CONSTRUCTION_PARAMS = {"cutoff_hz": float, "fs": float}
     TUNABLE_PARAMS = {"cutoff_hz": float}
 
@@ -422,10 +1209,12 @@ class HighPass(Stage):
         cutoff_hz: float,
         fs: float,
         output_sensor: Optional[str] = None,
+        backend: str = BACKEND_PYTHON,
     ):
         self._fs = float(fs)
         self.cutoff_hz = cutoff_hz  # triggers setter → _recompute_alpha
         self.output_sensor = output_sensor
+        self.backend = kernels.check_backend(backend)
         # (device, sensor) -> (prev_input_values, prev_output_values)
         self._state: dict = {}
 
@@ -468,14 +1257,47 @@ class HighPass(Stage):
                 for i in range(len(frame.values))
             )
         self._state[key] = (frame.values, new_out)
-        out = self.output_sensor or f"{frame.sensor}_hp"
+        sensor = frame.sensor
+        out = self._derived_names.get(sensor) or self.derived_sensor(sensor)
         yield IMUFrame(
             device=frame.device, sensor=out,
             t_recv=frame.t_recv, values=new_out,
         )
 
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        if self.backend == BACKEND_NUMPY:
+            filtered = kernels.highpass_values(frames, self._state, self.alpha)
+            if filtered is not None:
+                out: List[IMUFrame] = []
+                for frame, new_out in zip(frames, filtered):
+                    out.append(frame)
+                    sensor = frame.sensor
+                    name = self._derived_names.get(sensor) or self.derived_sensor(sensor)
+                    out.append(IMUFrame(frame.device, name, frame.t_recv, new_out))
+                return out
+        out = []
+        append = out.append
+        state = self._state
+        alpha = self.alpha
+        for frame in frames:
+            append(frame)
+            values = frame.values
+            key = (frame.device, frame.sensor)
+            prev = state.get(key)
+            if prev is None or len(prev[0]) != len(values):
+                new_out = tuple([0.0 for _ in values])
+            else:
+                prev_in, prev_out = prev
+                new_out = tuple([alpha * (po + v - pi)
+                                 for po, v, pi in zip(prev_out, values, prev_in)])
+            state[key] = (values, new_out)
+            sensor = frame.sensor
+            name = self._derived_names.get(sensor) or self.derived_sensor(sensor)
+            append(IMUFrame(frame.device, name, frame.t_recv, new_out))
+        return out
+
     def outputs(self, input_sensor: str) -> List[str]:
-        out = self.output_sensor or f"{input_sensor}_hp"
+        out = self.derived_sensor(input_sensor)
         return [input_sensor, out]
 
 
@@ -493,6 +1315,8 @@ class Differentiator(Stage):
     → angular_accel`. For noisy derivatives, compose with `LowPass`
     upstream or downstream.
     """
+    OUTPUT_SUFFIX = "_d"
+    prunable = True
     def __init__(self, output_sensor: Optional[str] = None):
         self.output_sensor = output_sensor
         # (device, sensor) -> (prev_values, prev_t_recv)
@@ -515,14 +1339,38 @@ class Differentiator(Stage):
             (frame.values[i] - prev_vals[i]) / dt
             for i in range(len(frame.values))
         )
-        out = self.output_sensor or f"{frame.sensor}_d"
+        sensor = frame.sensor
+        out = self._derived_names.get(sensor) or self.derived_sensor(sensor)
         yield IMUFrame(
             device=frame.device, sensor=out,
             t_recv=frame.t_recv, values=deriv,
         )
 
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        out: List[IMUFrame] = []
+        append = out.append
+        state = self._state
+        for frame in frames:
+            append(frame)
+            values = frame.values
+            t = frame.t_recv
+            key = (frame.device, frame.sensor)
+            prev = state.get(key)
+            state[key] = (values, t)
+            if prev is None:
+                continue
+            prev_vals, prev_t = prev
+            dt = t - prev_t
+            if dt <= 0 or len(prev_vals) != len(values):
+                continue
+            sensor = frame.sensor
+            name = self._derived_names.get(sensor) or self.derived_sensor(sensor)
+            append(IMUFrame(frame.device, name, t,
+                            tuple([(v - p) / dt for v, p in zip(values, prev_vals)])))
+        return out
+
     def outputs(self, input_sensor: str) -> List[str]:
-        out = self.output_sensor or f"{input_sensor}_d"
+        out = self.derived_sensor(input_sensor)
         return [input_sensor, out]
 
 
@@ -542,6 +1390,8 @@ class EdgeDetector(Stage):
     `threshold - hysteresis` (mirror for falling). `direction ∈
     {"rising", "falling", "either"}`.
     """
+    OUTPUT_SUFFIX = "_edge"
+    prunable = True
     CONSTRUCTION_PARAMS = {
         "threshold": float, "hysteresis": float, "direction": str,
     }
@@ -606,17 +1456,163 @@ class EdgeDetector(Stage):
                 st["armed_falling"] = True
 
         if emit:
-            out = self.output_sensor or f"{frame.sensor}_edge"
+            sensor = frame.sensor
+            out = self._derived_names.get(sensor) or self.derived_sensor(sensor)
             yield IMUFrame(
                 device=frame.device, sensor=out,
                 t_recv=frame.t_recv, values=(1.0,),
             )
 
     def outputs(self, input_sensor: str) -> List[str]:
-        out = self.output_sensor or f"{input_sensor}_edge"
+        out = self.derived_sensor(input_sensor)
         return [input_sensor, out]
 
 
+_MOMENT_STATS = frozenset(("mean", "std", "sum"))
+
+
+class _WindowState:
+    """
+    Incremental per-(device, sensor) state for `Window`: the raw
+    samples plus whichever aggregate the current stat reads.
+
+    - mean/sum/std: per-axis running sum of `x - shift` (shift = a
+      sample value, so integer-valued streams such as button 0/1 stay
+      exact), plus a sliding Welford mean / sum of squared deviations
+      for std — updating M2 by `(x - y)(x - mean' + y - mean)` avoids
+      the Σx² - (Σx)²/n cancellation that wrecks std on an offset
+      signal like acc near 9.81. Every `resync_every` pushes all of it
+      is recomputed from the samples with `math.fsum`, bounding drift.
+    - min/max/range: per-axis monotonic deques of `(seq, value)`;
+      the front is the window extreme, expired entries drop off the
+      left.
+
+    Only the aggregate for the current kind is maintained; switching
+    kind (a `stat` retune across the two groups) rebuilds it once from
+    the samples. `push` is amortised O(arity), independent of `n`.
+    """
+    __slots__ = ("n", "arity", "samples", "seq", "moments",
+                 "shift", "s1", "mean", "m2", "since_resync", "resync_every",
+                 "maxq", "minq")
+
+    def __init__(self, n: int, arity: int, moments: bool, resync_every: int):
+        self.n = n
+        self.arity = arity
+        self.samples: deque = deque(maxlen=n)
+        self.seq = 0
+        # Resyncing no more often than every n pushes keeps the O(n)
+        # fsum amortised O(1) per frame.
+        self.resync_every = max(n, resync_every)
+        self.rebuild(moments)
+
+    def rebuild(self, moments: bool) -> None:
+        self.moments = moments
+        if moments:
+            self.maxq = self.minq = None
+            self.resync()
+            return
+        self.shift = self.s1 = self.mean = self.m2 = None
+        self.maxq = [deque() for _ in range(self.arity)]
+        self.minq = [deque() for _ in range(self.arity)]
+        seq = self.seq - len(self.samples)
+        for values in self.samples:
+            self._push_extrema(values, seq)
+            seq += 1
+
+    def resync(self) -> None:
+        samples = self.samples
+        arity = self.arity
+        self.since_resync = 0
+        if not samples:
+            # Shift is taken from the first pushed sample (see push).
+            self.shift = None
+            self.s1 = [0.0] * arity
+            self.mean = [0.0] * arity
+            self.m2 = [0.0] * arity
+            return
+        fsum = math.fsum
+        n = len(samples)
+        shift = list(samples[-1])
+        s1, mean, m2 = [], [], []
+        for axis in range(arity):
+            col = [v[axis] for v in samples]
+            k = shift[axis]
+            s1.append(fsum([v - k for v in col]))
+            m = fsum(col) / n
+            mean.append(m)
+            m2.append(fsum([(v - m) * (v - m) for v in col]))
+        self.shift, self.s1, self.mean, self.m2 = shift, s1, mean, m2
+
+    def _push_extrema(self, values, seq: int) -> None:
+        expired = seq - self.n
+        for axis, v in enumerate(values):
+            q = self.maxq[axis]
+            while q and q[-1][1] <= v:
+                q.pop()
+            q.append((seq, v))
+            if q[0][0] <= expired:
+                q.popleft()
+            q = self.minq[axis]
+            while q and q[-1][1] >= v:
+                q.pop()
+            q.append((seq, v))
+            if q[0][0] <= expired:
+                q.popleft()
+
+    def push(self, values) -> None:
+        samples = self.samples
+        count = len(samples)
+        evicted = samples[0] if count == self.n else None
+        samples.append(values)
+        seq = self.seq
+        self.seq = seq + 1
+        if not self.moments:
+            self._push_extrema(values, seq)
+            return
+        shift, s1, mean, m2 = self.shift, self.s1, self.mean, self.m2
+        if shift is None:
+            shift = self.shift = list(values)
+        if evicted is None:
+            # Warm-up: plain Welford insert.
+            count += 1
+            for axis in range(self.arity):
+                x = values[axis]
+                s1[axis] += x - shift[axis]
+                delta = x - mean[axis]
+                mean[axis] += delta / count
+                m2[axis] += delta * (x - mean[axis])
+        else:
+            n = self.n
+            for axis in range(self.arity):
+                x = values[axis]
+                y = evicted[axis]
+                k = shift[axis]
+                s1[axis] += (x - k) - (y - k)
+                old = mean[axis]
+                new = old + (x - y) / n
+                mean[axis] = new
+                m2[axis] += (x - y) * (x - new + y - old)
+        self.since_resync += 1
+        if self.since_resync >= self.resync_every:
+            self.resync()
+
+    def compute(self, stat: str) -> Tuple[float, ...]:
+        if stat == "max":
+            return tuple([q[0][1] for q in self.maxq])
+        if stat == "min":
+            return tuple([q[0][1] for q in self.minq])
+        if stat == "range":
+            return tuple([hi[0][1] - lo[0][1] for hi, lo in zip(self.maxq, self.minq)])
+        n = len(self.samples)
+        if stat == "mean":
+            return tuple([k + s / n for k, s in zip(self.shift, self.s1)])
+        if stat == "sum":
+            return tuple([k * n + s for k, s in zip(self.shift, self.s1)])
+        # std (population); M2 can dip a hair below 0 on constant input.
+        sqrt = math.sqrt
+        return tuple([sqrt(q / n) if q > 0.0 else 0.0 for q in self.m2])
+
+
 class Window(Stage):
     """
     Rolling N-sample window per (device, sensor). On each frame, emit
@@ -626,22 +1622,34 @@ class Window(Stage):
     `n_samples` is set at construction (deque is sized once; resizing
     mid-stream is messy state surgery, so it's intentionally not in
     TUNABLE_PARAMS). `stat ∈ {mean, std, max, min, range, sum}` is
-    tunable — the deque holds raw values; the stat is computed on
-    every frame from the window contents.
+    tunable — the deque holds raw values, so a retune takes effect on
+    the next frame with the full window behind it.
+
+    Stats are maintained incrementally (`_WindowState`): running sums
+    for mean/sum/std, monotonic deques for min/max/range, so each frame
+    costs O(arity) whatever `n_samples` is — multi-second windows at
+    100 Hz are fine. Results track a from-scratch recompute to ~1e-12
+    relative (min/max/range exactly); std of a near-constant signal
+    reads back as ~1e-8 × signal scale instead of a clean 0.
 
     Multi-axis input: stat is computed independently per axis (output
     arity matches input arity). Until the window is full (first N-1
     frames per key), the derived frame is still emitted using whatever
     samples are available — operators usually want partial-window
-    output during the warm-up rather than silence.
+    output during the warm-up rather than silence. A key whose arity
+    changes starts a fresh window.
 
     Output sensor defaults to `<sensor>_<stat>` (e.g. `acc_mag_std`).
     """
     CONSTRUCTION_PARAMS = {"n_samples": int, "stat": str}
     TUNABLE_PARAMS = {"stat": str}
+    prunable = True
 
     _VALID_STATS = ("mean", "std", "max", "min", "range", "sum")
 
+    # Minimum pushes between exact re-summations of the running sums.
+    RESYNC_EVERY = 1024
+
     def __init__(
         self,
         n_samples: int,
@@ -657,53 +1665,52 @@ class Window(Stage):
         self.n_samples = int(n_samples)
         self.stat = stat
         self.output_sensor = output_sensor
-        # (device, sensor) -> deque[tuple[float, ...]]
+        # (device, sensor) -> _WindowState
         self._state: dict = {}
 
-    def _compute(self, samples: list) -> Tuple[float, ...]:
-        """Compute the configured stat per-axis over the windowed samples."""
-        if not samples:
-            return ()
-        arity = len(samples[0])
-        out = []
-        for axis in range(arity):
-            col = [s[axis] for s in samples]
-            if self.stat == "mean":
-                out.append(sum(col) / len(col))
-            elif self.stat == "sum":
-                out.append(sum(col))
-            elif self.stat == "max":
-                out.append(max(col))
-            elif self.stat == "min":
-                out.append(min(col))
-            elif self.stat == "range":
-                out.append(max(col) - min(col))
-            elif self.stat == "std":
-                m = sum(col) / len(col)
-                var = sum((v - m) ** 2 for v in col) / len(col)
-                out.append(math.sqrt(var))
-        return tuple(out)
+    @property
+    def stat(self) -> str:
+        return self._stat_kind[0]
+
+    @stat.setter
+    def stat(self, value: str) -> None:
+        # One store, so a frame in flight during /cmd/pipeline/set
+        # never pairs the new stat with the old state kind.
+        self._stat_kind = (value, value in _MOMENT_STATS)
+        # Default output name is `<sensor>_<stat>` — drop memoised names.
+        # A pipeline with a demand routes by output name: recompile it
+        # after a retune (C2 /cmd/pipeline/set does).
+        self._invalidate_derived_names()
+
+    def _output_suffix(self) -> str:
+        return f"_{self._stat_kind[0]}"
 
     def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
         yield frame
         key = (frame.device, frame.sensor)
-        dq = self._state.get(key)
-        if dq is None or dq.maxlen != self.n_samples:
-            # First frame for this key (or n_samples reconstructed,
-            # which currently can't happen since n_samples isn't
-            # tunable — guard left for forward compatibility).
-            dq = deque(maxlen=self.n_samples)
-            self._state[key] = dq
-        dq.append(frame.values)
-        stat_values = self._compute(list(dq))
-        out = self.output_sensor or f"{frame.sensor}_{self.stat}"
+        values = frame.values
+        stat, moments = self._stat_kind
+        st = self._state.get(key)
+        if st is None or st.arity != len(values) or st.n != self.n_samples:
+            # First frame for this key, or its arity changed. (n_samples
+            # can't change today — it isn't tunable — guard left for
+            # forward compatibility.)
+            st = _WindowState(self.n_samples, len(values), moments,
+                              self.RESYNC_EVERY)
+            self._state[key] = st
+        elif st.moments is not moments:
+            # stat retuned across mean/sum/std ↔ min/max/range.
+            st.rebuild(moments)
+        st.push(values)
+        sensor = frame.sensor
+        out = self._derived_names.get(sensor) or self.derived_sensor(sensor)
         yield IMUFrame(
             device=frame.device, sensor=out,
-            t_recv=frame.t_recv, values=stat_values,
+            t_recv=frame.t_recv, values=st.compute(stat),
         )
 
     def outputs(self, input_sensor: str) -> List[str]:
-        out = self.output_sensor or f"{input_sensor}_{self.stat}"
+        out = self.derived_sensor(input_sensor)
         return [input_sensor, out]
 
 
@@ -721,6 +1728,8 @@ class Scale(Stage):
     `<sensor>_scaled`); set `output_sensor` to override, or pass an
     explicit name to live in the same value space the consumer expects.
     """
+    OUTPUT_SUFFIX = "_scaled"
+    prunable = True
     CONSTRUCTION_PARAMS = {"scale": float, "offset": float}
     TUNABLE_PARAMS = {"scale": float, "offset": float}
 
@@ -729,25 +1738,155 @@ class Scale(Stage):
         scale: float = 1.0,
         offset: float = 0.0,
         output_sensor: Optional[str] = None,
+        backend: str = BACKEND_PYTHON,
     ):
         self.scale = float(scale)
         self.offset = float(offset)
         self.output_sensor = output_sensor
+        self.backend = kernels.check_backend(backend)
 
     def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
         yield frame
         new = tuple((v - self.offset) * self.scale for v in frame.values)
-        out = self.output_sensor or f"{frame.sensor}_scaled"
+        sensor = frame.sensor
+        out = self._derived_names.get(sensor) or self.derived_sensor(sensor)
         yield IMUFrame(
             device=frame.device, sensor=out,
             t_recv=frame.t_recv, values=new,
         )
 
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        out: List[IMUFrame] = []
+        append = out.append
+        offset = self.offset
+        scale = self.scale
+        if self.backend == BACKEND_NUMPY:
+            scaled = kernels.scale_values(frames, offset, scale)
+        else:
+            scaled = [tuple([(v - offset) * scale for v in frame.values])
+                      for frame in frames]
+        for frame, new in zip(frames, scaled):
+            append(frame)
+            sensor = frame.sensor
+            name = self._derived_names.get(sensor) or self.derived_sensor(sensor)
+            append(IMUFrame(frame.device, name, frame.t_recv, new))
+        return out
+
     def outputs(self, input_sensor: str) -> List[str]:
-        out = self.output_sensor or f"{input_sensor}_scaled"
+        out = self.derived_sensor(input_sensor)
         return [input_sensor, out]
 
 
+class EmitPolicy(Stage):
+    """
+    Emission policy for the OSC path: drops frames a receiver doesn't
+    need before `OscEmit` sends them. Spliced in by run_fs.py just
+    ahead of the terminal (after any Recorder, so recordings stay
+    full-rate) from fs_config.json's `emission` section; `inputs`
+    selects the streams it governs. Each (device, sensor) stream is
+    limited independently.
+
+    - `max_hz`: at most this many frames per second per stream. A
+      frame arriving before the stream is due is dropped; the first
+      one after is sent, so the value that goes out is always the
+      latest (superseded values are never queued). The schedule
+      advances by whole intervals, keeping the average rate at
+      `max_hz` rather than drifting down to the input's divisor.
+    - `deadband` / `deadband_rel`: send only when some axis moved by
+      more than `deadband + deadband_rel * |last sent|` since the last
+      sent frame (numpy.isclose semantics).
+    - `refresh_s`: a frame is always sent once the stream has been
+      quiet this long, so a value lost over UDP or a receiver that
+      joins late is corrected within `refresh_s`.
+    0 disables any of the four. Timing uses `t_recv`.
+
+    All four are TUNABLE_PARAMS; C2 tunes them with
+    `/cmd/pipeline/set <mac> <pipeline> EmitPolicy[:N] <param> <value>`.
+    Not in `_STAGE_REGISTRY`: it's wired from config next to the
+    terminal, and persisted as `tunings`.
+    """
+    is_filter = True
+    TUNABLE_PARAMS = {"max_hz": float, "deadband": float,
+                      "deadband_rel": float, "refresh_s": float}
+
+    def __init__(self, max_hz: float = 0.0, deadband: float = 0.0,
+                 deadband_rel: float = 0.0, refresh_s: float = 1.0,
+                 inputs: Optional[Iterable[str]] = None):
+        for name, value in (("max_hz", max_hz), ("deadband", deadband),
+                            ("deadband_rel", deadband_rel), ("refresh_s", refresh_s)):
+            if value < 0:
+                raise ValueError(f"{name} must be >= 0, got {value}")
+        self.max_hz = float(max_hz)
+        self.deadband = float(deadband)
+        self.deadband_rel = float(deadband_rel)
+        self.refresh_s = float(refresh_s)
+        if inputs is not None:
+            self.inputs = frozenset(intern_key(s) for s in inputs)
+        # (device, sensor) -> [due_t, last_sent_t, last_sent_values]
+        self._streams: Dict[Tuple[str, str], list] = {}
+        self.sent = 0
+        self.suppressed = 0
+
+    def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
+        key = (frame.device, frame.sensor)
+        stream = self._streams.get(key)
+        t = frame.t_recv
+        max_hz = self.max_hz
+        if stream is None:
+            self._streams[key] = [t + 1.0 / max_hz if max_hz > 0 else t,
+                                  t, frame.values]
+            self.sent += 1
+            return (frame,)
+        refresh_s = self.refresh_s
+        if refresh_s <= 0 or t - stream[1] < refresh_s:
+            if max_hz > 0 and t < stream[0] - _DUE_SLACK_S:
+                self.suppressed += 1
+                return ()
+            atol = self.deadband
+            rtol = self.deadband_rel
+            if (atol > 0 or rtol > 0) and not _moved(frame.values, stream[2], atol, rtol):
+                self.suppressed += 1
+                return ()
+        if max_hz > 0:
+            interval = 1.0 / max_hz
+            due = stream[0] + interval
+            # Behind by more than an interval (stream paused, deadband
+            # held it): restart the schedule from now.
+            stream[0] = due if due > t else t + interval
+        stream[1] = t
+        stream[2] = frame.values
+        self.sent += 1
+        return (frame,)
+
+
+# Tolerance on the `max_hz` schedule: BLE delivery jitter and float
+# rounding would otherwise push a frame that lands right on the due
+# time into the next interval.
+_DUE_SLACK_S = 1e-4
+
+
+def _moved(values, last, atol: float, rtol: float) -> bool:
+    if len(values) != len(last):
+        return True
+    try:
+        for v, prev in zip(values, last):
+            if abs(v - prev) > atol + rtol * abs(prev):
+                return True
+    except TypeError:
+        return values != last
+    return False
+
+
+BUNDLE_OFF = "off"
+BUNDLE_TICK = "tick"
+BUNDLE_WINDOW = "window"
+BUNDLE_MODES = (BUNDLE_OFF, BUNDLE_TICK, BUNDLE_WINDOW)
+
+# Messages per bundle before it's sent regardless of mode — keeps a
+# long window's datagram well under a typical 1500-byte MTU.
+BUNDLE_MAX_MESSAGES = 24
+
+
 class OscEmit(Stage):
     """
     Terminal stage. Sends each frame to OSC as `/<device>/<sensor>`.
@@ -759,32 +1898,257 @@ class OscEmit(Stage):
     frame — used by capture mode so the JSONL recording captures the
     same post-pipeline frames the receiver would have seen, without
     side-effecting the audio plane mid-training.
+
+    `bundle` groups messages into one datagram instead of one per
+    frame:
+    - `"off"` (default): one message per frame, as before.
+    - `"tick"`: everything derived from one input frame (acc, acc_lp,
+      acc_mag, ... — they share its `t_recv`) goes out together at the
+      end of the push.
+    - `"window"`: frames accumulate for `bundle_window_us` from the
+      first one held, across input frames; the group is sent at the
+      first push ending after the window closes. Worst-case added
+      latency is the window plus one input interval.
+    A group is an OSC `#bundle` whose timetag is the wall-clock time
+    its first frame arrived; a group of one is sent as a plain
+    message. `pd_compat=True` replaces the bundle with one plain
+    message `/<device>/packed  <sensor> <v...> <sensor> <v...> ...`
+    for receivers without bundle support (vanilla Pd's [oscparse]);
+    split it on the symbol arguments. See docs/stages.md#oscemit.
+
+    When the client can take pre-encoded bytes (`send_dgram`, i.e. an
+    `oscwire.WireClient`), each stream's message head is encoded once
+    and frames are packed with a cached `struct.Struct` — the type
+    tags are fixed by the stream's first frame (re-derived if a later
+    frame doesn't fit). Other clients get `send_message` as before.
+    WireClient / EgressClient skip the send while their target's
+    circuit breaker is open (see sense/breaker.py). With a
+    `fanout.FanOut` client each stream's `Route` is cached, and held
+    groups are split per target subset (see `_send_pending_fanout`).
     """
     is_terminal = True
 
-    def __init__(self, osc_client):
+    def __init__(self, osc_client, bundle: str = BUNDLE_OFF,
+                 bundle_window_us: int = 2000, pd_compat: bool = False):
+        if bundle not in BUNDLE_MODES:
+            raise ValueError(f"bundle must be one of {BUNDLE_MODES}, got {bundle!r}")
+        if bundle_window_us < 0:
+            raise ValueError(f"bundle_window_us must be >= 0, got {bundle_window_us}")
+        # (device, sensor) -> MessageTemplate, for send_dgram clients.
+        self._templates: Dict[Tuple[str, str], oscwire.MessageTemplate] = {}
         self.osc_client = osc_client
         self.muted = False
+        self.bundle = bundle
+        self.bundle_window_us = int(bundle_window_us)
+        self.pd_compat = bool(pd_compat)
+        # (device, sensor) -> "/<device>/<sensor>", built once per stream.
+        self._addresses: Dict[Tuple[str, str], str] = {}
+        # Held group: (sensor, address, value, encoded message or None)
+        # per frame, all from `_pending_device`; `_opened_ns` is when
+        # the first was held.
+        self._pending: List[Tuple[str, str, object, Optional[bytes]]] = []
+        self._pending_device: Optional[str] = None
+        self._pending_t: Optional[float] = None
+        self._opened_ns = 0
+        self._opened_wall = 0.0
+
+    @property
+    def osc_client(self):
+        return self._osc_client
+
+    @osc_client.setter
+    def osc_client(self, client) -> None:
+        # C2's network reconfigure swaps clients on live stages.
+        self._osc_client = client
+        self._send_dgram = getattr(client, "send_dgram", None)
+        # fanout.FanOut: one cached Route per stream instead of
+        # send_dgram, so the address is never re-matched per frame.
+        self._route = getattr(client, "route", None)
+        self._routes: Dict[Tuple[str, str], object] = {}
+
+    def address_for(self, device: str, sensor: str) -> str:
+        key = (device, sensor)
+        addr = self._addresses.get(key)
+        if addr is None:
+            addr = self._addresses[key] = f"/{device}/{sensor}"
+        return addr
+
+    def route_for(self, device: str, sensor: str):
+        """The fan-out `Route` for one stream (fan-out clients only)."""
+        key = (device, sensor)
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = self._route(self.address_for(device, sensor))
+        return route
+
+    def encode(self, frame: IMUFrame) -> bytes:
+        """The frame's OSC message, through the per-stream template."""
+        values = frame.values
+        tpl = self._templates.get((frame.device, frame.sensor))
+        if tpl is not None and tpl.arity == len(values):
+            try:
+                return tpl.encode(values)
+            except struct.error:
+                pass  # value types changed (int ↔ float): re-derive
+        addr = self.address_for(frame.device, frame.sensor)
+        tpl = oscwire.ENCODER.template(addr, values)
+        if tpl is None:
+            return oscwire.ENCODER.encode(addr, values)
+        self._templates[(frame.device, frame.sensor)] = tpl
+        return tpl.encode(values)
 
     def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
         if self.muted:
             return ()
-        addr = f"/{frame.device}/{frame.sensor}"
-        try:
-            if len(frame.values) == 1:
-                self.osc_client.send_message(addr, frame.values[0])
+        send_dgram = self._send_dgram
+        if self.bundle == BUNDLE_OFF:
+            try:
+                if self._route is not None:
+                    self.route_for(frame.device, frame.sensor).send(self.encode(frame))
+                elif send_dgram is not None:
+                    send_dgram(self.encode(frame))
+                else:
+                    values = frame.values
+                    self._osc_client.send_message(
+                        self.address_for(frame.device, frame.sensor),
+                        values[0] if len(values) == 1 else values)
+            except BaseException as e:
+                _send_failed(self.address_for(frame.device, frame.sensor), e)
+            return ()
+        addr = self.address_for(frame.device, frame.sensor)
+        values = frame.values
+        value = values[0] if len(values) == 1 else values
+        pending = self._pending
+        if pending and (frame.device != self._pending_device
+                        or (self.bundle == BUNDLE_TICK and frame.t_recv != self._pending_t)
+                        or len(pending) >= BUNDLE_MAX_MESSAGES):
+            # New input tick (push_batch hands us several), another
+            # device, or a full datagram: send what's held first.
+            self._send_pending()
+        if not pending:
+            self._pending_device = frame.device
+            self._pending_t = frame.t_recv
+            self._opened_ns = _perf_ns()
+            self._opened_wall = time.time()
+        dgram = None
+        if send_dgram is not None:
+            try:
+                dgram = self.encode(frame)
+            except BaseException as e:
+                _send_failed(addr, e)
+                return ()
+        pending.append((frame.sensor, addr, value, dgram))
+        return ()
+
+    def flush(self, force: bool = False) -> None:
+        """Send the held group: always in tick mode, once the window has
+        closed in window mode, or unconditionally with `force`."""
+        if not self._pending:
+            return
+        if (self.bundle == BUNDLE_WINDOW and not force
+                and _perf_ns() - self._opened_ns < self.bundle_window_us * 1000):
+            return
+        self._send_pending()
+
+    def drain(self) -> None:
+        """Send a held window-mode group without waiting for its window."""
+        self.flush(force=True)
+
+    def _send_pending(self) -> None:
+        pending = self._pending
+        if self._route is not None:
+            self._send_pending_fanout()
+            pending.clear()
+            return
+        send_dgram = self._send_dgram
+        if len(pending) == 1:
+            _, addr, value, dgram = pending[0]
+            if dgram is not None and send_dgram is not None:
+                self._guarded(addr, send_dgram, dgram)
             else:
-                self.osc_client.send_message(addr, frame.values)
-        except OSError as e:
-            # Receiver not reachable — silent. log.exception here would
-            # dominate CPU at high frame rates and throttle the BLE
-            # callback thread (observed: 199 Hz aggregate → 60 Hz when
-            # PD is unreachable and every send raised + logged a traceback).
-            if e.errno not in _TRANSIENT_OSC_ERRNOS:
-                log.warning("[OscEmit] send_message %s failed: %s", addr, e)
+                self._guarded(addr, self._osc_client.send_message, addr, value)
+        elif self.pd_compat:
+            args: list = []
+            for sensor, _, value, _ in pending:
+                args.append(sensor)
+                if isinstance(value, (tuple, list)):
+                    args.extend(value)
+                else:
+                    args.append(value)
+            addr = f"/{self._pending_device}/packed"
+            self._guarded(addr, self._osc_client.send_message, addr, args)
+        else:
+            addr = f"/{self._pending_device}/#bundle"
+            self._guarded(addr, self._send_bundle, pending, self._opened_wall)
+        pending.clear()
+
+    def _send_pending_fanout(self) -> None:
+        """`_send_pending` for a fan-out client: each distinct subset of
+        targets gets the group narrowed to the addresses it wants, in
+        the same shape (single message / packed / bundle)."""
+        pending = self._pending
+        device = self._pending_device
+        encode = oscwire.ENCODER.encode
+        route = self._osc_client.route
+        for _, addr, value, dgram in pending:
+            # Per-address telemetry counts the message once, at its own
+            # encoded size, whatever group shape carries it.
+            route(addr).count(len(dgram if dgram is not None else encode(addr, value)))
+        for indices, sends in self._osc_client.partition([p[1] for p in pending]):
+            group = [pending[i] for i in indices]
+            if len(group) == 1:
+                _, addr, value, dgram = group[0]
+                dgram = dgram if dgram is not None else encode(addr, value)
+            elif self.pd_compat:
+                args: list = []
+                for sensor, _, value, _ in group:
+                    args.append(sensor)
+                    if isinstance(value, (tuple, list)):
+                        args.extend(value)
+                    else:
+                        args.append(value)
+                addr = f"/{device}/packed"
+                dgram = encode(addr, args)
+            else:
+                addr = f"/{device}/#bundle"
+                dgram = oscwire.encode_bundle(
+                    [d if d is not None else encode(a, v) for _, a, v, d in group],
+                    self._opened_wall)
+            for send in sends:
+                self._guarded(addr, send, dgram)
+
+    def _send_bundle(self, pending, timetag: float) -> None:
+        send_dgram = self._send_dgram
+        if send_dgram is not None and all(p[3] is not None for p in pending):
+            send_dgram(oscwire.encode_bundle([p[3] for p in pending], timetag))
+            return
+        from pythonosc.osc_bundle_builder import OscBundleBuilder
+        from pythonosc.osc_message_builder import OscMessageBuilder
+        bundle = OscBundleBuilder(timetag)
+        for _, addr, value, _ in pending:
+            msg = OscMessageBuilder(address=addr)
+            for v in (value if isinstance(value, (tuple, list)) else (value,)):
+                msg.add_arg(v)
+            bundle.add_content(msg.build())
+        self._osc_client.send(bundle.build())
+
+    @staticmethod
+    def _guarded(addr: str, send, *args) -> None:
+        try:
+            send(*args)
         except BaseException as e:
-            log.warning("[OscEmit] send_message %s failed: %s", addr, e)
-        return ()
+            _send_failed(addr, e)
+
+
+def _send_failed(addr: str, e: BaseException) -> None:
+    # Receiver not reachable — silent. log.exception here would
+    # dominate CPU at high frame rates and throttle the BLE callback
+    # thread (observed: 199 Hz aggregate → 60 Hz when PD is
+    # unreachable and every send raised + logged a traceback). After
+    # a few of these the target's circuit breaker stops the sends.
+    if isinstance(e, OSError) and e.errno in _TRANSIENT_OSC_ERRNOS:
+        return
+    log.warning("[OscEmit] send_message %s failed: %s", addr, e)
 
 
 # --- Stage registry for /cmd/pipeline/add ------------------------------------
@@ -808,6 +2172,60 @@ _STAGE_REGISTRY: Dict[str, type] = {
 }
 
 
+# --- Emission policy ---------------------------------------------------------
+#
+# fs_config.json's optional `emission` section maps address patterns to
+# EmitPolicy params:
+#
+#     "emission": {
+#         "tilt":           {"max_hz": 30},
+#         "temp":           {"deadband": 0.05, "refresh_s": 5},
+#         "/*/euler_angle": {"max_hz": 25, "deadband": 0.5}
+#     }
+#
+# A pattern without a leading `/` matches sensor names; one with it
+# matches the full `/<mac>/<sensor>` address, so a rule can target one
+# device. Shell wildcards as in /cmd/subscribe. run_fs.py calls this
+# after the Recorder splice and before apply_pipeline_overrides, so
+# persisted EmitPolicy tunings land on the stages built here.
+
+def apply_emission_policy(states, config) -> None:
+    """Insert one `EmitPolicy` per matching `config["emission"]` rule
+    in front of each pipeline's first terminal stage, selecting the
+    sensors that reach it. Rules apply in config order; a sensor
+    matched by several rules goes through each. Duck-typed on
+    `states` like apply_pipeline_overrides."""
+    rules = config.get("emission") or {}
+    if not rules:
+        return
+    for state in states:
+        for pipe_name, pipe in state.pipelines.items():
+            stages = pipe.composition.stages
+            term = next((i for i, st in enumerate(stages) if st.is_terminal), None)
+            if term is None:
+                continue
+            reaching = sorted(pipe.sensors_at(pipe_name, term))
+            policies = []
+            for pattern, params in rules.items():
+                if pattern.startswith("/"):
+                    selected = [s for s in reaching
+                                if fnmatch.fnmatchcase(f"/{state.address}/{s}", pattern)]
+                else:
+                    selected = [s for s in reaching if fnmatch.fnmatchcase(s, pattern)]
+                if not selected:
+                    continue
+                try:
+                    policies.append(EmitPolicy(inputs=selected, **params))
+                except BaseException:
+                    log.exception("[%s/%s] emission rule %r failed",
+                                  state.address, pipe_name, pattern)
+                    continue
+                log.info("[%s/%s] emission %r → %s %s",
+                         state.address, pipe_name, pattern, selected, params)
+            if policies:
+                pipe.edit(lambda current: current[:term] + policies + current[term:])
+
+
 # --- Persisted-override application ------------------------------------------
 #
 # Counterpart to the C2 /cmd/pipeline/* persistence writers in sense/c2.py.
@@ -842,9 +2260,9 @@ def apply_pipeline_overrides(states, config) -> None:
             composition = entry.get("composition")
             if composition is not None:
                 try:
-                    pipe.stages = rebuild_composition_with_overrides(
+                    pipe.edit(lambda _: rebuild_composition_with_overrides(
                         pipe, composition,
-                    )
+                    ))
                     log.info("[%s/%s] composition override applied: %s",
                              state.address, pipe_name,
                              [s.__class__.__name__ for s in pipe.stages])
@@ -852,11 +2270,10 @@ def apply_pipeline_overrides(states, config) -> None:
                     log.exception("[%s/%s] composition apply failed",
                                   state.address, pipe_name)
             for cls_name, params in entry.get("tunings", {}).items():
-                target = next(
-                    (s for s in pipe.stages
-                     if s.__class__.__name__ == cls_name),
-                    None,
-                )
+                # Keys are stage refs: "Class", or "Class:N" for the Nth
+                # of a class that appears more than once.
+                resolved = _resolve_stage(pipe.composition.stages, cls_name)
+                target = resolved[1] if resolved is not None else None
                 if target is None:
                     log.warning("[%s/%s] tunings: %s not in live pipeline; skipping",
                                 state.address, pipe_name, cls_name)
@@ -880,7 +2297,10 @@ def rebuild_composition_with_overrides(pipe, composition_list) -> List["Stage"]:
     provides the constructible-stage chain in order; non-constructible
     stages (Recorder, GestureRecognizer, PositionTracker, LatchUpdate,
     OscEmit) are preserved from the current pipe.stages in their
-    existing relative order."""
+    existing relative order. A constructible stage already in the
+    pipeline with identical params and routing is kept as-is rather
+    than rebuilt, so its filter state carries over."""
+    current = pipe.composition.stages
     new_stages: List["Stage"] = []
     for item in composition_list:
         cls_name = item.get("class")
@@ -890,14 +2310,76 @@ def rebuild_composition_with_overrides(pipe, composition_list) -> List["Stage"]:
             log.warning("override references unknown class %r; skipping",
                         cls_name)
             continue
+        retained = next((s for s in current
+                         if s not in new_stages and _same_stage(s, klass, item)),
+                        None)
+        if retained is not None:
+            new_stages.append(retained)
+            continue
         try:
             stage = klass(**params)
         except BaseException:
             log.exception("override construction failed for %s(**%s)",
                           cls_name, params)
             continue
+        if "inputs" in item:
+            # Explicit routing from /cmd/pipeline/add; null = all sensors.
+            inputs = item["inputs"]
+            stage.inputs = frozenset(inputs) if inputs is not None else None
         new_stages.append(stage)
-    for stage in pipe.stages:
+    for stage in current:
         if stage.__class__.__name__ not in _STAGE_REGISTRY:
             new_stages.append(stage)
     return new_stages
+
+
+def _same_stage(stage: "Stage", klass: type, item: dict) -> bool:
+    """Would building `item` reproduce `stage` (class, construction
+    params, explicit routing)? Params absent from `item` mean None,
+    mirroring how C2 persists them."""
+    if type(stage) is not klass:
+        return False
+    params = item.get("params", {})
+    for k in klass.CONSTRUCTION_PARAMS:
+        if getattr(stage, k, None) != params.get(k):
+            return False
+    if "inputs" in item:
+        inputs = item["inputs"]
+        return stage.inputs == (frozenset(inputs) if inputs is not None else None)
+    return "inputs" not in stage.__dict__
+
+
+def _resolve_stage(stages: list, stage_ref: str):
+    """Resolve a stage_ref string to (index, stage). Returns None if
+    unresolved. Accepts three forms:
+      - Integer string: 0-indexed position in the pipeline
+      - 'ClassName': first stage of that class
+      - 'ClassName:N': 1-indexed Nth stage of that class (for duplicates)
+    """
+    # Pure integer → position
+    try:
+        idx = int(stage_ref)
+        if 0 <= idx < len(stages):
+            return (idx, stages[idx])
+        return None
+    except (TypeError, ValueError):
+        pass
+    # ClassName:N
+    if ":" in stage_ref:
+        cls_name, n_str = stage_ref.rsplit(":", 1)
+        try:
+            n = int(n_str)
+        except (TypeError, ValueError):
+            return None
+        matches = [
+            (i, s) for i, s in enumerate(stages)
+            if s.__class__.__name__ == cls_name
+        ]
+        if 1 <= n <= len(matches):
+            return matches[n - 1]
+        return None
+    # Bare ClassName → first match
+    for i, s in enumerate(stages):
+        if s.__class__.__name__ == stage_ref:
+            return (i, s)
+    return None
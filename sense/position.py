@@ -126,7 +126,9 @@ class PositionTracker(FusionStage):
         # them creates 3 downstream frames per linear_acc tick (Recorder
         # writes + OscEmit sends per channel), which back up the BLE
         # callback thread and cap the linear_acc input rate at ~9 Hz.
-        # Opt them on via the run_fs.py CLI flags for debug/analysis runs.
+        # Opt them on via the run_fs.py CLI flags for debug/analysis runs
+        # (with --frame-queue the cost moves to the per-device worker and
+        # shows up as queue drops instead of a lower BLE rate).
         emit_velocity: bool = False,
         emit_zupt: bool = False,
         state_lookup: Optional[Callable] = None,  # (mac) -> MetaWearState | None, for LED control
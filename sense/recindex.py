@@ -0,0 +1,314 @@
+"""
+Random-access index sidecar for JSONL recordings.
+
+Every reader used to scan a recording from the first line, even to
+pull one gesture window or the last minute out of a day's capture. A
+sidecar `<recording>.idx.json` (for a compressed segment, named after
+the uncompressed file) records where things are, as byte offsets into
+the uncompressed JSONL:
+
+    {"version": 1, "size": <bytes covered>, "bucket_s": 1.0,
+     "frames": N, "t_first": .., "t_last": ..,
+     "buckets": [[k, offset], ...],        # first line with t_recv >= t_first + k·bucket_s
+     "streams": [[device, sensor, count, first_offset, first_t,
+                  last_offset, last_t], ...],
+     "markers": [[kind, label, device, instance, offset], ...]}   # `_gesture` records
+
+Buckets are sparse (only where a new one starts) and keyed on "first
+line in file order with a later time", so seeking to a bucket never
+skips a frame of that time even when devices interleave out of order.
+`RecorderSink` builds the index as it writes and saves it every
+`index_interval_s`, at each segment rollover and on close;
+`tools/index_recording.py` (`build_index`) indexes existing files.
+
+Readers:
+- `load_index(path)` — the sidecar, or None when missing or stale (it
+  covers more bytes than the file has, or doesn't end on a line).
+  `size` can be short of the file while it's still being written; the
+  readers below scan the unindexed tail.
+- `iter_frames_between(path, t_start, t_end)` — frame records with
+  `t_start <= t_recv < t_end`, seeking to the bucket and stopping a
+  bucket past `t_end`.
+- `iter_gesture_windows(path)` — `(start, end, frames)` per `_gesture`
+  window, reading only the lines between each start / end pair.
+
+Both fall back to a full `columnar.iter_records` scan (same results)
+for `.fsc` files, which carry their own index, and for unindexed JSONL;
+a segment manifest is read segment by segment, skipping segments whose
+time span (sense/segments.py) misses the range.
+"""
+import bisect
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import columnar, segments
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+DEFAULT_BUCKET_S = 1.0
+
+
+def index_path(path) -> Path:
+    """Sidecar of `path`: `x.jsonl` and `x.jsonl.gz` → `x.jsonl.idx.json`."""
+    path = Path(path)
+    if segments.is_compressed(path):
+        path = path.with_suffix("")
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+class IndexBuilder:
+    """
+    Accumulates the index while lines are written (or scanned). Feed
+    every line in file order: `frame(offset, device, sensor, t_recv)`
+    for frames, `marker(offset, record)` for other records, with the
+    byte offset the line starts at; `size` is where the last fed line
+    ended. Not thread-safe — the sink's writer thread owns it.
+    """
+    def __init__(self, bucket_s: float = DEFAULT_BUCKET_S):
+        self.bucket_s = float(bucket_s)
+        self.size = 0
+        self.frames = 0
+        self.t_first: Optional[float] = None
+        self.t_last: Optional[float] = None
+        self.buckets: List[list] = []
+        self.markers: List[list] = []
+        self._streams: Dict[tuple, list] = {}
+        # Start time of the bucket after the newest one.
+        self._next_t = float("-inf")
+
+    def frame(self, offset: int, device: str, sensor: str, t_recv: float) -> None:
+        self.frames += 1
+        stream = self._streams.get((device, sensor))
+        if stream is None:
+            self._streams[(device, sensor)] = [device, sensor, 1, offset, t_recv, offset, t_recv]
+        else:
+            stream[2] += 1
+            stream[5] = offset
+            stream[6] = t_recv
+        self.t_last = t_recv
+        if t_recv >= self._next_t:
+            if self.t_first is None:
+                self.t_first = t_recv
+            k = int((t_recv - self.t_first) // self.bucket_s)
+            self.buckets.append([k, offset])
+            self._next_t = self.t_first + (k + 1) * self.bucket_s
+
+    def marker(self, offset: int, record: dict) -> None:
+        kind = record.get("_gesture")
+        if kind is not None:
+            self.markers.append([kind, record.get("label"), record.get("device"),
+                                 record.get("instance"), offset])
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "bucket_s": self.bucket_s,
+            "frames": self.frames,
+            "t_first": self.t_first,
+            "t_last": self.t_last,
+            "buckets": self.buckets,
+            "streams": list(self._streams.values()),
+            "markers": self.markers,
+        }
+
+    def save(self, recording) -> Path:
+        """Write the sidecar of `recording` atomically."""
+        out = index_path(recording)
+        tmp = out.with_name(out.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, separators=(",", ":"))
+        os.replace(tmp, out)
+        return out
+
+
+class RecordingIndex:
+    """A loaded sidecar. Plain attributes mirror the JSON."""
+    def __init__(self, data: dict):
+        self.size: int = data["size"]
+        self.bucket_s: float = data["bucket_s"]
+        self.frames: int = data["frames"]
+        self.t_first: Optional[float] = data["t_first"]
+        self.t_last: Optional[float] = data["t_last"]
+        self._keys = [k for k, _ in data["buckets"]]
+        self._offsets = [o for _, o in data["buckets"]]
+        # (device, sensor, count, first_offset, first_t, last_offset, last_t)
+        self.streams: List[tuple] = [tuple(s) for s in data["streams"]]
+        # (kind, label, device, instance, offset)
+        self.markers: List[tuple] = [tuple(m) for m in data["markers"]]
+
+    def seek_offset(self, t: float) -> int:
+        """Offset to start reading at for frames with t_recv >= t."""
+        if self.t_first is None or t <= self.t_first:
+            return 0
+        k = int((t - self.t_first) // self.bucket_s)
+        i = bisect.bisect_right(self._keys, k) - 1
+        return self._offsets[i] if i >= 0 else 0
+
+    def end_offset(self, t: float) -> int:
+        """Offset past which no frame with t_recv < `t` is expected:
+        the first bucket starting a full bucket after `t` (`size` if
+        none)."""
+        if self.t_first is None:
+            return self.size
+        k = int((t - self.t_first) // self.bucket_s) + 2
+        i = bisect.bisect_left(self._keys, k)
+        return self._offsets[i] if i < len(self._offsets) else self.size
+
+
+def load_index(path) -> Optional[RecordingIndex]:
+    """The sidecar of JSONL file `path`, or None if there is none or it
+    doesn't match the file (see module docstring)."""
+    path = Path(path)
+    try:
+        with index_path(path).open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION:
+        return None
+    size = data.get("size", 0)
+    if size and not segments.is_compressed(path):
+        # Compressed segments are closed and immutable; a plain file
+        # must still be at least as long and have a line end there.
+        try:
+            with path.open("rb") as fh:
+                fh.seek(size - 1)
+                if fh.read(1) != b"\n":
+                    return None
+        except OSError:
+            return None
+    return RecordingIndex(data)
+
+
+def _records(fh, start: int, end: Optional[int] = None) -> Iterator[dict]:
+    """Records of binary file `fh` from byte `start` (a line start) to
+    `end` (a line start; None: EOF)."""
+    fh.seek(start)
+    if end is not None:
+        for line in fh.read(end - start).splitlines():
+            if line.strip():
+                yield json.loads(line)
+        return
+    for line in fh:
+        if not line.endswith(b"\n"):
+            # Torn last line of a file whose writer died mid-write.
+            try:
+                yield json.loads(line)
+            except ValueError:
+                pass
+            return
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def build_index(path, bucket_s: float = DEFAULT_BUCKET_S) -> IndexBuilder:
+    """Index an existing JSONL file (plain or compressed) by scanning
+    it. Call `.save(path)` on the result to write the sidecar."""
+    builder = IndexBuilder(bucket_s)
+    offset = 0
+    with segments.open_file(path, "rb") as fh:
+        for line in fh:
+            if not line.endswith(b"\n"):
+                break
+            text = line.strip()
+            if text:
+                record = json.loads(text)
+                if "sensor" in record and "device" in record:
+                    t = record.get("t_recv")
+                    if t is not None:
+                        builder.frame(offset, record["device"], record["sensor"], t)
+                else:
+                    builder.marker(offset, record)
+            offset += len(line)
+            builder.size = offset
+    return builder
+
+
+def _indexed(path) -> Optional[RecordingIndex]:
+    if columnar.is_columnar(path):
+        return None
+    return load_index(path)
+
+
+def _segment_spans(path) -> List[Tuple[Path, Optional[float], Optional[float]]]:
+    """(file, t_first, t_last) per segment of a manifest, (path, None,
+    None) for a single file."""
+    if not segments.is_manifest(path):
+        return [(Path(path), None, None)]
+    return [(segment, entry.get("t_first"), entry.get("t_last"))
+            for segment, entry in segments.segment_entries(path)]
+
+
+def iter_frames_between(path, t_start: Optional[float] = None,
+                        t_end: Optional[float] = None) -> Iterator[dict]:
+    """Frame records with `t_start <= t_recv < t_end` (either bound
+    None: open), in file order."""
+    lo = float("-inf") if t_start is None else t_start
+    hi = float("inf") if t_end is None else t_end
+    for segment, seg_first, seg_last in _segment_spans(path):
+        if (seg_last is not None and seg_last < lo) or (seg_first is not None and seg_first >= hi):
+            continue
+        index = _indexed(segment)
+        if index is None:
+            yield from _frames_between(columnar.iter_records(segment), lo, hi)
+            continue
+        start = index.seek_offset(lo) if t_start is not None else 0
+        # Past `size` the file is unindexed: read on to EOF.
+        end = index.end_offset(hi) if t_end is not None else None
+        if end is not None and end >= index.size:
+            end = None
+        with segments.open_file(segment, "rb") as fh:
+            yield from _frames_between(_records(fh, start, end), lo, hi)
+
+
+def _frames_between(records: Iterator[dict], lo: float, hi: float) -> Iterator[dict]:
+    for record in records:
+        if "sensor" in record and "device" in record and lo <= record["t_recv"] < hi:
+            yield record
+
+
+def _windows_from(records: Iterator[dict]) -> Iterator[Tuple[dict, dict, List[dict]]]:
+    """Sequential window split: a start opens a window (dropping any
+    open one), an end closes the open one."""
+    start: Optional[dict] = None
+    frames: List[dict] = []
+    for record in records:
+        kind = record.get("_gesture")
+        if kind == "start":
+            start, frames = record, []
+        elif kind == "end":
+            if start is not None:
+                yield start, record, frames
+            start, frames = None, []
+        elif start is not None and "sensor" in record and "device" in record:
+            frames.append(record)
+
+
+def iter_gesture_windows(path) -> Iterator[Tuple[dict, dict, List[dict]]]:
+    """`(start_marker, end_marker, frame_records)` per `_gesture` window,
+    in file order. A start followed by another start is dropped, as a
+    sequential reader would."""
+    for segment in segments.segment_paths(path):
+        index = _indexed(segment)
+        if index is None:
+            yield from _windows_from(columnar.iter_records(segment))
+            continue
+        markers = index.markers
+        # An unmatched trailing start (or markers past `size`) is left
+        # to the sequential scan of the tail.
+        resume = index.size
+        if markers and markers[-1][0] == "start":
+            resume = markers[-1][4]
+            markers = markers[:-1]
+        with segments.open_file(segment, "rb") as fh:
+            for (kind, *_, offset), (next_kind, *_, next_offset) in zip(markers, markers[1:]):
+                if kind != "start" or next_kind != "end":
+                    continue
+                records = list(_records(fh, offset, next_offset))
+                records.append(json.loads(fh.readline()))
+                yield from _windows_from(iter(records))
+            yield from _windows_from(_records(fh, resume))
@@ -8,10 +8,11 @@ shared `RecorderSink` as JSON Lines. Drop it anywhere in the pipeline:
 - first position captures raw sensor frames before any transforms
 - between two stages captures the boundary
 
-`replay(path, on_frame, speed)` reads a JSONL file back and calls
+`replay(path, on_frame, speed)` reads a recording back and calls
 `on_frame(frame)` per frame. Combine with a Pipeline to tune or debug
 stages offline against real recordings — no sensors, no PD,
-deterministic.
+deterministic. `replay_batches(path, on_batch)` is the unpaced,
+chunked variant for `Pipeline.push_batch`.
 
 JSONL schema:
     {"_meta": {...}}                                        # optional, line 1
@@ -20,36 +21,226 @@ JSONL schema:
     ...
     {"_session": "end", "t": <mono>}                        # process-end marker
 
-Frame records always have a `device` key; non-frame records (`_meta`,
-`_session`, future `_stream`/`_gesture` markers) do not. `replay()`
-skips anything without `device`. `read_metadata(path)` returns the
+Frame records always have `device` and `sensor` keys; non-frame
+records (`_meta`, `_session`, `_gesture` markers, future `_stream`) do
+not have both. `replay()` skips anything that isn't a frame. `read_metadata(path)` returns the
 `_meta` dict for callers who want session context without a full read.
+
+`RecorderSink` can write the binary columnar format of
+sense/columnar.py instead (`.fsc`), and can split a session into
+rotating, compressed segments tied together by a manifest
+(sense/segments.py); every reader here accepts any of these.
 """
 import json
 import logging
+import os
 import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import Callable, Iterable, Optional, TextIO
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional
 
-from .pipeline import IMUFrame, Stage
+from . import columnar, recindex, segments
+from .pipeline import IMUFrame, Stage, intern_key
 
 log = logging.getLogger("fs.recorder")
 
+# Frames the writer may fall behind by before the sink drops: ~20 s of
+# four devices' default chains.
+DEFAULT_QUEUE_CAPACITY = 65536
+DEFAULT_FLUSH_INTERVAL_S = 1.0
+# How long frames sit in the queue before the writer takes them — the
+# group-commit window. Producers only wake the writer early when a
+# quarter of the queue is pending.
+DEFAULT_COMMIT_INTERVAL_S = 0.02
+DEFAULT_BUFFER_BYTES = 1 << 18
+DROP_LOG_INTERVAL_S = 10.0
+# How often the writer rewrites a JSONL file's index sidecar
+# (sense/recindex.py); also on segment rollover and close.
+DEFAULT_INDEX_INTERVAL_S = 30.0
+
+FORMAT_JSONL = "jsonl"
+FORMAT_COLUMNAR = "columnar"
+FORMATS = (FORMAT_JSONL, FORMAT_COLUMNAR)
+
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+_float_repr = float.__repr__
+_float_format = float.__format__
+
+
+def _nbytes(line: str) -> int:
+    """UTF-8 length of `line` (frame lines are ASCII)."""
+    return len(line) if line.isascii() else len(line.encode("utf-8"))
+
+
+# Frame-line prefixes kept by a FrameEncoder before it starts over.
+MAX_PREFIXES = 4096
+# `t_recv` digits after the point when values are rounded: 1 µs, well
+# under BLE timestamp jitter.
+TIME_DECIMALS = 6
+
+
+class FrameEncoder:
+    """
+    JSONL frame lines without the generic encoder. The part of a line
+    that's fixed per stream — `{"device":..,"sensor":..,"t_recv":` — is
+    escaped once and cached per (device, sensor); per frame only the
+    numbers are formatted and joined. Lines are byte-identical to
+    `json.dumps(record, separators=(",", ":"))` when `decimals` is None.
+
+    `decimals=N` writes values with N digits after the point (and
+    `t_recv` with TIME_DECIMALS): the IMU delivers 4-5 significant
+    digits, `repr` prints 17, and the shortest-repr search is most of
+    the cost of a line.
+    Values that aren't floats (ints, bools, None) or aren't finite take
+    the generic encoder, so the output always parses the same way.
+    """
+    def __init__(self, decimals: Optional[int] = None):
+        if decimals is not None and decimals < 1:
+            # 0 would print floats as JSON integers.
+            raise ValueError(f"decimals must be >= 1, got {decimals}")
+        self.decimals = decimals
+        self._spec = f".{decimals}f" if decimals is not None else None
+        self._time_spec = f".{TIME_DECIMALS}f"
+        self._prefixes: Dict[tuple, str] = {}
+
+    def prefix(self, device: str, sensor: str) -> str:
+        key = (device, sensor)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            if len(self._prefixes) >= MAX_PREFIXES:
+                self._prefixes.clear()
+            prefix = self._prefixes[key] = (
+                f'{{"device":{_dumps(device)},"sensor":{_dumps(sensor)},"t_recv":')
+        return prefix
+
+    def encode(self, device: str, sensor: str, t_recv, values) -> str:
+        """One frame line (no newline). Raises TypeError / ValueError
+        like `json.dumps` for values it can't serialise."""
+        prefix = self._prefixes.get((device, sensor)) or self.prefix(device, sensor)
+        try:
+            spec = self._spec
+            if spec is None:
+                text = _float_repr(t_recv) + ',"values":[' + ",".join(map(_float_repr, values))
+            else:
+                text = _float_format(t_recv, self._time_spec) + ',"values":[' + ",".join(
+                    [_float_format(v, spec) for v in values])
+        except TypeError:
+            text = None
+        if text is None or "n" in text:
+            # Not all floats, or inf / nan (JSON's Infinity / NaN).
+            return _dumps({"device": device, "sensor": sensor, "t_recv": t_recv,
+                           "values": list(values)})
+        return prefix + text + "]}"
+
 
 class RecorderSink:
     """
-    Owner of one JSONL file. Thread-safe — multiple `Recorder` Stages
-    (one per pipeline, across all devices) may share a single sink so
-    a session is one file with frames demuxable by device + sensor.
+    Owner of one recording file. Thread-safe — multiple `Recorder`
+    Stages (one per pipeline, across all devices) may share a single
+    sink so a session is one file with frames demuxable by device +
+    sensor. `fmt` is `jsonl` or `columnar` (sense/columnar.py, values
+    stored as `values_dtype`); by default a `.fsc` path is columnar and
+    anything else JSONL. JSONL frame lines come from a `FrameEncoder`
+    (`float_decimals` digits per value, or exact).
 
     Lifecycle: instantiate, `open()` once, any number of `write(frame)`
-    calls from any thread, then `close()` to flush and release.
+    calls from any thread, then `close()` to drain, flush and release.
+
+    Writes are group-committed. `write()` runs on the producer (BLE
+    callback / pipeline worker) thread, so it only appends the frame's
+    fields to a bounded queue under a short lock. One writer thread
+    wakes every `commit_interval_s` (or early, when a quarter of the
+    queue is pending), takes everything pending at once, serialises it
+    and hands the file one large chunk through a `buffer_bytes` buffer.
+    The file is flushed every `flush_interval_s` and, if
+    `fsync_interval_s` is set, fsynced at that interval, so a power cut
+    loses at most that much.
+    A stalling SD card backs up the queue instead of the producers;
+    when it reaches `capacity` further frames are dropped and counted
+    (`stats()`), never blocking. Gesture markers share the queue, so
+    they keep their place among the frames, and are never dropped.
+
+    With `segment_bytes` and/or `segment_s` (or `compression`) set, the
+    session is split into segments: `path`'s stem plus `.000`, `.001`,
+    ... The writer thread rolls over to the next segment between
+    batches once the current one is `segment_bytes` big or
+    `segment_s` old, and a `segments.Compressor` gzips / xz's each
+    closed segment in the background. `recording_path` is then the
+    session manifest (sense/segments.py), which every reader accepts.
+
+    JSONL files get an index sidecar (sense/recindex.py, `index=False`
+    to skip): the writer notes each line's byte offset as it commits
+    and saves the index every `index_interval_s`, per segment and on
+    close, so readers can seek to a time or a gesture window.
     """
-    def __init__(self, path):
+    def __init__(
+        self,
+        path,
+        capacity: int = DEFAULT_QUEUE_CAPACITY,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+        fsync_interval_s: Optional[float] = None,
+        buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        commit_interval_s: float = DEFAULT_COMMIT_INTERVAL_S,
+        fmt: Optional[str] = None,
+        values_dtype: str = "float64",
+        segment_bytes: Optional[int] = None,
+        segment_s: Optional[float] = None,
+        compression: str = segments.COMPRESSION_NONE,
+        float_decimals: Optional[int] = None,
+        index: bool = True,
+        index_interval_s: float = DEFAULT_INDEX_INTERVAL_S,
+    ):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
         self.path = Path(path)
-        self._fh: Optional[TextIO] = None
+        if fmt is None:
+            fmt = FORMAT_COLUMNAR if self.path.suffix == columnar.SUFFIX else FORMAT_JSONL
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt must be one of {FORMATS}, got {fmt!r}")
+        self.fmt = fmt
+        self.values_dtype = values_dtype
+        self._columnar: Optional[columnar.ColumnarWriter] = None
+        self._encoder = FrameEncoder(float_decimals)
+        self.index = bool(index) and fmt == FORMAT_JSONL
+        self.index_interval_s = float(index_interval_s)
+        self._index: Optional[recindex.IndexBuilder] = None
+        if compression not in segments.COMPRESSIONS:
+            raise ValueError(f"compression must be one of {segments.COMPRESSIONS}, "
+                             f"got {compression!r}")
+        self.segment_bytes = int(segment_bytes) if segment_bytes else None
+        self.segment_s = float(segment_s) if segment_s else None
+        self.compression = compression
+        self.segmented = bool(self.segment_bytes or self.segment_s
+                              or compression != segments.COMPRESSION_NONE)
+        self._manifest: Optional[segments.Manifest] = None
+        self._compressor: Optional[segments.Compressor] = None
+        # Current segment: index, file, manifest entry, and what went in.
+        self._segment = 0
+        self._segment_path: Optional[Path] = None
+        self._segment_entry: Optional[dict] = None
+        self._segment_opened = 0.0
+        self._segment_bytes = 0
+        self._segment_start_count = 0
+        self._segment_t: List[Optional[float]] = [None, None]
+        self.capacity = int(capacity)
+        self.flush_interval_s = float(flush_interval_s)
+        self.fsync_interval_s = float(fsync_interval_s) if fsync_interval_s else None
+        self.buffer_bytes = int(buffer_bytes)
+        self.commit_interval_s = float(commit_interval_s)
+        self._wake_depth = max(1, self.capacity // 4)
+        self._fh: Optional[IO] = None
+        # Producer side: frames as (device, sensor, t_recv, values)
+        # tuples, markers as record dicts.
+        self._pending: deque = deque()
         self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._accepting = False
+        self._thread: Optional[threading.Thread] = None
+        # Writer-exit handshake (under _lock): a close() that timed out
+        # leaves the end marker and file close to the writer thread.
+        self._writer_done = False
+        self._finish_in_writer = False
         self._count = 0
         # Active label for `_gesture` markers. Set by run_fs.py at startup
         # (--capture-label) and/or at runtime via OSC (future). Per-(label,
@@ -57,67 +248,454 @@ class RecorderSink:
         self.current_label: Optional[str] = None
         self._gesture_instances: dict = {}
 
+        self.enqueued = 0
+        self.dropped = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.max_batch = 0
+        self.write_errors = 0
+        self._last_drop_log = 0.0
+
     def open(self, metadata: Optional[dict] = None) -> None:
         """
-        Open the file for writing. If `metadata` is provided, write it
-        as a `{"_meta": ...}` first line so callers can recover session
-        context (wall-clock anchor, configured ODRs, FS version, etc.)
-        without inspecting frames. A `{"_session": "start", "t": ...}`
-        marker is always written after the optional meta line so the
-        process-start boundary is recoverable on read.
+        Open the file for writing and start the writer thread. If
+        `metadata` is provided, write it as a `{"_meta": ...}` first
+        record so callers can recover session context (wall-clock anchor,
+        configured ODRs, FS version, etc.) without inspecting frames. A
+        `{"_session": "start", "t": ...}` marker is always written after
+        the optional meta record so the process-start boundary is
+        recoverable on read.
         """
         if self._fh is not None:
             return
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._fh = self.path.open("w", encoding="utf-8")
+        if self.segmented:
+            self._manifest = segments.Manifest(
+                segments.manifest_path(self.path), self.fmt, self.compression)
+            if self.compression != segments.COMPRESSION_NONE:
+                self._compressor = segments.Compressor(self.compression)
+            name = segments.segment_name(self.path, 0)
+            self._fh, self._columnar = self._open_file(self.path.with_name(name))
+            self._start_segment(name)
+        else:
+            self._fh, self._columnar = self._open_file(self.path)
+        self._new_index()
         if metadata is not None:
-            self._fh.write(
-                json.dumps({"_meta": metadata}, separators=(",", ":")) + "\n"
-            )
-        self._fh.write(
-            json.dumps({"_session": "start", "t": time.monotonic()},
-                       separators=(",", ":")) + "\n"
-        )
-        log.info("recording to %s", self.path)
+            self._write_record({"_meta": metadata})
+        self._write_record({"_session": "start", "t": time.monotonic()})
+        self._flush_file()
+        self._accepting = True
+        self._writer_done = False
+        self._finish_in_writer = False
+        self._thread = threading.Thread(target=self._run, name="fs-recorder", daemon=True)
+        self._thread.start()
+        log.info("recording to %s", self.recording_path)
+
+    @property
+    def recording_path(self) -> Path:
+        """What readers take: the manifest of a segmented session, else
+        the file."""
+        return self._manifest.path if self._manifest is not None else self.path
+
+    def _open_file(self, path: Path) -> tuple:
+        """(file object, columnar writer or None) for a new file."""
+        if self.fmt == FORMAT_COLUMNAR:
+            fh = path.open("wb", buffering=self.buffer_bytes)
+            return fh, columnar.ColumnarWriter(fh, dtype=self.values_dtype)
+        return path.open("w", encoding="utf-8", buffering=self.buffer_bytes), None
+
+    def _close_file(self) -> None:
+        """Footer (columnar), flush, fsync if configured, close."""
+        fh = self._fh
+        self._fh = None
+        try:
+            if self._columnar is not None:
+                self._columnar.close()
+            fh.flush()
+            if self.fsync_interval_s:
+                os.fsync(fh.fileno())
+        finally:
+            fh.close()
+
+    # --- Producer side --------------------------------------------------------
 
     def write(self, frame: IMUFrame) -> None:
-        if self._fh is None:
+        if not self._accepting:
             return
-        record = {
-            "device": frame.device,
-            "sensor": frame.sensor,
-            "t_recv": frame.t_recv,
-            "values": list(frame.values),
-        }
-        line = json.dumps(record, separators=(",", ":"))
+        item = (frame.device, frame.sensor, frame.t_recv, frame.values)
         with self._lock:
             # Re-check under lock — close() may have raced ahead.
-            if self._fh is None:
+            if not self._accepting:
                 return
-            self._fh.write(line + "\n")
-            self._count += 1
+            pending = self._pending
+            if len(pending) >= self.capacity:
+                self.dropped += 1
+                return
+            pending.append(item)
+            self.enqueued += 1
+            depth = len(pending)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if depth == self._wake_depth:
+                self._not_empty.notify()
 
-    def close(self) -> None:
+    def write_many(self, frames: Iterable[IMUFrame]) -> None:
+        """`write()` for a batch — one lock acquisition for the chunk."""
+        if not self._accepting:
+            return
+        items = [(f.device, f.sensor, f.t_recv, f.values) for f in frames]
+        if not items:
+            return
         with self._lock:
-            if self._fh is None:
+            if not self._accepting:
                 return
-            try:
-                self._fh.write(
-                    json.dumps({"_session": "end", "t": time.monotonic()},
-                               separators=(",", ":")) + "\n"
-                )
-            except BaseException:
-                # Best-effort end marker — don't block close on a write failure.
-                pass
+            pending = self._pending
+            room = self.capacity - len(pending)
+            if room < len(items):
+                self.dropped += len(items) - max(room, 0)
+                items = items[:max(room, 0)]
+                if not items:
+                    return
+            before = len(pending)
+            pending.extend(items)
+            self.enqueued += len(items)
+            depth = len(pending)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if before < self._wake_depth <= depth:
+                self._not_empty.notify()
+
+    def _write_marker(self, record: dict) -> bool:
+        """Queue a non-frame record. Ignores capacity: markers are rare
+        and a lost one would mislabel a capture."""
+        with self._lock:
+            if not self._accepting:
+                return False
+            self._pending.append(record)
+        return True
+
+    # --- Writer thread --------------------------------------------------------
+
+    def _take_batch(self, timeout: float) -> list:
+        with self._lock:
+            if len(self._pending) < self._wake_depth and self._accepting:
+                self._not_empty.wait(timeout)
+            if not self._pending:
+                return []
+            batch = list(self._pending)
+            self._pending.clear()
+        return batch
+
+    def _run(self) -> None:
+        now = time.monotonic()
+        next_flush = now + self.flush_interval_s
+        fsync_s = self.fsync_interval_s
+        next_fsync = now + fsync_s if fsync_s else None
+        next_index = now + self.index_interval_s
+        segmented = self._manifest is not None
+        while True:
+            batch = self._take_batch(self.commit_interval_s)
+            now = time.monotonic()
+            if batch:
+                # Roll only with a batch in hand, so no segment is empty.
+                if segmented and self._segment_due(now):
+                    self._roll(now)
+                self._commit(self._fh, batch)
+                if segmented:
+                    self._note_span(batch)
+            elif not self._accepting:
+                with self._lock:
+                    self._writer_done = True
+                    finish = self._finish_in_writer
+                if finish:
+                    self._finish()
+                return
+            if now >= next_flush:
+                next_flush = now + self.flush_interval_s
+                try:
+                    self._flush_file()
+                    if next_fsync is not None and now >= next_fsync:
+                        next_fsync = now + fsync_s
+                        os.fsync(self._fh.fileno())
+                except BaseException as e:
+                    self._write_error(e)
+                else:
+                    # After the flush, so the sidecar never covers bytes
+                    # the file doesn't have yet.
+                    if now >= next_index:
+                        next_index = now + self.index_interval_s
+                        self._save_index()
+            if self.dropped and now - self._last_drop_log >= DROP_LOG_INTERVAL_S:
+                self._last_drop_log = now
+                log.warning("recorder queue full: %d frames dropped so far "
+                            "(capacity %d) — storage can't keep up",
+                            self.dropped, self.capacity)
+
+    def _write_record(self, record: dict) -> None:
+        """Write a non-frame record directly (open/close, writer thread)."""
+        if self._columnar is not None:
+            self._columnar.marker(record)
+            return
+        line = _dumps(record) + "\n"
+        self._fh.write(line)
+        index = self._index
+        if index is not None:
+            index.marker(index.size, record)
+            index.size += _nbytes(line)
+
+    def _flush_file(self) -> None:
+        if self._columnar is not None:
+            # Writes the partial blocks too, so a crash loses at most
+            # one flush interval here as well.
+            self._columnar.flush()
+        else:
             self._fh.flush()
-            self._fh.close()
-            self._fh = None
-        log.info("recording closed: %d frames in %s", self._count, self.path)
+
+    def _commit(self, fh, batch: list) -> None:
+        if self._columnar is not None:
+            self._commit_columnar(batch)
+            return
+        dumps = _dumps
+        encode = self._encoder.encode
+        lines = []
+        frames = 0
+        # (line offset, item) for the index, applied once written.
+        marks = [] if self._index is not None else None
+        offset = self._index.size if marks is not None else 0
+        for item in batch:
+            if isinstance(item, dict):
+                line = dumps(item)
+            else:
+                try:
+                    line = encode(*item)
+                except (TypeError, ValueError) as e:
+                    # One unserialisable frame mustn't take the batch with it.
+                    self._write_error(e)
+                    continue
+                frames += 1
+            lines.append(line)
+            if marks is not None:
+                marks.append((offset, item))
+                offset += _nbytes(line) + 1
+        lines.append("")
+        chunk = "\n".join(lines)
+        try:
+            fh.write(chunk)
+        except BaseException as e:
+            self._write_error(e)
+            # Offsets past here are unknown.
+            self._drop_index()
+            return
+        if marks is not None:
+            self._index_lines(marks, offset)
+        self._segment_bytes += len(chunk)
+        self._count += frames
+        self._batch_done(batch)
+
+    # --- Index sidecar --------------------------------------------------------
+
+    def _new_index(self) -> None:
+        self._index = recindex.IndexBuilder() if self.index else None
+
+    def _index_lines(self, marks: list, end: int) -> None:
+        index = self._index
+        frame, marker = index.frame, index.marker
+        try:
+            for offset, item in marks:
+                if isinstance(item, dict):
+                    marker(offset, item)
+                else:
+                    frame(offset, item[0], item[1], item[2])
+        except (TypeError, ValueError) as e:
+            # A frame time the index can't order (None, a string).
+            self._write_error(e)
+            self._drop_index()
+            return
+        index.size = end
+
+    def _save_index(self) -> None:
+        if self._index is not None:
+            try:
+                self._index.save(self._segment_path or self.path)
+            except BaseException as e:
+                self._write_error(e)
+
+    def _drop_index(self) -> None:
+        """Stop indexing this file and remove its sidecar."""
+        if self._index is None:
+            return
+        self._index = None
+        log.warning("recording index for %s dropped — readers will scan it",
+                    self._segment_path or self.path)
+        try:
+            recindex.index_path(self._segment_path or self.path).unlink()
+        except OSError:
+            pass
+
+    def _commit_columnar(self, batch: list) -> None:
+        writer = self._columnar
+        frame = writer.frame
+        frames = 0
+        try:
+            for item in batch:
+                if isinstance(item, dict):
+                    writer.marker(item)
+                    continue
+                try:
+                    frame(*item)
+                except (TypeError, ValueError) as e:
+                    self._write_error(e)
+                    continue
+                frames += 1
+        except BaseException as e:
+            self._write_error(e)
+        self._count += frames
+        self._batch_done(batch)
+
+    # --- Segments -------------------------------------------------------------
+
+    def _start_segment(self, name: str) -> None:
+        self._segment_path = self.path.with_name(name)
+        self._segment_entry = self._manifest.add(name)
+        self._segment_opened = time.monotonic()
+        self._segment_bytes = 0
+        self._segment_start_count = self._count
+        self._segment_t = [None, None]
+
+    def _note_span(self, batch: list) -> None:
+        """First / last frame time of the current segment."""
+        first = next((item for item in batch if not isinstance(item, dict)), None)
+        if first is None:
+            return
+        if self._segment_t[0] is None:
+            self._segment_t[0] = first[2]
+        last = next(item for item in reversed(batch) if not isinstance(item, dict))
+        self._segment_t[1] = last[2]
+
+    def _segment_due(self, now: float) -> bool:
+        if self.segment_s is not None and now - self._segment_opened >= self.segment_s:
+            return self._count > self._segment_start_count
+        if self.segment_bytes is None:
+            return False
+        size = self._columnar.size if self._columnar is not None else self._segment_bytes
+        return size >= self.segment_bytes
+
+    def _finish_segment(self) -> None:
+        """Record the closed segment's counts in the manifest and queue
+        it for compression."""
+        path, entry = self._segment_path, self._segment_entry
+        self._manifest.update(
+            entry,
+            frames=self._count - self._segment_start_count,
+            bytes=path.stat().st_size,
+            t_first=self._segment_t[0],
+            t_last=self._segment_t[1],
+        )
+        if self._compressor is not None:
+            manifest = self._manifest
+            self._compressor.submit(
+                path, lambda out: manifest.update(entry, file=out.name))
+
+    def _roll(self, now: float) -> None:
+        """Close the current segment and continue in the next. The new
+        file is opened first, so if that fails the sink keeps writing
+        the current one (and retries after another interval)."""
+        name = segments.segment_name(self.path, self._segment + 1)
+        try:
+            opened = self._open_file(self.path.with_name(name))
+        except BaseException as e:
+            self._segment_opened = now
+            self._write_error(e)
+            return
+        try:
+            self._close_file()
+            self._save_index()
+            self._finish_segment()
+        except BaseException as e:
+            self._write_error(e)
+        self._fh, self._columnar = opened
+        self._new_index()
+        self._segment += 1
+        self._start_segment(name)
+        log.info("recording segment %d: %s", self._segment, name)
+
+    def _batch_done(self, batch: list) -> None:
+        self.batches += 1
+        if len(batch) > self.max_batch:
+            self.max_batch = len(batch)
+
+    def _write_error(self, e: BaseException) -> None:
+        self.write_errors += 1
+        if self.write_errors == 1 or self.write_errors % 100 == 0:
+            log.error("recorder write to %s failed (%d so far): %s",
+                      self.path, self.write_errors, e)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop accepting, let the writer drain the queue, then write
+        the end marker, flush (and fsync if configured) and close. If
+        the writer is still draining after `timeout`, it does the rest
+        itself once it's done — the file is never touched from two
+        threads."""
+        with self._lock:
+            if self._fh is None or not self._accepting:
+                return
+            self._accepting = False
+            self._not_empty.notify_all()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            with self._lock:
+                handed_off = self._finish_in_writer = not self._writer_done
+            if handed_off:
+                log.warning("recorder writer did not drain within %.1fs (%d pending) — "
+                            "it closes the recording when done", timeout, len(self._pending))
+                return
+        self._finish(timeout)
+
+    def _finish(self, timeout: float = 5.0) -> None:
+        """End marker, close, sidecar, manifest (close(), or the writer
+        thread after a timed-out close)."""
+        try:
+            self._write_record({"_session": "end", "t": time.monotonic()})
+        except BaseException:
+            # Best-effort end marker — don't block close on a write failure.
+            pass
+        self._close_file()
+        self._save_index()
+        if self._manifest is not None:
+            try:
+                self._finish_segment()
+                self._manifest.finish()
+            except BaseException as e:
+                self._write_error(e)
+            if self._compressor is not None and not self._compressor.close(timeout):
+                log.warning("recording: segments still compressing after %.1fs "
+                            "(left uncompressed, still readable)", timeout)
+        log.info("recording closed: %d frames in %s (%s)", self._count,
+                 self.recording_path, self.stats())
 
     @property
     def frame_count(self) -> int:
+        """Frames written to the file so far."""
         return self._count
 
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "written": self._count,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "write_errors": self.write_errors,
+            "segments": self._segment + 1,
+        }
+
     def mark_gesture_start(self, device: str) -> Optional[int]:
         """
         Write a `_gesture: start` marker for `device` under the current
@@ -126,7 +704,7 @@ class RecorderSink:
         sink isn't open. Auto-increments the per-(label, device) counter.
         """
         label = self.current_label
-        if label is None or self._fh is None:
+        if label is None or not self._accepting:
             return None
         key = (label, device)
         instance = self._gesture_instances.get(key, 0)
@@ -138,11 +716,8 @@ class RecorderSink:
             "instance": instance,
             "t": time.monotonic(),
         }
-        line = json.dumps(record, separators=(",", ":")) + "\n"
-        with self._lock:
-            if self._fh is None:
-                return None
-            self._fh.write(line)
+        if not self._write_marker(record):
+            return None
         return instance
 
     def mark_gesture_end(self, device: str, instance: int) -> None:
@@ -150,7 +725,7 @@ class RecorderSink:
         instance returned by mark_gesture_start. No-op if the sink is
         closed or no label is set."""
         label = self.current_label
-        if label is None or self._fh is None:
+        if label is None or not self._accepting:
             return
         record = {
             "_gesture": "end",
@@ -159,11 +734,7 @@ class RecorderSink:
             "instance": instance,
             "t": time.monotonic(),
         }
-        line = json.dumps(record, separators=(",", ":")) + "\n"
-        with self._lock:
-            if self._fh is None:
-                return
-            self._fh.write(line)
+        self._write_marker(record)
 
 
 class Recorder(Stage):
@@ -182,17 +753,67 @@ class Recorder(Stage):
         self.sink.write(frame)
         yield frame
 
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        self.sink.write_many(frames)
+        return list(frames)
 
-def replay(path, on_frame: Callable[[IMUFrame], None], speed: float = 1.0) -> int:
+
+def _iter_frames(path: Path, t_start: Optional[float] = None,
+                 t_end: Optional[float] = None) -> Iterator[IMUFrame]:
+    """Frame records of a recording (JSONL, `.fsc` or a segmented
+    session's manifest), in file order; with a time range, only frames
+    with `t_start <= t_recv < t_end`, found through the index sidecar
+    when there is one."""
+    if t_start is not None or t_end is not None:
+        for record in recindex.iter_frames_between(path, t_start, t_end):
+            yield IMUFrame(
+                device=intern_key(record["device"]),
+                sensor=intern_key(record["sensor"]),
+                t_recv=record["t_recv"],
+                values=tuple(record["values"]),
+            )
+        return
+    if segments.is_manifest(path):
+        for segment in segments.segment_paths(path):
+            yield from _iter_frames(segment)
+        return
+    if columnar.is_columnar(path):
+        with columnar.ColumnarReader(path) as reader:
+            for device, sensor, t_recv, values in reader.iter_frames():
+                yield IMUFrame(
+                    device=intern_key(device),
+                    sensor=intern_key(sensor),
+                    t_recv=t_recv,
+                    values=tuple(values),
+                )
+        return
+    for record in columnar.iter_records(path):
+        # Skip metadata / session-bracket / marker records. Frame
+        # records always have a "device" key; `_gesture` markers
+        # have one too but no "sensor".
+        if "device" not in record or "sensor" not in record:
+            continue
+        yield IMUFrame(
+            device=intern_key(record["device"]),
+            sensor=intern_key(record["sensor"]),
+            t_recv=record["t_recv"],
+            values=tuple(record["values"]),
+        )
+
+
+def replay(path, on_frame: Callable[[IMUFrame], None], speed: float = 1.0,
+           t_start: Optional[float] = None, t_end: Optional[float] = None) -> int:
     """
-    Read a JSONL recording and call `on_frame(frame)` per frame.
+    Read a recording and call `on_frame(frame)` per frame. `t_start` /
+    `t_end` limit it to frames with `t_start <= t_recv < t_end`; an
+    indexed JSONL recording is read from the matching offset only.
 
     speed:
       1.0  — real-time (respect inter-frame timestamps)
       0.5  — half speed
       2.0  — double speed
       0.0  — no pacing (push as fast as the loop runs; right for
-             offline pipeline tuning)
+             offline pipeline tuning — see also `replay_batches`)
 
     Returns the number of frames replayed.
     """
@@ -201,46 +822,87 @@ def replay(path, on_frame: Callable[[IMUFrame], None], speed: float = 1.0) -> in
     record_start: Optional[float] = None
     n = 0
 
-    with path.open("r", encoding="utf-8") as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            record = json.loads(line)
-            # Skip metadata / session-bracket / future marker records.
-            # Frame records always have a "device" key.
-            if "device" not in record:
-                continue
-            frame = IMUFrame(
-                device=record["device"],
-                sensor=record["sensor"],
-                t_recv=record["t_recv"],
-                values=tuple(record["values"]),
-            )
-
-            if speed > 0.0:
-                if record_start is None:
-                    record_start = frame.t_recv
-                # Wall-clock time at which this frame is "due".
-                target = wall_start + (frame.t_recv - record_start) / speed
-                delay = target - time.monotonic()
-                if delay > 0:
-                    time.sleep(delay)
+    for frame in _iter_frames(path, t_start, t_end):
+        if speed > 0.0:
+            if record_start is None:
+                record_start = frame.t_recv
+            # Wall-clock time at which this frame is "due".
+            target = wall_start + (frame.t_recv - record_start) / speed
+            delay = target - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
 
-            on_frame(frame)
-            n += 1
+        on_frame(frame)
+        n += 1
 
     log.info("replay: %d frames from %s", n, path)
     return n
 
 
+def replay_batches(
+    path,
+    on_batch: Callable[[List[IMUFrame]], None],
+    batch_size: int = 4096,
+    t_start: Optional[float] = None,
+    t_end: Optional[float] = None,
+) -> int:
+    """
+    Unpaced replay in chunks: call `on_batch(frames)` with up to
+    `batch_size` frames at a time, in file order. Pair with
+    `Pipeline.push_batch` for offline tuning against long recordings,
+    where per-frame Python dispatch dominates:
+
+        pipes = {"acc": Pipeline([...]), "gyro": Pipeline([...])}
+        def on_batch(frames):
+            by_sensor = defaultdict(list)
+            for f in frames:
+                by_sensor[f.sensor].append(f)
+            for sensor, group in by_sensor.items():
+                if sensor in pipes:
+                    pipes[sensor].push_batch(group)
+        replay_batches("recordings/session.jsonl", on_batch)
+
+    Grouping by sensor keeps per-stream order but not cross-stream
+    interleaving inside a chunk — fine for per-stream stages, not for
+    fusion stages that read another stream through a Latch.
+    `t_start` / `t_end` select a time range as in `replay`.
+
+    Returns the number of frames replayed.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+    path = Path(path)
+    n = 0
+    batch: List[IMUFrame] = []
+    for frame in _iter_frames(path, t_start, t_end):
+        batch.append(frame)
+        if len(batch) >= batch_size:
+            on_batch(batch)
+            n += len(batch)
+            batch = []
+    if batch:
+        on_batch(batch)
+        n += len(batch)
+
+    log.info("replay: %d frames from %s (batches of %d)", n, path, batch_size)
+    return n
+
+
 def read_metadata(path) -> Optional[dict]:
     """
-    Return the `_meta` dict from a recording's first line, or None if
-    the file has no metadata header. Reads only the first line.
+    Return the `_meta` dict from a recording's first line (a `.fsc`
+    file's marker table; a segmented session's first segment), or None
+    if the file has no metadata header. Reads only the first line / the
+    index.
     """
     path = Path(path)
-    with path.open("r", encoding="utf-8") as fh:
+    if segments.is_manifest(path):
+        first = segments.segment_paths(path)[:1]
+        return read_metadata(first[0]) if first else None
+    if columnar.is_columnar(path):
+        with columnar.ColumnarReader(path) as reader:
+            return reader.meta
+    with segments.open_file(path, "r") as fh:
         line = fh.readline().strip()
     if not line:
         return None
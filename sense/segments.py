@@ -0,0 +1,253 @@
+"""
+Segmented, compressed recordings.
+
+A long `--record` session used to be one ever-growing file: hundreds
+of MB rewritten block by block on the SD card, with the session only
+closed (`_session: end`) if the process got to exit cleanly.
+`RecorderSink(segment_bytes=..., segment_s=...)` instead rolls over to
+a new segment file whenever the current one passes a size or an age,
+and hands each closed segment to a `Compressor` — one low-priority
+background thread that gzips / xz's it next to the original and then
+removes the original.
+
+The segments of one session are tied together by a manifest,
+`<stem>.manifest.json`, next to them:
+
+    {"version": 1, "format": "jsonl", "compression": "gzip",
+     "complete": true,
+     "segments": [{"file": "session-X.000.jsonl.gz", "frames": 91234,
+                   "bytes": 67108912, "t_first": 1714.., "t_last": 1714..},
+                  ...]}
+
+It is rewritten atomically (temp file + rename) on every rollover and
+after every compression, so it always names files that exist. The
+segment being written is listed too (without counts), so after a crash
+every frame up to the last flush is still reachable; `complete` is only
+set by a clean close.
+
+Readers take the manifest path wherever they take a recording:
+`segment_paths(path)` expands a manifest to its segment files (a plain
+recording to itself) and `open_file(path)` opens `.gz` / `.xz` files
+transparently. `sense.columnar.iter_records` and `sense.recorder.replay`
+go through both, so the tools read segmented sessions unchanged. Only
+the stdlib is needed.
+"""
+import gzip
+import json
+import logging
+import lzma
+import os
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import IO, Callable, List, Optional, Tuple
+
+log = logging.getLogger("fs.segments")
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_LZMA = "lzma"
+COMPRESSIONS = (COMPRESSION_NONE, COMPRESSION_GZIP, COMPRESSION_LZMA)
+_SUFFIXES = {COMPRESSION_GZIP: ".gz", COMPRESSION_LZMA: ".xz"}
+_OPENERS = {".gz": gzip.open, ".xz": lzma.open}
+
+# gzip level 6 is zlib's default trade-off; xz preset 3 keeps a Pi's
+# memory use and CPU time per segment reasonable.
+_COMPRESS_ARGS = {COMPRESSION_GZIP: {"compresslevel": 6}, COMPRESSION_LZMA: {"preset": 3}}
+_COPY_CHUNK = 1 << 20
+# Nice value of the compressor thread (Linux applies it per thread).
+COMPRESSOR_NICE = 19
+
+# What opening / reading a possibly-compressed file may raise.
+READ_ERRORS = (OSError, EOFError, lzma.LZMAError)
+
+
+def is_manifest(path) -> bool:
+    return str(path).endswith(MANIFEST_SUFFIX)
+
+
+def manifest_path(path) -> Path:
+    """Manifest of the session a sink was asked to record to `path`:
+    `recordings/session-X.jsonl` → `recordings/session-X.manifest.json`."""
+    path = Path(path)
+    return path.with_name(path.stem + MANIFEST_SUFFIX)
+
+
+def segment_name(path, index: int) -> str:
+    """`session-X.jsonl` → `session-X.000.jsonl` for segment 0."""
+    path = Path(path)
+    return f"{path.stem}.{index:03d}{path.suffix}"
+
+
+def is_compressed(path) -> bool:
+    return Path(path).suffix in _OPENERS
+
+
+def open_file(path, mode: str = "rb") -> IO:
+    """Open a recording file, decompressing `.gz` / `.xz` by suffix.
+    Text modes read UTF-8."""
+    path = Path(path)
+    opener = _OPENERS.get(path.suffix)
+    if "b" in mode:
+        return opener(path, mode) if opener else path.open(mode)
+    if opener:
+        return opener(path, mode + ("t" if "t" not in mode else ""), encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def read_manifest(path) -> dict:
+    with Path(path).open("r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("version", 0) > MANIFEST_VERSION:
+        raise ValueError(f"{path}: manifest version {manifest['version']} "
+                         f"is newer than {MANIFEST_VERSION}")
+    return manifest
+
+
+def _locate(directory: Path, name: str) -> Optional[Path]:
+    """The segment file `name`, or the same segment under another
+    compression — a crash between compressing and rewriting the
+    manifest leaves either."""
+    path = directory / name
+    if path.exists():
+        return path
+    base = name[:-len(Path(name).suffix)] if is_compressed(name) else name
+    for candidate in [base] + [base + s for s in _SUFFIXES.values()]:
+        if (directory / candidate).exists():
+            return directory / candidate
+    return None
+
+
+def segment_entries(path) -> List[Tuple[Path, dict]]:
+    """(file, manifest entry) per segment of a manifest, in order;
+    missing segments are skipped with a warning."""
+    path = Path(path)
+    found = []
+    for entry in read_manifest(path)["segments"]:
+        segment = _locate(path.parent, entry["file"])
+        if segment is None:
+            log.warning("%s: segment %s is missing — skipped", path, entry["file"])
+            continue
+        found.append((segment, entry))
+    return found
+
+
+def segment_paths(path) -> List[Path]:
+    """The files of a recording in order: a manifest's segments, or
+    `[path]` for a single file."""
+    if not is_manifest(path):
+        return [Path(path)]
+    return [segment for segment, _ in segment_entries(path)]
+
+
+class Manifest:
+    """Writer side of a session manifest. Thread-safe: the recorder's
+    writer thread adds segments, the compressor renames them."""
+    def __init__(self, path, fmt: str, compression: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data = {
+            "version": MANIFEST_VERSION,
+            "format": fmt,
+            "compression": compression,
+            "complete": False,
+            "segments": [],
+        }
+
+    def add(self, name: str) -> dict:
+        """List a new (open) segment and save. Returns its entry."""
+        entry = {"file": name}
+        with self._lock:
+            self._data["segments"].append(entry)
+            self._save()
+        return entry
+
+    def update(self, entry: dict, **fields) -> None:
+        with self._lock:
+            entry.update(fields)
+            self._save()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._data["complete"] = True
+            self._save()
+
+    def _save(self) -> None:
+        # Caller holds _lock.
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(self._data, fh, indent=1)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+
+
+def compress_file(path: Path, compression: str) -> Path:
+    """Write `path` compressed next to it (via a temp file, so a
+    half-written one is never mistaken for a segment) and return the new
+    path. The original is left for the caller to remove."""
+    suffix = _SUFFIXES[compression]
+    out = path.with_name(path.name + suffix)
+    tmp = out.with_name(out.name + ".tmp")
+    with path.open("rb") as src, _OPENERS[suffix](tmp, "wb", **_COMPRESS_ARGS[compression]) as dst:
+        shutil.copyfileobj(src, dst, _COPY_CHUNK)
+    os.replace(tmp, out)
+    return out
+
+
+class Compressor:
+    """
+    Background compression of closed segments, one at a time, on a
+    daemon thread at the lowest CPU priority so it only uses time the
+    pipelines leave idle. `submit(path, done)` queues a file;
+    `done(new_path)` is called once the compressed copy exists, before
+    the original is removed. A failed compression leaves the original
+    in place (it's still a valid segment) and is logged.
+    """
+    def __init__(self, compression: str):
+        if compression not in _SUFFIXES:
+            raise ValueError(f"compression must be one of {tuple(_SUFFIXES)}, got {compression!r}")
+        self.compression = compression
+        self._jobs: "queue.Queue" = queue.Queue()
+        self.compressed = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._thread = threading.Thread(target=self._run, name="fs-compress", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: Path, done: Callable[[Path], None]) -> None:
+        self._jobs.put((path, done))
+
+    def _run(self) -> None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), COMPRESSOR_NICE)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            path, done = job
+            try:
+                size = path.stat().st_size
+                out = compress_file(path, self.compression)
+                done(out)
+                path.unlink()
+                self.compressed += 1
+                self.bytes_in += size
+                self.bytes_out += out.stat().st_size
+            except BaseException as e:
+                self.errors += 1
+                log.error("compressing %s failed — left uncompressed: %s", path, e)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Finish the queued segments and stop. False if `timeout`
+        passed first (the rest stay uncompressed, still valid)."""
+        self._jobs.put(None)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -0,0 +1,287 @@
+"""
+Shared-memory frame ring for local consumers.
+
+A visualiser, a second analysis process or a local synth engine on the
+Pi would otherwise take the frame stream as loopback UDP and decode
+OSC: a `sendto` per frame here, a `recvfrom` and an OSC parse per frame
+there, per consumer. `ShmPublish` instead writes every frame it sees
+into one `multiprocessing.shared_memory` block; any number of local
+processes map the same block with `ShmRingReader` and read it without
+a syscall, at their own pace, without the writer knowing they exist.
+
+Layout (little-endian), all sizes fixed at creation:
+
+    header   64 B   magic "FSRING01", version, slots, record size,
+                    max values, max keys, key count, write seq
+    keys     max_keys × 64 B   "<device>\\0<sensor>" per interned id
+    records  slots × 64 B      seq u64, key id u32, n u16, pad,
+                               t_recv f64, values f64 × max_values
+
+Record `seq` starts at 1 and increases by one per frame; it lives in
+slot `(seq - 1) % slots`. The header's write seq is the last complete
+record. A writer overwriting a slot first stores seq 0 in it, then the
+body, then the new seq; a reader copies the record and re-reads its seq
+— a record whose seq changed under it, or isn't the one expected, was
+overwritten (an overrun) and is counted in `lost`, never returned torn.
+(The three stores are separate calls from the writer thread, so they
+land in that order; a reader never trusts a body without both checks.)
+
+Keys are (device, sensor) pairs interned to small ids on first sight;
+a reader resolves an id it doesn't know by re-reading the key table.
+Frames with more than `max_values` values, non-numeric values, or past
+`max_keys` distinct streams are skipped and counted, not truncated.
+
+One writer per ring. `ShmPublish` forwards frames unchanged and, like
+`Recorder`, isn't prunable, so every stream reaching it stays computed
+even when OSC subscriptions narrow what is sent.
+"""
+import logging
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .pipeline import IMUFrame, Stage, intern_key
+
+log = logging.getLogger("fs.shmring")
+
+MAGIC = b"FSRING01"
+VERSION = 1
+HEADER_SIZE = 64
+KEY_SIZE = 64
+RECORD_SIZE = 64
+DEFAULT_SLOTS = 4096
+DEFAULT_MAX_VALUES = 4
+DEFAULT_MAX_KEYS = 256
+
+_HEADER = struct.Struct("<8sIIIIII")          # through key count
+_WRITE_SEQ = struct.Struct("<Q")              # at offset 32
+_WRITE_SEQ_OFFSET = 32
+_KEY_COUNT_OFFSET = 28
+_KEY_COUNT = struct.Struct("<I")
+_SEQ = struct.Struct("<Q")
+_RECORD_HEAD = struct.Struct("<IHHd")         # after seq: key id, n, pad, t_recv
+_BODY_OFFSET = _SEQ.size
+
+
+def _bodies(max_values: int) -> List[struct.Struct]:
+    """Record body struct per value count n (values zero-padded)."""
+    return [struct.Struct("<IHHd%dd" % n) for n in range(max_values + 1)]
+
+
+class ShmRing:
+    """
+    Writer side: creates (and on `close()` unlinks) the shared block.
+    `write(frame)` is safe from several producer threads — each device
+    pushes from its own BLE callback thread — via one short lock.
+    """
+    def __init__(self, name: Optional[str] = None, slots: int = DEFAULT_SLOTS,
+                 max_values: int = DEFAULT_MAX_VALUES,
+                 max_keys: int = DEFAULT_MAX_KEYS):
+        if slots < 1:
+            raise ValueError(f"slots must be >= 1, got {slots}")
+        if not 1 <= max_values <= (RECORD_SIZE - _BODY_OFFSET - _RECORD_HEAD.size) // 8:
+            raise ValueError(f"max_values out of range: {max_values}")
+        self.slots = int(slots)
+        self.max_values = int(max_values)
+        self.max_keys = int(max_keys)
+        self._keys_offset = HEADER_SIZE
+        self._records_offset = HEADER_SIZE + self.max_keys * KEY_SIZE
+        size = self._records_offset + self.slots * RECORD_SIZE
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self._shm.name
+        self._buf = self._shm.buf
+        _HEADER.pack_into(self._buf, 0, MAGIC, VERSION, self.slots, RECORD_SIZE,
+                          self.max_values, self.max_keys, 0)
+        _WRITE_SEQ.pack_into(self._buf, _WRITE_SEQ_OFFSET, 0)
+        self._bodies = _bodies(self.max_values)
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.seq = 0
+        self.skipped = 0
+
+    def _intern(self, device: str, sensor: str) -> Optional[int]:
+        # Caller holds _lock.
+        key_id = len(self._ids)
+        if key_id >= self.max_keys:
+            return None
+        raw = f"{device}\0{sensor}".encode("utf-8")[:KEY_SIZE - 1]
+        off = self._keys_offset + key_id * KEY_SIZE
+        self._buf[off:off + len(raw)] = raw
+        self._ids[(device, sensor)] = key_id
+        _KEY_COUNT.pack_into(self._buf, _KEY_COUNT_OFFSET, key_id + 1)
+        return key_id
+
+    def write(self, frame: IMUFrame) -> bool:
+        """Append one frame. False if it was skipped (see module doc)."""
+        values = frame.values
+        n = len(values)
+        if n > self.max_values:
+            self.skipped += 1
+            return False
+        with self._lock:
+            buf = self._buf
+            if buf is None:
+                return False
+            key_id = self._ids.get((frame.device, frame.sensor))
+            if key_id is None:
+                key_id = self._intern(frame.device, frame.sensor)
+                if key_id is None:
+                    self.skipped += 1
+                    return False
+            try:
+                body = self._bodies[n].pack(key_id, n, 0, frame.t_recv, *values)
+            except struct.error:
+                self.skipped += 1
+                return False
+            seq = self.seq + 1
+            off = self._records_offset + ((seq - 1) % self.slots) * RECORD_SIZE
+            _SEQ.pack_into(buf, off, 0)
+            buf[off + _BODY_OFFSET:off + _BODY_OFFSET + len(body)] = body
+            _SEQ.pack_into(buf, off, seq)
+            _WRITE_SEQ.pack_into(buf, _WRITE_SEQ_OFFSET, seq)
+            self.seq = seq
+        return True
+
+    def close(self, unlink: bool = True) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        log.info("[shmring] %s closed after %d frames (%d skipped)",
+                 self.name, self.seq, self.skipped)
+        with self._lock:
+            self._buf = None
+            self._shm.close()
+            if unlink:
+                try:
+                    self._shm.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Map an existing block without adopting it: before 3.13 the
+    resource tracker unlinks every segment a process attached to when
+    that process exits, which would pull the ring from under the
+    writer and the other readers."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class ShmRingReader:
+    """
+    Reader side, one per consumer (process or thread). `read()` returns
+    the frames written since the previous call, oldest first; `lost`
+    counts records the writer overwrote before they were read.
+    `start="latest"` skips what's already in the ring, `"oldest"`
+    starts from the oldest record still held.
+    """
+    def __init__(self, name: str, start: str = "latest"):
+        if start not in ("latest", "oldest"):
+            raise ValueError(f"start must be 'latest' or 'oldest', got {start!r}")
+        self._shm = _attach(name)
+        self.buffer = self._shm.buf
+        magic, version, slots, record_size, max_values, max_keys, _ = \
+            _HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"{name}: not a v{VERSION} frame ring")
+        self.slots = slots
+        self.max_values = max_values
+        self.max_keys = max_keys
+        self._keys_offset = HEADER_SIZE
+        self._records_offset = HEADER_SIZE + max_keys * KEY_SIZE
+        self._keys: List[Tuple[str, str]] = []
+        head = self.head
+        self.next_seq = head + 1 if start == "latest" else max(1, head - slots + 1)
+        self.lost = 0
+
+    @property
+    def head(self) -> int:
+        """Seq of the last complete record (0 = nothing written yet)."""
+        return _WRITE_SEQ.unpack_from(self.buffer, _WRITE_SEQ_OFFSET)[0]
+
+    def record_offset(self, seq: int) -> int:
+        """Byte offset of `seq`'s slot in `buffer`, for consumers that
+        want to view records in place (e.g. `numpy.frombuffer`)."""
+        return self._records_offset + ((seq - 1) % self.slots) * RECORD_SIZE
+
+    def key(self, key_id: int) -> Tuple[str, str]:
+        """(device, sensor) for an interned id."""
+        keys = self._keys
+        if key_id >= len(keys):
+            count = _KEY_COUNT.unpack_from(self.buffer, _KEY_COUNT_OFFSET)[0]
+            for i in range(len(keys), count):
+                off = self._keys_offset + i * KEY_SIZE
+                raw = bytes(self.buffer[off:off + KEY_SIZE]).rstrip(b"\0")
+                device, _, sensor = raw.decode("utf-8").partition("\0")
+                keys.append((intern_key(device), intern_key(sensor)))
+        return keys[key_id]
+
+    def read(self, max_records: Optional[int] = None) -> List[IMUFrame]:
+        buf = self.buffer
+        head = self.head
+        seq = self.next_seq
+        oldest = head - self.slots + 1
+        if seq < oldest:
+            self.lost += oldest - seq
+            seq = oldest
+        if max_records is not None:
+            head = min(head, seq + max_records - 1)
+        frames: List[IMUFrame] = []
+        append = frames.append
+        records_offset = self._records_offset
+        slots = self.slots
+        unpack_head = _RECORD_HEAD.unpack_from
+        unpack_seq = _SEQ.unpack_from
+        while seq <= head:
+            off = records_offset + ((seq - 1) % slots) * RECORD_SIZE
+            raw = bytes(buf[off:off + RECORD_SIZE])
+            if unpack_seq(raw, 0)[0] != seq or unpack_seq(buf, off)[0] != seq:
+                # Overwritten while we were catching up: everything up
+                # to the writer's current lap is gone.
+                oldest = self.head - slots + 1
+                skip_to = max(seq + 1, oldest)
+                self.lost += skip_to - seq
+                seq = skip_to
+                continue
+            key_id, n, _, t_recv = unpack_head(raw, _BODY_OFFSET)
+            values = struct.unpack_from("<%dd" % n, raw, _BODY_OFFSET + _RECORD_HEAD.size)
+            device, sensor = self.key(key_id)
+            append(IMUFrame(device, sensor, t_recv, values))
+            seq += 1
+        self.next_seq = seq
+        return frames
+
+    def close(self) -> None:
+        self.buffer = None
+        self._shm.close()
+
+
+class ShmPublish(Stage):
+    """
+    Pipeline Stage that writes every passing frame to a `ShmRing` and
+    forwards it unchanged. One ring is shared by all pipelines of all
+    devices; run_fs.py (`--shm-ring`) puts an instance just ahead of
+    each terminal, like Recorder.
+    """
+    is_terminal = False
+
+    def __init__(self, ring: ShmRing):
+        self.ring = ring
+
+    def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
+        self.ring.write(frame)
+        return (frame,)
+
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        write = self.ring.write
+        for frame in frames:
+            write(frame)
+        return list(frames)
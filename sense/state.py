@@ -1,4 +1,3 @@
-import errno
 import logging
 import threading
 import time
@@ -9,8 +8,13 @@ from mbientlab.metawear import MetaWear, libmetawear, parse_value
 from mbientlab.metawear.cbindings import *
 from time import sleep
 from .sensors import start_sensor_stream, stop_sensor_stream
+from .breaker import TRANSIENT_ERRNOS
 from .osc import ControlledOSCConnection
-from .pipeline import IMUFrame, OscEmit, Pipeline
+from .pipeline import IMUFrame, OscEmit, Pipeline, intern_key
+from .framequeue import (
+    DEFAULT_BLOCK_TIMEOUT_S, DEFAULT_CAPACITY, OVERFLOW_DROP_OLDEST,
+    FrameQueue, PipelineWorker,
+)
 
 log = logging.getLogger("fs.state")
 
@@ -169,6 +173,17 @@ class MetaWearState:
             )
         }
 
+        # Optional per-device frame queue (sense.framequeue). None = run
+        # pipelines synchronously on the BLE callback thread (default);
+        # set via enable_frame_queue().
+        self._frame_queue: Optional[FrameQueue] = None
+        self._pipeline_worker: Optional[PipelineWorker] = None
+
+        # Receiver subscriptions (sense.subscriptions), set by the C2
+        # controller via apply_subscriptions(). None = no demand: every
+        # advertised stream is computed and sent.
+        self._subscriptions = None
+
     # [ end __init__ ]
     #
     # TODO - a function to re-check configuration after remote change.
@@ -211,13 +226,13 @@ class MetaWearState:
         yet (common at boot before PD/the listener is up), log one
         WARNING line and return False — no traceback, no failure
         counter. Other exceptions go through _record_failure. Returns
-        True iff the send completed without exception.
+        True iff the send completed without exception; False (silently)
+        if the target's circuit breaker skipped it.
         """
         try:
-            self._osc_client.send_message(addr, value)
-            return True
+            return self._osc_client.send_message(addr, value) is not False
         except OSError as e:
-            if e.errno in (errno.ENETUNREACH, errno.EHOSTUNREACH, errno.ECONNREFUSED):
+            if e.errno in TRANSIENT_ERRNOS:
                 log.warning("[%s] %s: receiver unreachable (%s); skipping",
                             self.address, op, e)
                 return False
@@ -369,7 +384,7 @@ class MetaWearState:
         self.capture_mode = True
         # Mute every OscEmit on this state's pipelines.
         for pipe in self.pipelines.values():
-            for stage in pipe.stages:
+            for stage in pipe.composition.stages:
                 if isinstance(stage, OscEmit):
                     stage.muted = True
         # Auto-start streaming if not already (capture without frames is
@@ -386,7 +401,7 @@ class MetaWearState:
         if self.gesture_active:
             self._stop_gesture()
         for pipe in self.pipelines.values():
-            for stage in pipe.stages:
+            for stage in pipe.composition.stages:
                 if isinstance(stage, OscEmit):
                     stage.muted = False
         # Revert streaming to whatever it was before capture if WE started it.
@@ -749,6 +764,24 @@ class MetaWearState:
                 self.disconnect()
             except BaseException as e:
                 self._record_failure("shutdown:disconnect", e)
+
+        # After sensors stop, so the worker drains the tail of the stream
+        # through the pipelines before the recorder sink is closed.
+        if self._pipeline_worker is not None:
+            try:
+                self._pipeline_worker.stop()
+                log.info("[%s] frame queue: %s",
+                         self.address, self._frame_queue.stats())
+            except BaseException as e:
+                self._record_failure("shutdown:frame_queue", e)
+
+        # Last pushes are done: send what stages still hold (OscEmit's
+        # open --osc-bundle window group) before the OSC client closes.
+        for name, pipe in self.pipelines.items():
+            try:
+                pipe.drain()
+            except BaseException as e:
+                self._record_failure(f"shutdown:drain:{name}", e)
         return None
     
     # OSC ----
@@ -896,20 +929,85 @@ class MetaWearState:
     # and stamps _last_frame_at on success — A2 + A5 plumbing.
 
     def _emit(self, sensor: str, values, logger_key=None) -> None:
-        """Build an IMUFrame and push it through the named sensor's pipeline."""
+        """
+        Build an IMUFrame and push it through the named sensor's
+        pipeline — or, with a frame queue enabled, enqueue it for this
+        device's pipeline worker and return immediately.
+        """
         frame = IMUFrame(
-            device=self.device.address,
+            device=intern_key(self.device.address),
             sensor=sensor,
             t_recv=time.monotonic(),
             values=tuple(values),
         )
-        pipeline = self.pipelines.get(sensor)
+        frame_queue = self._frame_queue
+        if frame_queue is not None:
+            frame_queue.put(frame)
+        else:
+            self._dispatch(frame)
+        self.logger[logger_key or sensor] += 1
+
+    def _dispatch(self, frame: IMUFrame) -> None:
+        pipeline = self.pipelines.get(frame.sensor)
         if pipeline is None:
             # Defensive: a stage emitted a sensor we didn't pre-register.
             pipeline = Pipeline([OscEmit(self._osc_client)])
-            self.pipelines[sensor] = pipeline
+            pipeline.set_demand(frame.sensor, self._demand())
+            self.pipelines[frame.sensor] = pipeline
         pipeline.push(frame)
-        self.logger[logger_key or sensor] += 1
+
+    def apply_subscriptions(self, table) -> None:
+        """
+        Re-plan every pipeline of this device against the receiver
+        subscription `table` (a `SubscriptionTable`, or None). Called
+        by the controller whenever the table changes; cheap — one
+        recompile per pipeline.
+        """
+        self._subscriptions = table
+        wants = self._demand()
+        for source, pipeline in list(self.pipelines.items()):
+            pipeline.set_demand(source, wants)
+
+    def _demand(self):
+        """`wants(sensor)` predicate for Pipeline.set_demand, or None
+        while no receiver has subscribed."""
+        table = self._subscriptions
+        if table is None or not table.active:
+            return None
+        prefix = f"/{self.address}/"
+        return lambda sensor: table.wants(prefix + sensor)
+
+    def enable_frame_queue(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        policy: str = OVERFLOW_DROP_OLDEST,
+        block_timeout_s: float = DEFAULT_BLOCK_TIMEOUT_S,
+    ) -> None:
+        """
+        Move pipeline execution off the BLE callback thread: callbacks
+        enqueue into a bounded `FrameQueue` and a per-device worker
+        thread runs the pipelines. See sense/framequeue.py for the
+        overflow policies. Call before start_sensors(); a second call
+        is a no-op.
+        """
+        if self._frame_queue is not None:
+            log.debug("[%s] frame queue already enabled", self.address)
+            return
+        queue = FrameQueue(capacity=capacity, policy=policy,
+                           block_timeout_s=block_timeout_s)
+        worker = PipelineWorker(queue, self._dispatch,
+                                name=f"fs-pipeline-{self.address}")
+        worker.start()
+        self._pipeline_worker = worker
+        self._frame_queue = queue
+        log.info("[%s] frame queue enabled (capacity=%d, policy=%s)",
+                 self.address, capacity, policy)
+
+    def frame_queue_stats(self) -> Optional[dict]:
+        """Counters of the per-device frame queue, or None when disabled."""
+        if self._frame_queue is None:
+            return None
+        return self._frame_queue.stats()
 
     # Mapping from validated sensor_config keys to pipeline source names
     # (the sensor names used by the data callbacks). Kept here rather
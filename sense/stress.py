@@ -523,21 +523,14 @@ def _teardown_rig(osc, listener) -> None:
         listener.server_close()
     except BaseException:
         pass
+    # ControlledOSCConnection.stop_server joins the control server's
+    # threads and closes its socket, so 8001 is free for scenarios that
+    # build two rigs in one process (e.g. calibrate-flow's not-enabled
+    # vs. enabled paths).
     try:
         osc.stop_server()
     except BaseException:
         pass
-    # ControlledOSCConnection.stop_server flips is_running and wakes the
-    # listener thread but leaves the ThreadingOSCUDPServer socket bound.
-    # For scenarios that build two rigs in one process (e.g. calibrate-flow's
-    # not-enabled vs. enabled paths), we need 8001 fully released before the
-    # second boot(). Small sleep gives the listener thread a moment to exit
-    # handle_request() before the socket is closed under it.
-    time.sleep(0.1)
-    try:
-        osc.server.server_close()
-    except BaseException:
-        pass
 
 
 def scenario_c2_status_roundtrip() -> int:
@@ -1967,268 +1960,3422 @@ def scenario_pipeline_basics() -> int:
     return 0
 
 
-def scenario_preprocessing_stages_library() -> int:
+def scenario_pipeline_compiled_plan() -> int:
     """
-    Composite coverage for the preprocessing stage library (HighPass,
-    Differentiator, EdgeDetector, Window, Scale). One sub-test per
-    stage, all driven synthetically — no BLE.
-
-    Locks down the contracts that downstream pipelines depend on:
-    derived output naming, scalar-only EdgeDetector with hysteresis,
-    per-axis stats from Window, affine math from Scale, and
-    Differentiator's first-frame pass-through-only behavior.
+    The compiled push plan must be observably identical to the
+    interpreted loop: same output frames in the same order, plan
+    rebuilt on in-place `stages` mutation, and a raising stage drops
+    everything it yielded for that frame (not just what came after).
     """
     from sense.pipeline import (
-        Differentiator, EdgeDetector, HighPass, IMUFrame, Magnitude,
-        Pipeline, Scale, Stage, Window,
+        IMUFrame, LowPass, Magnitude, Pipeline, Stage, Tilt,
     )
 
-    captured: list = []
+    def build(compiled, sink):
+        class CaptureStage(Stage):
+            def process(self, frame):
+                sink.append((frame.sensor, frame.values))
+                return ()
+        return Pipeline([
+            LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+            Magnitude(),
+            Tilt(),
+            CaptureStage(),
+        ], compiled=compiled)
+
+    ref, got = [], []
+    interpreted, compiled = build(False, ref), build(True, got)
+    for i in range(50):
+        frame_args = ("AA:BB:CC:DD:EE:FF", "acc", i * 0.04,
+                      (0.05 * (i % 9), 0.1 * (i % 3), 9.81))
+        interpreted.push(IMUFrame(*frame_args))
+        compiled.push(IMUFrame(*frame_args))
+    if got != ref:
+        log.error("FAIL: compiled output diverges from interpreted "
+                  "(%d vs %d frames)", len(got), len(ref))
+        return 1
+    if compiled.stats["Tilt"].count != interpreted.stats["Tilt"].count:
+        log.error("FAIL: Tilt stats count %d != interpreted %d",
+                  compiled.stats["Tilt"].count, interpreted.stats["Tilt"].count)
+        return 1
+    log.info("OK: compiled == interpreted over %d output frames", len(got))
 
-    class Capture(Stage):
+    # In-place mutation must recompile (run_fs.py inserts gesture /
+    # recorder stages with pipe.stages.insert).
+    class Halt(Stage):
         def process(self, frame):
-            captured.append(frame)
             return ()
 
-    # --- Test 1: HighPass — DC-rejection + sinusoid passthrough -------------
-    log.info("test 1: HighPass — rejects DC, passes high-freq")
-    captured.clear()
-    pipe = Pipeline([HighPass(cutoff_hz=2.0, fs=25.0), Capture()])
-    # 25 frames at 25Hz of a CONSTANT signal — HP output should decay to ~0.
-    for i in range(25):
-        pipe.push(IMUFrame(
-            device="A", sensor="acc",
-            t_recv=i * 0.04, values=(5.0, 5.0, 5.0),
-        ))
-    hp_frames = [f for f in captured if f.sensor == "acc_hp"]
-    raw_frames = [f for f in captured if f.sensor == "acc"]
-    if len(hp_frames) != 25 or len(raw_frames) != 25:
-        log.error("FAIL: HighPass counts hp=%d raw=%d (expected 25 each)",
-                  len(hp_frames), len(raw_frames))
+    compiled.stages.insert(0, Halt())
+    got.clear()
+    compiled.push(IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (0.0, 0.0, 9.81)))
+    if got:
+        log.error("FAIL: stages.insert did not recompile the plan — %d frames "
+                  "reached the sink past Halt", len(got))
         return 1
-    # Last few HP samples on a constant input should be near zero.
-    last_hp = hp_frames[-1].values
-    if any(abs(v) > 0.5 for v in last_hp):
-        log.error("FAIL: HighPass didn't reject DC: last_hp=%s", last_hp)
+    del compiled.stages[0]
+    compiled.push(IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (0.0, 0.0, 9.81)))
+    if not got:
+        log.error("FAIL: del stages[0] did not recompile the plan")
         return 1
-    log.info("OK: HighPass last_hp=%s (DC rejected)",
-             tuple(round(v, 4) for v in last_hp))
+    log.info("OK: in-place insert/del recompile the plan")
 
-    # --- Test 2: Differentiator — first frame pass-only, then derivative ----
-    log.info("test 2: Differentiator — first frame yields no derivative")
-    captured.clear()
-    pipe = Pipeline([Differentiator(), Capture()])
-    # Linear ramp on a scalar: v(t) = 2*t. dv/dt should be ≈ 2.0.
-    for i in range(5):
-        pipe.push(IMUFrame(
-            device="A", sensor="acc_mag",
-            t_recv=i * 0.04, values=(2.0 * i * 0.04,),
-        ))
-    raw = [f for f in captured if f.sensor == "acc_mag"]
-    deriv = [f for f in captured if f.sensor == "acc_mag_d"]
-    if len(raw) != 5:
-        log.error("FAIL: Differentiator raw count %d != 5", len(raw))
-        return 1
-    if len(deriv) != 4:
-        log.error("FAIL: Differentiator deriv count %d != 4 "
-                  "(first frame should yield no derivative)", len(deriv))
-        return 1
-    if any(abs(f.values[0] - 2.0) > 1e-6 for f in deriv):
-        log.error("FAIL: Differentiator on ramp != 2.0: %s",
-                  [f.values for f in deriv])
-        return 1
-    log.info("OK: Differentiator dv/dt=2.0 across %d derivative frames",
-             len(deriv))
+    # A stage that yields then raises: partial output is discarded.
+    class HalfThenRaise(Stage):
+        def process(self, frame):
+            yield frame
+            raise RuntimeError("deliberate")
 
-    # --- Test 3: EdgeDetector — scalar rising edge w/ hysteresis ------------
-    log.info("test 3: EdgeDetector — rising edge + hysteresis re-arm")
-    captured.clear()
-    pipe = Pipeline([
-        EdgeDetector(threshold=0.5, hysteresis=0.1, direction="rising"),
-        Capture(),
-    ])
-    # Profile: 0.0, 0.6 (RISING EDGE), 0.7, 0.45 (above 0.4 floor — no rearm),
-    #         0.3 (below 0.4 — rearm), 0.6 (RISING EDGE), 0.2 (rearm)
-    profile = [0.0, 0.6, 0.7, 0.45, 0.3, 0.6, 0.2]
-    for i, v in enumerate(profile):
-        pipe.push(IMUFrame(
-            device="A", sensor="acc_mag",
-            t_recv=i * 0.04, values=(v,),
-        ))
-    edges = [f for f in captured if f.sensor == "acc_mag_edge"]
-    if len(edges) != 2:
-        log.error("FAIL: EdgeDetector emitted %d edges, expected 2 "
-                  "(hysteresis should suppress the bounce at 0.45)",
-                  len(edges))
-        return 1
-    log.info("OK: EdgeDetector fired %d rising edges with hysteresis", len(edges))
+    sink = []
 
-    # --- Test 4: EdgeDetector — vec3 input rejected with one-shot warning ---
-    log.info("test 4: EdgeDetector — vec3 rejected, raw still flows")
-    captured.clear()
-    pipe = Pipeline([EdgeDetector(threshold=1.0), Capture()])
-    for i in range(5):
-        pipe.push(IMUFrame(
-            device="A", sensor="acc",
-            t_recv=i * 0.04, values=(0.1 * i, 0.1, 0.1),
-        ))
-    raw = [f for f in captured if f.sensor == "acc"]
-    edges = [f for f in captured if f.sensor == "acc_edge"]
-    if len(raw) != 5:
-        log.error("FAIL: vec3 pass-through count %d != 5", len(raw))
-        return 1
-    if edges:
-        log.error("FAIL: EdgeDetector emitted %d edges on vec3 input "
-                  "(should be rejected)", len(edges))
+    class Sink(Stage):
+        def process(self, frame):
+            sink.append(frame)
+            return ()
+
+    pipe = Pipeline([HalfThenRaise(), Sink()])
+    pipe.push(IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (1.0, 2.0, 3.0)))
+    if sink:
+        log.error("FAIL: partial output from a raising stage leaked downstream")
         return 1
-    log.info("OK: vec3 input passes through, no edges emitted")
+    log.info("OK: raising stage's partial output dropped")
 
-    # --- Test 5: Window — rolling std on a noisy scalar ---------------------
-    log.info("test 5: Window — rolling std on a constant ≈ 0")
-    captured.clear()
-    pipe = Pipeline([Window(n_samples=4, stat="std"), Capture()])
-    # Constant input → std should converge to 0.
-    for i in range(8):
-        pipe.push(IMUFrame(
-            device="A", sensor="acc_mag",
-            t_recv=i * 0.04, values=(5.0,),
-        ))
-    stat_frames = [f for f in captured if f.sensor == "acc_mag_std"]
-    if len(stat_frames) != 8:
-        log.error("FAIL: Window stat count %d != 8", len(stat_frames))
+    log.info("PASS: pipeline-compiled-plan")
+    return 0
+
+
+def scenario_pipeline_profiling_modes() -> int:
+    """
+    Profiling modes on `Pipeline`: "off" records nothing, "sampled"
+    times exactly 1-in-N pushes, "full" times every push. Histogram
+    percentiles land within bucket resolution of known inputs.
+    """
+    from sense.pipeline import IMUFrame, LowPass, Magnitude, Pipeline, Stage
+    from sense.profiling import LatencyHistogram
+
+    class Drop(Stage):
+        def process(self, frame):
+            return ()
+
+    def run(profile, sample_every=8, n=64):
+        pipe = Pipeline([LowPass(cutoff_hz=5.0, fs=25.0), Magnitude(), Drop()],
+                        profile=profile, sample_every=sample_every)
+        for i in range(n):
+            pipe.push(IMUFrame("AA:BB:CC:DD:EE:FF", "acc", i * 0.04,
+                               (0.1, 0.2, 9.81)))
+        return pipe
+
+    off = run("off")
+    if any(st.count for st in off.stats.values()) or off.push_stats:
+        log.error("FAIL: profile=off recorded timings: %s", off.profile_report())
         return 1
-    last_std = stat_frames[-1].values[0]
-    if abs(last_std) > 1e-9:
-        log.error("FAIL: Window std on constant != 0: %f", last_std)
+    sampled = run("sampled", sample_every=8, n=64)
+    if sampled.stats["LowPass"].count != 8:
+        log.error("FAIL: sampled 1-in-8 over 64 pushes → LowPass count %d, "
+                  "expected 8", sampled.stats["LowPass"].count)
         return 1
-    log.info("OK: Window std on constant input = %.2e", last_std)
-
-    # Window range on a known step
-    log.info("test 5b: Window — range on a step input")
-    captured.clear()
-    pipe = Pipeline([Window(n_samples=3, stat="range"), Capture()])
-    for i, v in enumerate([1.0, 2.0, 5.0, 5.0, 5.0]):
-        pipe.push(IMUFrame(
-            device="A", sensor="acc_mag",
-            t_recv=i * 0.04, values=(v,),
-        ))
-    range_frames = [f for f in captured if f.sensor == "acc_mag_range"]
-    # After the step settles (frames 4-5), range over (5,5,5) = 0.
-    if abs(range_frames[-1].values[0]) > 1e-9:
-        log.error("FAIL: Window range on settled step != 0: %f",
-                  range_frames[-1].values[0])
+    full = run("full")
+    push = full.push_stats.get(("AA:BB:CC:DD:EE:FF", "acc"))
+    if full.stats["LowPass"].count != 64 or push is None or push.count != 64:
+        log.error("FAIL: full mode counts: %s", full.profile_report())
         return 1
-    # Frame 3 sees (1,2,5) — range = 4.
-    if abs(range_frames[2].values[0] - 4.0) > 1e-9:
-        log.error("FAIL: Window range mid-step != 4.0: %f",
-                  range_frames[2].values[0])
+    report = full.profile_report()
+    lp = report["stages"]["LowPass"]
+    if not (lp["p50_us"] <= lp["p95_us"] <= lp["p99_us"] <= lp["p999_us"] <= lp["max_us"]):
+        log.error("FAIL: percentiles not monotone: %s", lp)
         return 1
-    log.info("OK: Window range tracks step correctly")
+    log.info("OK: off/sampled/full counts; LowPass %s", lp)
 
-    # --- Test 6: Scale — affine map, default + override output name ---------
-    log.info("test 6: Scale — affine map, default + custom output name")
-    captured.clear()
-    pipe = Pipeline([Scale(scale=2.0, offset=1.0), Capture()])
-    pipe.push(IMUFrame(device="A", sensor="tilt", t_recv=0.0, values=(5.0,)))
-    raw = [f for f in captured if f.sensor == "tilt"]
-    scaled = [f for f in captured if f.sensor == "tilt_scaled"]
-    if len(raw) != 1 or len(scaled) != 1:
-        log.error("FAIL: Scale counts raw=%d scaled=%d", len(raw), len(scaled))
+    # Runtime switch: off → full starts recording on the next push.
+    off.set_profile("full")
+    off.push(IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (0.1, 0.2, 9.81)))
+    if off.stats["LowPass"].count != 1:
+        log.error("FAIL: set_profile('full') did not take effect")
         return 1
-    # (5.0 - 1.0) * 2.0 = 8.0
-    if abs(scaled[0].values[0] - 8.0) > 1e-9:
-        log.error("FAIL: Scale value: %f, expected 8.0", scaled[0].values[0])
+
+    # Histogram resolution: uniform 1..100 µs → p50 ≈ 50 µs, p99 ≈ 99 µs.
+    hist = LatencyHistogram()
+    for us in range(1, 101):
+        hist.add_ns(us * 1000)
+    for q, expected_ns in ((50.0, 50_000), (99.0, 99_000)):
+        got = hist.percentile_ns(q)
+        if abs(got - expected_ns) / expected_ns > 0.07:
+            log.error("FAIL: p%s = %.0fns, expected ≈ %dns", q, got, expected_ns)
+            return 1
+    log.info("OK: histogram p50=%.1fµs p99=%.1fµs",
+             hist.percentile_ns(50) / 1e3, hist.percentile_ns(99) / 1e3)
+
+    log.info("PASS: pipeline-profiling-modes")
+    return 0
+
+
+def scenario_pipeline_key_registry() -> int:
+    """
+    Interned keys and memoised derived names: slotted frames carry no
+    __dict__, KEYS round-trips name ↔ id and hands back one canonical
+    str per name, derived sensor names are interned and follow a
+    runtime Window `stat` change.
+    """
+    from sense.pipeline import KEYS, IMUFrame, Magnitude, Window, intern_key
+
+    frame = IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (1.0, 2.0, 2.0))
+    if hasattr(frame, "__dict__"):
+        log.error("FAIL: IMUFrame instances still carry a __dict__")
         return 1
-    log.info("OK: Scale (5.0 - 1.0) * 2.0 = %f", scaled[0].values[0])
 
-    # Override output name
-    captured.clear()
-    pipe = Pipeline([Scale(scale=0.5, offset=0.0, output_sensor="cutoff_norm"),
-                     Capture()])
-    pipe.push(IMUFrame(device="A", sensor="tilt", t_recv=0.0, values=(40.0,)))
-    custom = [f for f in captured if f.sensor == "cutoff_norm"]
-    if len(custom) != 1 or abs(custom[0].values[0] - 20.0) > 1e-9:
-        log.error("FAIL: Scale custom output_sensor: frames=%s",
-                  [(f.sensor, f.values) for f in captured])
+    built = "".join(["acc", "_mag"])
+    canonical = intern_key(built)
+    if intern_key("acc_mag") is not canonical:
+        log.error("FAIL: intern_key returned distinct objects for equal names")
+        return 1
+    key_id = KEYS.id_of("acc_mag")
+    if KEYS.name_of(key_id) is not canonical or KEYS.id_of(built) != key_id:
+        log.error("FAIL: KEYS id round-trip broken (id=%d)", key_id)
         return 1
-    log.info("OK: Scale output_sensor override emits 'cutoff_norm'")
 
-    # --- Test 7: composition recipe — Magnitude → EdgeDetector --------------
-    log.info("test 7: Magnitude → EdgeDetector composition")
-    captured.clear()
-    pipe = Pipeline([
-        Magnitude(),
-        EdgeDetector(threshold=2.0, hysteresis=0.3, direction="rising"),
-        Capture(),
-    ])
-    # Three vec3 frames: small, big, small. acc_mag = sqrt(3) ≈ 1.73, then
-    # sqrt(12) ≈ 3.46 (RISING EDGE), then sqrt(0.03) ≈ 0.17 (rearm).
-    for vec in [(1.0, 1.0, 1.0), (2.0, 2.0, 2.0), (0.1, 0.1, 0.1)]:
-        pipe.push(IMUFrame(
-            device="A", sensor="acc", t_recv=0.0, values=vec,
-        ))
-    edges = [f for f in captured if f.sensor == "acc_mag_edge"]
-    if len(edges) != 1:
-        log.error("FAIL: composition emitted %d edges, expected 1: %s",
-                  len(edges), [f.sensor for f in captured])
+    mag = Magnitude()
+    outs = list(mag.process(frame))
+    if outs[1].sensor is not canonical or outs[1].values != (3.0,):
+        log.error("FAIL: Magnitude derived frame %r (name not interned?)", outs[1])
         return 1
-    log.info("OK: composition Magnitude → EdgeDetector fired %d edge(s)",
-             len(edges))
 
-    # --- Test 8: registry — every new stage is C2-constructible -------------
-    log.info("test 8: _STAGE_REGISTRY includes all 5 new stages")
-    from sense.pipeline import _STAGE_REGISTRY
-    new_stages = ("HighPass", "Differentiator", "EdgeDetector", "Window", "Scale")
-    missing = [s for s in new_stages if s not in _STAGE_REGISTRY]
-    if missing:
-        log.error("FAIL: _STAGE_REGISTRY missing: %s", missing)
+    win = Window(n_samples=4, stat="mean")
+    names = [list(win.process(frame))[1].sensor]
+    win.stat = "max"
+    names.append(list(win.process(frame))[1].sensor)
+    if names != ["acc_mean", "acc_max"] or win.outputs("acc") != ["acc", "acc_max"]:
+        log.error("FAIL: Window names after stat change: %s / %s",
+                  names, win.outputs("acc"))
         return 1
-    log.info("OK: registry contains %s", new_stages)
+    log.info("OK: %d keys registered; derived names %s", len(KEYS), names)
 
-    log.info("PASS: preprocessing-stages-library")
+    log.info("PASS: pipeline-key-registry")
     return 0
 
 
-# --- Soak / long-run scenarios ----------------------------------------------
-#
-# These run for minutes, not seconds. Registered in SOAK_SCENARIOS (separate
-# from SCENARIOS) so any future "run all fast scenarios" loop iterating
-# `SCENARIOS.keys()` skips them. Invoke explicitly via --scenario.
-
-
-def scenario_recorder_soak_write_latency(
-    duration_s: float = 600.0,
-    p99_budget_ms: float = 5.0,
-    rate_hz: float = 100.0,
-    n_producers: int = 4,
-) -> int:
+def scenario_pipeline_push_batch() -> int:
     """
-    Long-run RecorderSink write-latency soak. Streams synthetic frames
-    through N representative pipelines (LowPass → Magnitude → Recorder →
-    muted OscEmit) sharing one RecorderSink, at ~rate_hz per producer
-    for duration_s seconds. Tracks per-push wall-clock latency on each
-    producer thread; reports p50/p95/p99/p99.9/max + Pipeline.stats
-    [Recorder] internal-stage timing at the end.
-
-    Pass: p99 across all producers stays under p99_budget_ms.
-
-    Catches: (a) sync JSON serialize + locked file write blocking the
-    BLE callback thread under filesystem stutters; (b) RecorderSink
-    lock contention across multiple Recorder Stages sharing one sink.
-
-    Defaults are tuned to mimic Phase-A loads (~4 devices × ~100 Hz
-    per-sensor aggregate = ~400 sink.write/s, 10-min duration). Override
-    via --duration-s / --rate-hz / --n-producers / --p99-budget-ms.
+    `Pipeline.push_batch` must reach the terminal with exactly the
+    frames per-frame `push` would have, in the same order — across the
+    batch-aware stages (LowPass, HighPass, Scale, Magnitude,
+    Differentiator), stages without a batch hook (Tilt, Window), and
+    a mixed two-device batch. Per-frame error containment still holds
+    for stages without a hook. Logs the speedup for the record.
     """
-    import shutil
-    import tempfile
+    import math
     from sense.pipeline import (
-        IMUFrame, LowPass, Magnitude, OscEmit, Pipeline,
+        Differentiator, HighPass, IMUFrame, LowPass, Magnitude, Pipeline,
+        Scale, Stage, Tilt, Window,
     )
-    from sense.recorder import Recorder, RecorderSink
 
-    tmp_dir = tempfile.mkdtemp(prefix="fs-recorder-soak-")
-    sink_path = os.path.join(tmp_dir, "soak.jsonl")
+    def build(sink):
+        class Capture(Stage):
+            def process(self, frame):
+                sink.append((frame.device, frame.sensor, frame.t_recv, frame.values))
+                return ()
+        return Pipeline([
+            LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+            HighPass(cutoff_hz=0.5, fs=25.0),
+            Magnitude(),
+            Differentiator(),
+            Tilt(),
+            Scale(scale=0.5, offset=1.0),
+            Window(n_samples=8, stat="std"),
+            Capture(),
+        ], profile="off")
+
+    frames = []
+    for i in range(2000):
+        dev = "AA:BB:CC:DD:EE:01" if i % 3 else "AA:BB:CC:DD:EE:02"
+        frames.append(IMUFrame(dev, "acc", i * 0.01,
+                               (math.sin(i * 0.1), math.cos(i * 0.07), 9.81 + 0.01 * (i % 5))))
+
+    ref, got = [], []
+    per_frame, batched = build(ref), build(got)
+    t0 = time.perf_counter()
+    for f in frames:
+        per_frame.push(f)
+    t_single = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i in range(0, len(frames), 500):
+        batched.push_batch(frames[i:i + 500])
+    t_batch = time.perf_counter() - t0
+    if got != ref:
+        first = next((i for i, (a, b) in enumerate(zip(got, ref)) if a != b),
+                     min(len(got), len(ref)))
+        log.error("FAIL: push_batch diverges from push at output %d of %d/%d: %r vs %r",
+                  first, len(got), len(ref),
+                  got[first] if first < len(got) else None,
+                  ref[first] if first < len(ref) else None)
+        return 1
+    log.info("OK: %d output frames identical; push %.1fms vs push_batch %.1fms (%.2fx)",
+             len(got), t_single * 1e3, t_batch * 1e3, t_single / max(t_batch, 1e-9))
+
+    # Stats stay in per-input-frame units.
+    profiled = Pipeline([LowPass(cutoff_hz=5.0, fs=25.0), Magnitude()])
+    profiled.push_batch(frames[:100])
+    if profiled.stats["LowPass"].count != 100 or profiled.stats["Magnitude"].count != 100:
+        log.error("FAIL: batch stats counts LowPass=%d Magnitude=%d, expected 100",
+                  profiled.stats["LowPass"].count, profiled.stats["Magnitude"].count)
+        return 1
+
+    class RaiseOnOdd(Stage):
+        def process(self, frame):
+            if int(frame.t_recv * 100) % 2:
+                raise RuntimeError("deliberate")
+            yield frame
+
+    survivors = []
+
+    class Keep(Stage):
+        def process(self, frame):
+            survivors.append(frame)
+            return ()
+
+    Pipeline([RaiseOnOdd(), Keep()]).push_batch(frames[:10])
+    if len(survivors) != 5:
+        log.error("FAIL: per-frame containment in push_batch kept %d of 10 "
+                  "(expected the 5 even frames)", len(survivors))
+        return 1
+    log.info("OK: raising frames dropped individually")
+
+    log.info("PASS: pipeline-push-batch")
+    return 0
+
+
+def scenario_pipeline_numpy_kernels() -> int:
+    """
+    `backend="numpy"` on LowPass / HighPass / Scale / Magnitude must
+    reproduce the Python batch path: IIR outputs within 1e-9 (the
+    chunked matrix scan sums in a different order), element-wise
+    stages exactly, same frame order and sensor names. Filter state
+    carries across batches and across a mid-stream backend switch;
+    a key changing arity mid-batch falls back to the scalar loop.
+    Skipped (PASS) when NumPy isn't installed. Logs the speedup.
+    """
+    import math
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        log.info("SKIP: numpy not installed")
+        log.info("PASS: pipeline-numpy-kernels")
+        return 0
+    from sense.pipeline import (
+        HighPass, IMUFrame, LowPass, Magnitude, Pipeline, Scale, Stage,
+    )
+
+    def build(sink, backend):
+        class Capture(Stage):
+            def process(self, frame):
+                sink.append(frame)
+                return ()
+        return Pipeline([
+            LowPass(cutoff_hz=5.0, fs=25.0, backend=backend),
+            HighPass(cutoff_hz=0.5, fs=25.0, backend=backend),
+            LowPass(cutoff_hz=2.0, fs=25.0, output_sensor="acc_lp", backend=backend),
+            Scale(scale=0.5, offset=1.0, backend=backend),
+            Magnitude(backend=backend),
+            Capture(),
+        ], profile="off")
+
+    def diverges(got, ref, tol):
+        if len(got) != len(ref):
+            return f"{len(got)} output frames vs {len(ref)}"
+        for i, (a, b) in enumerate(zip(got, ref)):
+            if (a.device, a.sensor, a.t_recv) != (b.device, b.sensor, b.t_recv) \
+                    or len(a.values) != len(b.values):
+                return f"frame {i}: {a!r} vs {b!r}"
+            for x, y in zip(a.values, b.values):
+                if abs(x - y) > tol * max(1.0, abs(y)):
+                    return f"frame {i} ({a.sensor}): {a.values!r} vs {b.values!r}"
+        return None
+
+    devices = ["AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02", "AA:BB:CC:DD:EE:03"]
+    frames = []
+    for i in range(6000):
+        dev = devices[i % 3 if i % 7 else 0]
+        frames.append(IMUFrame(dev, "acc", i * 0.01,
+                               (math.sin(i * 0.1), math.cos(i * 0.07), 9.81 + 0.01 * (i % 5))))
+
+    ref, got = [], []
+    python_pipe, numpy_pipe = build(ref, "python"), build(got, "numpy")
+    t0 = time.perf_counter()
+    for i in range(0, len(frames), 1000):
+        python_pipe.push_batch(frames[i:i + 1000])
+    t_python = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i in range(0, len(frames), 1000):
+        numpy_pipe.push_batch(frames[i:i + 1000])
+    t_numpy = time.perf_counter() - t0
+    problem = diverges(got, ref, 1e-9)
+    if problem:
+        log.error("FAIL: numpy backend diverges from python: %s", problem)
+        return 1
+    log.info("OK: %d output frames match; python %.1fms vs numpy %.1fms (%.2fx)",
+             len(got), t_python * 1e3, t_numpy * 1e3, t_python / max(t_numpy, 1e-9))
+
+    # Element-wise stages are exact, not just close.
+    for make in (lambda b: Scale(scale=0.3, offset=0.1, backend=b),
+                 lambda b: Magnitude(backend=b)):
+        a = [(f.sensor, f.values) for f in make("python").process_batch(frames)]
+        b = [(f.sensor, f.values) for f in make("numpy").process_batch(frames)]
+        if a != b:
+            log.error("FAIL: %s numpy output not bit-identical",
+                      type(make("python")).__name__)
+            return 1
+
+    # Switch backend mid-stream (and single-frame push in between):
+    # state is shared, so the output must not notice.
+    ref, got = [], []
+    python_pipe, mixed_pipe = build(ref, "python"), build(got, "python")
+    for f in frames[:3000]:
+        python_pipe.push(f)
+    python_pipe.push_batch(frames[3000:])
+    mixed_pipe.push_batch(frames[:1000])
+    for stage in mixed_pipe.stages:
+        if hasattr(stage, "backend"):
+            stage.backend = "numpy"
+    mixed_pipe.push_batch(frames[1000:2000])
+    for f in frames[2000:3000]:
+        mixed_pipe.push(f)
+    mixed_pipe.push_batch(frames[3000:])
+    problem = diverges(got, ref, 1e-9)
+    if problem:
+        log.error("FAIL: backend switch mid-stream diverges: %s", problem)
+        return 1
+    log.info("OK: state carries across batches, push() and a backend switch")
+
+    # Arity change mid-batch → scalar fallback resets that key's state.
+    odd = [IMUFrame("AA:BB:CC:DD:EE:01", "acc", 0.0, (1.0, 2.0, 3.0)),
+           IMUFrame("AA:BB:CC:DD:EE:01", "acc", 0.01, (4.0,)),
+           IMUFrame("AA:BB:CC:DD:EE:01", "acc", 0.02, (5.0,))]
+    ref, got = [], []
+    build(ref, "python").push_batch(odd)
+    build(got, "numpy").push_batch(odd)
+    problem = diverges(got, ref, 1e-12)
+    if problem:
+        log.error("FAIL: arity change mid-batch: %s", problem)
+        return 1
+
+    try:
+        LowPass(cutoff_hz=5.0, fs=25.0, backend="cuda")
+    except ValueError:
+        pass
+    else:
+        log.error("FAIL: unknown backend accepted")
+        return 1
+
+    log.info("PASS: pipeline-numpy-kernels")
+    return 0
+
+
+def scenario_window_incremental_stats() -> int:
+    """
+    Window's incremental engine (running sums + monotonic deques) must
+    track a from-scratch recompute over the same samples: every stat,
+    window sizes from 1 to 500, an offset-heavy signal (9.81 + small
+    noise, the cancellation-prone case for std), frequent resyncs, a
+    live `stat` retune across the sum and extrema groups, and an arity
+    change. Logs per-frame cost at n=5 vs n=500 — it should be flat.
+    """
+    import math
+    import random
+    from collections import deque
+    from sense.pipeline import IMUFrame, Window
+
+    def reference(samples, stat):
+        out = []
+        for axis in range(len(samples[0])):
+            col = [s[axis] for s in samples]
+            if stat == "mean":
+                out.append(sum(col) / len(col))
+            elif stat == "sum":
+                out.append(sum(col))
+            elif stat == "max":
+                out.append(max(col))
+            elif stat == "min":
+                out.append(min(col))
+            elif stat == "range":
+                out.append(max(col) - min(col))
+            else:
+                m = sum(col) / len(col)
+                out.append(math.sqrt(sum((v - m) ** 2 for v in col) / len(col)))
+        return out
+
+    def close(got, want, stat):
+        exact = stat in ("max", "min", "range")
+        for g, w in zip(got, want):
+            if exact and g != w:
+                return False
+            # std is a sqrt of a running sum: near-zero variance reads
+            # back as ~1e-7 noise on a signal of scale ~10.
+            if abs(g - w) > 1e-9 * max(1.0, abs(w)) + (1e-6 if stat == "std" else 0.0):
+                return False
+        return len(got) == len(want)
+
+    rng = random.Random(7)
+    signal = [(9.81 + rng.gauss(0, 0.02), rng.uniform(-5, 5), float(rng.randint(0, 1)))
+              for _ in range(3000)]
+    for n in (1, 5, 64, 500):
+        for stat in Window._VALID_STATS:
+            win = Window(n_samples=n, stat=stat)
+            win.RESYNC_EVERY = 16  # exercise resync far more than live
+            window = deque(maxlen=n)
+            for i, values in enumerate(signal):
+                window.append(values)
+                got = list(win.process(IMUFrame("A", "acc", i * 0.01, values)))[1].values
+                want = reference(list(window), stat)
+                if not close(got, want, stat):
+                    log.error("FAIL: n=%d stat=%s frame %d: %r vs %r",
+                              n, stat, i, got, want)
+                    return 1
+    log.info("OK: all stats match a full recompute for n in (1, 5, 64, 500)")
+
+    # Live retune cycling across the sum/extrema groups — each switch
+    # rebuilds from the retained samples.
+    win = Window(n_samples=50, stat="mean")
+    window = deque(maxlen=50)
+    cycle = ["mean", "max", "std", "range", "sum", "min"]
+    for i, values in enumerate(signal[:1200]):
+        if i % 97 == 0:
+            win.stat = cycle[(i // 97) % len(cycle)]
+        window.append(values)
+        got = list(win.process(IMUFrame("A", "acc", i * 0.01, values)))[1].values
+        if not close(got, reference(list(window), win.stat), win.stat):
+            log.error("FAIL: after retune to %s at frame %d: %r", win.stat, i, got)
+            return 1
+    log.info("OK: stat retunes rebuild state correctly")
+
+    # Arity change starts a fresh window.
+    win = Window(n_samples=4, stat="sum")
+    for values in [(1.0, 2.0), (3.0, 4.0), (10.0,)]:
+        last = list(win.process(IMUFrame("A", "x", 0.0, values)))[1].values
+    if last != (10.0,):
+        log.error("FAIL: arity change kept stale window: %r", last)
+        return 1
+
+    costs = {}
+    for n in (5, 500):
+        win = Window(n_samples=n, stat="std")
+        frames = [IMUFrame("A", "acc", i * 0.01, v) for i, v in enumerate(signal)]
+        t0 = time.perf_counter()
+        for f in frames:
+            for _ in win.process(f):
+                pass
+        costs[n] = (time.perf_counter() - t0) / len(frames) * 1e6
+    log.info("OK: std per-frame cost %.1fµs at n=5, %.1fµs at n=500",
+             costs[5], costs[500])
+
+    log.info("PASS: window-incremental-stats")
+    return 0
+
+
+def scenario_pipeline_stage_routing() -> int:
+    """
+    Stage `inputs` selectors: a stage only sees frames of the sensors
+    it selects; the rest bypass it in place. Checks call counts (Tilt
+    no longer sees acc_lp / acc_mag), that the terminal output of a
+    routed chain equals the unrouted one where the stage would have
+    rejected the frame anyway, `advertised_outputs()` vs what actually
+    reaches the terminal, push_batch order with interleaved routed and
+    bypassed frames, and `/cmd/pipeline/add ... inputs` including its
+    persistence round-trip.
+    """
+    import math
+    from sense.pipeline import (
+        IMUFrame, LowPass, Magnitude, OscEmit, Pipeline, Scale, Stage, Tilt,
+        rebuild_composition_with_overrides,
+    )
+
+    def capture_stage(sink):
+        class Capture(Stage):
+            is_terminal = True
+
+            def process(self, frame):
+                sink.append((frame.device, frame.sensor, frame.t_recv, frame.values))
+                return ()
+        return Capture()
+
+    frames = [IMUFrame("A", "acc", i * 0.04,
+                       (math.sin(i * 0.2), math.cos(i * 0.3), 9.81))
+              for i in range(200)]
+
+    def chain(sink, tilt_inputs="default", mag_inputs=None):
+        tilt = Tilt()
+        if tilt_inputs != "default":
+            tilt.inputs = tilt_inputs
+        mag = Magnitude()
+        mag.inputs = mag_inputs
+        return Pipeline([LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+                         mag, tilt, capture_stage(sink)])
+
+    routed_out, unrouted_out = [], []
+    routed, unrouted = chain(routed_out), chain(unrouted_out, tilt_inputs=None)
+    for f in frames:
+        routed.push(f)
+        unrouted.push(f)
+    if routed_out != unrouted_out:
+        log.error("FAIL: routing Tilt to acc changed the terminal output")
+        return 1
+    # acc, acc_lp, acc_mag, acc_lp_mag reach Tilt unrouted; only acc routed.
+    if routed.stats["Tilt"].count != 200 or unrouted.stats["Tilt"].count != 800:
+        log.error("FAIL: Tilt calls routed=%d unrouted=%d (expected 200 / 800)",
+                  routed.stats["Tilt"].count, unrouted.stats["Tilt"].count)
+        return 1
+    log.info("OK: Tilt called %d× routed vs %d× unrouted, same output",
+             routed.stats["Tilt"].count, unrouted.stats["Tilt"].count)
+
+    # Magnitude restricted to acc: no acc_lp_mag, and the static walk agrees.
+    out = []
+    pipe = chain(out, mag_inputs=frozenset({"acc"}))
+    for f in frames[:10]:
+        pipe.push(f)
+    seen = {sensor for _, sensor, _, _ in out}
+    advertised = pipe.advertised_outputs("acc")
+    if seen != {"acc", "acc_lp", "acc_mag", "tilt"} or advertised != seen:
+        log.error("FAIL: routed Magnitude emitted %s, advertised %s",
+                  sorted(seen), sorted(advertised))
+        return 1
+    if pipe.sensors_at("acc", 2) != {"acc", "acc_lp", "acc_mag"}:
+        log.error("FAIL: sensors_at before Tilt = %s", pipe.sensors_at("acc", 2))
+        return 1
+    log.info("OK: advertised_outputs follows routing: %s", sorted(advertised))
+
+    # push_batch: routed stages with batch hooks and mixed sensors keep
+    # the per-frame order exactly.
+    mixed = []
+    for i, f in enumerate(frames):
+        mixed.append(f)
+        if i % 3 == 0:
+            mixed.append(IMUFrame("A", "gyro", f.t_recv, (0.1 * i, 0.2, 0.3)))
+
+    def batch_chain(sink):
+        lp = LowPass(cutoff_hz=3.0, fs=25.0)
+        lp.inputs = frozenset({"gyro"})
+        sc = Scale(scale=2.0)
+        sc.inputs = frozenset({"acc", "gyro"})
+        mag = Magnitude()
+        mag.inputs = frozenset({"acc_scaled"})
+        return Pipeline([lp, sc, mag, Tilt(), capture_stage(sink)])
+
+    ref, got = [], []
+    per_frame, batched = batch_chain(ref), batch_chain(got)
+    for f in mixed:
+        per_frame.push(f)
+    for i in range(0, len(mixed), 64):
+        batched.push_batch(mixed[i:i + 64])
+    if got != ref:
+        log.error("FAIL: routed push_batch diverges from push (%d vs %d frames)",
+                  len(got), len(ref))
+        return 1
+    if batched.stats["Magnitude"].count != 200:
+        log.error("FAIL: batched Magnitude counted %d routed frames, expected 200",
+                  batched.stats["Magnitude"].count)
+        return 1
+    log.info("OK: push_batch with routing matches push over %d outputs", len(got))
+
+    # C2: add with an inputs selector, reject an unreachable one, persist.
+    osc, states, controller, listener, captured = _build_c2_test_rig()
+    try:
+        if not states:
+            log.error("FAIL: no devices")
+            return 1
+        target = states[0]
+        target.pipelines["acc"].stages = [
+            LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+            OscEmit(target._osc_client),
+        ]
+        _send_cmd_local("/cmd/pipeline/add",
+                        [target.address, "acc", 1, "Magnitude", "inputs", "acc_lp"])
+        _wait_for(lambda: any(a == "/state/configured" for a, _ in captured),
+                  timeout_s=1.0)
+        stage = target.pipelines["acc"].stages[1]
+        if not isinstance(stage, Magnitude) or stage.inputs != frozenset({"acc_lp"}):
+            log.error("FAIL: add with inputs → %r inputs=%r",
+                      stage, getattr(stage, "inputs", None))
+            return 1
+        advertised = target.pipelines["acc"].advertised_outputs("acc")
+        if advertised != {"acc", "acc_lp", "acc_lp_mag"}:
+            log.error("FAIL: advertised after routed add: %s", sorted(advertised))
+            return 1
+
+        captured.clear()
+        _send_cmd_local("/cmd/pipeline/add",
+                        [target.address, "acc", 0, "Scale", "inputs", "gyro"])
+        _wait_for(lambda: any(a == "/error/bad-params" for a, _ in captured),
+                  timeout_s=1.0)
+        if not any(a == "/error/bad-params" for a, _ in captured) \
+                or len(target.pipelines["acc"].stages) != 3:
+            log.error("FAIL: unreachable inputs selector not rejected")
+            return 1
+
+        entry = controller._build_pipeline_entry(target, "acc")
+        items = entry["composition"]
+        if items[1].get("inputs") != ["acc_lp"] or "inputs" in items[0]:
+            log.error("FAIL: persisted composition %r", items)
+            return 1
+        rebuilt = rebuild_composition_with_overrides(target.pipelines["acc"], items)
+        if rebuilt[1].inputs != frozenset({"acc_lp"}) or rebuilt[0].inputs is not None:
+            log.error("FAIL: rebuilt inputs %r / %r", rebuilt[0].inputs, rebuilt[1].inputs)
+            return 1
+        log.info("OK: C2 add inputs, unreachable rejected, persistence round-trips")
+    finally:
+        _teardown_rig(osc, listener)
+
+    log.info("PASS: pipeline-stage-routing")
+    return 0
+
+
+def scenario_subscription_pruning() -> int:
+    """
+    Receiver subscriptions (sense/subscriptions.py): the table's
+    liveness expiry; Pipeline.set_demand skipping derive stages whose
+    outputs nobody consumes (with identical values on what is
+    consumed), side-effect stages pinning everything upstream; and the
+    `/cmd/subscribe` → OscEmit-sends-only-subscribed → unsubscribe /
+    expiry round-trip through the C2 rig.
+    """
+    import math
+    from sense.pipeline import (
+        HighPass, IMUFrame, LowPass, Magnitude, OscEmit, Pipeline, Stage, Tilt,
+    )
+    from sense.subscriptions import SubscriptionTable
+
+    now = [100.0]
+    table = SubscriptionTable(ttl_s=10.0, clock=lambda: now[0])
+    if not table.wants("/X/acc") or table.active:
+        log.error("FAIL: empty table should pass everything")
+        return 1
+    table.subscribe("pd", ["/*/acc_mag"])
+    table.subscribe("gui", ["/X/tilt"])
+    if table.wants("/X/acc") or not table.wants("/Y/acc_mag") or not table.wants("/X/tilt"):
+        log.error("FAIL: pattern matching: %s", table.receivers())
+        return 1
+    now[0] += 8.0
+    table.subscribe("pd")  # keepalive only
+    now[0] += 5.0
+    if table.prune() != ["gui"] or table.wants("/X/tilt") or not table.wants("/X/acc_mag"):
+        log.error("FAIL: liveness expiry kept %s", table.receivers())
+        return 1
+    table.unsubscribe("pd")
+    if table.active:
+        log.error("FAIL: table still active after last unsubscribe")
+        return 1
+    # Keepalive from a receiver that already expired (or subscribed
+    # before a restart) must not register it with no patterns.
+    if table.subscribe("gui") or table.active or not table.wants("/X/acc"):
+        log.error("FAIL: keepalive of an expired receiver registered %s", table.receivers())
+        return 1
+    table.subscribe("pd", ["/X/tilt", "/X/acc"])
+    table.unsubscribe("pd", ["/X/tilt"])
+    if table.receivers() != {"pd": ["/X/acc"]}:
+        log.error("FAIL: pattern unsubscribe left %s", table.receivers())
+        return 1
+    table.unsubscribe("pd", ["/X/acc"])
+    if table.active or table.receivers() or not table.wants("/X/acc_mag"):
+        log.error("FAIL: unsubscribing the last pattern left %s", table.receivers())
+        return 1
+    log.info("OK: table matching, keepalive and expiry; no empty receivers")
+
+    class Capture(Stage):
+        is_terminal = True
+
+        def __init__(self, sink):
+            self.sink = sink
+
+        def process(self, frame):
+            self.sink.append(frame)
+            return ()
+
+    def chain(sink, extra=()):
+        return Pipeline([LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+                         Magnitude(), HighPass(cutoff_hz=0.5, fs=25.0), Tilt(),
+                         *extra, Capture(sink)])
+
+    frames = [IMUFrame("X", "acc", i * 0.04, (math.sin(i * 0.2), 0.3, 9.81))
+              for i in range(100)]
+    full_out, pruned_out = [], []
+    full, pruned = chain(full_out), chain(pruned_out)
+    pruned.set_demand("acc", lambda sensor: sensor == "acc_lp_mag")
+    for f in frames:
+        full.push(f)
+        pruned.push(f)
+    want = [(f.t_recv, f.values) for f in full_out if f.sensor == "acc_lp_mag"]
+    got = [(f.t_recv, f.values) for f in pruned_out]
+    if got != want or {f.sensor for f in pruned_out} != {"acc_lp_mag"}:
+        log.error("FAIL: pruned pipeline sent %s (%d frames, expected %d acc_lp_mag)",
+                  sorted({f.sensor for f in pruned_out}), len(got), len(want))
+        return 1
+    counts = {name: pruned.stats[name].count for name in ("Magnitude", "HighPass", "Tilt")}
+    if counts != {"Magnitude": 100, "HighPass": 0, "Tilt": 0}:
+        log.error("FAIL: pruned stage call counts %s", counts)
+        return 1
+    log.info("OK: only acc_lp_mag computed and sent; calls %s vs unpruned "
+             "Magnitude=%d HighPass=%d Tilt=%d", counts, full.stats["Magnitude"].count,
+             full.stats["HighPass"].count, full.stats["Tilt"].count)
+
+    class SideEffect(Stage):
+        def process(self, frame):
+            yield frame
+
+    pinned_out = []
+    pinned = chain(pinned_out, extra=(SideEffect(),))
+    pinned.set_demand("acc", lambda sensor: False)
+    for f in frames[:10]:
+        pinned.push(f)
+    # HighPass sees acc, acc_lp and both magnitudes: 4 calls per frame.
+    if pinned_out or pinned.stats["HighPass"].count != 40:
+        log.error("FAIL: side-effect stage should pin upstream (HighPass=%d, sent=%d)",
+                  pinned.stats["HighPass"].count, len(pinned_out))
+        return 1
+    pinned.set_demand("acc", None)
+    pinned.push(frames[0])
+    if not pinned_out:
+        log.error("FAIL: lifting demand didn't restore sends")
+        return 1
+    log.info("OK: side-effect stage keeps upstream; demand lifts cleanly")
+
+    class ListClient:
+        def __init__(self):
+            self.sent = []
+
+        def send_message(self, addr, value):
+            self.sent.append(addr)
+
+    osc, states, controller, listener, captured = _build_c2_test_rig()
+    try:
+        if not states:
+            log.error("FAIL: no devices")
+            return 1
+        target = states[0]
+        client = ListClient()
+        target.pipelines["acc"].stages = [Magnitude(), Tilt(), OscEmit(client)]
+
+        def push_some():
+            client.sent.clear()
+            for f in frames[:5]:
+                target._dispatch(IMUFrame(target.address, "acc", f.t_recv, f.values))
+            return sorted(set(client.sent))
+
+        mac = target.address
+        if push_some() != [f"/{mac}/acc", f"/{mac}/acc_mag", f"/{mac}/tilt"]:
+            log.error("FAIL: unsubscribed baseline sent %s", sorted(set(client.sent)))
+            return 1
+        _send_cmd_local("/cmd/subscribe", ["pd-main", f"/{mac}/tilt"])
+        _wait_for(lambda: any(a == "/state/subscriptions" for a, _ in captured),
+                  timeout_s=1.0)
+        sent = push_some()
+        if sent != [f"/{mac}/tilt"]:
+            log.error("FAIL: after subscribe sent %s", sent)
+            return 1
+        if target.pipelines["acc"].stats["Magnitude"].count != 5:
+            # 5 baseline frames; none since — nobody reads acc_mag.
+            log.error("FAIL: Magnitude ran while unsubscribed (%d calls)",
+                      target.pipelines["acc"].stats["Magnitude"].count)
+            return 1
+        log.info("OK: subscribe → only %s sent, Magnitude skipped", sent)
+
+        captured.clear()
+        _send_cmd_local("/cmd/unsubscribe", ["pd-main"])
+        _wait_for(lambda: any(a == "/state/subscriptions" for a, _ in captured),
+                  timeout_s=1.0)
+        if len(push_some()) != 3:
+            log.error("FAIL: unsubscribe didn't restore all streams: %s", client.sent)
+            return 1
+
+        captured.clear()
+        _send_cmd_local("/cmd/subscribe", ["pd-main", f"/{mac}/acc_mag"])
+        _wait_for(lambda: any(a == "/state/subscriptions" for a, _ in captured),
+                  timeout_s=1.0)
+        if push_some() != [f"/{mac}/acc_mag"]:
+            log.error("FAIL: resubscribe sent %s", sorted(set(client.sent)))
+            return 1
+        controller.subscriptions.ttl_s = 0.05
+        time.sleep(0.1)
+        controller.tick()
+        if len(push_some()) != 3:
+            log.error("FAIL: expired subscriber still filtering: %s", client.sent)
+            return 1
+        log.info("OK: unsubscribe and liveness expiry restore every stream")
+    finally:
+        _teardown_rig(osc, listener)
+
+    log.info("PASS: subscription-pruning")
+    return 0
+
+
+def scenario_pipeline_hot_swap() -> int:
+    """
+    RCU composition swaps: while one thread pushes, another adds and
+    removes stages and retunes params. Every frame must come out of
+    exactly one composition (never a half-edited chain), retained
+    stages must keep their filter state (output identical to an
+    unedited twin), published snapshots must stay immutable, tunable
+    sets must not publish at all, and a composition override that
+    reproduces a live stage must keep that stage object.
+    """
+    from sense.pipeline import (
+        IMUFrame, LowPass, Magnitude, Pipeline, Stage, Tilt, Window,
+        rebuild_composition_with_overrides,
+    )
+
+    class Capture(Stage):
+        is_terminal = True
+
+        def __init__(self, sink):
+            self.sink = sink
+
+        def process(self, frame):
+            self.sink.append((frame.t_recv, frame.sensor, frame.values))
+            return ()
+
+    errors = []
+
+    class ErrorCounter(logging.Handler):
+        def emit(self, record):
+            errors.append(record.getMessage())
+
+    counter = ErrorCounter(level=logging.ERROR)
+    logging.getLogger("fs.pipeline").addHandler(counter)
+    try:
+        ref_out, got_out = [], []
+        ref = Pipeline([LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+                        Magnitude(), Capture(ref_out)])
+        lowpass = LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp")
+        window = Window(n_samples=8, stat="mean")
+        window.inputs = frozenset({"acc_lp_mag"})
+        pipe = Pipeline([lowpass, Magnitude(), window, Capture(got_out)])
+
+        def core(names):
+            # Window's output name follows its (retuned) stat; leave it out.
+            return {s for s in names if not s.startswith("acc_lp_mag_")}
+
+        plain = core(pipe.advertised_outputs("acc"))
+        with_tilt = plain | {"tilt"}
+
+        n_frames = 3000
+        frames = [IMUFrame("AA:BB:CC:DD:EE:FF", "acc", i * 0.001,
+                           (0.05 * (i % 9), 0.1 * (i % 3), 9.81))
+                  for i in range(n_frames)]
+        first = pipe.composition
+        first_stages = first.stages
+        done = threading.Event()
+
+        def pusher():
+            for i, f in enumerate(frames):
+                pipe.push(f)
+                if i % 8 == 0:
+                    time.sleep(0)  # let the editor in mid-stream
+            done.set()
+
+        def add_tilt(stages):
+            stages.insert(len(stages) - 1, Tilt())
+            return stages
+
+        def drop_tilt(stages):
+            return [s for s in stages if not isinstance(s, Tilt)]
+
+        swaps = 0
+        t = threading.Thread(target=pusher)
+        t.start()
+        while not done.is_set():
+            pipe.edit(add_tilt if swaps % 2 == 0 else drop_tilt)
+            window.stat = ("std", "max", "mean")[swaps % 3]
+            swaps += 1
+            time.sleep(0)
+        t.join()
+        for f in frames:
+            ref.push(f)
+
+        if errors:
+            log.error("FAIL: %d stage error(s) during swaps, first: %s",
+                      len(errors), errors[0])
+            return 1
+        by_frame: dict = {}
+        for t_recv, sensor, _ in got_out:
+            by_frame.setdefault(t_recv, set()).add(sensor)
+        mixed = [k for k, seen in by_frame.items()
+                 if core(seen) not in (plain, with_tilt)]
+        if len(by_frame) != n_frames or mixed:
+            log.error("FAIL: %d/%d frames out, %d from a half-edited chain",
+                      len(by_frame), n_frames, len(mixed))
+            return 1
+        log.info("OK: %d frames across %d swaps, each from one composition",
+                 n_frames, swaps)
+
+        want = [r for r in ref_out if r[1] == "acc_lp"]
+        got = [r for r in got_out if r[1] == "acc_lp"]
+        if got != want:
+            log.error("FAIL: retained LowPass lost state across swaps")
+            return 1
+        if first.stages is not first_stages or len(first_stages) != 4:
+            log.error("FAIL: a published composition was mutated")
+            return 1
+        if pipe.composition.version - first.version < swaps:
+            log.error("FAIL: %d edits published only %d versions",
+                      swaps, pipe.composition.version - first.version)
+            return 1
+        log.info("OK: retained stage state carried over; snapshots immutable")
+
+        version = pipe.composition.version
+        for i in range(200):
+            lowpass.cutoff_hz = 2.0 + (i % 10)
+        if pipe.composition.version != version:
+            log.error("FAIL: tunable sets republished the composition")
+            return 1
+        log.info("OK: 200 tunable sets, 0 publishes")
+    finally:
+        logging.getLogger("fs.pipeline").removeHandler(counter)
+
+    pipe = Pipeline([LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+                     Magnitude(), Capture([])])
+    kept_lp, kept_mag, capture = pipe.composition.stages
+    kept_lp.process(IMUFrame("X", "acc", 0.0, (1.0, 2.0, 3.0))).__next__()
+    pipe.edit(lambda _: rebuild_composition_with_overrides(pipe, [
+        {"class": "LowPass", "params": {"cutoff_hz": 5.0, "fs": 25.0,
+                                        "output_sensor": "acc_lp"}},
+        {"class": "Magnitude", "params": {}, "inputs": ["acc_lp"]},
+    ]))
+    new_lp, new_mag, new_capture = pipe.composition.stages
+    if new_lp is not kept_lp or not new_lp._state or new_capture is not capture:
+        log.error("FAIL: identical override entry rebuilt the stage")
+        return 1
+    if new_mag is kept_mag or new_mag.inputs != frozenset({"acc_lp"}):
+        log.error("FAIL: changed routing should build a new Magnitude")
+        return 1
+    log.info("OK: override keeps identical stages, rebuilds changed ones")
+
+    log.info("PASS: pipeline-hot-swap")
+    return 0
+
+
+def scenario_osc_bundle() -> int:
+    """
+    OscEmit bundling: tick mode sends one #bundle per input sample
+    carrying exactly the messages "off" mode would have sent (5× fewer
+    datagrams on the run_fs acc chain), push_batch splits on sample
+    boundaries, window mode groups across samples and caps bundle
+    size (and a held group is sent on drain / swap-out), and pd_compat
+    packs a group into one plain message.
+    """
+    from pythonosc.osc_packet import OscPacket
+    from pythonosc.udp_client import SimpleUDPClient
+    from sense.pipeline import (
+        BUNDLE_MAX_MESSAGES, IMUFrame, LowPass, Magnitude, OscEmit, Pipeline, Tilt,
+    )
+
+    class DgramClient(SimpleUDPClient):
+        """Records each datagram (decoded) as a list of (address, args)
+        instead of sending it."""
+        def __init__(self):
+            super().__init__("127.0.0.1", 9)
+            self.datagrams = []
+            self.raw = []
+
+        def send(self, content):
+            self.raw.append(content.dgram)
+            packet = OscPacket(content.dgram)
+            self.datagrams.append([(m.message.address, list(m.message.params))
+                                   for m in packet.messages])
+
+    def chain(client, **opts):
+        return Pipeline([LowPass(cutoff_hz=5.0, fs=25.0, output_sensor="acc_lp"),
+                         Magnitude(), Tilt(), OscEmit(client, **opts)])
+
+    frames = [IMUFrame("AA:BB:CC:DD:EE:FF", "acc", i * 0.01,
+                       (0.05 * (i % 9), 0.1 * (i % 3), 9.81))
+              for i in range(100)]
+    plain, tick = DgramClient(), DgramClient()
+    off_pipe, tick_pipe = chain(plain), chain(tick, bundle="tick")
+    t_wall = time.time()
+    for f in frames:
+        off_pipe.push(f)
+        tick_pipe.push(f)
+    flat = [m for d in tick.datagrams for m in d]
+    flat_plain = [m for d in plain.datagrams for m in d]
+    if flat != flat_plain:
+        log.error("FAIL: bundled messages differ from per-frame sends")
+        return 1
+    if len(tick.datagrams) != len(frames) or len(plain.datagrams) != 5 * len(frames):
+        log.error("FAIL: %d bundles / %d plain datagrams for %d samples",
+                  len(tick.datagrams), len(plain.datagrams), len(frames))
+        return 1
+    tick_pipe.push(frames[0])
+    timetag = OscPacket(tick.raw[-1]).messages[0].time
+    if abs(timetag - t_wall) > 5.0:
+        log.error("FAIL: bundle timetag %.3f not wall-clock (~%.3f)", timetag, t_wall)
+        return 1
+    log.info("OK: tick mode: %d datagrams → %d bundles, identical messages",
+             len(plain.datagrams), len(frames))
+
+    batched = DgramClient()
+    chain(batched, bundle="tick").push_batch(frames[:10])
+    if [m for d in batched.datagrams for m in d] != flat_plain[:50] \
+            or len(batched.datagrams) != 10:
+        log.error("FAIL: push_batch produced %d bundles for 10 samples",
+                  len(batched.datagrams))
+        return 1
+    log.info("OK: push_batch bundles split on sample boundaries")
+
+    windowed = DgramClient()
+    win_pipe = chain(windowed, bundle="window", bundle_window_us=10_000_000)
+    for f in frames[:10]:
+        win_pipe.push(f)
+    sizes = [len(d) for d in windowed.datagrams]
+    if sizes != [BUNDLE_MAX_MESSAGES, BUNDLE_MAX_MESSAGES]:
+        log.error("FAIL: long window sent %s (cap %d)", sizes, BUNDLE_MAX_MESSAGES)
+        return 1
+    emit = win_pipe.composition.stages[-1]
+    emit.flush(force=True)
+    short = DgramClient()
+    short_pipe = chain(short, bundle="window", bundle_window_us=1000)
+    short_pipe.push(frames[0])
+    time.sleep(0.005)
+    short_pipe.push(frames[1])
+    if [len(d) for d in windowed.datagrams][-1] != 2 or \
+            [len(d) for d in short.datagrams] != [10]:
+        log.error("FAIL: window flush: forced %s, closed-window %s",
+                  [len(d) for d in windowed.datagrams],
+                  [len(d) for d in short.datagrams])
+        return 1
+    log.info("OK: window mode groups across samples, caps at %d",
+             BUNDLE_MAX_MESSAGES)
+
+    # Teardown: an open window group is sent by Pipeline.drain()
+    # (shutdown) and when a swap removes the OscEmit holding it.
+    drained = DgramClient()
+    drain_pipe = chain(drained, bundle="window", bundle_window_us=10_000_000)
+    drain_pipe.push(frames[0])
+    held = len(drained.datagrams)
+    drain_pipe.drain()
+    swapped = DgramClient()
+    swap_pipe = chain(swapped, bundle="window", bundle_window_us=10_000_000)
+    swap_pipe.push(frames[0])
+    swap_pipe.stages = swap_pipe.stages[:-1] + [OscEmit(DgramClient(), bundle="window")]
+    if held or [len(d) for d in drained.datagrams] != [5] \
+            or [len(d) for d in swapped.datagrams] != [5]:
+        log.error("FAIL: drain sent %s (held %d), swap sent %s",
+                  [len(d) for d in drained.datagrams], held,
+                  [len(d) for d in swapped.datagrams])
+        return 1
+    log.info("OK: held window group sent on drain() and when its OscEmit is swapped out")
+
+    packed = DgramClient()
+    chain(packed, bundle="tick", pd_compat=True).push(frames[0])
+    (addr, args), = packed.datagrams[0]
+    expected = []
+    for a, vals in flat_plain[:5]:
+        expected.append(a.rsplit("/", 1)[1])
+        expected.extend(vals)
+    if addr != "/AA:BB:CC:DD:EE:FF/packed" or args != expected:
+        log.error("FAIL: pd_compat sent %s %s, expected %s", addr, args, expected)
+        return 1
+    log.info("OK: pd_compat packs a sample into %s", addr)
+
+    log.info("PASS: osc-bundle")
+    return 0
+
+
+def scenario_osc_wire() -> int:
+    """
+    sense/oscwire.py must put the same bytes on the wire as python-osc:
+    every argument type we template or encode, bundles with a timetag,
+    OscEmit's per-stream templates (including a stream whose value
+    types change), and a real loopback send through WireClient. Also
+    logs the per-message encode cost against OscMessageBuilder.
+    """
+    import socket
+    import timeit
+    from pythonosc.osc_bundle_builder import OscBundleBuilder
+    from pythonosc.osc_message_builder import OscMessageBuilder
+    from sense.oscwire import ENCODER, OscEncoder, WireClient, encode_bundle
+    from sense.pipeline import IMUFrame, OscEmit, Pipeline
+
+    def reference_msg(addr, value):
+        if value is None:
+            args = []
+        elif isinstance(value, (str, bytes)) or not isinstance(value, (tuple, list)):
+            args = [value]
+        else:
+            args = value
+        builder = OscMessageBuilder(address=addr)
+        for v in args:
+            builder.add_arg(v)
+        return builder.build()
+
+    def reference(addr, value):
+        return reference_msg(addr, value).dgram
+
+    encoder = OscEncoder()
+    cases = [
+        ("/E0:2D:64:47:02:F5/acc", (0.01, -0.5, 9.81)),
+        ("/E0:2D:64:47:02:F5/acc_mag", 9.8),
+        ("/state/heartbeat", [12.34, "tok-abc"]),
+        ("/state/E0:2D:64:47:02:F5/snapshot", [1, 0, 1, 3]),
+        ("/state/subscriptions", ["pd-main", 2, 30.0]),
+        ("/x", [True, False, None, 7]),
+        ("/big", 2 ** 40),
+        ("/blob", b"\x01\x02\x03"),
+        ("/empty", None),
+        ("/utf", "héllo"),
+        ("/arr", [[1.0, 2.0], "x"]),
+    ]
+    for addr, value in cases:
+        for _ in range(2):  # second pass hits the cache
+            got = encoder.encode(addr, value)
+            if got != reference(addr, value):
+                log.error("FAIL: %s %r encodes differently from python-osc", addr, value)
+                return 1
+    log.info("OK: %d message shapes byte-identical to python-osc", len(cases))
+
+    msgs = [encoder.encode(a, v) for a, v in cases[:3]]
+    builder = OscBundleBuilder(1_700_000_000.25)
+    for a, v in cases[:3]:
+        builder.add_content(reference_msg(a, v))
+    if encode_bundle(msgs, 1_700_000_000.25) != builder.build().dgram:
+        log.error("FAIL: bundle bytes differ from OscBundleBuilder")
+        return 1
+    log.info("OK: bundle + timetag byte-identical")
+
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx.bind(("127.0.0.1", 0))
+    rx.settimeout(1.0)
+    try:
+        client = WireClient("127.0.0.1", rx.getsockname()[1])
+        emit = OscEmit(client)
+        pipe = Pipeline([emit])
+        frames = [IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (0.1, 0.2, 9.81)),
+                  IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.01, (0.3, 0.2, 9.80)),
+                  IMUFrame("AA:BB:CC:DD:EE:FF", "temp", 0.0, (21.5,)),
+                  IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.02, (1, 2, 3)),
+                  IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.03, (1.5, 2, 3))]
+        for f in frames:
+            pipe.push(f)
+        client.send_message("/state/heartbeat", [1.5, "tok"])
+        received = [rx.recv(2048) for _ in range(len(frames) + 1)]
+    finally:
+        rx.close()
+    # The int frame reuses the float template (struct 'f' accepts ints);
+    # the mixed frame after it must still decode to the same floats.
+    expected = [reference("/AA:BB:CC:DD:EE:FF/" + f.sensor,
+                          tuple(float(v) for v in f.values)
+                          if len(f.values) > 1 else float(f.values[0]))
+                for f in frames]
+    expected.append(reference("/state/heartbeat", [1.5, "tok"]))
+    if received != expected:
+        log.error("FAIL: loopback datagrams differ from python-osc encoding")
+        return 1
+    log.info("OK: OscEmit + WireClient loopback: %d datagrams as expected",
+             len(received))
+
+    addr, value = "/E0:2D:64:47:02:F5/acc_lp", (0.1, 0.2, 9.81)
+    emit = OscEmit(WireClient("127.0.0.1", 9))
+    frame = IMUFrame("E0:2D:64:47:02:F5", "acc_lp", 0.0, value)
+    emit.encode(frame)
+    t_ref = min(timeit.repeat(lambda: reference(addr, value), number=2000, repeat=3))
+    t_new = min(timeit.repeat(lambda: emit.encode(frame), number=2000, repeat=3))
+    t_gen = min(timeit.repeat(lambda: ENCODER.encode(addr, value), number=2000, repeat=3))
+    log.info("OK: encode 3 floats: OscMessageBuilder %.2f µs, WireClient "
+             "send_message path %.2f µs, OscEmit template %.2f µs",
+             t_ref * 500, t_gen * 500, t_new * 500)  # s / 2000 calls → µs
+    if t_new * 3 > t_ref:
+        log.error("FAIL: templated encode not clearly faster (%.2f vs %.2f µs)",
+                  t_new * 500, t_ref * 500)
+        return 1
+
+    log.info("PASS: osc-wire")
+    return 0
+
+
+def scenario_osc_egress() -> int:
+    """
+    sense/egress.py: datagrams queued by OscEmit through an
+    EgressClient arrive intact over loopback; a slow, erroring socket
+    costs the producer nothing (push time stays flat, errors are
+    counted per target, overflow drops the oldest); stop() drains;
+    restarting the control listener leaves egress running.
+    """
+    import errno as _errno
+    import socket
+    from sense.egress import Egress, EgressClient
+    from sense.oscwire import ENCODER
+    from sense.pipeline import IMUFrame, OscEmit, Pipeline
+
+    frames = [IMUFrame("AA:BB:CC:DD:EE:FF", "acc", i * 0.01, (0.01 * i, 0.2, 9.81))
+              for i in range(200)]
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx.bind(("127.0.0.1", 0))
+    rx.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    rx.settimeout(1.0)
+    egress = Egress(capacity=1024)
+    egress.start()
+    try:
+        client = EgressClient(egress, "127.0.0.1", rx.getsockname()[1])
+        pipe = Pipeline([OscEmit(client)])
+        for f in frames:
+            pipe.push(f)
+        received = [rx.recv(2048) for _ in frames]
+    finally:
+        rx.close()
+        egress.stop()
+    expected = [ENCODER.encode("/AA:BB:CC:DD:EE:FF/acc", f.values) for f in frames]
+    stats = egress.stats()
+    target = next(iter(stats["targets"].values()), {})
+    if received != expected or stats["sent"] != len(frames) or target.get("sent") != len(frames):
+        log.error("FAIL: loopback egress: %d/%d matching, stats %s",
+                  sum(a == b for a, b in zip(received, expected)), len(frames), stats)
+        return 1
+    log.info("OK: %d datagrams via egress in %d batch(es), identical bytes",
+             stats["sent"], stats["batches"])
+
+    class SlowRefusingSocket:
+        """Every send takes 2 ms; every other one is refused."""
+        def __init__(self):
+            self.calls = 0
+
+        def sendto(self, dgram, addr):
+            self.calls += 1
+            time.sleep(0.002)
+            if self.calls % 2:
+                raise OSError(_errno.ECONNREFUSED, "Connection refused")
+            return len(dgram)
+
+        def close(self):
+            pass
+
+    egress = Egress(capacity=64)
+    client = EgressClient(egress, "127.0.0.1", 9)
+    slow = egress._sockets[client.target[0]] = SlowRefusingSocket()
+    egress.start()
+    pipe = Pipeline([OscEmit(client)], profile="full")
+    t0 = time.perf_counter()
+    for f in frames:
+        pipe.push(f)
+    produce_s = time.perf_counter() - t0
+    egress.stop(timeout=5.0)
+    stats = egress.stats()
+    target = stats["targets"]["127.0.0.1:9"]
+    # 200 sends at 2 ms would take 0.4 s inline; queued they must not.
+    if produce_s > 0.1:
+        log.error("FAIL: producer took %.3fs behind a slow socket", produce_s)
+        return 1
+    if stats["dropped_overflow"] == 0 or \
+            stats["sent"] + stats["dropped_overflow"] + target["transient_errors"] != len(frames):
+        log.error("FAIL: accounting doesn't add up: %s", stats)
+        return 1
+    if target["transient_errors"] != (slow.calls + 1) // 2 or target["errors"]:
+        log.error("FAIL: refused sends miscounted: %s (calls=%d)", target, slow.calls)
+        return 1
+    log.info("OK: producer %.1f ms for %d frames behind a 2 ms/send socket; "
+             "sent=%d transient=%d dropped=%d", produce_s * 1e3, len(frames),
+             stats["sent"], target["transient_errors"], stats["dropped_overflow"])
+
+    if egress.send(client.target, b"late") or stats["dropped_closed"] != 0 \
+            or egress.stats()["dropped_closed"] != 1:
+        log.error("FAIL: send after stop should be refused and counted")
+        return 1
+    log.info("OK: closed egress refuses and counts late sends")
+
+    # A control-listener restart (PD /stop_server, set_OSC) must not
+    # stop outgoing data; only the final close() does.
+    from sense.osc import ControlledOSCConnection
+    conn = ControlledOSCConnection("127.0.0.1", 9)
+    egress = conn.enable_egress(capacity=64)
+    try:
+        conn.start_server()
+        conn.stop_server()
+        if egress.closed or not egress.send(("127.0.0.1", 9), b"still"):
+            log.error("FAIL: stop_server() stopped the egress thread")
+            return 1
+    finally:
+        conn.close()
+    if not egress.closed or conn.is_running:
+        log.error("FAIL: close() left egress or the listener running")
+        return 1
+    log.info("OK: stop_server() leaves egress running; close() stops both")
+
+    log.info("PASS: osc-egress")
+    return 0
+
+
+def scenario_osc_breaker() -> int:
+    """
+    sense/breaker.py: after K consecutive ECONNREFUSED sends a
+    WireClient stops touching the socket, probes once per backoff
+    (doubling on failure) and closes on the first successful probe;
+    C2's tick reports each transition as /state/egress/breaker.
+    """
+    import errno as _errno
+    import types
+    from sense import breaker as _breaker
+    from sense.c2 import Controller
+    from sense.oscwire import WireClient
+    from sense.pipeline import IMUFrame, OscEmit, Pipeline
+
+    now = [100.0]
+
+    class RefusingSocket:
+        def __init__(self):
+            self.calls = 0
+            self.refuse = True
+
+        def sendto(self, dgram, addr):
+            self.calls += 1
+            if self.refuse:
+                raise OSError(_errno.ECONNREFUSED, "Connection refused")
+            return len(dgram)
+
+        def close(self):
+            pass
+
+    class Capture:
+        def __init__(self):
+            self.sent = []
+
+        def send_message(self, addr, value):
+            self.sent.append((addr, list(value)))
+
+    client = WireClient("127.0.0.1", 1)
+    b = client.breaker
+    b._clock = lambda: now[0]
+    client._sock.close()
+    sock = client._sock = RefusingSocket()
+    controller = Controller(osc=types.SimpleNamespace(client=Capture()), states=[])
+    reports = controller.osc.client.sent
+
+    pipe = Pipeline([OscEmit(client)])
+    frames = [IMUFrame("AA:BB:CC:DD:EE:FF", "acc", i * 0.005, (0.0, 0.0, 9.81))
+              for i in range(200)]
+    for f in frames:
+        pipe.push(f)
+    if sock.calls != b.threshold or b.state != _breaker.OPEN \
+            or b.skipped != len(frames) - b.threshold:
+        log.error("FAIL: expected %d syscalls then open; calls=%d state=%s skipped=%d",
+                  b.threshold, sock.calls, b.state, b.skipped)
+        return 1
+    controller.tick()
+    if ("/state/egress/breaker", ["127.0.0.1:1", "open", b.threshold, b.skipped]) not in reports:
+        log.error("FAIL: open transition not reported: %s", reports)
+        return 1
+    log.info("OK: %d syscalls for %d frames, breaker open and reported",
+             sock.calls, len(frames))
+
+    # First probe fails → re-open with the backoff doubled.
+    now[0] += b.backoff_s
+    pipe.push(frames[0])
+    pipe.push(frames[1])
+    if sock.calls != b.threshold + 1 or b.state != _breaker.OPEN or b.probes != 1:
+        log.error("FAIL: one probe per interval; calls=%d state=%s probes=%d",
+                  sock.calls, b.state, b.probes)
+        return 1
+    now[0] += b.backoff_s
+    pipe.push(frames[2])
+    if sock.calls != b.threshold + 1:
+        log.error("FAIL: probed before the doubled backoff elapsed")
+        return 1
+    log.info("OK: failed probe re-opened with backoff doubled")
+
+    # Receiver back: the next probe closes the breaker, sends resume.
+    sock.refuse = False
+    now[0] += b.backoff_s
+    for f in frames[:10]:
+        pipe.push(f)
+    if b.state != _breaker.CLOSED or b.consecutive or sock.calls != b.threshold + 1 + 10:
+        log.error("FAIL: breaker should close on a good probe; state=%s calls=%d",
+                  b.state, sock.calls)
+        return 1
+    del reports[:]
+    controller.tick()
+    controller.tick()
+    breaker_reports = [r for r in reports if r[0] == "/state/egress/breaker"]
+    if breaker_reports != [("/state/egress/breaker", ["127.0.0.1:1", "closed", 0, b.skipped])]:
+        log.error("FAIL: expected one closed report, got %s", breaker_reports)
+        return 1
+    log.info("OK: good probe closed the breaker; one /state/egress/breaker closed report")
+
+    # Non-transient errors are not the receiver's absence: never trip.
+    class BrokenSocket(RefusingSocket):
+        def sendto(self, dgram, addr):
+            self.calls += 1
+            raise OSError(_errno.EMSGSIZE, "Message too long")
+
+    sock = client._sock = BrokenSocket()
+    for _ in range(b.threshold * 2):
+        try:
+            client.send_message("/x", 1.0)
+        except OSError:
+            pass
+    if b.state != _breaker.CLOSED or sock.calls != b.threshold * 2:
+        log.error("FAIL: non-transient errors tripped the breaker (%s)", b.state)
+        return 1
+    log.info("OK: non-transient errors leave the breaker closed")
+
+    log.info("PASS: osc-breaker")
+    return 0
+
+
+def scenario_emission_policy() -> int:
+    """
+    EmitPolicy (sense/pipeline.py): max_hz holds a 100 Hz stream to the
+    configured rate with the latest value winning; deadband drops
+    noise but sends steps at once and refreshes every refresh_s;
+    apply_emission_policy wires rules from config ahead of the
+    terminal; duplicates tune and persist as EmitPolicy:N; a demand
+    routes the filter only what's wanted.
+    """
+    import types
+    from sense.c2 import Controller
+    from sense.pipeline import (
+        EmitPolicy, IMUFrame, Magnitude, Pipeline, Stage, Tilt,
+        apply_emission_policy, apply_pipeline_overrides,
+    )
+
+    class Sink(Stage):
+        is_terminal = True
+
+        def __init__(self):
+            self.frames = []
+
+        def process(self, frame):
+            self.frames.append(frame)
+            return ()
+
+    dev = "AA:BB:CC:DD:EE:FF"
+    sink = Sink()
+    pipe = Pipeline([EmitPolicy(max_hz=30, inputs=["tilt"]), sink])
+    for i in range(200):
+        t = i * 0.01
+        pipe.push(IMUFrame(dev, "acc", t, (0.0, 0.0, 9.81)))
+        pipe.push(IMUFrame(dev, "tilt", t, (float(i),)))
+    tilt = [f for f in sink.frames if f.sensor == "tilt"]
+    n_acc = len(sink.frames) - len(tilt)
+    if n_acc != 200 or not 58 <= len(tilt) <= 62:
+        log.error("FAIL: max_hz=30 over 2 s at 100 Hz: tilt=%d acc=%d", len(tilt), n_acc)
+        return 1
+    gaps = {round(b.t_recv - a.t_recv, 3) for a, b in zip(tilt, tilt[1:])}
+    if not gaps <= {0.03, 0.04}:
+        log.error("FAIL: uneven max_hz spacing: %s", sorted(gaps))
+        return 1
+    log.info("OK: max_hz=30 passed %d/200 tilt frames (gaps %s), acc untouched",
+             len(tilt), sorted(gaps))
+
+    sink = Sink()
+    policy = EmitPolicy(deadband=0.05, refresh_s=1.0)
+    pipe = Pipeline([policy, sink])
+    for i in range(100):
+        noise = 0.01 if i % 2 else -0.01
+        pipe.push(IMUFrame(dev, "temp", i * 0.1, (21.0 + noise,)))
+    quiet = len(sink.frames)
+    pipe.push(IMUFrame(dev, "temp", 10.0, (22.0,)))
+    if not 9 <= quiet <= 11 or len(sink.frames) != quiet + 1 \
+            or sink.frames[-1].values != (22.0,):
+        log.error("FAIL: deadband: %d sent over 10 s of noise, step sent=%s",
+                  quiet, len(sink.frames) == quiet + 1)
+        return 1
+    log.info("OK: deadband sent %d/100 noisy frames (refreshes), step passed at once",
+             quiet)
+
+    sink = Sink()
+    pipe = Pipeline([Magnitude(), Tilt(), sink])
+    state = types.SimpleNamespace(address=dev, pipelines={"acc": pipe})
+    config = {"emission": {"tilt": {"max_hz": 30},
+                           f"/{dev}/acc*": {"deadband": 0.1},
+                           "/11:*/acc": {"max_hz": 1}}}
+    apply_emission_policy([state], config)
+    names = [type(st).__name__ for st in pipe.stages]
+    policies = pipe.stages[2:4]
+    if names != ["Magnitude", "Tilt", "EmitPolicy", "EmitPolicy", "Sink"] \
+            or policies[0].inputs != {"tilt"} \
+            or policies[1].inputs != {"acc", "acc_mag"}:
+        log.error("FAIL: emission rules wired as %s / %s", names,
+                  [p.inputs for p in policies])
+        return 1
+    log.info("OK: emission rules → %s", [sorted(p.inputs) for p in policies])
+
+    controller = Controller(osc=types.SimpleNamespace(client=None), states=[state])
+    policies[1].max_hz = 12.0
+    entry = controller._build_pipeline_entry(state, "acc")
+    tunings = entry.get("tunings", {})
+    if set(tunings) != {"EmitPolicy", "EmitPolicy:2"} \
+            or tunings["EmitPolicy:2"]["max_hz"] != 12.0:
+        log.error("FAIL: persisted tunings %s", tunings)
+        return 1
+    policies[1].max_hz = 0.0
+    apply_pipeline_overrides([state], {"pipelines": {dev: {"acc": entry}}})
+    if policies[1].max_hz != 12.0 or policies[0].max_hz != 30.0:
+        log.error("FAIL: EmitPolicy:2 tuning not restored (%s, %s)",
+                  policies[0].max_hz, policies[1].max_hz)
+        return 1
+    log.info("OK: duplicate policies persist and restore as %s", sorted(tunings))
+
+    # Only acc wanted: tilt is pruned and the filters see just acc.
+    pipe.set_demand("acc", lambda sensor: sensor == "acc")
+    routes = [entry[3] for entry in pipe.composition.plan]
+    if routes[1] != frozenset() or routes[2] != frozenset() or routes[3] != {"acc"}:
+        log.error("FAIL: demand routes %s", routes)
+        return 1
+    log.info("OK: under demand the filters don't keep tilt/acc_mag alive")
+
+    log.info("PASS: emission-policy")
+    return 0
+
+
+def scenario_osc_fanout() -> int:
+    """
+    sense/fanout.py: one OscEmit feeding three loopback receivers with
+    different patterns — each gets exactly its addresses, byte-identical
+    to a direct send; routes are matched once, not per frame; targets
+    added/removed mid-stream take effect on the cached routes; tick
+    bundles are split per target; /cmd/target/add|remove via C2.
+    """
+    import socket
+    from sense.fanout import DEFAULT_TARGET, FanOut
+    from sense.oscwire import ENCODER, WireClient
+    from sense.pipeline import IMUFrame, OscEmit, Pipeline, Tilt
+    from pythonosc.osc_packet import OscPacket
+
+    def listener():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(0.2)
+        return sock, sock.getsockname()[1]
+
+    def drain(sock) -> list:
+        out = []
+        while True:
+            try:
+                out.append(sock.recv(4096))
+            except socket.timeout:
+                return out
+
+    dev = "AA:BB:CC:DD:EE:FF"
+    acc_addr, tilt_addr = f"/{dev}/acc", f"/{dev}/tilt"
+    (rx_a, port_a), (rx_b, port_b), (rx_c, port_c), (rx_d, port_d) = (
+        listener(), listener(), listener(), listener())
+    try:
+        fanout = FanOut(WireClient)
+        fanout.set_target(DEFAULT_TARGET, "127.0.0.1", port_a)
+        fanout.set_target("viz", "127.0.0.1", port_b, ["/*/tilt"])
+        fanout.set_target("log", "127.0.0.1", port_c, ["/AA:*/acc*"])
+        pipe = Pipeline([Tilt(), OscEmit(fanout)])
+        frames = [IMUFrame(dev, "acc", i * 0.01, (0.1 * i, 0.2, 9.81)) for i in range(20)]
+        pipe.push(frames[0])
+        matched = [0]
+        for t in fanout.targets:
+            inner = t._match
+            def counting(address, _inner=inner):
+                matched[0] += 1
+                return _inner(address)
+            t._match = counting
+        for f in frames[1:]:
+            pipe.push(f)
+        got_a, got_b, got_c = drain(rx_a), drain(rx_b), drain(rx_c)
+        acc = [ENCODER.encode(acc_addr, f.values) for f in frames]
+        addrs_a = [OscPacket(d).messages[0].message.address for d in got_a]
+        if len(got_a) != 40 or addrs_a.count(tilt_addr) != 20 \
+                or [d for d in got_a if d.startswith(acc_addr.encode())] != acc:
+            log.error("FAIL: default target got %d datagrams (%s...)", len(got_a), addrs_a[:4])
+            return 1
+        if len(got_b) != 20 or any(not d.startswith(tilt_addr.encode()) for d in got_b):
+            log.error("FAIL: viz (/*/tilt) got %d datagrams", len(got_b))
+            return 1
+        if got_c != acc:
+            log.error("FAIL: log (/AA:*/acc*) got %d datagrams, expected the 20 acc", len(got_c))
+            return 1
+        if matched[0]:
+            log.error("FAIL: %d pattern matches after the first frame; routes not cached",
+                      matched[0])
+            return 1
+        log.info("OK: default=%d viz=%d log=%d datagrams, identical bytes, "
+                 "0 pattern matches per frame", len(got_a), len(got_b), len(got_c))
+
+        fanout.set_target("acc-only", "127.0.0.1", port_d, [f"/{dev}/acc"])
+        fanout.remove_target("viz")
+        for f in frames[:5]:
+            pipe.push(f)
+        got_a, got_b, got_d = drain(rx_a), drain(rx_b), drain(rx_d)
+        drain(rx_c)
+        if len(got_a) != 10 or got_b or got_d != acc[:5]:
+            log.error("FAIL: after add/remove: default=%d viz=%d acc-only=%d",
+                      len(got_a), len(got_b), len(got_d))
+            return 1
+        log.info("OK: target add/remove mid-stream re-resolved cached routes")
+
+        fanout.set_target("viz", "127.0.0.1", port_b, ["/*/tilt"])
+        pipe = Pipeline([Tilt(), OscEmit(fanout, bundle="tick")])
+        for f in frames[:3]:
+            pipe.push(f)
+        got_a, got_b, got_c = drain(rx_a), drain(rx_b), drain(rx_c)
+        drain(rx_d)
+        bundles_a = [OscPacket(d) for d in got_a]
+        if len(got_a) != 3 or not all(d.startswith(b"#bundle") for d in got_a) \
+                or any(len(p.messages) != 2 for p in bundles_a):
+            log.error("FAIL: default should get 3 two-message bundles, got %d", len(got_a))
+            return 1
+        if len(got_b) != 3 or any(not d.startswith(tilt_addr.encode()) for d in got_b) \
+                or got_c != acc[:3]:
+            log.error("FAIL: split bundles: viz=%d log=%d", len(got_b), len(got_c))
+            return 1
+        log.info("OK: tick bundles split per target (bundle / single tilt / single acc)")
+    finally:
+        for sock in (rx_a, rx_b, rx_c, rx_d):
+            sock.close()
+
+    osc, states, controller, listener_ctl, captured = _build_c2_test_rig()
+    try:
+        _send_cmd_local("/cmd/target/add", ["viz", "127.0.0.1", port_b, "/*/tilt"])
+        _send_cmd_local("/cmd/target/add", ["default", "127.0.0.1", port_b])
+        _send_cmd_local("/cmd/target/add", ["bad", "127.0.0.1", port_b, "tilt"])
+        ok = _wait_for(lambda: sum(a.startswith(("/state/targets", "/error/"))
+                                   for a, _ in captured) >= 3, timeout_s=1.0)
+        target = osc.fanout.target("viz")
+        if not ok or target is None or target.patterns != ("/*/tilt",) \
+                or ("/state/targets", ["viz", f"127.0.0.1:{port_b}", "/*/tilt"]) not in captured \
+                or ("/error/bad-target", ["default", "reserved"]) not in captured \
+                or ("/error/bad-pattern", ["bad", "tilt"]) not in captured:
+            log.error("FAIL: /cmd/target/add replies %s", captured)
+            return 1
+        captured.clear()
+        _send_cmd_local("/cmd/target/remove", ["viz"])
+        _send_cmd_local("/cmd/target/remove", ["viz"])
+        ok = _wait_for(lambda: len(captured) >= 2, timeout_s=1.0)
+        if not ok or osc.fanout.target("viz") is not None \
+                or ("/error/bad-target", ["viz", "unknown-target"]) not in captured:
+            log.error("FAIL: /cmd/target/remove replies %s", captured)
+            return 1
+        log.info("OK: /cmd/target/add|remove over C2")
+    finally:
+        _teardown_rig(osc, listener_ctl)
+
+    log.info("PASS: osc-fanout")
+    return 0
+
+
+
+def scenario_shm_ring() -> int:
+    """
+    sense/shmring.py: frames published through ShmPublish come back out
+    of a ShmRingReader unchanged, in order, in this process and in a
+    separate one; a reader that falls behind counts exactly the frames
+    it lost; under a concurrent writer no torn record is returned; and
+    a reader process exiting doesn't unlink the writer's block.
+    """
+    import subprocess
+    from sense.pipeline import IMUFrame, Magnitude, Pipeline
+    from sense.shmring import ShmPublish, ShmRing, ShmRingReader
+
+    dev = "AA:BB:CC:DD:EE:FF"
+    name = f"fs-stress-{os.getpid()}"
+    ring = ShmRing(name, slots=64)
+    try:
+        reader = ShmRingReader(name)
+        pipe = Pipeline([Magnitude(), ShmPublish(ring)])
+        sent = [IMUFrame(dev, "acc", i * 0.01, (0.5 * i, -1.0, 9.75)) for i in range(20)]
+        out = []
+        for f in sent:
+            out.extend(pipe.push(f) or ())
+        got = reader.read()
+        expected = [(f.device, f.sensor, f.t_recv, tuple(f.values)) for f in out] if out else None
+        got_t = [(f.device, f.sensor, f.t_recv, tuple(f.values)) for f in got]
+        if len(got) != 40 or reader.lost \
+                or [t for t in got_t if t[1] == "acc"] != [
+                    (f.device, f.sensor, f.t_recv, tuple(f.values)) for f in sent] \
+                or (expected is not None and got_t != expected):
+            log.error("FAIL: round trip read %d frames (lost %d): %s", len(got), reader.lost, got_t[:3])
+            return 1
+        if reader.read():
+            log.error("FAIL: second read returned frames already consumed")
+            return 1
+        log.info("OK: %d frames round-tripped through the ring", len(got))
+
+        for i in range(100):
+            ring.write(IMUFrame(dev, "gyro", 1.0 + i, (float(i),)))
+        got = reader.read()
+        if reader.lost != 100 - 64 or [f.values[0] for f in got] != [float(i) for i in range(36, 100)]:
+            log.error("FAIL: overrun: lost=%d, read %d from %s",
+                      reader.lost, len(got), got[0].values if got else None)
+            return 1
+        if ring.write(IMUFrame(dev, "wide", 0.0, (1.0,) * 5)) or ring.skipped != 1:
+            log.error("FAIL: 5-value frame not skipped (skipped=%d)", ring.skipped)
+            return 1
+        log.info("OK: slow reader lost %d frames, resumed at the oldest held", reader.lost)
+
+        child = (
+            "import sys\n"
+            "from sense.shmring import ShmRingReader\n"
+            "r = ShmRingReader(sys.argv[1], start='oldest')\n"
+            "fs = r.read()\n"
+            "print(len(fs), fs[-1].sensor, fs[-1].values[0], r.lost)\n"
+            "r.close()\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+        proc = subprocess.run([sys.executable, "-c", child, name], env=env,
+                              capture_output=True, text=True, timeout=30)
+        if proc.returncode != 0 or proc.stdout.split() != ["64", "gyro", "99.0", "0"]:
+            log.error("FAIL: reader process: rc=%d out=%r err=%s",
+                      proc.returncode, proc.stdout, proc.stderr[-500:])
+            return 1
+        try:
+            ShmRingReader(name).close()
+        except FileNotFoundError:
+            log.error("FAIL: ring unlinked when the reader process exited")
+            return 1
+        log.info("OK: separate reader process attached, read, detached")
+
+        stop = threading.Event()
+        written = [0]
+
+        def writer():
+            k = 0
+            while not stop.is_set():
+                k += 1
+                v = float(k)
+                ring.write(IMUFrame(dev, "quat", v, (v, v, v, v)))
+            written[0] = k
+
+        reader = ShmRingReader(name)
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 1.0
+        seen = torn = 0
+        last = 0.0
+        while time.monotonic() < deadline:
+            for f in reader.read():
+                v = f.t_recv
+                if f.values != (v, v, v, v) or v <= last:
+                    torn += 1
+                last = v
+                seen += 1
+        stop.set()
+        thread.join(2.0)
+        seen += len(reader.read())
+        if torn or not seen or seen + reader.lost != written[0]:
+            log.error("FAIL: concurrent read: %d torn, seen %d + lost %d != written %d",
+                      torn, seen, reader.lost, written[0])
+            return 1
+        reader.close()
+        log.info("OK: concurrent writer: %d read, %d lost, none torn", seen, reader.lost)
+    finally:
+        ring.close()
+
+    log.info("PASS: shm-ring")
+    return 0
+
+
+def scenario_osc_control_server() -> int:
+    """
+    sense/oscserver.py: a flood to one address runs on the worker pool
+    without a thread per datagram, in arrival order, latest value
+    last; exact, pattern and default dispatch; a slow handler doesn't
+    block other shards; a full shard coalesces per address and never
+    evicts another address's command; a raising handler is contained;
+    a handler can stop its own server and the port is free when stop()
+    returns.
+    """
+    import socket
+    from pythonosc import udp_client
+    from sense.oscserver import ControlServer, Dispatcher, _Shard
+
+    d = Dispatcher()
+    server = ControlServer(("127.0.0.1", 0), d, workers=4, shard_capacity=64)
+    port = server.server_address[1]
+    sender = udp_client.SimpleUDPClient("127.0.0.1", port)
+    applied: list = []
+    seen: list = []
+    d.map("/cmd/pipeline/set", lambda addr, v: (applied.append(v), time.sleep(0.0005)))
+    d.map("/x/a", lambda addr, *a: seen.append("a"))
+    d.map("/x/b", lambda addr, *a: seen.append("b"))
+    d.map("/boom", lambda addr, *a: 1 / 0)
+    d.set_default_handler(lambda addr, *a: seen.append("default:" + addr))
+    baseline = threading.active_count()
+    server.start()
+    try:
+        peak = 0
+        for i in range(500):
+            sender.send_message("/cmd/pipeline/set", i)
+            if i % 50 == 0:
+                peak = max(peak, threading.active_count())
+        ok = _wait_for(lambda: applied and applied[-1] == 499, timeout_s=3.0)
+        peak = max(peak, threading.active_count())
+        if not ok or applied != sorted(applied) or len(set(applied)) != len(applied):
+            log.error("FAIL: flood applied %d values, last %s, ordered=%s",
+                      len(applied), applied[-1:] or None, applied == sorted(applied))
+            return 1
+        # Slack for daemon threads left over from earlier scenarios; a
+        # thread per datagram would be hundreds over.
+        if peak > baseline + server.workers + 1 + 10:
+            log.error("FAIL: %d threads during the flood (baseline %d, %d workers)",
+                      peak, baseline, server.workers)
+            return 1
+        stats = server.stats()
+        if stats["dropped"] + len(applied) != stats["dispatched"]:
+            log.error("FAIL: flood stats %s vs %d applied", stats, len(applied))
+            return 1
+        log.info("OK: 500-message flood: %d applied in order, %d dropped, peak %d threads",
+                 len(applied), stats["dropped"], peak)
+
+        for addr in ("/x/a", "/x/*", "/nope", "/boom", "/x/b"):
+            sender.send_message(addr, 1)
+        ok = _wait_for(lambda: len(seen) >= 5, timeout_s=1.0)
+        if not ok or sorted(seen) != ["a", "a", "b", "b", "default:/nope"] \
+                or server.handler_errors != 1:
+            log.error("FAIL: dispatch got %s (handler_errors=%d)", seen, server.handler_errors)
+            return 1
+        log.info("OK: exact, pattern and default dispatch; raising handler contained")
+
+        shard_of = lambda a: hash(a) % server.workers
+        slow_addr = "/slow"
+        fast_addr = next(f"/fast{i}" for i in range(100)
+                         if shard_of(f"/fast{i}") != shard_of(slow_addr))
+        release = threading.Event()
+        fast_done = threading.Event()
+        d.map(slow_addr, lambda addr, *a: release.wait(2.0))
+        d.map(fast_addr, lambda addr, *a: fast_done.set())
+        sender.send_message(slow_addr, 1)
+        sender.send_message(fast_addr, 1)
+        ok = fast_done.wait(1.0)
+        release.set()
+        if not ok:
+            log.error("FAIL: %s waited behind a slow handler on %s", fast_addr, slow_addr)
+            return 1
+        log.info("OK: slow handler held only its own shard")
+
+        # Overflow coalesces per address: a flood never evicts another
+        # address's queued command. (Worker not started: queue only.)
+        class Msg:
+            def __init__(self, address, value):
+                self.address, self.value = address, value
+
+        class Owner:
+            dropped = 0
+
+        owner = Owner()
+        shard = _Shard("osc-ctl-test", 8, owner)
+        shard.put(((), None, Msg("/cmd/shutdown", "tok")))
+        for i in range(50):
+            shard.put(((), None, Msg("/cmd/pipeline/set", i)))
+        shard.put(((), None, Msg("/cmd/target/add", "late")))
+        queued = [(m.address, m.value) for _, _, m in shard._pending]
+        if queued != [("/cmd/shutdown", "tok")] + [("/cmd/pipeline/set", i)
+                                                   for i in range(43, 50)] \
+                or owner.dropped != 44:
+            log.error("FAIL: overflow queue %s (dropped %d)", queued, owner.dropped)
+            return 1
+        log.info("OK: full shard coalesced the flood, kept /cmd/shutdown, "
+                 "rejected a new address (%d dropped)", owner.dropped)
+
+        stopped = threading.Event()
+        d.map("/stop_server", lambda addr, *a: (server.stop(), stopped.set()))
+        sender.send_message("/stop_server", [])
+        if not stopped.wait(3.0) or server.is_running:
+            log.error("FAIL: /stop_server handler didn't stop its server")
+            return 1
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            probe.bind(("127.0.0.1", port))
+        except OSError as e:
+            log.error("FAIL: port %d still bound after stop(): %s", port, e)
+            return 1
+        finally:
+            probe.close()
+        # The worker that ran /stop_server exits once the handler returns.
+        if not _wait_for(lambda: not any(t.name.startswith("osc-ctl")
+                                         for t in threading.enumerate()), timeout_s=1.0):
+            log.error("FAIL: control threads still alive after stop: %s",
+                      [t.name for t in threading.enumerate() if t.name.startswith("osc-ctl")])
+            return 1
+        log.info("OK: stopped from its own handler; port released")
+    finally:
+        server.stop()
+
+    log.info("PASS: osc-control-server")
+    return 0
+
+
+def scenario_osc_tcp_stream() -> int:
+    """
+    sense/tcpstream.py + tools/osc_tcp_record.py: SLIP framing survives
+    escapes and arbitrary chunking; TcpPublish sends every frame, one
+    timetagged bundle per input tick, while EmitPolicy thins, demand
+    prunes and capture mode mutes the UDP side; a client that stops
+    reading is disconnected at its buffer bound without holding up a
+    reading one; the recorder tool writes a JSONL recording check_rates
+    can read.
+    """
+    import json
+    import socket
+    import subprocess
+    import tempfile
+    from pythonosc.osc_packet import OscPacket
+    from sense.fanout import DEFAULT_TARGET, FanOut
+    from sense.oscwire import WireClient
+    from sense.pipeline import EmitPolicy, IMUFrame, OscEmit, Pipeline, Tilt
+    from sense.tcpstream import SlipDecoder, TcpPublish, TcpStreamServer, slip_encode
+
+    packets = [b"/a\x00\x00,b\x00\x00" + bytes(range(256)), b"\xc0\xdb\xdc\xdd", b"x"]
+    stream = b"".join(slip_encode(p) for p in packets)
+    for step in (1, 3, 7, len(stream)):
+        dec = SlipDecoder()
+        got = []
+        for i in range(0, len(stream), step):
+            got.extend(dec.feed(stream[i:i + step]))
+        if got != packets:
+            log.error("FAIL: SLIP round trip in %d-byte chunks: %r", step, got[:3])
+            return 1
+    log.info("OK: SLIP framing round-trips escapes across chunk boundaries")
+
+    def connect(port, rcvbuf=None):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        sock.connect(("127.0.0.1", port))
+        return sock
+
+    def reader(sock, out):
+        dec = SlipDecoder()
+        sock.settimeout(0.5)
+        while True:
+            try:
+                chunk = sock.recv(65536)
+            except (socket.timeout, OSError):
+                return
+            if not chunk:
+                return
+            out.extend(dec.feed(chunk))
+
+    dev = "AA:BB:CC:DD:EE:FF"
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind(("127.0.0.1", 0))
+    udp.settimeout(0.2)
+    tcp = TcpStreamServer("127.0.0.1", 0, max_buffer=256 << 10)
+    tcp.start()
+    try:
+        fanout = FanOut(WireClient)
+        fanout.set_target(DEFAULT_TARGET, "127.0.0.1", udp.getsockname()[1])
+        client = connect(tcp.server_address[1])
+        if not _wait_for(lambda: tcp.connections == 1, timeout_s=1.0):
+            log.error("FAIL: TCP client not accepted")
+            return 1
+        received: list = []
+        t = threading.Thread(target=reader, args=(client, received), daemon=True)
+        t.start()
+        emit = OscEmit(fanout)
+        pipe = Pipeline([Tilt(), TcpPublish(tcp), EmitPolicy(max_hz=5.0), emit])
+        # UDP side: 5 Hz cap, nobody subscribed to tilt; then muted.
+        pipe.set_demand("acc", lambda sensor: sensor == "acc")
+        wall0 = time.time()
+        for i in range(100):
+            emit.muted = i >= 80
+            pipe.push(IMUFrame(dev, "acc", i * 0.01, (0.01 * i, 0.2, 9.81)))
+        dgrams = []
+        while True:
+            try:
+                dgrams.append(udp.recv(4096))
+            except socket.timeout:
+                break
+        _wait_for(lambda: len(received) >= 100, timeout_s=1.0)
+        bundles = [OscPacket(p).messages for p in received]
+        addresses = [[m.message.address for m in b] for b in bundles]
+        if len(received) != 100 or not all(p.startswith(b"#bundle") for p in received) \
+                or addresses != [[f"/{dev}/acc", f"/{dev}/tilt"]] * 100 \
+                or not all(wall0 - 1 < b[0].time < time.time() + 1 for b in bundles):
+            log.error("FAIL: TCP got %d packets: %s", len(received), addresses[:2])
+            return 1
+        if not 0 < len(dgrams) < 20:
+            log.error("FAIL: UDP side should be thinned to a few packets, got %d", len(dgrams))
+            return 1
+        log.info("OK: TCP carried all %d ticks (acc + tilt, timetagged); UDP got %d "
+                 "after policy, demand and mute", len(received), len(dgrams))
+
+        stalled = connect(tcp.server_address[1], rcvbuf=4096)
+        if not _wait_for(lambda: tcp.connections == 2, timeout_s=1.0):
+            log.error("FAIL: second TCP client not accepted")
+            return 1
+        received.clear()
+        blob = b"/blob\x00\x00\x00,b\x00\x00" + (4096).to_bytes(4, "big") + bytes(4096)
+        sent = 0
+        while sent < 4000 and tcp.slow_disconnects == 0:
+            for _ in range(16):
+                tcp.send_dgram(blob)
+                sent += 1
+            time.sleep(0.003)
+        for _ in range(64):
+            tcp.send_dgram(blob)
+            sent += 1
+            time.sleep(0.001)
+        ok = _wait_for(lambda: tcp.connections == 1 and len(received) >= sent, timeout_s=3.0)
+        if not ok or tcp.slow_disconnects != 1 or received != [blob] * sent:
+            log.error("FAIL: slow consumer: connections=%d slow_disconnects=%d, "
+                      "reader got %d/%d", tcp.connections, tcp.slow_disconnects,
+                      len(received), sent)
+            return 1
+        stalled.close()
+        log.info("OK: stalled client dropped after %d packets; reader got all of them", sent)
+        client.close()
+        _wait_for(lambda: tcp.connections == 0, timeout_s=1.0)
+
+        tool = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "tools", "osc_tcp_record.py")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "remote.jsonl")
+            proc = subprocess.Popen(
+                [sys.executable, tool, f"127.0.0.1:{tcp.server_address[1]}", path,
+                 "--duration", "1.0"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if not _wait_for(lambda: tcp.connections == 1, timeout_s=5.0):
+                proc.kill()
+                log.error("FAIL: recorder tool never connected: %s", proc.communicate()[1])
+                return 1
+            muted = OscEmit(fanout)
+            muted.muted = True
+            tapped = Pipeline([Tilt(), TcpPublish(tcp), muted])
+            for i in range(50):
+                tapped.push(IMUFrame(dev, "acc", i * 0.01, (0.5, 0.25, 9.75)))
+            _, err = proc.communicate(timeout=10)
+            with open(path, encoding="utf-8") as fh:
+                records = [json.loads(line) for line in fh]
+        frames = [r for r in records if "device" in r]
+        sensors = sorted({r["sensor"] for r in frames})
+        if "_meta" not in records[0] or records[-1].get("_session") != "end" \
+                or len(frames) != 100 or sensors != ["acc", "tilt"] \
+                or frames[0]["values"] != [0.5, 0.25, 9.75] \
+                or any(r["device"] != dev for r in frames):
+            log.error("FAIL: recorder wrote %d frames %s: %s", len(frames), sensors,
+                      err.decode()[-300:])
+            return 1
+        log.info("OK: osc_tcp_record.py recorded %d frames", len(frames))
+    finally:
+        tcp.close()
+        udp.close()
+
+    log.info("PASS: osc-tcp-stream")
+    return 0
+
+
+def scenario_egress_telemetry() -> int:
+    """
+    sense/telemetry.py: per-address counts on fan-out routes (once per
+    message, bundled or not), per-target datagrams / bytes / send-time
+    histogram from both the inline WireClient and the egress thread,
+    errors by errno, and the /state/egress/* report on
+    /cmd/egress/stats.
+    """
+    import socket
+    from sense.egress import Egress, EgressClient
+    from sense.fanout import DEFAULT_TARGET, FanOut
+    from sense.oscwire import ENCODER, WireClient
+    from sense.pipeline import IMUFrame, OscEmit, Pipeline, Tilt
+    from sense.telemetry import LATENCY_BUCKETS, RateTracker, telemetry_for
+
+    def listener():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        return sock, sock.getsockname()[1]
+
+    dev = "AA:BB:CC:DD:EE:FF"
+    acc_addr, tilt_addr = f"/{dev}/acc", f"/{dev}/tilt"
+    (rx_a, port_a), (rx_b, port_b), (rx_c, port_c) = listener(), listener(), listener()
+    try:
+        fanout = FanOut(WireClient)
+        fanout.set_target(DEFAULT_TARGET, "127.0.0.1", port_a)
+        fanout.set_target("viz", "127.0.0.1", port_b, ["/*/tilt"])
+        frames = [IMUFrame(dev, "acc", i * 0.01, (0.1 * i, 0.2, 9.81)) for i in range(10)]
+        pipe = Pipeline([Tilt(), OscEmit(fanout)])
+        for f in frames:
+            pipe.push(f)
+        acc_bytes = sum(len(ENCODER.encode(acc_addr, f.values)) for f in frames)
+        acc_route, tilt_route = fanout.route(acc_addr), fanout.route(tilt_addr)
+        if acc_route.messages != 10 or acc_route.bytes != acc_bytes \
+                or tilt_route.messages != 10:
+            log.error("FAIL: routes acc=%d/%d (want 10/%d) tilt=%d (want 10)",
+                      acc_route.messages, acc_route.bytes, acc_bytes, tilt_route.messages)
+            return 1
+        t_a = telemetry_for("127.0.0.1", port_a)
+        t_b = telemetry_for("127.0.0.1", port_b)
+        if t_a.messages != 20 or t_b.messages != 10 \
+                or t_a.bytes != acc_bytes + tilt_route.bytes or t_b.bytes != tilt_route.bytes:
+            log.error("FAIL: targets a=%d/%d b=%d/%d", t_a.messages, t_a.bytes,
+                      t_b.messages, t_b.bytes)
+            return 1
+        if sum(t_a.latency) != 20 or len(t_a.latency) != LATENCY_BUCKETS \
+                or not 0 < t_a.percentile_us(0.5) <= t_a.percentile_us(0.99):
+            log.error("FAIL: latency histogram %s", t_a.latency)
+            return 1
+        log.info("OK: tilt counted once for 2 targets; target a=%d b=%d; p50=%.0fus p99=%.0fus",
+                 t_a.messages, t_b.messages, t_a.percentile_us(0.5), t_a.percentile_us(0.99))
+
+        pipe = Pipeline([Tilt(), OscEmit(fanout, bundle="tick")])
+        for f in frames[:3]:
+            pipe.push(f)
+        if acc_route.messages != 13 or tilt_route.messages != 13 \
+                or t_a.messages != 23 or t_b.messages != 13:
+            log.error("FAIL: after 3 tick bundles: acc=%d tilt=%d a=%d b=%d",
+                      acc_route.messages, tilt_route.messages, t_a.messages, t_b.messages)
+            return 1
+        log.info("OK: bundled messages count per address; one datagram per bundle per target")
+
+        # Egress-thread path records in the sender thread.
+        egress = Egress(capacity=64)
+        egress.start()
+        client = EgressClient(egress, "127.0.0.1", port_c)
+        for f in frames[:5]:
+            client.send_message(acc_addr, f.values)
+        egress.stop()
+        t_c = telemetry_for("127.0.0.1", port_c)
+        if t_c.messages != 5 or sum(t_c.latency) != 5:
+            log.error("FAIL: egress thread recorded %d sends", t_c.messages)
+            return 1
+        log.info("OK: egress thread recorded 5 sends")
+
+        # Errors by errno, counted before the exception reaches the caller.
+        import errno
+
+        class _FullSocket:
+            def sendto(self, dgram, addr):
+                raise OSError(errno.ENOBUFS, "No buffer space available")
+
+        dead = WireClient("127.0.0.1", port_c + 1 if port_c < 65535 else port_c - 1)
+        dead_key = f"127.0.0.1:{dead._port}"
+        real_sock, dead._sock = dead._sock, _FullSocket()
+        raised = 0
+        for _ in range(3):
+            try:
+                dead.send_dgram(b"/x\x00\x00,\x00\x00\x00")
+            except OSError:
+                raised += 1
+        dead._sock = real_sock
+        if raised != 3 or dead.telemetry.errors.get("ENOBUFS") != 3 \
+                or dead.telemetry.messages:
+            log.error("FAIL: ENOBUFS sends raised=%d errors=%s messages=%d",
+                      raised, dead.telemetry.errors, dead.telemetry.messages)
+            return 1
+        log.info("OK: errors by errno %s", dead.telemetry.errors)
+
+        clock = [100.0]
+        rates = RateTracker(clock=lambda: clock[0])
+        first = rates.rate("k", 10, 1000)
+        clock[0] += 2.0
+        second = rates.rate("k", 30, 5000)
+        if first != (0.0, 0.0) or second != (10.0, 2000.0):
+            log.error("FAIL: rates %s then %s", first, second)
+            return 1
+        log.info("OK: rate tracker")
+    finally:
+        for s in (rx_a, rx_b, rx_c):
+            s.close()
+
+    osc, states, controller, listener_srv, captured = _build_c2_test_rig()
+    try:
+        _send_cmd_local("/cmd/egress/stats", [])
+        key_a = f"127.0.0.1:{port_a}"
+        ok = _wait_for(lambda: any(a == "/state/egress/latency" and args[0] == key_a
+                                   for a, args in list(captured)))
+        rows = {}
+        for a, args in list(captured):
+            if a.startswith("/state/egress/"):
+                rows.setdefault(a, []).append(args)
+        target_a = [r for r in rows.get("/state/egress/target", []) if r[0] == key_a]
+        errors = [r for r in rows.get("/state/egress/errors", []) if r[0] == dead_key]
+        if not ok or len(target_a) != 1 or target_a[0][1:3] != [23, t_a.bytes] \
+                or len(target_a[0]) != 8:
+            log.error("FAIL: /state/egress/target for %s: %s", key_a, target_a)
+            return 1
+        latency_a = [r for r in rows["/state/egress/latency"] if r[0] == key_a]
+        if latency_a[0][1:] != list(t_a.latency):
+            log.error("FAIL: /state/egress/latency %s", latency_a)
+            return 1
+        if errors != [[dead_key, "ENOBUFS", 3]]:
+            log.error("FAIL: /state/egress/errors %s", rows.get("/state/egress/errors"))
+            return 1
+        log.info("OK: /cmd/egress/stats → %s",
+                 {a: len(r) for a, r in sorted(rows.items())})
+    finally:
+        _teardown_rig(osc, listener_srv)
+
+    log.info("PASS: egress-telemetry")
+    return 0
+
+
+def scenario_recorder_group_commit() -> int:
+    """
+    RecorderSink's queued writer: frames from several producer threads
+    and gesture markers all land, in per-producer order, with markers
+    between the frames written around them; a stalled writer makes the
+    queue drop (counted) instead of blocking producers; close drains
+    everything before the end marker, and a close that times out leaves
+    the end marker and file close to the writer thread.
+    """
+    import json
+    import shutil
+    import tempfile
+    from sense.pipeline import IMUFrame
+    from sense.recorder import RecorderSink, replay
+
+    tmp_dir = tempfile.mkdtemp(prefix="fs-recorder-gc-")
+    try:
+        path = os.path.join(tmp_dir, "gc.jsonl")
+        sink = RecorderSink(path, flush_interval_s=0.05)
+        sink.current_label = "wave"
+        sink.open(metadata={"scenario": "recorder-group-commit"})
+        n_producers, per_producer = 4, 2000
+
+        def produce(idx):
+            device = f"AA:BB:CC:DD:EE:{idx:02X}"
+            for i in range(per_producer):
+                frame = IMUFrame(device, "acc", float(i), (0.1 * i, 0.2, 9.81))
+                if i % 100:
+                    sink.write(frame)
+                else:
+                    sink.write_many([frame])
+
+        threads = [threading.Thread(target=produce, args=(i,)) for i in range(n_producers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        instance = sink.mark_gesture_start("AA:BB:CC:DD:EE:00")
+        sink.write(IMUFrame("AA:BB:CC:DD:EE:00", "acc", 1e6, (1.0, 2.0, 3.0)))
+        sink.mark_gesture_end("AA:BB:CC:DD:EE:00", instance)
+        if not _wait_for(lambda: sink.depth == 0, timeout_s=5.0):
+            log.error("FAIL: writer never drained (depth %d)", sink.depth)
+            return 1
+        time.sleep(0.1)
+        with open(path, encoding="utf-8") as fh:
+            flushed = sum(1 for line in fh if '"device"' in line)
+        total = n_producers * per_producer + 1
+        if flushed < total:
+            log.error("FAIL: %d/%d frame lines on disk after the flush interval",
+                      flushed, total)
+            return 1
+        sink.close()
+        stats = sink.stats()
+        with open(path, encoding="utf-8") as fh:
+            records = [json.loads(line) for line in fh]
+        frames = [r for r in records if "sensor" in r]
+        kinds = [next(iter(r)) for r in records if "sensor" not in r]
+        if len(frames) != total or stats["written"] != total or stats["dropped"]:
+            log.error("FAIL: %d frames in file, stats %s", len(frames), stats)
+            return 1
+        for idx in range(n_producers):
+            device = f"AA:BB:CC:DD:EE:{idx:02X}"
+            ts = [r["t_recv"] for r in frames if r["device"] == device and r["t_recv"] < 1e6]
+            if ts != [float(i) for i in range(per_producer)]:
+                log.error("FAIL: producer %d frames out of order or missing", idx)
+                return 1
+        tail = [next(iter(r)) if "sensor" not in r else "frame" for r in records[-4:]]
+        if kinds != ["_meta", "_session", "_gesture", "_gesture", "_session"] \
+                or tail != ["_gesture", "frame", "_gesture", "_session"]:
+            log.error("FAIL: marker order %s, tail %s", kinds, tail)
+            return 1
+        if replay(path, lambda f: None, speed=0.0) != total:
+            log.error("FAIL: replay count")
+            return 1
+        log.info("OK: %d frames from %d threads in %d batches (max depth %d, max batch %d)",
+                 total, n_producers, stats["batches"], stats["max_depth"], stats["max_batch"])
+
+        # Stalled storage: producers keep going, the queue drops.
+        path2 = os.path.join(tmp_dir, "stall.jsonl")
+        sink = RecorderSink(path2, capacity=100)
+        release = threading.Event()
+        real_commit = sink._commit
+
+        def stalled_commit(fh, batch):
+            release.wait(5.0)
+            real_commit(fh, batch)
+
+        sink._commit = stalled_commit
+        sink.open()
+        frame = IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (0.0, 0.0, 1.0))
+        sink.write(frame)
+        _wait_for(lambda: sink.depth == 0, timeout_s=2.0)
+        t0 = time.monotonic()
+        for _ in range(500):
+            sink.write(frame)
+        elapsed = time.monotonic() - t0
+        if sink.dropped != 400 or sink.depth != 100 or elapsed > 0.5:
+            log.error("FAIL: stalled writer: dropped=%d depth=%d in %.3fs",
+                      sink.dropped, sink.depth, elapsed)
+            return 1
+        release.set()
+        sink.close()
+        if sink.frame_count != 101:
+            log.error("FAIL: %d frames written after release, want 101", sink.frame_count)
+            return 1
+        log.info("OK: stalled writer → %d dropped in %.1fms, producers never blocked",
+                 sink.dropped, elapsed * 1e3)
+
+        # close() timing out on a stalled writer hands the end marker
+        # and file close to the writer instead of racing it.
+        path3 = os.path.join(tmp_dir, "close-timeout.jsonl")
+        sink = RecorderSink(path3)
+        release = threading.Event()
+        real_commit = sink._commit
+
+        def slow_commit(fh, batch):
+            release.wait(5.0)
+            real_commit(fh, batch)
+
+        sink._commit = slow_commit
+        sink.open()
+        for i in range(50):
+            sink.write(IMUFrame("AA:BB:CC:DD:EE:FF", "acc", float(i), (0.0, 0.0, 1.0)))
+        sink.close(timeout=0.05)
+        if sink._fh is None or not sink._thread.is_alive():
+            log.error("FAIL: close() closed the file while the writer was still busy")
+            return 1
+        release.set()
+        sink._thread.join(5.0)
+        with open(path3, encoding="utf-8") as fh:
+            records = [json.loads(line) for line in fh]
+        if sink._fh is not None or sink.frame_count != 50 \
+                or [r.get("_session") for r in records if "_session" in r] != ["start", "end"] \
+                or "_session" not in records[-1]:
+            log.error("FAIL: handed-off close: %d frames, records %s",
+                      sink.frame_count, [next(iter(r)) for r in records[-3:]])
+            return 1
+        log.info("OK: timed-out close left the file to the writer, which closed it after draining")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    log.info("PASS: recorder-group-commit")
+    return 0
+
+
+def scenario_recording_columnar() -> int:
+    """
+    sense/columnar.py: the same session recorded by RecorderSink as
+    JSONL and as `.fsc` reads back record-for-record identical through
+    iter_records, replay, read_metadata, GestureLibrary.from_files and
+    the tools/ loaders; stream arrays are views into the mapped file;
+    a file cut before its footer (crash) is recovered by scanning;
+    float32 values shrink the file.
+    """
+    import importlib.util
+    import shutil
+    import subprocess
+    import tempfile
+    import numpy as np
+    from sense.columnar import ColumnarReader, is_columnar, iter_records
+    from sense.gesture import GestureLibrary
+    from sense.pipeline import IMUFrame
+    from sense.recorder import RecorderSink, read_metadata, replay
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def load_tool(name):
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(root, "tools", f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    devs = ("AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02")
+
+    def record(path, **kwargs):
+        sink = RecorderSink(path, flush_interval_s=0.05, **kwargs)
+        sink.current_label = "wave"
+        sink.open(metadata={"scenario": "recording-columnar"})
+        t = 1000.0
+        for window in range(4):
+            instance = 0
+            for i in range(60):
+                t += 0.01
+                if i == 10:
+                    # _extract_templates tracks one open window at a time.
+                    instance = sink.mark_gesture_start(devs[window % 2])
+                for k, d in enumerate(devs):
+                    phase = 0.1 * i + window + k
+                    sink.write(IMUFrame(d, "linear_acc", t, (0.01 * i, -0.02, 0.5 + k)))
+                    sink.write(IMUFrame(d, "quat", t, (1.0, 0.0, 0.0, 0.0)))
+                    sink.write(IMUFrame(d, "corrected_gyro", t, (0.25, 0.5, phase)))
+                    sink.write_many([IMUFrame(d, "acc_mag", t, (1.0 + 0.5 * np.sin(phase),)),
+                                     IMUFrame(d, "tilt", t, (phase % 3.0,))])
+                if i == 50:
+                    sink.mark_gesture_end(devs[window % 2], instance)
+            time.sleep(0.06)
+        sink.close()
+        return sink
+
+    tmp_dir = tempfile.mkdtemp(prefix="fs-columnar-")
+    try:
+        jsonl = os.path.join(tmp_dir, "s.jsonl")
+        fsc = os.path.join(tmp_dir, "s.fsc")
+        record(jsonl)
+        sink = record(fsc)
+        if is_columnar(jsonl) or not is_columnar(fsc) or sink.fmt != "columnar":
+            log.error("FAIL: format detection")
+            return 1
+        a, b = list(iter_records(jsonl)), list(iter_records(fsc))
+        # Marker `t` is monotonic time at write, so differs per run.
+        strip = [{k: v for k, v in r.items() if k != "t"} for r in a]
+        if len(a) != len(b) or strip != [{k: v for k, v in r.items() if k != "t"} for r in b]:
+            diff = next((i for i, (x, y) in enumerate(zip(a, b)) if x.keys() != y.keys()
+                         or x.get("values") != y.get("values")), None)
+            log.error("FAIL: iter_records differs: %d vs %d records, first diff at %s",
+                      len(a), len(b), diff)
+            return 1
+        frames_j, frames_c = [], []
+        replay(jsonl, frames_j.append, speed=0.0)
+        replay(fsc, frames_c.append, speed=0.0)
+        if [(f.device, f.sensor, f.t_recv, f.values) for f in frames_j] \
+                != [(f.device, f.sensor, f.t_recv, f.values) for f in frames_c]:
+            log.error("FAIL: replay differs")
+            return 1
+        if not read_metadata(fsc) == read_metadata(jsonl) == {"scenario": "recording-columnar"}:
+            log.error("FAIL: read_metadata %s", read_metadata(fsc))
+            return 1
+        size_j, size_c = os.path.getsize(jsonl), os.path.getsize(fsc)
+        log.info("OK: %d records identical (%d frames); jsonl %d B, fsc %d B",
+                 len(a), len(frames_c), size_j, size_c)
+
+        lib_j = GestureLibrary.from_files([jsonl])
+        lib_c = GestureLibrary.from_files([fsc])
+        if lib_c.feature_sensors != ("acc_mag", "tilt") \
+                or lib_c.feature_sensors != lib_j.feature_sensors \
+                or len(lib_c.templates) != 4 \
+                or any(not np.array_equal(x.feature_series, y.feature_series)
+                       for x, y in zip(lib_j.templates, lib_c.templates)):
+            log.error("FAIL: gesture library from .fsc: features=%s templates=%d",
+                      lib_c.feature_sensors, len(lib_c.templates))
+            return 1
+        log.info("OK: GestureLibrary.from_files: %d templates over %s from both",
+                 len(lib_c.templates), lib_c.feature_sensors)
+
+        with ColumnarReader(fsc) as reader:
+            stream = reader.stream(devs[0], "linear_acc")
+            seq, t, values = stream.block(0)
+            if reader.recovered or values.shape[1] != 3 or values.flags.owndata \
+                    or values.flags.writeable or not np.shares_memory(values, reader._buf):
+                log.error("FAIL: block arrays are not read-only views of the mapping")
+                return 1
+            del seq, t, values
+        log.info("OK: %d streams; block arrays are read-only views into the mmap",
+                 len(reader.streams))
+
+        position = load_tool("analyze_position")
+        pj, pc = position.load_fusion_streams(jsonl), position.load_fusion_streams(fsc)
+        if set(pj) != set(pc) or any(not np.allclose(pj[k], pc[k]) or pj[k].shape != pc[k].shape
+                                     for k in pj):
+            log.error("FAIL: analyze_position.load_fusion_streams differs")
+            return 1
+        gestures = load_tool("analyze_gestures")
+        gj = gestures.load_gestures([jsonl], ("acc_mag", "tilt"))
+        gc = gestures.load_gestures([fsc], ("acc_mag", "tilt"))
+        if not len(gj) == len(gc) == 4 or any(
+                not np.array_equal(x["raw"]["tilt"], y["raw"]["tilt"]) for x, y in zip(gj, gc)):
+            log.error("FAIL: analyze_gestures.load_gestures differs (%d vs %d)", len(gj), len(gc))
+            return 1
+        outs = []
+        for path in (jsonl, fsc):
+            proc = subprocess.run([sys.executable, os.path.join(root, "tools", "check_rates.py"),
+                                   path], capture_output=True, text=True, timeout=30)
+            outs.append((proc.returncode, proc.stdout.splitlines()[1:]))
+        if outs[0] != outs[1] or outs[0][0] != 0:
+            log.error("FAIL: check_rates differs:\n%s\n%s", outs[0], outs[1])
+            return 1
+        log.info("OK: analyze_position, analyze_gestures, check_rates agree on both formats")
+
+        # Crash before close: no footer, blocks flushed so far survive.
+        with open(fsc, "rb") as fh:
+            data = fh.read()
+        cut = os.path.join(tmp_dir, "cut.fsc")
+        footer_at = int.from_bytes(data[-24:-16], "little")
+        with open(cut, "wb") as fh:
+            fh.write(data[:footer_at] + data[footer_at:footer_at + 7])
+        with ColumnarReader(cut) as reader:
+            if not reader.recovered or reader.frame_count != len(frames_c):
+                log.error("FAIL: recovery found %d/%d frames (recovered=%s)",
+                          reader.frame_count, len(frames_c), reader.recovered)
+                return 1
+        if len(list(iter_records(cut))) != len(b):
+            log.error("FAIL: recovered file records")
+            return 1
+        log.info("OK: file without footer recovered by block scan")
+
+        f32 = os.path.join(tmp_dir, "s32.fsc")
+        record(f32, values_dtype="float32")
+        frames_32 = []
+        replay(f32, frames_32.append, speed=0.0)
+        if len(frames_32) != len(frames_c) or os.path.getsize(f32) >= size_c \
+                or any(abs(x - y) > 1e-6 for f, g in zip(frames_c, frames_32)
+                       for x, y in zip(f.values, g.values)):
+            log.error("FAIL: float32 recording")
+            return 1
+        log.info("OK: float32 values: %d B vs %d B", os.path.getsize(f32), size_c)
+
+        # JSONL recording and reading stay stdlib-only: numpy is only
+        # imported once a .fsc file is written or read.
+        child = (
+            "import sys\n"
+            "sys.modules['numpy'] = None\n"
+            "from sense.columnar import iter_records\n"
+            "from sense.pipeline import IMUFrame\n"
+            "from sense.recorder import RecorderSink\n"
+            "sink = RecorderSink(sys.argv[1])\n"
+            "sink.open()\n"
+            "sink.write(IMUFrame('A', 'acc', 1.0, (1.0, 2.0, 3.0)))\n"
+            "sink.close()\n"
+            "print(sum('sensor' in r for r in iter_records(sys.argv[1])))\n"
+            "try:\n"
+            "    RecorderSink(sys.argv[1][:-6] + '.fsc').open()\n"
+            "except ImportError:\n"
+            "    print('ImportError')\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([root] + [p for p in sys.path if p]))
+        proc = subprocess.run([sys.executable, "-c", child, os.path.join(tmp_dir, "plain.jsonl")],
+                              env=env, capture_output=True, text=True, timeout=30)
+        if proc.returncode != 0 or proc.stdout.split() != ["1", "ImportError"]:
+            log.error("FAIL: recorder without numpy: rc=%d out=%r err=%s",
+                      proc.returncode, proc.stdout, proc.stderr[-500:])
+            return 1
+        log.info("OK: JSONL recorded and read without numpy; .fsc asks for it")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    log.info("PASS: recording-columnar")
+    return 0
+
+
+def scenario_recording_segments() -> int:
+    """
+    sense/segments.py: a RecorderSink with a segment size rolls over
+    between batches, the compressor gzips / xz's every closed segment
+    and the manifest ends up naming only compressed files. replay,
+    iter_records, read_metadata and tools/check_rates read the manifest
+    as one recording, record-for-record equal to an unsegmented one
+    (JSONL and columnar). While the sink is still open — as after a
+    crash — the manifest already reaches every flushed frame.
+    """
+    import json
+    import shutil
+    import subprocess
+    import tempfile
+    from sense.columnar import iter_records
+    from sense.pipeline import IMUFrame
+    from sense.recorder import RecorderSink, read_metadata, replay
+    from sense.segments import read_manifest, segment_paths
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    devs = ("AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02")
+
+    def feed(sink, rounds=12, per_round=250):
+        t = 500.0
+        sink.current_label = "wave"
+        for r in range(rounds):
+            instance = sink.mark_gesture_start(devs[0]) if r % 3 == 0 else None
+            for i in range(per_round):
+                t += 0.01
+                for d in devs:
+                    sink.write(IMUFrame(d, "acc", t, (0.001 * i, -1.0, 0.5 * r)))
+            if instance is not None:
+                sink.mark_gesture_end(devs[0], instance)
+            time.sleep(0.03)
+
+    def no_t(records):
+        return [{k: v for k, v in r.items() if k != "t"} for r in records]
+
+    tmp_dir = tempfile.mkdtemp(prefix="fs-segments-")
+    try:
+        for fmt, ext, compression in (("jsonl", ".jsonl", "gzip"), ("columnar", ".fsc", "lzma")):
+            ref = RecorderSink(os.path.join(tmp_dir, f"ref{ext}"))
+            ref.open(metadata={"scenario": "recording-segments"})
+            feed(ref)
+            ref.close()
+
+            path = os.path.join(tmp_dir, f"seg-{fmt}{ext}")
+            sink = RecorderSink(path, segment_bytes=40000, compression=compression,
+                                flush_interval_s=0.02)
+            sink.open(metadata={"scenario": "recording-segments"})
+            feed(sink)
+            sink.close()
+            manifest = str(sink.recording_path)
+            data = read_manifest(manifest)
+            files = sorted(os.listdir(tmp_dir))
+            suffix = ".gz" if compression == "gzip" else ".xz"
+            n_segments = len(data["segments"])
+            if not data["complete"] or n_segments < 3 or n_segments != sink.stats()["segments"] \
+                    or any(not e["file"].endswith(suffix) for e in data["segments"]) \
+                    or any(f.startswith(f"seg-{fmt}.")
+                           and not f.endswith((suffix, ".manifest.json", ".idx.json"))
+                           for f in files) \
+                    or sum(e["frames"] for e in data["segments"]) != sink.frame_count:
+                log.error("FAIL: %s manifest %s; files %s", fmt, data, files)
+                return 1
+            if no_t(iter_records(manifest)) != no_t(iter_records(ref.path)):
+                log.error("FAIL: %s segmented records differ from unsegmented", fmt)
+                return 1
+            frames = []
+            replay(manifest, frames.append, speed=0.0)
+            if len(frames) != ref.frame_count or read_metadata(manifest) != read_metadata(ref.path):
+                log.error("FAIL: %s replay %d/%d frames, meta %s", fmt, len(frames),
+                          ref.frame_count, read_metadata(manifest))
+                return 1
+            spans = [(e["t_first"], e["t_last"]) for e in data["segments"]]
+            if any(a > b for a, b in spans) or any(spans[i][1] >= spans[i + 1][0]
+                                                   for i in range(len(spans) - 1)):
+                log.error("FAIL: %s segment spans %s", fmt, spans)
+                return 1
+            outs = []
+            for p in (str(ref.path), manifest):
+                proc = subprocess.run([sys.executable, os.path.join(root, "tools", "check_rates.py"),
+                                       p], capture_output=True, text=True, timeout=30)
+                outs.append((proc.returncode, proc.stdout.splitlines()[1:]))
+            if outs[0] != outs[1] or outs[0][0] != 0:
+                log.error("FAIL: check_rates on %s manifest:\n%s\n%s", fmt, outs[0], outs[1])
+                return 1
+            log.info("OK: %s: %d %s segments, %d frames read back as one recording",
+                     fmt, n_segments, compression, len(frames))
+
+        # Mid-session (what a crash leaves): the open segment is listed,
+        # closed ones are compressed or about to be.
+        path = os.path.join(tmp_dir, "live.jsonl")
+        sink = RecorderSink(path, segment_bytes=40000, compression="gzip", flush_interval_s=0.02)
+        sink.open()
+        feed(sink, rounds=6)
+        time.sleep(0.2)
+        manifest = str(sink.recording_path)
+        live = sum(1 for r in iter_records(manifest) if "sensor" in r)
+        data = read_manifest(manifest)
+        if data["complete"] or live != sink.frame_count or "frames" in data["segments"][-1] \
+                or len(segment_paths(manifest)) != len(data["segments"]):
+            log.error("FAIL: open session: %d/%d frames readable, manifest %s",
+                      live, sink.frame_count, json.dumps(data))
+            sink.close()
+            return 1
+        sink.close()
+        log.info("OK: open session readable through its manifest: %d frames in %d segments",
+                 live, len(data["segments"]))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    log.info("PASS: recording-segments")
+    return 0
+
+
+def scenario_recorder_frame_encoder() -> int:
+    """
+    RecorderSink's FrameEncoder: JSONL frame lines are byte-identical to
+    `json.dumps(..., separators=(",", ":"))` (escaped names, ints,
+    bools, None, inf / nan, numpy floats, no values), cheaper per
+    frame, and with `float_decimals` smaller files that replay within
+    the rounding.
+    """
+    import json
+    import random
+    import shutil
+    import tempfile
+    import numpy as np
+    from sense.pipeline import IMUFrame
+    from sense.recorder import FrameEncoder, RecorderSink, replay
+
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+    def reference(device, sensor, t_recv, values):
+        return dumps({"device": device, "sensor": sensor, "t_recv": t_recv,
+                      "values": list(values)})
+
+    cases = [
+        ("E0:4C:1A:2B:3C:4D", "acc", 1714000000.123456, (0.1, -2.0, 3e-07)),
+        ('dev "ü"\n\\', "s/é", 12.5, [1, 2.5]),
+        ("d", "button", 2.0, (True, False)),
+        ("d", "x", 3.0, (float("nan"), float("-inf"))),
+        ("d", "y", 4, (1.0,)),
+        ("d", "z", 5.0, (None,)),
+        ("d", "np", 6.0, (np.float64(0.3), np.float64(1e300))),
+        ("d", "empty", 7.0, ()),
+    ]
+    encoder = FrameEncoder()
+    for case in cases:
+        if encoder.encode(*case) != reference(*case):
+            log.error("FAIL: %r: %s != %s", case, encoder.encode(*case), reference(*case))
+            return 1
+    log.info("OK: %d edge cases byte-identical to json.dumps", len(cases))
+
+    random.seed(7)
+    items = []
+    t = 1714000000.0
+    for _ in range(5000):
+        t += 0.01
+        for sensor, width in (("acc", 3), ("gyro", 3), ("quat", 4), ("acc_mag", 1)):
+            items.append(("E0:4C:1A:2B:3C:4D", sensor, t,
+                          tuple(random.uniform(-2.0, 2.0) for _ in range(width))))
+
+    def per_frame_us(fn):
+        best = float("inf")
+        for _ in range(3):
+            t0 = time.perf_counter()
+            for item in items:
+                fn(*item)
+            best = min(best, time.perf_counter() - t0)
+        return best / len(items) * 1e6
+
+    base_us = per_frame_us(reference)
+    exact_us = per_frame_us(FrameEncoder().encode)
+    rounded_us = per_frame_us(FrameEncoder(5).encode)
+    log.info("OK: per frame: json.dumps %.2f µs, exact %.2f µs (%.1fx), "
+             "5 decimals %.2f µs (%.1fx)", base_us, exact_us, base_us / exact_us,
+             rounded_us, base_us / rounded_us)
+    if exact_us >= base_us or rounded_us >= base_us:
+        log.error("FAIL: FrameEncoder is not cheaper than json.dumps")
+        return 1
+
+    tmp_dir = tempfile.mkdtemp(prefix="fs-frame-encoder-")
+    try:
+        sizes = {}
+        frames = {}
+        for name, decimals in (("exact", None), ("rounded", 5)):
+            path = os.path.join(tmp_dir, f"{name}.jsonl")
+            sink = RecorderSink(path, float_decimals=decimals)
+            sink.open()
+            sink.write_many([IMUFrame(*item) for item in items])
+            sink.close()
+            sizes[name] = os.path.getsize(path)
+            got = []
+            replay(path, got.append, speed=0.0)
+            frames[name] = got
+            if name == "exact":
+                with open(path, encoding="utf-8") as fh:
+                    lines = [line.rstrip("\n") for line in fh if '"sensor"' in line]
+                if lines != [reference(*item) for item in items]:
+                    log.error("FAIL: exact recording isn't json.dumps output")
+                    return 1
+        if len(frames["rounded"]) != len(items) or any(
+                abs(f.t_recv - item[2]) > 1e-6
+                or any(type(v) is not float or abs(v - w) > 5e-6
+                       for v, w in zip(f.values, item[3]))
+                for f, item in zip(frames["rounded"], items)):
+            log.error("FAIL: rounded recording doesn't replay within the rounding")
+            return 1
+        if sizes["rounded"] >= sizes["exact"]:
+            log.error("FAIL: rounded file %d B not smaller than %d B",
+                      sizes["rounded"], sizes["exact"])
+            return 1
+        log.info("OK: recordings: exact %d B, 5 decimals %d B (%.0f%%), replay within 5e-6",
+                 sizes["exact"], sizes["rounded"], 100.0 * sizes["rounded"] / sizes["exact"])
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    log.info("PASS: recorder-frame-encoder")
+    return 0
+
+
+def scenario_recording_index() -> int:
+    """
+    sense/recindex.py: the sidecar RecorderSink writes matches what the
+    offline indexer builds from the file; gesture windows and time
+    ranges read through it equal a full scan (out-of-order devices,
+    non-ASCII labels, a still-open recording with an unindexed tail)
+    at a fraction of the cost; a stale sidecar is ignored; check_rates
+    reports the same from the index as from a scan.
+    """
+    import json
+    import shutil
+    import subprocess
+    import tempfile
+    from sense.columnar import iter_records
+    from sense.gesture import GestureLibrary
+    from sense.pipeline import IMUFrame
+    from sense.recindex import (build_index, index_path, iter_frames_between,
+                                iter_gesture_windows, load_index, _windows_from)
+    from sense.recorder import RecorderSink, replay
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    devs = ("AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02")
+
+    def feed(sink, windows, gap_steps=1000, window_steps=50):
+        t = 100.0
+        for w in range(windows):
+            sink.current_label = ("wave", "wavé")[w % 2]
+            dev = devs[w % 2]
+            for step in range(gap_steps + window_steps):
+                if step == gap_steps:
+                    instance = sink.mark_gesture_start(dev)
+                t += 0.01
+                frames = []
+                for k, d in enumerate(devs):
+                    # Device 2's frames land 0.3 s late in file order.
+                    tk = t - 0.3 * k
+                    frames.append(IMUFrame(d, "acc_mag", tk, (1.0 + 0.01 * (step % 37),)))
+                    frames.append(IMUFrame(d, "tilt", tk, (0.5 * w + 0.001 * step,)))
+                sink.write_many(frames)
+                if step % 500 == 0:
+                    time.sleep(0.001)
+            sink.mark_gesture_end(dev, instance)
+
+    def scan_windows(path):
+        return list(_windows_from(iter_records(path)))
+
+    tmp_dir = tempfile.mkdtemp(prefix="fs-index-")
+    try:
+        path = os.path.join(tmp_dir, "capture.jsonl")
+        sink = RecorderSink(path)
+        sink.open(metadata={"scenario": "recording-index"})
+        feed(sink, windows=40)
+        sink.close()
+        written = load_index(path)
+        rebuilt = build_index(path).to_dict()
+        with open(index_path(path), encoding="utf-8") as fh:
+            if json.load(fh) != rebuilt or written is None:
+                log.error("FAIL: sink's sidecar differs from build_index")
+                return 1
+        log.info("OK: sidecar: %d frames, %d buckets, %d markers — equal to an offline build",
+                 written.frames, len(rebuilt["buckets"]), len(written.markers))
+
+        t0 = time.perf_counter()
+        scanned = scan_windows(path)
+        scan_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        seeked = list(iter_gesture_windows(path))
+        seek_s = time.perf_counter() - t0
+        if seeked != scanned or len(seeked) != 40:
+            log.error("FAIL: indexed windows differ from scan (%d vs %d)", len(seeked), len(scanned))
+            return 1
+        t0 = time.perf_counter()
+        lib = GestureLibrary.from_files([path], feature_sensors=("acc_mag", "tilt"))
+        lib_s = time.perf_counter() - t0
+        log.info("OK: 40 windows: scan %.0f ms, indexed %.1f ms; GestureLibrary %.0f ms "
+                 "(%d templates, DTW thresholds included)",
+                 scan_s * 1e3, seek_s * 1e3, lib_s * 1e3, len(lib.templates))
+        if seek_s * 5 > scan_s or len(lib.templates) != 40:
+            log.error("FAIL: indexed window load not faster (%.3fs vs %.3fs)", seek_s, scan_s)
+            return 1
+
+        everything = [r for r in iter_records(path) if "sensor" in r]
+        for lo, hi in ((None, 150.0), (300.0, 300.5), (412.3, None), (700.0, 701.0), (0.0, 50.0)):
+            want = [r for r in everything
+                    if (lo is None or r["t_recv"] >= lo) and (hi is None or r["t_recv"] < hi)]
+            got = list(iter_frames_between(path, lo, hi))
+            if got != want:
+                log.error("FAIL: range [%s, %s): %d frames, want %d", lo, hi, len(got), len(want))
+                return 1
+        frames = []
+        t0 = time.perf_counter()
+        replay(path, frames.append, speed=0.0, t_start=300.0, t_end=310.0)
+        range_s = time.perf_counter() - t0
+        if len(frames) != sum(1 for r in everything if 300.0 <= r["t_recv"] < 310.0):
+            log.error("FAIL: replay range: %d frames", len(frames))
+            return 1
+        log.info("OK: time ranges equal a filtered scan; replay of 10 s: %d frames in %.1f ms",
+                 len(frames), range_s * 1e3)
+
+        outs = []
+        for env_index in (True, False):
+            if not env_index:
+                os.unlink(index_path(path))
+            proc = subprocess.run([sys.executable, os.path.join(root, "tools", "check_rates.py"),
+                                   path], capture_output=True, text=True, timeout=60)
+            outs.append((proc.returncode, proc.stdout))
+        if outs[0] != outs[1] or outs[0][0] != 0:
+            log.error("FAIL: check_rates from index differs from scan:\n%s\n%s", outs[0], outs[1])
+            return 1
+        proc = subprocess.run([sys.executable, os.path.join(root, "tools", "index_recording.py"),
+                               path], capture_output=True, text=True, timeout=60)
+        if proc.returncode != 0 or load_index(path) is None \
+                or build_index(path).to_dict() != rebuilt:
+            log.error("FAIL: index_recording.py: %s%s", proc.stdout, proc.stderr)
+            return 1
+        log.info("OK: check_rates agrees with and without the sidecar; "
+                 "index_recording.py rebuilt it")
+
+        # A sidecar that no longer matches its file is ignored.
+        with open(path, "r+b") as fh:
+            fh.truncate(os.path.getsize(path) // 2 + 3)
+        if load_index(path) is not None or list(iter_gesture_windows(path)) != scan_windows(path):
+            log.error("FAIL: stale sidecar used")
+            return 1
+        log.info("OK: stale sidecar ignored")
+
+        # Still recording: the sidecar lags the file; the tail is scanned.
+        live = os.path.join(tmp_dir, "live.jsonl")
+        sink = RecorderSink(live, flush_interval_s=0.02, index_interval_s=0.05)
+        sink.open()
+        feed(sink, windows=6, gap_steps=300)
+        time.sleep(0.2)
+        sink.current_label = "tail"
+        instance = sink.mark_gesture_start(devs[0])
+        sink.write(IMUFrame(devs[0], "acc_mag", 999.0, (1.0,)))
+        sink.write(IMUFrame(devs[0], "tilt", 999.0, (1.0,)))
+        time.sleep(0.1)
+        sink.mark_gesture_end(devs[0], instance)
+        time.sleep(0.05)
+        windows = list(iter_gesture_windows(live))
+        index = load_index(live)
+        ok = (index is not None and windows == scan_windows(live) and len(windows) == 7
+              and list(iter_frames_between(live, 998.0)) == [
+                  r for r in iter_records(live) if r.get("t_recv", 0) >= 998.0])
+        sink.close()
+        if not ok:
+            log.error("FAIL: open recording: %d windows, index %s", len(windows),
+                      index and index.size)
+            return 1
+        log.info("OK: open recording: indexed windows plus scanned tail")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    log.info("PASS: recording-index")
+    return 0
+
+
+def scenario_osc_control_malformed() -> int:
+    """
+    sense/oscserver.py: datagrams python-osc can't parse — a non-UTF-8
+    address (UnicodeDecodeError, not ParseError), a truncated bundle,
+    an empty one — are counted and skipped; the receiver keeps
+    dispatching the valid messages after them.
+    """
+    import socket
+    from pythonosc import udp_client
+    from sense.oscserver import ControlServer, Dispatcher
+
+    d = Dispatcher()
+    server = ControlServer(("127.0.0.1", 0), d, workers=2)
+    port = server.server_address[1]
+    sender = udp_client.SimpleUDPClient("127.0.0.1", port)
+    raw = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    pings: list = []
+    d.map("/ping", lambda addr, v: pings.append(v))
+    server.start()
+    try:
+        bad = [b"/\xff\x00\x00,\x00\x00\x00", b"#bundle\x00\xff", b"",
+               b",s\x00\x00\xfe\xfe\x00\x00"]
+        for i, datagram in enumerate(bad):
+            raw.sendto(datagram, ("127.0.0.1", port))
+            sender.send_message("/ping", i)
+        ok = _wait_for(lambda: len(pings) == len(bad), timeout_s=2.0)
+        if not ok or pings != list(range(len(bad))) or not server.is_running:
+            log.error("FAIL: after malformed datagrams got pings %s (running=%s, stats %s)",
+                      pings, server.is_running, server.stats())
+            return 1
+        if server.parse_errors != len(bad):
+            log.error("FAIL: parse_errors=%d, expected %d", server.parse_errors, len(bad))
+            return 1
+        log.info("OK: %d malformed datagrams counted and skipped; /ping still dispatched",
+                 server.parse_errors)
+    finally:
+        raw.close()
+        server.stop()
+
+    log.info("PASS: osc-control-malformed")
+    return 0
+
+
+def scenario_subscription_window_retune() -> int:
+    """
+    Retuning Window.stat over C2 renames its output (acc_mag_mean →
+    acc_mag_std). With a subscription to the new name active, the
+    renamed stream must keep flowing: /cmd/pipeline/set recompiles the
+    demand-narrowed plan instead of leaving it routing the old name.
+    """
+    from sense.pipeline import IMUFrame, Magnitude, OscEmit, Window
+
+    class ListClient:
+        def __init__(self):
+            self.sent = []
+
+        def send_message(self, addr, value):
+            self.sent.append(addr)
+
+    osc, states, controller, listener, captured = _build_c2_test_rig()
+    try:
+        if not states:
+            log.error("FAIL: no devices")
+            return 1
+        target = states[0]
+        mac = target.address
+        client = ListClient()
+        target.pipelines["acc"].stages = [Magnitude(), Window(n_samples=4, stat="mean"),
+                                          OscEmit(client)]
+
+        def push_some():
+            client.sent.clear()
+            for i in range(8):
+                target._dispatch(IMUFrame(mac, "acc", i * 0.04, (0.1 * i, 0.2, 9.81)))
+            return sorted(set(client.sent))
+
+        _send_cmd_local("/cmd/subscribe",
+                        ["pd-main", f"/{mac}/acc_mag_mean", f"/{mac}/acc_mag_std"])
+        _wait_for(lambda: any(a == "/state/subscriptions" for a, _ in captured),
+                  timeout_s=1.0)
+        sent = push_some()
+        if sent != [f"/{mac}/acc_mag_mean"]:
+            log.error("FAIL: before retune sent %s", sent)
+            return 1
+        captured.clear()
+        _send_cmd_local("/cmd/pipeline/set", [mac, "acc", "Window", "stat", "std"])
+        if not _wait_for(lambda: any(a == "/state/configured" for a, _ in captured),
+                         timeout_s=1.0):
+            log.error("FAIL: no /state/configured for the retune: %s", captured)
+            return 1
+        sent = push_some()
+        if sent != [f"/{mac}/acc_mag_std"]:
+            log.error("FAIL: after stat retune sent %s", sent)
+            return 1
+        log.info("OK: Window stat mean → std under a subscription: %s still sent", sent)
+    finally:
+        _teardown_rig(osc, listener)
+
+    log.info("PASS: subscription-window-retune")
+    return 0
+
+
+def scenario_frame_queue_policies() -> int:
+    """
+    Per-device frame queue (sense/framequeue.py): a producer standing in
+    for the BLE callback pushes at 200 Hz into a pipeline whose stage
+    takes 20 ms. With the queue, put() latency stays in the µs range
+    and the overflow policy decides what's lost; counters add up.
+    """
+    import threading
+    from sense.framequeue import FrameQueue, PipelineWorker
+    from sense.pipeline import IMUFrame, Pipeline, Stage
+
+    class Slow(Stage):
+        def __init__(self, seen):
+            self.seen = seen
+
+        def process(self, frame):
+            time.sleep(0.02)
+            self.seen.append(frame)
+            return ()
+
+    def run(policy, n=100, capacity=8):
+        seen: list = []
+        pipe = Pipeline([Slow(seen)])
+        queue = FrameQueue(capacity=capacity, policy=policy, block_timeout_s=0.005)
+        worker = PipelineWorker(queue, pipe.push, name=f"stress-{policy}")
+        worker.start()
+        put_s = []
+        for i in range(n):
+            sensor = "acc" if i % 4 else "gyro"
+            t0 = time.monotonic()
+            queue.put(IMUFrame("AA:BB:CC:DD:EE:FF", sensor, t0, (float(i),)))
+            put_s.append(time.monotonic() - t0)
+            time.sleep(0.005)
+        worker.stop(timeout=5.0)
+        return queue, seen, max(put_s)
+
+    for policy in ("drop-oldest", "coalesce", "block"):
+        queue, seen, worst_put = run(policy)
+        st = queue.stats()
+        log.info("%s: %s worst put=%.2fms", policy, st, worst_put * 1e3)
+        if st["enqueued"] + st["dropped_timeout"] != 100:
+            log.error("FAIL: %s: enqueued+timeouts != produced: %s", policy, st)
+            return 1
+        if st["processed"] != len(seen) or len(seen) != st["enqueued"] - (
+                st["dropped_oldest"] + st["coalesced"]):
+            log.error("FAIL: %s: processed %d, seen %d, stats %s",
+                      policy, st["processed"], len(seen), st)
+            return 1
+        if queue.dropped == 0:
+            log.error("FAIL: %s: a 20ms stage at 200Hz must overflow cap=8", policy)
+            return 1
+        if st["max_depth"] > queue.capacity:
+            log.error("FAIL: %s: depth %d exceeded capacity", policy, st["max_depth"])
+            return 1
+        order = [f.values[0] for f in seen]
+        if order != sorted(order):
+            log.error("FAIL: %s: frames processed out of arrival order", policy)
+            return 1
+        # Budgets leave room for a GIL switch interval (5 ms) — the point
+        # is that put() never waits on the 20 ms stage.
+        budget_s = 0.015 if policy == "block" else 0.005
+        if worst_put > budget_s:
+            log.error("FAIL: %s: put() stalled the producer %.2fms (budget %.1fms)",
+                      policy, worst_put * 1e3, budget_s * 1e3)
+            return 1
+        if policy == "coalesce":
+            # gyro is 1-in-4 of the traffic; coalescing evicts same-sensor
+            # frames first, so gyro must still reach the pipeline.
+            if not any(f.sensor == "gyro" for f in seen):
+                log.error("FAIL: coalesce starved the minority sensor")
+                return 1
+            if st["coalesced"] == 0:
+                log.error("FAIL: coalesce policy never coalesced: %s", st)
+                return 1
+        if policy == "block" and st["dropped_timeout"] == 0:
+            log.error("FAIL: block policy never timed out: %s", st)
+            return 1
+
+    # Closed queue rejects; worker exits on its own after close.
+    queue = FrameQueue(capacity=4)
+    worker = PipelineWorker(queue, lambda f: None, name="stress-close")
+    worker.start()
+    worker.stop(timeout=1.0)
+    if queue.put(IMUFrame("AA:BB:CC:DD:EE:FF", "acc", 0.0, (0.0,))):
+        log.error("FAIL: put() accepted a frame after close")
+        return 1
+    if any(t.name == "stress-close" for t in threading.enumerate()):
+        log.error("FAIL: worker thread still alive after stop()")
+        return 1
+
+    log.info("PASS: frame-queue-policies")
+    return 0
+
+
+def scenario_preprocessing_stages_library() -> int:
+    """
+    Composite coverage for the preprocessing stage library (HighPass,
+    Differentiator, EdgeDetector, Window, Scale). One sub-test per
+    stage, all driven synthetically — no BLE.
+
+    Locks down the contracts that downstream pipelines depend on:
+    derived output naming, scalar-only EdgeDetector with hysteresis,
+    per-axis stats from Window, affine math from Scale, and
+    Differentiator's first-frame pass-through-only behavior.
+    """
+    from sense.pipeline import (
+        Differentiator, EdgeDetector, HighPass, IMUFrame, Magnitude,
+        Pipeline, Scale, Stage, Window,
+    )
+
+    captured: list = []
+
+    class Capture(Stage):
+        def process(self, frame):
+            captured.append(frame)
+            return ()
+
+    # --- Test 1: HighPass — DC-rejection + sinusoid passthrough -------------
+    log.info("test 1: HighPass — rejects DC, passes high-freq")
+    captured.clear()
+    pipe = Pipeline([HighPass(cutoff_hz=2.0, fs=25.0), Capture()])
+    # 25 frames at 25Hz of a CONSTANT signal — HP output should decay to ~0.
+    for i in range(25):
+        pipe.push(IMUFrame(
+            device="A", sensor="acc",
+            t_recv=i * 0.04, values=(5.0, 5.0, 5.0),
+        ))
+    hp_frames = [f for f in captured if f.sensor == "acc_hp"]
+    raw_frames = [f for f in captured if f.sensor == "acc"]
+    if len(hp_frames) != 25 or len(raw_frames) != 25:
+        log.error("FAIL: HighPass counts hp=%d raw=%d (expected 25 each)",
+                  len(hp_frames), len(raw_frames))
+        return 1
+    # Last few HP samples on a constant input should be near zero.
+    last_hp = hp_frames[-1].values
+    if any(abs(v) > 0.5 for v in last_hp):
+        log.error("FAIL: HighPass didn't reject DC: last_hp=%s", last_hp)
+        return 1
+    log.info("OK: HighPass last_hp=%s (DC rejected)",
+             tuple(round(v, 4) for v in last_hp))
+
+    # --- Test 2: Differentiator — first frame pass-only, then derivative ----
+    log.info("test 2: Differentiator — first frame yields no derivative")
+    captured.clear()
+    pipe = Pipeline([Differentiator(), Capture()])
+    # Linear ramp on a scalar: v(t) = 2*t. dv/dt should be ≈ 2.0.
+    for i in range(5):
+        pipe.push(IMUFrame(
+            device="A", sensor="acc_mag",
+            t_recv=i * 0.04, values=(2.0 * i * 0.04,),
+        ))
+    raw = [f for f in captured if f.sensor == "acc_mag"]
+    deriv = [f for f in captured if f.sensor == "acc_mag_d"]
+    if len(raw) != 5:
+        log.error("FAIL: Differentiator raw count %d != 5", len(raw))
+        return 1
+    if len(deriv) != 4:
+        log.error("FAIL: Differentiator deriv count %d != 4 "
+                  "(first frame should yield no derivative)", len(deriv))
+        return 1
+    if any(abs(f.values[0] - 2.0) > 1e-6 for f in deriv):
+        log.error("FAIL: Differentiator on ramp != 2.0: %s",
+                  [f.values for f in deriv])
+        return 1
+    log.info("OK: Differentiator dv/dt=2.0 across %d derivative frames",
+             len(deriv))
+
+    # --- Test 3: EdgeDetector — scalar rising edge w/ hysteresis ------------
+    log.info("test 3: EdgeDetector — rising edge + hysteresis re-arm")
+    captured.clear()
+    pipe = Pipeline([
+        EdgeDetector(threshold=0.5, hysteresis=0.1, direction="rising"),
+        Capture(),
+    ])
+    # Profile: 0.0, 0.6 (RISING EDGE), 0.7, 0.45 (above 0.4 floor — no rearm),
+    #         0.3 (below 0.4 — rearm), 0.6 (RISING EDGE), 0.2 (rearm)
+    profile = [0.0, 0.6, 0.7, 0.45, 0.3, 0.6, 0.2]
+    for i, v in enumerate(profile):
+        pipe.push(IMUFrame(
+            device="A", sensor="acc_mag",
+            t_recv=i * 0.04, values=(v,),
+        ))
+    edges = [f for f in captured if f.sensor == "acc_mag_edge"]
+    if len(edges) != 2:
+        log.error("FAIL: EdgeDetector emitted %d edges, expected 2 "
+                  "(hysteresis should suppress the bounce at 0.45)",
+                  len(edges))
+        return 1
+    log.info("OK: EdgeDetector fired %d rising edges with hysteresis", len(edges))
+
+    # --- Test 4: EdgeDetector — vec3 input rejected with one-shot warning ---
+    log.info("test 4: EdgeDetector — vec3 rejected, raw still flows")
+    captured.clear()
+    pipe = Pipeline([EdgeDetector(threshold=1.0), Capture()])
+    for i in range(5):
+        pipe.push(IMUFrame(
+            device="A", sensor="acc",
+            t_recv=i * 0.04, values=(0.1 * i, 0.1, 0.1),
+        ))
+    raw = [f for f in captured if f.sensor == "acc"]
+    edges = [f for f in captured if f.sensor == "acc_edge"]
+    if len(raw) != 5:
+        log.error("FAIL: vec3 pass-through count %d != 5", len(raw))
+        return 1
+    if edges:
+        log.error("FAIL: EdgeDetector emitted %d edges on vec3 input "
+                  "(should be rejected)", len(edges))
+        return 1
+    log.info("OK: vec3 input passes through, no edges emitted")
+
+    # --- Test 5: Window — rolling std on a noisy scalar ---------------------
+    log.info("test 5: Window — rolling std on a constant ≈ 0")
+    captured.clear()
+    pipe = Pipeline([Window(n_samples=4, stat="std"), Capture()])
+    # Constant input → std should converge to 0.
+    for i in range(8):
+        pipe.push(IMUFrame(
+            device="A", sensor="acc_mag",
+            t_recv=i * 0.04, values=(5.0,),
+        ))
+    stat_frames = [f for f in captured if f.sensor == "acc_mag_std"]
+    if len(stat_frames) != 8:
+        log.error("FAIL: Window stat count %d != 8", len(stat_frames))
+        return 1
+    last_std = stat_frames[-1].values[0]
+    if abs(last_std) > 1e-9:
+        log.error("FAIL: Window std on constant != 0: %f", last_std)
+        return 1
+    log.info("OK: Window std on constant input = %.2e", last_std)
+
+    # Window range on a known step
+    log.info("test 5b: Window — range on a step input")
+    captured.clear()
+    pipe = Pipeline([Window(n_samples=3, stat="range"), Capture()])
+    for i, v in enumerate([1.0, 2.0, 5.0, 5.0, 5.0]):
+        pipe.push(IMUFrame(
+            device="A", sensor="acc_mag",
+            t_recv=i * 0.04, values=(v,),
+        ))
+    range_frames = [f for f in captured if f.sensor == "acc_mag_range"]
+    # After the step settles (frames 4-5), range over (5,5,5) = 0.
+    if abs(range_frames[-1].values[0]) > 1e-9:
+        log.error("FAIL: Window range on settled step != 0: %f",
+                  range_frames[-1].values[0])
+        return 1
+    # Frame 3 sees (1,2,5) — range = 4.
+    if abs(range_frames[2].values[0] - 4.0) > 1e-9:
+        log.error("FAIL: Window range mid-step != 4.0: %f",
+                  range_frames[2].values[0])
+        return 1
+    log.info("OK: Window range tracks step correctly")
+
+    # --- Test 6: Scale — affine map, default + override output name ---------
+    log.info("test 6: Scale — affine map, default + custom output name")
+    captured.clear()
+    pipe = Pipeline([Scale(scale=2.0, offset=1.0), Capture()])
+    pipe.push(IMUFrame(device="A", sensor="tilt", t_recv=0.0, values=(5.0,)))
+    raw = [f for f in captured if f.sensor == "tilt"]
+    scaled = [f for f in captured if f.sensor == "tilt_scaled"]
+    if len(raw) != 1 or len(scaled) != 1:
+        log.error("FAIL: Scale counts raw=%d scaled=%d", len(raw), len(scaled))
+        return 1
+    # (5.0 - 1.0) * 2.0 = 8.0
+    if abs(scaled[0].values[0] - 8.0) > 1e-9:
+        log.error("FAIL: Scale value: %f, expected 8.0", scaled[0].values[0])
+        return 1
+    log.info("OK: Scale (5.0 - 1.0) * 2.0 = %f", scaled[0].values[0])
+
+    # Override output name
+    captured.clear()
+    pipe = Pipeline([Scale(scale=0.5, offset=0.0, output_sensor="cutoff_norm"),
+                     Capture()])
+    pipe.push(IMUFrame(device="A", sensor="tilt", t_recv=0.0, values=(40.0,)))
+    custom = [f for f in captured if f.sensor == "cutoff_norm"]
+    if len(custom) != 1 or abs(custom[0].values[0] - 20.0) > 1e-9:
+        log.error("FAIL: Scale custom output_sensor: frames=%s",
+                  [(f.sensor, f.values) for f in captured])
+        return 1
+    log.info("OK: Scale output_sensor override emits 'cutoff_norm'")
+
+    # --- Test 7: composition recipe — Magnitude → EdgeDetector --------------
+    log.info("test 7: Magnitude → EdgeDetector composition")
+    captured.clear()
+    pipe = Pipeline([
+        Magnitude(),
+        EdgeDetector(threshold=2.0, hysteresis=0.3, direction="rising"),
+        Capture(),
+    ])
+    # Three vec3 frames: small, big, small. acc_mag = sqrt(3) ≈ 1.73, then
+    # sqrt(12) ≈ 3.46 (RISING EDGE), then sqrt(0.03) ≈ 0.17 (rearm).
+    for vec in [(1.0, 1.0, 1.0), (2.0, 2.0, 2.0), (0.1, 0.1, 0.1)]:
+        pipe.push(IMUFrame(
+            device="A", sensor="acc", t_recv=0.0, values=vec,
+        ))
+    edges = [f for f in captured if f.sensor == "acc_mag_edge"]
+    if len(edges) != 1:
+        log.error("FAIL: composition emitted %d edges, expected 1: %s",
+                  len(edges), [f.sensor for f in captured])
+        return 1
+    log.info("OK: composition Magnitude → EdgeDetector fired %d edge(s)",
+             len(edges))
+
+    # --- Test 8: registry — every new stage is C2-constructible -------------
+    log.info("test 8: _STAGE_REGISTRY includes all 5 new stages")
+    from sense.pipeline import _STAGE_REGISTRY
+    new_stages = ("HighPass", "Differentiator", "EdgeDetector", "Window", "Scale")
+    missing = [s for s in new_stages if s not in _STAGE_REGISTRY]
+    if missing:
+        log.error("FAIL: _STAGE_REGISTRY missing: %s", missing)
+        return 1
+    log.info("OK: registry contains %s", new_stages)
+
+    log.info("PASS: preprocessing-stages-library")
+    return 0
+
+
+# --- Soak / long-run scenarios ----------------------------------------------
+#
+# These run for minutes, not seconds. Registered in SOAK_SCENARIOS (separate
+# from SCENARIOS) so any future "run all fast scenarios" loop iterating
+# `SCENARIOS.keys()` skips them. Invoke explicitly via --scenario.
+
+
+def scenario_recorder_soak_write_latency(
+    duration_s: float = 600.0,
+    p99_budget_ms: float = 5.0,
+    rate_hz: float = 100.0,
+    n_producers: int = 4,
+) -> int:
+    """
+    Long-run RecorderSink write-latency soak. Streams synthetic frames
+    through N representative pipelines (LowPass → Magnitude → Recorder →
+    muted OscEmit) sharing one RecorderSink, at ~rate_hz per producer
+    for duration_s seconds. Tracks per-push wall-clock latency on each
+    producer thread; reports p50/p95/p99/p99.9/max + Pipeline.stats
+    [Recorder] internal-stage timing at the end.
+
+    Pass: p99 across all producers stays under p99_budget_ms.
+
+    Catches: (a) sync JSON serialize + locked file write blocking the
+    BLE callback thread under filesystem stutters; (b) RecorderSink
+    lock contention across multiple Recorder Stages sharing one sink.
+    The sink's writer thread takes both off the producers; a stutter
+    shows up as queue depth instead, and any dropped frame fails the
+    run.
+
+    Defaults are tuned to mimic Phase-A loads (~4 devices × ~100 Hz
+    per-sensor aggregate = ~400 sink.write/s, 10-min duration). Override
+    via --duration-s / --rate-hz / --n-producers / --p99-budget-ms.
+    """
+    import shutil
+    import tempfile
+    from sense.pipeline import (
+        IMUFrame, LowPass, Magnitude, OscEmit, Pipeline,
+    )
+    from sense.recorder import Recorder, RecorderSink
+
+    tmp_dir = tempfile.mkdtemp(prefix="fs-recorder-soak-")
+    sink_path = os.path.join(tmp_dir, "soak.jsonl")
     sink = RecorderSink(sink_path)
     sink.open(metadata={
         "scenario": "recorder-soak-write-latency",
@@ -2332,8 +5479,13 @@ def scenario_recorder_soak_write_latency(
     p999 = _pct(all_lat, 0.999)
     pmax = all_lat[-1]
 
+    sink_stats = sink.stats()
     log.info("results: %d pushes across %d producers (%d frames in sink)",
              len(all_lat), n_producers, sink.frame_count)
+    log.info("  sink queue: max depth %d, %d batches (max %d), %d dropped, "
+             "%d write errors",
+             sink_stats["max_depth"], sink_stats["batches"], sink_stats["max_batch"],
+             sink_stats["dropped"], sink_stats["write_errors"])
     log.info("  pipe.push latency: p50=%.3fms p95=%.3fms p99=%.3fms "
              "p99.9=%.3fms max=%.3fms",
              p50 * 1e3, p95 * 1e3, p99 * 1e3, p999 * 1e3, pmax * 1e3)
@@ -2341,16 +5493,22 @@ def scenario_recorder_soak_write_latency(
     # Per-stage timing on producer 0 (representative — all share the sink).
     rec_stats = pipelines[0].stats.get("Recorder")
     if rec_stats is not None:
-        log.info("  Recorder stage stats (producer 0, last %d samples): "
-                 "count=%d mean=%.3fms max=%.3fms",
-                 rec_stats.count, rec_stats.count,
-                 rec_stats.mean_s * 1e3, rec_stats.max_s * 1e3)
+        log.info("  Recorder stage stats (producer 0): "
+                 "count=%d mean=%.3fms p99=%.3fms max=%.3fms",
+                 rec_stats.count, rec_stats.mean_s * 1e3,
+                 rec_stats.percentile_s(99.0) * 1e3, rec_stats.max_s * 1e3)
 
     try:
         shutil.rmtree(tmp_dir)
     except BaseException:
         pass
 
+    if sink_stats["dropped"] or sink_stats["write_errors"]:
+        log.error("FAIL: sink dropped %d frames / %d write errors — the writer "
+                  "thread can't keep up with the producers",
+                  sink_stats["dropped"], sink_stats["write_errors"])
+        return 1
+
     if p99 * 1e3 > p99_budget_ms:
         log.error("FAIL: p99 %.3fms exceeds budget %.3fms — RecorderSink "
                   "write path is bottlenecking the producer thread; "
@@ -2370,6 +5528,33 @@ SCENARIOS = {
     "stale-stream": scenario_stale_stream,
     "button-toggle": scenario_button_toggle,
     "pipeline-basics": scenario_pipeline_basics,
+    "pipeline-compiled-plan": scenario_pipeline_compiled_plan,
+    "pipeline-profiling-modes": scenario_pipeline_profiling_modes,
+    "pipeline-key-registry": scenario_pipeline_key_registry,
+    "pipeline-push-batch": scenario_pipeline_push_batch,
+    "pipeline-numpy-kernels": scenario_pipeline_numpy_kernels,
+    "window-incremental-stats": scenario_window_incremental_stats,
+    "pipeline-stage-routing": scenario_pipeline_stage_routing,
+    "subscription-pruning": scenario_subscription_pruning,
+    "pipeline-hot-swap": scenario_pipeline_hot_swap,
+    "osc-bundle": scenario_osc_bundle,
+    "osc-wire": scenario_osc_wire,
+    "osc-egress": scenario_osc_egress,
+    "osc-breaker": scenario_osc_breaker,
+    "emission-policy": scenario_emission_policy,
+    "osc-fanout": scenario_osc_fanout,
+    "shm-ring": scenario_shm_ring,
+    "osc-control-server": scenario_osc_control_server,
+    "osc-tcp-stream": scenario_osc_tcp_stream,
+    "egress-telemetry": scenario_egress_telemetry,
+    "recorder-group-commit": scenario_recorder_group_commit,
+    "recording-columnar": scenario_recording_columnar,
+    "recording-segments": scenario_recording_segments,
+    "recorder-frame-encoder": scenario_recorder_frame_encoder,
+    "recording-index": scenario_recording_index,
+    "osc-control-malformed": scenario_osc_control_malformed,
+    "subscription-window-retune": scenario_subscription_window_retune,
+    "frame-queue-policies": scenario_frame_queue_policies,
     "preprocessing-stages-library": scenario_preprocessing_stages_library,
     "latch-basics": scenario_latch_basics,
     "gesture-feature-autodiscover": scenario_gesture_feature_autodiscover,
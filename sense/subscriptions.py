@@ -0,0 +1,150 @@
+"""
+Receiver subscriptions: which OSC addresses anybody actually consumes.
+
+Receivers (PD patches, a GUI, a logger) declare the addresses they
+read with `/cmd/subscribe <receiver> <pattern>...` and keep the
+declaration alive by re-sending `/cmd/subscribe <receiver>` (patterns
+optional) at least once per `ttl_s`. A receiver that goes quiet for
+longer is pruned by `Controller.tick`, so a crashed patch doesn't pin
+streams on forever.
+
+Patterns are OSC addresses with shell-style wildcards
+(`fnmatch.fnmatchcase`): `/E0:2D:64:47:02:F5/acc_mag` for one stream,
+`/*/tilt` for every device's tilt, `/E0:2D:64:47:02:F5/*` for one
+device. `*` also matches `/`.
+
+While the table is empty — no receiver has ever subscribed, or all of
+them expired — nothing is filtered: every advertised stream is
+computed and sent, as before subscriptions existed. Once at least one
+receiver is registered, `MetaWearState.apply_subscriptions` hands each
+pipeline a demand predicate; `Pipeline.recompile` then skips derive
+stages whose outputs nobody consumes and stops OscEmit from sending
+unsubscribed addresses. See docs/c2.md#subscriptions.
+"""
+import fnmatch
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Set
+
+log = logging.getLogger("fs.subscriptions")
+
+DEFAULT_TTL_S = 30.0
+
+
+class SubscriptionTable:
+    """
+    Thread-safe receiver → address-pattern table with liveness expiry.
+
+    Writers are the OSC dispatcher thread (`subscribe` / `unsubscribe`)
+    and the watchdog loop (`prune`). `wants(address)` is read when
+    pipelines recompile; verdicts are cached per address until the
+    next change.
+    """
+    def __init__(self, ttl_s: float = DEFAULT_TTL_S,
+                 clock: Callable[[], float] = time.monotonic):
+        if ttl_s <= 0:
+            raise ValueError(f"ttl_s must be > 0, got {ttl_s}")
+        self.ttl_s = float(ttl_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._patterns: Dict[str, Set[str]] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._verdicts: Dict[str, bool] = {}
+        self.version = 0
+
+    def _changed_locked(self) -> None:
+        self._verdicts = {}
+        self.version += 1
+
+    def subscribe(self, receiver: str, patterns: Iterable[str] = ()) -> bool:
+        """
+        Register `receiver` (if new), add `patterns`, and refresh its
+        liveness. Returns True if the set of consumed addresses
+        changed (callers re-apply demand only then). A keepalive (no
+        patterns) from an unknown receiver — one that expired, or
+        subscribed before a restart — registers nothing: a receiver
+        with no patterns would switch filtering on and want nothing.
+        """
+        added = set(patterns)
+        with self._lock:
+            current = self._patterns.get(receiver)
+            if current is None and not added:
+                return False
+            self._last_seen[receiver] = self._clock()
+            if current is None:
+                self._patterns[receiver] = added
+                self._changed_locked()
+                return True
+            if added - current:
+                current |= added
+                self._changed_locked()
+                return True
+            return False
+
+    def unsubscribe(self, receiver: str, patterns: Iterable[str] = ()) -> bool:
+        """
+        Drop `patterns` from `receiver`, or the receiver itself when no
+        patterns are given or none are left. Returns True if anything
+        was removed.
+        """
+        patterns = set(patterns)
+        with self._lock:
+            current = self._patterns.get(receiver)
+            if current is None:
+                return False
+            if patterns:
+                if not current & patterns:
+                    return False
+                current -= patterns
+            if not patterns or not current:
+                del self._patterns[receiver]
+                self._last_seen.pop(receiver, None)
+            self._changed_locked()
+            return True
+
+    def prune(self) -> List[str]:
+        """Expire receivers not refreshed within `ttl_s`; returns their ids."""
+        cutoff = self._clock() - self.ttl_s
+        with self._lock:
+            expired = [r for r, seen in self._last_seen.items() if seen < cutoff]
+            for receiver in expired:
+                del self._last_seen[receiver]
+                self._patterns.pop(receiver, None)
+            if expired:
+                self._changed_locked()
+        for receiver in expired:
+            log.info("subscription for %r expired (no refresh in %.0fs)",
+                     receiver, self.ttl_s)
+        return expired
+
+    @property
+    def active(self) -> bool:
+        """True once any receiver is registered — filtering is on.
+        Registered receivers always have at least one pattern."""
+        return bool(self._patterns)
+
+    def wants(self, address: str) -> bool:
+        """Does any live receiver consume `address`? Always True while
+        the table is inactive."""
+        verdicts = self._verdicts
+        verdict = verdicts.get(address)
+        if verdict is not None:
+            return verdict
+        with self._lock:
+            if not self._patterns:
+                verdict = True
+            else:
+                verdict = any(
+                    fnmatch.fnmatchcase(address, pattern)
+                    for patterns in self._patterns.values()
+                    for pattern in patterns
+                )
+            if verdicts is self._verdicts:
+                verdicts[address] = verdict
+        return verdict
+
+    def receivers(self) -> Dict[str, List[str]]:
+        """`{receiver: sorted patterns}` snapshot, for status replies."""
+        with self._lock:
+            return {r: sorted(p) for r, p in self._patterns.items()}
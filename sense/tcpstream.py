@@ -0,0 +1,369 @@
+"""
+Lossless OSC-over-TCP stream for recording and analysis clients.
+
+The UDP path to PD drops datagrams under Wi-Fi congestion and nobody
+notices — PD shows the next value. A remote recorder does notice: the
+offline tools (`tools/check_rates.py`, `tools/analyze_position.py`)
+assume every frame is there. `TcpStreamServer` is a second egress that
+runs alongside the UDP one: remote clients connect to it (run_fs.py
+`--osc-tcp PORT`; `tools/osc_tcp_record.py` is one) and get every
+frame as OSC, SLIP-framed per OSC 1.1 over a TCP stream, so the kernel
+retransmits what Wi-Fi loses.
+
+It is fed by a `TcpPublish` stage just ahead of each terminal (like
+Recorder and ShmPublish), not by OscEmit: the stream carries every
+post-pipeline frame at full rate, whatever EmitPolicy decimates,
+subscriptions prune or capture mode mutes on the UDP side. Each input
+tick goes out as one `#bundle` timetagged with the Pi's wall-clock
+time, so a recorder gets sample times without `--osc-bundle`. Only
+data frames are carried — no `/state` or `/error` replies.
+
+`send_dgram` only SLIP-frames the packet and appends it to each
+connection's buffer under one lock; a single sender thread does the
+socket work. Writes are coalesced: the
+sender wakes on the first packet after it went idle, waits
+`coalesce_s` for more, then writes each connection's whole buffer in
+one `send`. TCP_NODELAY is set, so the coalescing window — not Nagle's
+40 ms — is the added latency.
+
+A connection's pending bytes are bounded by `max_buffer`. A consumer
+that can't keep up (stalled reader, link too slow for the stream) is
+disconnected rather than allowed to grow the buffer or hold up other
+consumers — it loses the stream, but never gets a stream with silent
+holes in it. Reconnecting starts it on the live stream again.
+"""
+import logging
+import selectors
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .oscwire import ENCODER, OscEncoder, encode_bundle
+from .pipeline import BUNDLE_MAX_MESSAGES, IMUFrame, Stage
+
+log = logging.getLogger("fs.tcpstream")
+
+DEFAULT_PORT = 8002
+DEFAULT_MAX_BUFFER = 1 << 20
+DEFAULT_COALESCE_S = 0.002
+
+SLIP_END = b"\xc0"
+SLIP_ESC = b"\xdb"
+_ESC_END = b"\xdb\xdc"
+_ESC_ESC = b"\xdb\xdd"
+
+
+def slip_encode(packet: bytes) -> bytes:
+    """Double-END SLIP framing (RFC 1055, as OSC 1.1 uses it)."""
+    if b"\xc0" in packet or b"\xdb" in packet:
+        packet = packet.replace(SLIP_ESC, _ESC_ESC).replace(SLIP_END, _ESC_END)
+    return SLIP_END + packet + SLIP_END
+
+
+class SlipDecoder:
+    """Incremental SLIP deframer: `feed(chunk)` returns the packets
+    completed by it. Empty frames (the double END) are skipped."""
+    def __init__(self):
+        self._partial = b""
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        frames = (self._partial + chunk).split(SLIP_END)
+        self._partial = frames.pop()
+        packets = []
+        for frame in frames:
+            if not frame:
+                continue
+            if b"\xdb" in frame:
+                frame = frame.replace(_ESC_END, SLIP_END).replace(_ESC_ESC, SLIP_ESC)
+            packets.append(frame)
+        return packets
+
+
+class _Connection:
+    __slots__ = ("sock", "peer", "pending", "out", "sent_bytes", "slow", "writing")
+
+    def __init__(self, sock: socket.socket, peer):
+        self.sock = sock
+        self.peer = f"{peer[0]}:{peer[1]}"
+        # `pending` is appended by producers under the server lock;
+        # `out` is the sender thread's unsent remainder.
+        self.pending = bytearray()
+        self.out = b""
+        self.sent_bytes = 0
+        self.slow = False
+        self.writing = False
+
+
+class TcpStreamServer:
+    """
+    Listening SLIP/TCP egress with an outbound-client interface
+    (`send_message` / `send` / `send_dgram`); `TcpPublish` feeds it.
+    Sends with no client connected cost one check.
+    """
+    def __init__(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT,
+                 max_buffer: int = DEFAULT_MAX_BUFFER,
+                 coalesce_s: float = DEFAULT_COALESCE_S,
+                 encoder: Optional[OscEncoder] = None):
+        self.max_buffer = int(max_buffer)
+        self.coalesce_s = float(coalesce_s)
+        self.encoder = encoder or ENCODER
+        self._lock = threading.Lock()
+        self._conns: List[_Connection] = []
+        self._idle = True
+        self._closed = False
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self._listener.bind((host, port))
+            self._listener.listen(4)
+        except BaseException:
+            self._listener.close()
+            raise
+        self._listener.setblocking(False)
+        self.server_address = self._listener.getsockname()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._thread = threading.Thread(target=self._run, name="fs-tcpstream", daemon=True)
+
+        self.packets = 0
+        self.bytes = 0
+        self.accepted = 0
+        self.slow_disconnects = 0
+
+    def start(self) -> None:
+        self._thread.start()
+        log.info("[tcpstream] listening on %s:%d (buffer %d KiB/connection)",
+                 self.server_address[0], self.server_address[1], self.max_buffer >> 10)
+
+    # --- Client interface -----------------------------------------------------
+
+    def send_dgram(self, dgram: bytes) -> None:
+        if not self._conns:
+            return None
+        framed = slip_encode(dgram)
+        wake = False
+        with self._lock:
+            for conn in self._conns:
+                if conn.slow:
+                    continue
+                if len(conn.pending) + len(conn.out) + len(framed) > self.max_buffer:
+                    conn.slow = True
+                    wake = True
+                    continue
+                conn.pending += framed
+            self.packets += 1
+            if self._idle:
+                self._idle = False
+                wake = True
+        if wake:
+            self._wake()
+        return None
+
+    def send_message(self, address: str, value) -> None:
+        return self.send_dgram(self.encoder.encode(address, value))
+
+    def send(self, content) -> None:
+        return self.send_dgram(content.dgram)
+
+    @property
+    def connections(self) -> int:
+        return len(self._conns)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "connections": [(c.peer, c.sent_bytes) for c in self._conns],
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "accepted": self.accepted,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+    # --- Sender thread --------------------------------------------------------
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        sel = selectors.DefaultSelector()
+        sel.register(self._listener, selectors.EVENT_READ)
+        sel.register(self._wake_r, selectors.EVENT_READ)
+        try:
+            while not self._closed:
+                woken = False
+                for key, events in sel.select():
+                    obj = key.fileobj
+                    if obj is self._listener:
+                        self._accept(sel)
+                    elif obj is self._wake_r:
+                        woken = True
+                        try:
+                            self._wake_r.recv(4096)
+                        except OSError:
+                            pass
+                    elif events & selectors.EVENT_READ:
+                        self._read(sel, key.data)
+                if self._closed:
+                    break
+                if woken and self.coalesce_s > 0:
+                    # Let the rest of this push (and the next few) land
+                    # so they go out in the same segment.
+                    time.sleep(self.coalesce_s)
+                self._flush(sel)
+        except BaseException:
+            log.exception("[tcpstream] sender stopped")
+        finally:
+            for conn in list(self._conns):
+                self._drop(sel, conn, None)
+            sel.close()
+
+    def _accept(self, sel) -> None:
+        while True:
+            try:
+                sock, peer = self._listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = _Connection(sock, peer)
+            sel.register(sock, selectors.EVENT_READ, conn)
+            with self._lock:
+                self._conns = self._conns + [conn]
+            self.accepted += 1
+            log.info("[tcpstream] %s connected", conn.peer)
+
+    def _read(self, sel, conn: _Connection) -> None:
+        # Clients don't send anything we use; reading just notices EOF.
+        try:
+            data = conn.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._drop(sel, conn, str(e))
+            return
+        if not data:
+            self._drop(sel, conn, "closed by peer")
+
+    def _flush(self, sel) -> None:
+        with self._lock:
+            # The next packet wakes us again; until then only a
+            # connection with unsent bytes becoming writable does.
+            self._idle = True
+            for conn in self._conns:
+                if conn.pending:
+                    conn.out = conn.out + conn.pending if conn.out else bytes(conn.pending)
+                    conn.pending.clear()
+        for conn in list(self._conns):
+            if conn.slow:
+                self.slow_disconnects += 1
+                log.warning("[tcpstream] %s too slow (> %d KiB pending); disconnected",
+                            conn.peer, self.max_buffer >> 10)
+                self._drop(sel, conn, None)
+                continue
+            if not conn.out:
+                continue
+            try:
+                n = conn.sock.send(conn.out)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError as e:
+                self._drop(sel, conn, str(e))
+                continue
+            conn.out = conn.out[n:]
+            conn.sent_bytes += n
+            self.bytes += n
+        for conn in self._conns:
+            # Wait for writability only while a send is incomplete.
+            if bool(conn.out) != conn.writing:
+                conn.writing = bool(conn.out)
+                sel.modify(conn.sock, selectors.EVENT_READ
+                           | (selectors.EVENT_WRITE if conn.writing else 0), conn)
+
+    def _drop(self, sel, conn: _Connection, reason: Optional[str]) -> None:
+        with self._lock:
+            self._conns = [c for c in self._conns if c is not conn]
+        try:
+            sel.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            conn.sock.close()
+        except OSError:
+            pass
+        if reason:
+            log.info("[tcpstream] %s disconnected: %s", conn.peer, reason)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop, closing every connection (pending bytes are not drained)
+        and the listener."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        for s in (self._listener, self._wake_r, self._wake_w):
+            try:
+                s.close()
+            except OSError:
+                pass
+
+
+class TcpPublish(Stage):
+    """
+    Pipeline Stage that sends every passing frame to a `TcpStreamServer`
+    and forwards it unchanged. run_fs.py (`--osc-tcp`) puts one just
+    ahead of each terminal, before the emission policy. Frames of one
+    input tick (same device and `t_recv`) are sent as one `#bundle`
+    at the end of the push, timetagged with the wall-clock time the
+    first of them passed; nothing is encoded while no client is
+    connected.
+
+    Not prunable: like Recorder, it consumes everything it selects, so
+    a subscription demand doesn't prune streams off the TCP side.
+    """
+    is_terminal = False
+
+    def __init__(self, server: TcpStreamServer):
+        self.server = server
+        self._addresses: Dict[Tuple[str, str], str] = {}
+        self._pending: List[bytes] = []
+        self._pending_key: Optional[tuple] = None
+        self._pending_wall = 0.0
+
+    def process(self, frame: IMUFrame) -> Iterable[IMUFrame]:
+        if self.server.connections:
+            self._add(frame)
+        return (frame,)
+
+    def process_batch(self, frames: List[IMUFrame]) -> List[IMUFrame]:
+        if self.server.connections:
+            for frame in frames:
+                self._add(frame)
+        return list(frames)
+
+    def _add(self, frame: IMUFrame) -> None:
+        key = (frame.device, frame.sensor)
+        addr = self._addresses.get(key)
+        if addr is None:
+            addr = self._addresses[key] = f"/{frame.device}/{frame.sensor}"
+        tick = (frame.device, frame.t_recv)
+        pending = self._pending
+        if pending and (tick != self._pending_key or len(pending) >= BUNDLE_MAX_MESSAGES):
+            self.flush()
+        if not pending:
+            self._pending_key = tick
+            self._pending_wall = time.time()
+        values = frame.values
+        pending.append(self.server.encoder.encode(addr, values[0] if len(values) == 1 else values))
+
+    def flush(self) -> None:
+        pending = self._pending
+        if pending:
+            dgram = encode_bundle(pending, self._pending_wall)
+            pending.clear()
+            self.server.send_dgram(dgram)
@@ -0,0 +1,128 @@
+"""
+Egress telemetry: what each stream and each receiver costs the link.
+
+When the Wi-Fi link to the audio machine saturates, the operator has to
+pick which derived streams to decimate (EmitPolicy) or unsubscribe —
+which needs numbers per address, not a feeling. Two kinds of counters:
+
+- Per address, on each `fanout.Route`: messages and encoded bytes
+  emitted for `/<MAC>/<sensor>` (or `/state/...`), counted once however
+  many targets receive them. Bundled / packed messages count under
+  their own address with their own encoded size.
+- Per target (`ip:port`), a `TargetTelemetry` shared through
+  `telemetry_for()` like the circuit breakers: datagrams and bytes the
+  socket accepted, errors by errno name, and a histogram of `sendto`
+  time. `WireClient` records inline; with `--osc-egress thread` the
+  egress sender thread records, so the histogram is the syscall alone
+  in both modes.
+
+Recording is a few integer adds on paths that already do a syscall;
+nothing is aggregated until someone reads. C2 publishes both tables as
+`/state/egress/target`, `/state/egress/errors`, `/state/egress/latency`
+and `/state/egress/address` every `TELEMETRY_PERIOD_S` and on
+`/cmd/egress/stats` (docs/c2.md#egress-telemetry).
+
+Counters are written without a lock from whichever thread sends; a
+concurrent reader may see one increment late, never a torn value.
+"""
+import errno as _errno
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Histogram buckets: bucket 0 is < 1 µs, bucket i (1..N-2) is
+# [2^(i-1), 2^i) µs, the last one everything from 2^(N-2) µs (16 ms) up.
+LATENCY_BUCKETS = 16
+
+
+def errno_name(e: BaseException) -> str:
+    """`ECONNREFUSED`-style key for an exception; the class name when
+    it carries no errno."""
+    code = getattr(e, "errno", None)
+    if code is None:
+        return type(e).__name__
+    return _errno.errorcode.get(code, str(code))
+
+
+class TargetTelemetry:
+    """Send counters for one `ip:port` target."""
+    __slots__ = ("target", "messages", "bytes", "errors", "latency")
+
+    def __init__(self, target: str):
+        self.target = target
+        self.messages = 0
+        self.bytes = 0
+        self.errors: Dict[str, int] = {}
+        self.latency: List[int] = [0] * LATENCY_BUCKETS
+
+    def record(self, nbytes: int, elapsed_ns: int) -> None:
+        self.messages += 1
+        self.bytes += nbytes
+        bucket = (elapsed_ns // 1000).bit_length()
+        self.latency[bucket if bucket < LATENCY_BUCKETS else LATENCY_BUCKETS - 1] += 1
+
+    def record_error(self, e: BaseException) -> None:
+        key = errno_name(e)
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def percentile_us(self, q: float) -> float:
+        """Upper edge (µs) of the bucket holding the q-quantile send
+        time; 0.0 before the first send."""
+        hist = list(self.latency)
+        total = sum(hist)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(hist):
+            seen += n
+            if seen >= rank:
+                return float(1 << i)
+        return float(1 << (LATENCY_BUCKETS - 1))
+
+
+_TARGETS: Dict[str, TargetTelemetry] = {}
+_TARGETS_LOCK = threading.Lock()
+
+
+def telemetry_for(ip: str, port: int) -> TargetTelemetry:
+    """Process-wide counters for `ip:port`, created on first use."""
+    key = f"{ip}:{port}"
+    t = _TARGETS.get(key)
+    if t is None:
+        with _TARGETS_LOCK:
+            t = _TARGETS.get(key)
+            if t is None:
+                t = _TARGETS[key] = TargetTelemetry(key)
+    return t
+
+
+def targets() -> Dict[str, TargetTelemetry]:
+    """Snapshot of every target's counters, keyed by `ip:port`."""
+    with _TARGETS_LOCK:
+        return dict(_TARGETS)
+
+
+class RateTracker:
+    """
+    Turns monotonically growing counters into per-second rates between
+    successive reports: `rate(key, messages, bytes)` returns
+    (messages/s, bytes/s) since the previous call for `key` (0 on the
+    first).
+    """
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._last: Dict[str, tuple] = {}
+
+    def rate(self, key: str, messages: int, nbytes: int) -> tuple:
+        now = self._clock()
+        prev: Optional[tuple] = self._last.get(key)
+        self._last[key] = (now, messages, nbytes)
+        if prev is None or now <= prev[0]:
+            return 0.0, 0.0
+        dt = now - prev[0]
+        return (messages - prev[1]) / dt, (nbytes - prev[2]) / dt
@@ -1,8 +1,8 @@
 """
 Exploratory analysis of gesture recordings.
 
-Loads JSONL files produced by `run_fs.py --capture-label`, extracts
-labeled gesture instances, and emits:
+Loads recordings (JSONL, `.fsc` or segment manifests) produced by
+`run_fs.py --capture-label`, extracts labeled gesture instances, and emits:
 
 1. Per-label stats to stdout (count, length distribution, value
    distribution per feature sensor).
@@ -30,7 +30,6 @@ Plots land in --output (default ./gesture_analysis/). Stats go to
 stdout. Run with `--no-plots` to skip the matplotlib step entirely.
 """
 import argparse
-import json
 import sys
 from collections import defaultdict
 from pathlib import Path
@@ -38,6 +37,12 @@ from typing import Dict, List, Tuple
 
 import numpy as np
 
+# tools/ isn't a package: put the repo root on the path for
+# sense.columnar (numpy + stdlib only).
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sense.columnar import iter_records  # noqa: E402
+from sense.recindex import iter_gesture_windows  # noqa: E402
+
 
 # --- Loading -----------------------------------------------------------------
 
@@ -47,37 +52,26 @@ def load_gestures(paths, feature_sensors):
     out = []
     for path in paths:
         path = Path(path)
-        active = None
-        per_sensor: Dict[str, List[float]] = {s: [] for s in feature_sensors}
-        with path.open("r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                rec = json.loads(line)
-                kind = rec.get("_gesture")
-                if kind == "start":
-                    active = {
-                        "label": rec["label"],
-                        "device": rec["device"],
-                        "instance": rec["instance"],
-                    }
-                    per_sensor = {s: [] for s in feature_sensors}
-                elif kind == "end":
-                    if active and all(per_sensor[s] for s in feature_sensors):
-                        n = min(len(per_sensor[s]) for s in feature_sensors)
-                        raw = {
-                            s: np.array(per_sensor[s][:n], dtype=float)
-                            for s in feature_sensors
-                        }
-                        out.append({**active, "source_file": path.name, "raw": raw})
-                    active = None
-                elif active is not None and "device" in rec:
-                    sensor = rec.get("sensor")
-                    if (sensor in feature_sensors
-                            and rec.get("device") == active["device"]
-                            and rec.get("values")):
-                        per_sensor[sensor].append(float(rec["values"][0]))
+        for start, _, frames in iter_gesture_windows(path):
+            active = {
+                "label": start["label"],
+                "device": start["device"],
+                "instance": start["instance"],
+            }
+            per_sensor: Dict[str, List[float]] = {s: [] for s in feature_sensors}
+            for rec in frames:
+                sensor = rec["sensor"]
+                if (sensor in per_sensor
+                        and rec["device"] == active["device"]
+                        and rec.get("values")):
+                    per_sensor[sensor].append(float(rec["values"][0]))
+            if all(per_sensor[s] for s in feature_sensors):
+                n = min(len(per_sensor[s]) for s in feature_sensors)
+                raw = {
+                    s: np.array(per_sensor[s][:n], dtype=float)
+                    for s in feature_sensors
+                }
+                out.append({**active, "source_file": path.name, "raw": raw})
     return out
 
 
@@ -85,18 +79,13 @@ def load_background(path, feature_sensors):
     """Load all frames matching feature_sensors from a non-gesture
     recording into per-sensor 1D arrays."""
     per_sensor: Dict[str, List[float]] = {s: [] for s in feature_sensors}
-    with Path(path).open("r", encoding="utf-8") as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            rec = json.loads(line)
-            # Skip metadata / session / gesture markers — they don't have "device".
-            if "device" not in rec:
-                continue
-            sensor = rec.get("sensor")
-            if sensor in feature_sensors and rec.get("values"):
-                per_sensor[sensor].append(float(rec["values"][0]))
+    for rec in iter_records(path):
+        # Skip metadata / session / gesture markers — they have no "sensor".
+        if "sensor" not in rec:
+            continue
+        sensor = rec.get("sensor")
+        if sensor in feature_sensors and rec.get("values"):
+            per_sensor[sensor].append(float(rec["values"][0]))
     n = min(len(per_sensor[s]) for s in feature_sensors)
     return {s: np.array(per_sensor[s][:n], dtype=float) for s in feature_sensors}
 
@@ -1,9 +1,10 @@
 """
 Offline drift analysis for the IMU+ZUPT position-tracking spike.
 
-Loads a JSONL recording (typically captured with `run_fs.py --record`
-in Sensor Fusion mode), extracts the linear_acc / quat / corrected_gyro
-streams, and runs three parallel position estimators side-by-side:
+Loads a recording (JSONL, `.fsc` or a segment manifest, typically
+captured with `run_fs.py --record` in Sensor Fusion mode), extracts
+the linear_acc / quat / corrected_gyro streams, and runs three
+parallel position estimators side-by-side:
 
   (a) Naive double-integration of raw linear_acc (rotated to world frame).
   (b) Bias-subtracted double-integration (bias = mean of stationary
@@ -27,7 +28,6 @@ Usage:
 Requires numpy + matplotlib. Run on the Pi or scp + run on Windows.
 """
 import argparse
-import json
 import math
 import sys
 from collections import deque
@@ -36,6 +36,11 @@ from typing import Iterator, List, Tuple
 
 import numpy as np
 
+# tools/ isn't a package: put the repo root on the path for
+# sense.columnar (numpy + stdlib only).
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sense.columnar import ColumnarReader, is_columnar, iter_records  # noqa: E402
+
 
 # --- Loading -----------------------------------------------------------------
 
@@ -44,31 +49,28 @@ def load_fusion_streams(path):
     quat(M,4), t_gyro, gyro_mag(K). The streams are NOT time-aligned —
     we resample via "latest value" lookup at integration time, matching
     what PositionTracker does live."""
+    if is_columnar(path):
+        return _load_fusion_columns(path)
     t_acc, lin_acc = [], []
     t_quat, quat = [], []
     t_gyro, gyro_mag = [], []
-    with Path(path).open("r", encoding="utf-8") as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            rec = json.loads(line)
-            if "device" not in rec:
-                continue
-            sensor = rec.get("sensor")
-            t = rec.get("t_recv")
-            v = rec.get("values")
-            if not v or t is None:
-                continue
-            if sensor == "linear_acc" and len(v) >= 3:
-                t_acc.append(t)
-                lin_acc.append([v[0], v[1], v[2]])
-            elif sensor == "quat" and len(v) >= 4:
-                t_quat.append(t)
-                quat.append([v[0], v[1], v[2], v[3]])
-            elif sensor == "corrected_gyro" and len(v) >= 3:
-                t_gyro.append(t)
-                gyro_mag.append(math.sqrt(v[0] ** 2 + v[1] ** 2 + v[2] ** 2))
+    for rec in iter_records(path):
+        if "device" not in rec:
+            continue
+        sensor = rec.get("sensor")
+        t = rec.get("t_recv")
+        v = rec.get("values")
+        if not v or t is None:
+            continue
+        if sensor == "linear_acc" and len(v) >= 3:
+            t_acc.append(t)
+            lin_acc.append([v[0], v[1], v[2]])
+        elif sensor == "quat" and len(v) >= 4:
+            t_quat.append(t)
+            quat.append([v[0], v[1], v[2], v[3]])
+        elif sensor == "corrected_gyro" and len(v) >= 3:
+            t_gyro.append(t)
+            gyro_mag.append(math.sqrt(v[0] ** 2 + v[1] ** 2 + v[2] ** 2))
     return {
         "t_acc": np.array(t_acc),
         "lin_acc": np.array(lin_acc),
@@ -79,6 +81,29 @@ def load_fusion_streams(path):
     }
 
 
+def _load_fusion_columns(path):
+    """`load_fusion_streams` for a `.fsc` recording: whole columns out
+    of the mapped file, no per-frame parsing."""
+    with ColumnarReader(path) as reader:
+        t_acc, acc = reader.sensor_arrays("linear_acc")
+        t_quat, q = reader.sensor_arrays("quat")
+        t_gyro, gyro = reader.sensor_arrays("corrected_gyro")
+        if acc.shape[1] < 3:
+            t_acc, acc = t_acc[:0], np.empty((0, 3))
+        if q.shape[1] < 4:
+            t_quat, q = t_quat[:0], np.empty((0, 4))
+        if gyro.shape[1] < 3:
+            t_gyro, gyro = t_gyro[:0], np.empty((0, 3))
+        return {
+            "t_acc": np.array(t_acc, dtype=float),
+            "lin_acc": np.array(acc[:, :3], dtype=float),
+            "t_quat": np.array(t_quat, dtype=float),
+            "quat": np.array(q[:, :4], dtype=float),
+            "t_gyro": np.array(t_gyro, dtype=float),
+            "gyro_mag": np.sqrt((np.asarray(gyro[:, :3], dtype=float) ** 2).sum(axis=1)),
+        }
+
+
 # --- Math helpers ------------------------------------------------------------
 
 def quat_rotate(q, v):
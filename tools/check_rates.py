@@ -1,11 +1,14 @@
 """
 Per-sensor sample-rate diagnostic for FS recordings.
 
-Loads a JSONL recording and reports counts, effective rate (Hz), and
+Loads a recording (JSONL, `.fsc` columnar, or a segmented session's
+`.manifest.json`) and reports counts, effective rate (Hz), and
 recording duration for each sensor stream. Useful for isolating whether
 slow effective rates are firmware-side (different fusion outputs at
 different intrinsic ODRs) or BLE-bandwidth-side (uniform reduction
-under load).
+under load). Counts and times come from the `.fsc` block index or a
+JSONL file's index sidecar (sense/recindex.py) when there is one, so
+a day-long recording reports without being read.
 
 By default rows are broken out per-(device, sensor) with a per-device
 subtotal line — for 2+ device sessions this is how you tell whether the
@@ -17,18 +20,24 @@ Usage:
     python3 tools/check_rates.py --aggregate recordings/session-XXX.jsonl
 """
 import argparse
-import json
 import sys
 from collections import defaultdict
 from pathlib import Path
 
+# tools/ isn't a package: put the repo root on the path for
+# sense.columnar (stdlib only; numpy for .fsc files).
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sense.columnar import ColumnarReader, is_columnar, iter_records  # noqa: E402
+from sense.recindex import load_index  # noqa: E402
+from sense.segments import is_compressed, segment_paths  # noqa: E402
+
 
 def main():
     ap = argparse.ArgumentParser(
         description=__doc__,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
-    ap.add_argument("path", help="JSONL recording to inspect.")
+    ap.add_argument("path", help="Recording to inspect (JSONL, .fsc or a segment manifest).")
     ap.add_argument(
         "--aggregate", action="store_true",
         help="Aggregate across devices (sensor-only rows). Default is per-device.",
@@ -39,24 +48,35 @@ def main():
     counts: dict = defaultdict(int)
     first_t: dict = {}
     last_t: dict = {}
-    with Path(args.path).open("r", encoding="utf-8") as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            rec = json.loads(line)
+
+    def add_stream(device, sensor, n, t_first, t_last):
+        key = (sensor,) if args.aggregate else (device, sensor)
+        counts[key] += n
+        if t_first is not None and (key not in first_t or t_first < first_t[key]):
+            first_t[key] = t_first
+        if t_last is not None and (key not in last_t or t_last > last_t[key]):
+            last_t[key] = t_last
+
+    for segment in segment_paths(args.path):
+        if is_columnar(segment):
+            # Counts and first/last times come straight from the block index.
+            with ColumnarReader(segment) as reader:
+                for stream in reader.streams:
+                    add_stream(stream.device, stream.sensor, len(stream),
+                               stream.t_first, stream.t_last)
+            continue
+        index = load_index(segment)
+        if index is not None and (is_compressed(segment)
+                                  or index.size == segment.stat().st_size):
+            # ... or from the sidecar, when it covers the whole file.
+            for device, sensor, n, _, t_first, _, t_last in index.streams:
+                add_stream(device, sensor, n, t_first, t_last)
+            continue
+        for rec in iter_records(segment):
             if "device" not in rec or "sensor" not in rec:
                 continue
-            sensor = rec["sensor"]
-            device = rec["device"]
-            key = (sensor,) if args.aggregate else (device, sensor)
-            counts[key] += 1
             t = rec.get("t_recv")
-            if t is None:
-                continue
-            if key not in first_t:
-                first_t[key] = t
-            last_t[key] = t
+            add_stream(rec["device"], rec["sensor"], 1, t, t)
 
     if not counts:
         print("no frame records found in recording", file=sys.stderr)
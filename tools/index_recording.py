@@ -0,0 +1,77 @@
+"""
+Build index sidecars for existing JSONL recordings.
+
+`run_fs.py --record` writes `<recording>.idx.json` next to each JSONL
+file as it goes (sense/recindex.py). Recordings made before that, by
+`tools/osc_tcp_record.py`, or whose sidecar was lost, are indexed here
+with one scan each; afterwards `replay(..., t_start=, t_end=)`,
+`GestureLibrary.from_files`, `tools/analyze_gestures.py` and
+`tools/check_rates.py` seek instead of reading the whole file.
+
+A segment manifest indexes each of its segments (compressed ones
+included — offsets are into the uncompressed text). `.fsc` files carry
+their own index and are skipped, as are files whose sidecar is current
+unless `--force`.
+
+Usage:
+    python3 tools/index_recording.py recordings/gesture-*.jsonl
+    python3 tools/index_recording.py --force recordings/session-XXX.manifest.json
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# tools/ isn't a package: put the repo root on the path for
+# sense.recindex (stdlib only).
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sense.columnar import is_columnar  # noqa: E402
+from sense.recindex import DEFAULT_BUCKET_S, build_index, load_index  # noqa: E402
+from sense.segments import is_compressed, segment_paths  # noqa: E402
+
+
+def _current(path: Path) -> bool:
+    index = load_index(path)
+    if index is None:
+        return False
+    return is_compressed(path) or index.size == path.stat().st_size
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument("paths", nargs="+", help="JSONL recordings or segment manifests.")
+    ap.add_argument(
+        "--bucket-s", type=float, default=DEFAULT_BUCKET_S,
+        help=f"Time-bucket width of the index (default {DEFAULT_BUCKET_S:g} s).",
+    )
+    ap.add_argument("--force", action="store_true", help="Re-index files with a current sidecar.")
+    args = ap.parse_args()
+
+    failed = 0
+    for arg in args.paths:
+        for path in segment_paths(arg):
+            if is_columnar(path):
+                print(f"{path}: .fsc — has its own index, skipped")
+                continue
+            if not args.force and _current(path):
+                print(f"{path}: index current, skipped")
+                continue
+            t0 = time.perf_counter()
+            try:
+                builder = build_index(path, bucket_s=args.bucket_s)
+                out = builder.save(path)
+            except (OSError, ValueError) as e:
+                print(f"{path}: failed: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            print(f"{path}: {builder.frames} frames, {len(builder.markers)} gesture markers, "
+                  f"{len(builder.buckets)} buckets → {out.name} "
+                  f"({time.perf_counter() - t0:.2f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
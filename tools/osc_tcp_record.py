@@ -0,0 +1,149 @@
+"""
+Lossless remote recorder for the Pi's OSC-over-TCP stream.
+
+Connects to a `run_fs.py --osc-tcp PORT` instance, reads the
+SLIP-framed OSC stream (OSC 1.1) and writes a JSONL recording in the
+same shape as `run_fs.py --record` — `_meta`, `_session` markers, one
+`{"device", "sensor", "t_recv", "values"}` line per frame — so
+`tools/check_rates.py`, `tools/analyze_position.py` and
+`sense.recorder.replay` read it unchanged. Nothing touches the Pi's SD
+card, and TCP means no frames are lost to Wi-Fi congestion.
+
+Timestamps: the Pi sends each input tick as an OSC bundle, and its
+frames get the bundle's timetag — the Pi's wall-clock time of the
+sample. Plain messages (older Pis) carry no time, so they get this
+machine's wall-clock receive time.
+`/<MAC>/packed` messages (`--osc-pd-compat`) are split back into
+frames. Control-plane traffic (`/state/...`, `/error/...`) and
+`__advertise__` messages are skipped.
+
+The Pi disconnects a recorder that falls too far behind
+(`--osc-tcp-buffer-kb`); the recording then ends with an `_session`
+end marker and this tool exits non-zero.
+
+Needs only python-osc, so it runs on a laptop without the rest of the
+stack.
+
+Usage:
+    python3 tools/osc_tcp_record.py 192.168.4.100:8002 recordings/remote.jsonl
+    python3 tools/osc_tcp_record.py pi.local:8002 out.jsonl --duration 60
+"""
+import argparse
+import json
+import socket
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pythonosc.osc_packet import OscPacket, ParseError
+
+SLIP_END = b"\xc0"
+_ESC_END = b"\xdb\xdc"
+_ESC_ESC = b"\xdb\xdd"
+
+
+def deframe(partial: bytes, chunk: bytes):
+    """SLIP-deframe `chunk` after the carried-over `partial` frame.
+    Returns (complete packets, new partial)."""
+    frames = (partial + chunk).split(SLIP_END)
+    partial = frames.pop()
+    packets = [f.replace(_ESC_END, SLIP_END).replace(_ESC_ESC, b"\xdb")
+               for f in frames if f]
+    return packets, partial
+
+
+def frames_of(packet: bytes, now: float):
+    """(device, sensor, t, values) for each data frame in one packet."""
+    bundled = packet.startswith(b"#bundle")
+    for timed in OscPacket(packet).messages:
+        msg = timed.message
+        parts = msg.address.split("/")
+        if len(parts) != 3 or ":" not in parts[1] or parts[2] == "__advertise__":
+            continue
+        device, sensor = parts[1], parts[2]
+        t = timed.time if bundled else now
+        args = list(msg.params)
+        if sensor != "packed":
+            yield device, sensor, t, args
+            continue
+        # /<MAC>/packed  <sensor> <v...> <sensor> <v...> ...
+        name, values = None, []
+        for a in args:
+            if isinstance(a, str):
+                if name is not None:
+                    yield device, name, t, values
+                name, values = a, []
+            else:
+                values.append(a)
+        if name is not None:
+            yield device, name, t, values
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument("source", help="HOST:PORT of run_fs.py --osc-tcp.")
+    ap.add_argument("path", help="JSONL file to write.")
+    ap.add_argument("--duration", type=float, default=None, metavar="S",
+                    help="Stop after S seconds (default: until Ctrl-C or disconnect).")
+    args = ap.parse_args()
+
+    host, _, port = args.source.rpartition(":")
+    sock = socket.create_connection((host, int(port)), timeout=10.0)
+    sock.settimeout(1.0 if args.duration else None)
+    out = Path(args.path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    bad = 0
+    rc = 0
+    deadline = time.monotonic() + args.duration if args.duration else None
+    with out.open("w", encoding="utf-8") as fh:
+        meta = {
+            "version": 1,
+            "source": f"osc-tcp://{args.source}",
+            "wall_start_iso": datetime.now(timezone.utc).isoformat(),
+            "wall_start_epoch": time.time(),
+            "clock": "wall",
+        }
+        fh.write(json.dumps({"_meta": meta}, separators=(",", ":")) + "\n")
+        fh.write(json.dumps({"_session": "start", "t": time.time()},
+                            separators=(",", ":")) + "\n")
+        print(f"recording {args.source} → {out}", file=sys.stderr)
+        try:
+            partial = b""
+            while deadline is None or time.monotonic() < deadline:
+                try:
+                    chunk = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    print("stream closed by the Pi (too slow, or run_fs.py exited)",
+                          file=sys.stderr)
+                    rc = 1
+                    break
+                packets, partial = deframe(partial, chunk)
+                now = time.time()
+                for packet in packets:
+                    try:
+                        for device, sensor, t, values in frames_of(packet, now):
+                            fh.write(json.dumps({"device": device, "sensor": sensor,
+                                                 "t_recv": t, "values": values},
+                                                separators=(",", ":")) + "\n")
+                            count += 1
+                    except ParseError:
+                        bad += 1
+        except KeyboardInterrupt:
+            pass
+        finally:
+            fh.write(json.dumps({"_session": "end", "t": time.time()},
+                                separators=(",", ":")) + "\n")
+            sock.close()
+    print(f"{count} frames written ({bad} unparseable packets)", file=sys.stderr)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())